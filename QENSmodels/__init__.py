@@ -5,23 +5,61 @@
 __version__ = "0.1.5"
 
 from .lorentzian import lorentzian
+from .assemble import assemble, assemble_iqt, get_num_threads, \
+    set_num_threads
 from .brownian_translational_diffusion import hwhmBrownianTranslationalDiffusion
 from .brownian_translational_diffusion import sqwBrownianTranslationalDiffusion
+from .brownian_translational_diffusion import iqtBrownianTranslationalDiffusion
+from .brownian_translational_diffusion import componentsBrownianTranslationalDiffusion
 from .delta import delta
 from .delta_lorentz import sqwDeltaLorentz
+from .delta_lorentz import iqtDeltaLorentz
+from .delta_lorentz import componentsDeltaLorentz
 from .gaussian import gaussian
 from .gaussian_model_3d import hwhmGaussianModel3D
 from .gaussian_model_3d import sqwGaussianModel3D
+from .gaussian_model_3d import iqtGaussianModel3D
+from .gaussian_model_3d import componentsGaussianModel3D
 from .delta_two_lorentz import sqwDeltaTwoLorentz
+from .delta_two_lorentz import iqtDeltaTwoLorentz
+from .delta_two_lorentz import componentsDeltaTwoLorentz
 from .isotropic_rotational_diffusion import sqwIsotropicRotationalDiffusion
+from .isotropic_rotational_diffusion import iqtIsotropicRotationalDiffusion
 from .isotropic_rotational_diffusion import hwhmIsotropicRotationalDiffusion
+from .isotropic_rotational_diffusion import componentsIsotropicRotationalDiffusion
 from .jump_sites_log_norm_dist import hwhmJumpSitesLogNormDist
 from .jump_sites_log_norm_dist import sqwJumpSitesLogNormDist
+from .jump_sites_log_norm_dist import iqtJumpSitesLogNormDist
+from .jump_sites_log_norm_dist import componentsJumpSitesLogNormDist
 from .jump_translational_diffusion import hwhmJumpTranslationalDiffusion
 from .jump_translational_diffusion import sqwJumpTranslationalDiffusion
+from .jump_translational_diffusion import iqtJumpTranslationalDiffusion
+from .jump_translational_diffusion import componentsJumpTranslationalDiffusion
 from .water_teixeira import sqwWaterTeixeira
+from .water_teixeira import iqtWaterTeixeira
+from .water_teixeira import componentsWaterTeixeira
 from .background_polynomials import background_polynomials
+from .background_polynomials import background_polynomials_jacobian
 from .chudley_elliott_diffusion import hwhmChudleyElliottDiffusion
 from .chudley_elliott_diffusion import sqwChudleyElliottDiffusion
+from .chudley_elliott_diffusion import iqtChudleyElliottDiffusion
+from .chudley_elliott_diffusion import componentsChudleyElliottDiffusion
 from .equivalent_sites_circle import hwhmEquivalentSitesCircle
 from .equivalent_sites_circle import sqwEquivalentSitesCircle
+from .equivalent_sites_circle import iqtEquivalentSitesCircle
+from .equivalent_sites_circle import componentsEquivalentSitesCircle
+from .corrections import apply_corrections
+from .corrections import correction_factor
+from .corrections import debye_waller_factor
+from .corrections import detailed_balance_factor
+from .fourier import fourier_transform
+from .resolution import Resolution
+from .composite import Background, Delta, Lorentzian
+from . import fast
+from .models import ParameterVector, get_model
+from .fitting import Dataset, fit_hwhm, fit_iqt, fit_model, \
+    fit_multiresolution, fit_per_q, fit_scan, fit_two_stage
+from .estimators import estimate_components, initial_guess, spectral_moments
+from .uncertainty import bootstrap, evaluate_batch, posterior_predictive
+from .interactive import AsyncEvaluator
+from .selection import compare_models
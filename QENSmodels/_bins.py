@@ -0,0 +1,17 @@
+"""
+Helpers shared by the functions integrated over the bins of a histogram,
+whose energy axis is given by the edges of the bins.
+"""
+import numpy as np
+
+
+def bin_widths(edges: np.ndarray) -> np.ndarray:
+    """ Widths of the bins delimited by `edges`, which should contain at
+    least two values in strictly increasing order """
+    if edges.ndim != 1 or edges.size < 2:
+        raise ValueError('the bin edges should be a 1D array of at least '
+                         'two values')
+    widths = np.diff(edges)
+    if not np.all(widths > 0):
+        raise ValueError('the bin edges should be strictly increasing')
+    return widths
@@ -0,0 +1,58 @@
+"""
+Small helpers shared by the modules which cache quantities depending only
+on a (fixed) energy grid, such as FFTs of the resolution function.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Tuple
+
+import numpy as np
+
+
+def array_key(x: np.ndarray) -> Tuple:
+    """ Hashable key identifying the content of a numpy array
+
+    Two arrays with the same shape, dtype and values have the same key, so
+    that quantities computed once for a grid can be reused when the
+    optimizer passes a new (but identical) array at each iteration.
+    """
+    x = np.ascontiguousarray(x)
+    return x.shape, x.dtype.str, hash(x.tobytes())
+
+
+class LRUCache:
+    """ Least-recently-used mapping with a fixed maximum number of entries
+
+    The caches are shared by the fits run in parallel threads, so that the
+    accesses are serialized by a lock.
+    """
+
+    def __init__(self, maxsize: int = 32):
+        self.maxsize = maxsize
+        self._data: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,6 @@
+"""
+Adapters of the models of the library to fitting packages.
+
+Each adapter is in its own module, which imports the corresponding package
+only when it is used, so that none of them is a dependency of the library.
+"""
@@ -0,0 +1,242 @@
+"""
+Bumps fitness evaluating a model of the library for all q at once
+
+With one `bumps.curve.Curve` per q, the model is computed, and its widths
+and amplitudes are built, once per q and per step of the fit.
+:class:`MultiQFitness` fits the whole (q, w) dataset: the model is computed
+for all q in one vectorized call, convolved with the resolution in one
+batched FFT, and the residuals of all q are concatenated.
+
+Examples
+--------
+::
+
+    from bumps.names import FitProblem
+    from QENSmodels.adapters.bumps import MultiQFitness
+
+    resolution = QENSmodels.Resolution(w, resolution_data)
+    fitness = MultiQFitness('WaterTeixeira', w, q, data, error,
+                            resolution=resolution, scale=10., D=0.13,
+                            resTime=0.1, DR=0.3)
+    fitness.D.range(0.05, 0.25)
+    for item in fitness.scale:
+        item.range(1e-12, 1e2)
+    problem = FitProblem(fitness)
+"""
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Union
+
+from QENSmodels.models import ModelSpec, get_model
+from QENSmodels.resolution import Resolution
+
+
+class MultiQFitness:
+    r""" Bumps fitness of a model of the library over a 2D dataset
+
+    Parameters
+    ----------
+    model: str, callable or :class:`~QENSmodels.models.ModelSpec`
+        model of the library, see :func:`~QENSmodels.models.get_model`
+
+    w: list or :class:`~numpy:numpy.ndarray`
+        energy transfer, common to all q
+
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer
+
+    data: :class:`~numpy:numpy.ndarray`
+        measured intensities, of shape (q.size, w.size)
+
+    dy: :class:`~numpy:numpy.ndarray`
+        uncertainties of `data`, of the same shape. The points with an
+        uncertainty lower than or equal to zero are not fitted. Default to
+        one for all the points.
+
+    resolution: :class:`~QENSmodels.Resolution`
+        resolution function, with one spectrum or one spectrum per q. If
+        None (default), the model is not convolved.
+
+    per_q: iterable of str
+        names of the parameters with one value per q. The other parameters
+        are shared by all q. Default to `scale` and `center`.
+
+    name: str
+        name of the fitness, used as prefix of the names of the parameters.
+        Default to the name of the model.
+
+    temperature, msd, unit:
+        corrections of the model by the detailed balance and Debye-Waller
+        factors, applied before the convolution, see
+        :meth:`~QENSmodels.models.ModelSpec.evaluate`. Default to no
+        correction.
+
+    values:
+        initial values of the parameters: numbers, or lists of numbers for
+        the parameters in `per_q`. A bumps `Parameter` is used as is,
+        which ties the parameters of several fitnesses, for example to fit
+        the same diffusion coefficient to datasets measured with two
+        wavelengths.
+
+    Notes
+    -----
+    * The parameters are available as attributes, e.g. `fitness.D`, to set
+      their ranges. A parameter in `per_q` is a list of parameters.
+
+    * The parameters taking integer values, such as `Nsites`, are rounded
+      to the nearest integer and should be kept fixed.
+
+    * The model is evaluated in a single call when only `scale` and
+      `center` are given per q, and q by q otherwise.
+
+    """
+
+    def __init__(
+            self,
+            model: Union[str, ModelSpec],
+            w: Union[list, np.ndarray],
+            q: Union[float, list, np.ndarray],
+            data: np.ndarray,
+            dy: Optional[np.ndarray] = None,
+            resolution: Optional[Resolution] = None,
+            per_q: Iterable[str] = ('scale', 'center'),
+            name: Optional[str] = None,
+            temperature: Optional[float] = None,
+            msd: Optional[float] = None,
+            unit: str = 'meV',
+            **values
+    ):
+        try:
+            from bumps.parameter import Parameter
+        except ImportError:
+            raise ImportError('bumps is needed to use MultiQFitness')
+
+        self.model = get_model(model)
+        self.name = name or self.model.name
+        self.w = np.asarray(w, dtype=np.float64)
+        self.q = np.atleast_1d(np.asarray(q, dtype=np.float64))
+        shape = (self.q.size, self.w.size)
+        self.data = np.asarray(data, dtype=np.float64)
+        self.dy = np.ones(shape) if dy is None \
+            else np.asarray(dy, dtype=np.float64)
+        if self.data.shape != shape or self.dy.shape != shape:
+            raise ValueError('data and dy should be of shape (q.size, '
+                             'w.size)')
+        self.mask = self.dy > 0
+        self.resolution = resolution
+        self.corrections = dict(temperature=temperature, msd=msd, unit=unit)
+
+        self.per_q = tuple(per_q)
+        unknown = set(self.per_q).union(values) - set(self.model.param_names)
+        if unknown:
+            raise ValueError('unknown parameter(s): {}'.format(
+                ', '.join(sorted(unknown))))
+
+        self._parameters: Dict[str, Union[Parameter, List[Parameter]]] = {}
+        for item in self.model.param_names:
+            value = values.get(item, self.model.defaults[item])
+            label = '{} {}'.format(self.name, item)
+            if item in self.per_q:
+                if not isinstance(value, (list, tuple, np.ndarray)):
+                    value = [value] * self.q.size
+                if len(value) != self.q.size:
+                    raise ValueError('{} should have one value per '
+                                     'q'.format(item))
+                parameter = [
+                    element if isinstance(element, Parameter)
+                    else Parameter(float(element),
+                                   name='{}[{}]'.format(label, i))
+                    for i, element in enumerate(value)]
+            elif isinstance(value, Parameter):
+                parameter = value
+            else:
+                parameter = Parameter(float(value), name=label)
+            self._parameters[item] = parameter
+            setattr(self, item, parameter)
+
+        self._theory: Optional[np.ndarray] = None
+        self._saved_data: Optional[np.ndarray] = None
+
+    def parameters(self) -> Dict:
+        """ Parameters of the fitness, as needed by bumps """
+        return dict(self._parameters)
+
+    def values(self) -> Dict[str, Union[float, np.ndarray]]:
+        """ Current values of the parameters, with arrays for the
+        parameters in `per_q` """
+        values = {}
+        for item, parameter in self._parameters.items():
+            if item in self.per_q:
+                value = np.array([element.value for element in parameter])
+            else:
+                value = parameter.value
+            if item in self.model.integer:
+                value = np.rint(value).astype(int)
+            values[item] = value
+        return values
+
+    def update(self) -> None:
+        """ Forget the model computed with the previous parameters """
+        self._theory = None
+
+    def numpoints(self) -> int:
+        """ Number of fitted points """
+        return int(self.mask.sum())
+
+    def theory(self) -> np.ndarray:
+        """ Model for all q, convolved with the resolution, of shape
+        (q.size, w.size) """
+        if self._theory is None:
+            self._theory = self.model.evaluate(
+                self.w, self.q, resolution=self.resolution,
+                **self.corrections, **self.values())
+        return self._theory
+
+    def residuals(self) -> np.ndarray:
+        """ Normalized residuals of the fitted points of all q,
+        concatenated """
+        return ((self.theory() - self.data) / self.dy)[self.mask]
+
+    def nllf(self) -> float:
+        """ Negative log-likelihood, i.e. half the sum of the squared
+        residuals """
+        return 0.5 * np.sum(self.residuals() ** 2)
+
+    def resynth_data(self) -> None:
+        """ Replace the data by the model plus Gaussian noise of standard
+        deviation `dy`, for bootstrap estimates of the uncertainties """
+        if self._saved_data is None:
+            self._saved_data = self.data
+        noise = np.random.standard_normal(self.data.shape) * self.dy
+        self.data = np.where(self.mask, self.theory() + noise,
+                             self._saved_data)
+
+    def restore_data(self) -> None:
+        """ Restore the data replaced by :meth:`resynth_data` """
+        if self._saved_data is not None:
+            self.data = self._saved_data
+            self._saved_data = None
+
+    def save(self, basename: str) -> None:
+        """ Save `w` and the model for all q in `basename`.dat """
+        header = 'w ' + ' '.join('q={}'.format(item) for item in self.q)
+        np.savetxt(basename + '.dat',
+                   np.column_stack([self.w, self.theory().T]),
+                   header=header)
+
+    def plot(self, view: str = 'linear') -> None:
+        """ Plot the data and the model of each q, shifted vertically """
+        import matplotlib.pyplot as plt
+
+        theory = self.theory()
+        offset = 0.
+        for i, item in enumerate(self.q):
+            valid = self.mask[i]
+            plt.errorbar(self.w[valid], self.data[i, valid] + offset,
+                         yerr=self.dy[i, valid], fmt='.',
+                         color='C{}'.format(i % 10), label='q={}'.format(item))
+            plt.plot(self.w, theory[i] + offset, color='C{}'.format(i % 10))
+            if view != 'log':
+                offset += np.max(self.data[i, valid], initial=0.)
+        plt.yscale('log' if view == 'log' else 'linear')
+        plt.xlabel('w')
+        plt.title(self.name)
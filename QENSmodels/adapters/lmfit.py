@@ -0,0 +1,267 @@
+"""
+lmfit model of a model of the library over a whole (q, w) dataset
+
+Instead of one `lmfit.Model` per q, composed with a model convolving with
+the interpolated resolution at each call, :func:`make_model` creates a
+single model whose independent variable is the energy transfer `w` and
+whose output is the model for all q, flattened. The resolution, whose
+Fourier transform is cached per grid, is held by the model.
+
+Examples
+--------
+::
+
+    import QENSmodels
+    from QENSmodels.adapters.lmfit import make_model
+
+    resolution = QENSmodels.Resolution(w, resolution_data)
+    model = make_model(QENSmodels.sqwWaterTeixeira, q,
+                       resolution=resolution)
+    params = model.make_params(D=0.13, resTime=0.1, DR=0.3)
+    result = model.fit(data.ravel(), params, w=w,
+                       weights=1 / error.ravel())
+"""
+import inspect
+import numpy as np
+from typing import Callable, Iterable, Optional, Union
+
+from QENSmodels.models import ModelSpec, get_model
+from QENSmodels.resolution import Resolution
+
+try:
+    import lmfit
+except ImportError:
+    raise ImportError('lmfit is needed to use QENSmodels.adapters.lmfit')
+
+
+class MultiQModel(lmfit.Model):
+    """ lmfit model of a model of the library for all q at once
+
+    Parameters
+    ----------
+    model: str, callable or :class:`~QENSmodels.models.ModelSpec`
+        model of the library, see :func:`~QENSmodels.models.get_model`
+
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer
+
+    resolution: :class:`~QENSmodels.Resolution`
+        resolution function, with one spectrum or one spectrum per q. If
+        None (default), the model is not convolved.
+
+    per_q: iterable of str
+        names of the parameters with one value per q. They are named
+        `<name>_<index of q>`, e.g. `scale_0`, `scale_1`, ... The other
+        parameters are shared by all q. Default to `scale` and `center`.
+
+    temperature, msd, unit:
+        corrections of the model by the detailed balance and Debye-Waller
+        factors, applied before the convolution, see
+        :meth:`~QENSmodels.models.ModelSpec.evaluate`. Default to no
+        correction.
+
+    kwargs:
+        other arguments of `lmfit.Model`, e.g. `prefix`, and values of the
+        parameters taking integer values, such as `Nsites`, which are not
+        fitted
+
+    Notes
+    -----
+    * The data to fit are of shape (q.size, w.size), flattened.
+
+    * :meth:`fit` uses the analytic derivatives of the model (see
+      :meth:`eval_jacobian`) with the default `leastsq` method, unless
+      some parameters are constrained by expressions.
+
+    """
+
+    def __init__(
+            self,
+            model: Union[str, Callable, ModelSpec],
+            q: Union[float, list, np.ndarray],
+            resolution: Optional[Resolution] = None,
+            per_q: Iterable[str] = ('scale', 'center'),
+            temperature: Optional[float] = None,
+            msd: Optional[float] = None,
+            unit: str = 'meV',
+            **kwargs
+    ):
+        self.spec = get_model(model)
+        self.q = np.atleast_1d(np.asarray(q, dtype=np.float64))
+        self.resolution = resolution
+        self.corrections = dict(temperature=temperature, msd=msd, unit=unit)
+        self.per_q = tuple(per_q)
+        invalid = set(self.per_q) - set(self.spec.param_names) \
+            | set(self.per_q) & set(self.spec.integer)
+        if invalid:
+            raise ValueError('unknown or integer parameter(s) in per_q: '
+                             '{}'.format(', '.join(sorted(invalid))))
+
+        # (name of the parameter of the model, index of q or None)
+        self._columns = []
+        for item in self.spec.param_names:
+            if item in self.spec.integer:
+                continue
+            if item in self.per_q:
+                self._columns += [(item, i) for i in range(self.q.size)]
+            else:
+                self._columns.append((item, None))
+        names = [_column_name(*column) for column in self._columns]
+
+        signature = [inspect.Parameter(
+            'w', inspect.Parameter.POSITIONAL_OR_KEYWORD)]
+        for name, (item, _) in zip(names, self._columns):
+            signature.append(inspect.Parameter(
+                name, inspect.Parameter.POSITIONAL_OR_KEYWORD,
+                default=float(self.spec.defaults[item])))
+        for item in self.spec.integer:
+            signature.append(inspect.Parameter(
+                item, inspect.Parameter.POSITIONAL_OR_KEYWORD,
+                default=None))
+
+        def function(w, **params):
+            return self._evaluate(w, params)
+
+        function.__name__ = self.spec.sqw.__name__
+        function.__signature__ = inspect.Signature(signature)
+        super().__init__(function, independent_vars=['w'], param_names=names,
+                         **kwargs)
+        for name, (item, _) in zip(names, self._columns):
+            self.set_param_hint(name, value=self.spec.defaults[item])
+
+    def _values(self, params: dict) -> dict:
+        """ Values of the parameters of the model, with arrays for the
+        parameters given per q """
+        values = {}
+        for item in self.spec.param_names:
+            if item in self.spec.integer:
+                value = params.get(item)
+                if value is not None:
+                    values[item] = int(value)
+            elif item in self.per_q:
+                values[item] = np.array([params[_column_name(item, i)]
+                                         for i in range(self.q.size)])
+            else:
+                values[item] = params[item]
+        return values
+
+    def _evaluate(self, w: np.ndarray, params: dict) -> np.ndarray:
+        """ Model for all q, flattened """
+        w = np.asarray(w, dtype=np.float64)
+        return self.spec.evaluate(w, self.q, resolution=self.resolution,
+                                  **self.corrections,
+                                  **self._values(params)).ravel()
+
+    def eval_jacobian(
+            self,
+            params: Optional[lmfit.Parameters] = None,
+            **kwargs
+    ) -> np.ndarray:
+        """ Derivatives of the model with respect to its parameters
+
+        Parameters
+        ----------
+        params: `lmfit.Parameters`
+            values of the parameters. Default to the values given by
+            `make_params`.
+
+        kwargs:
+            values of the independent variable `w` and of some parameters,
+            as for `eval`
+
+        Return
+        -------
+        :class:`~numpy:numpy.ndarray`
+            array of shape (q.size * w.size, number of parameters), in the
+            order of `param_names`
+
+        """
+        if params is None:
+            params = self.make_params()
+        params = self.make_funcargs(params, kwargs)
+        w = np.asarray(params.pop('w'), dtype=np.float64)
+        values = self._values(params)
+        derivatives = self.spec.jacobian(w, self.q,
+                                         resolution=self.resolution,
+                                         **self.corrections, **values)
+
+        jacobian = np.zeros((self.q.size, w.size, len(self._columns)))
+        for k, (item, index) in enumerate(self._columns):
+            row = derivatives[self.spec.param_names.index(item)]
+            if index is None:
+                jacobian[..., k] = row
+            else:
+                jacobian[index, :, k] = row[index]
+        return jacobian.reshape(-1, len(self._columns))
+
+    def _residual_jacobian(
+            self,
+            params: lmfit.Parameters,
+            data: np.ndarray,
+            weights: Optional[np.ndarray],
+            **kwargs
+    ) -> np.ndarray:
+        """ Derivatives of the residual of :meth:`fit` with respect to the
+        varying parameters, as expected by `Dfun` of `leastsq` """
+        jacobian = self.eval_jacobian(params, **kwargs)
+        names = [name for name, parameter in params.items()
+                 if parameter.vary and parameter.expr is None]
+        jacobian = jacobian[:, [self.param_names.index(name)
+                                for name in names]]
+        if weights is not None:
+            jacobian = jacobian * np.ravel(weights)[:, np.newaxis]
+        return jacobian
+
+    def fit(self, data, params=None, weights=None, method='leastsq',
+            fit_kws=None, **kwargs):
+        """ Fit the model to the flattened `data`, see `lmfit.Model.fit`.
+        With the `leastsq` method, the analytic derivatives are used. """
+        fit_kws = dict(fit_kws or {})
+        if method == 'leastsq' and 'Dfun' not in fit_kws \
+                and not self._has_expressions(params, kwargs):
+            fit_kws.update(Dfun=self._residual_jacobian, col_deriv=0)
+        return super().fit(data, params=params, weights=weights,
+                           method=method, fit_kws=fit_kws, **kwargs)
+
+    def _has_expressions(
+            self,
+            params: Optional[lmfit.Parameters],
+            kwargs: dict
+    ) -> bool:
+        """ Whether some parameters are constrained by expressions, which
+        the analytic derivatives do not account for """
+        if params is None:
+            params = self.make_params()
+        return any(parameter.expr is not None
+                   for parameter in params.values()) \
+            or any(isinstance(value, lmfit.Parameter) and value.expr
+                   for value in kwargs.values())
+
+
+def _column_name(item: str, index: Optional[int]) -> str:
+    """ Name of the lmfit parameter of `item` for the q of index `index` """
+    return item if index is None else '{}_{}'.format(item, index)
+
+
+def make_model(
+        sqw_fn: Union[str, Callable, ModelSpec],
+        q: Union[float, list, np.ndarray],
+        resolution: Optional[Resolution] = None,
+        per_q: Iterable[str] = ('scale', 'center'),
+        **kwargs
+) -> MultiQModel:
+    """ lmfit model of `sqw_fn` for all `q` at once, see
+    :class:`MultiQModel`, whose other arguments, such as the corrections
+    `temperature` and `msd`, are given by `kwargs`
+
+    Examples
+    --------
+    >>> import QENSmodels
+    >>> model = make_model(QENSmodels.sqwBrownianTranslationalDiffusion,
+    ...                    [0.5, 1.])
+    >>> model.param_names
+    ['scale_0', 'scale_1', 'center_0', 'center_1', 'D']
+
+    """
+    return MultiQModel(sqw_fn, q, resolution=resolution, per_q=per_q,
+                       **kwargs)
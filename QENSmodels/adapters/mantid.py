@@ -0,0 +1,290 @@
+"""
+Mantid fit functions for the models of the library
+
+The classes are generated from the registry of :mod:`QENSmodels.models`.
+They provide the analytic derivatives of the models, so that Mantid does
+not need ``NumDeriv=true``. In a multi-domain fit, the domains of a model
+sharing the same parameters, other than `scale` and `center`, are evaluated
+in a single vectorized call.
+
+Examples
+--------
+In MantidWorkbench::
+
+    from QENSmodels.adapters.mantid import subscribe_all
+    subscribe_all()
+
+    function = ('name=sqwBrownianTranslationalDiffusion,'
+                'scale=7.,center=0.,D=2.,Q=0.2')
+"""
+import numpy as np
+from typing import Dict, Hashable, List, Optional, Tuple, Union
+
+from QENSmodels._cache import LRUCache, array_key
+from QENSmodels.models import MODELS, ModelSpec, get_model
+
+
+class DomainPool:
+    """ Shared evaluation of a model for the domains of a multi-domain fit
+
+    Mantid evaluates a multi-domain function domain by domain. Each domain
+    registers its q on its grid when it is evaluated. When a domain is
+    evaluated with shared parameters or a grid not seen yet, the model (and
+    its derivatives, if requested) is computed at once for all the q
+    registered on the grid with the previous parameters, each with the last
+    `scale` and `center` of its domain, and the other domains reuse the
+    result as long as the parameters do not change.
+
+    Parameters
+    ----------
+    model: str, callable or :class:`~QENSmodels.models.ModelSpec`
+        model of the library, see :func:`~QENSmodels.models.get_model`
+
+    maxsize: int
+        number of grids for which the last results are kept. Default to 8.
+
+    Notes
+    -----
+    `scale` and `center` usually differ from one domain to the other, while
+    the parameters of the model are tied. The results are therefore
+    grouped by values of the parameters other than `scale` and `center`. A
+    domain whose `scale` or `center` changed since the group was computed
+    is evaluated alone, so that a step of the fit computes at most twice the
+    number of domains rows of the model.
+
+    The q registered on a grid are those evaluated with the last
+    parameters. A domain whose q is not among them, when evaluated with new
+    parameters, starts a new fit: the q of the previous fits are then
+    forgotten, so that the pool, shared by all the fits of a model, only
+    computes the domains of the current fit.
+
+    """
+
+    def __init__(self, model: Union[str, ModelSpec], maxsize: int = 8):
+        self.model = get_model(model)
+        # q registered per grid
+        self.q: Dict[Hashable, List[float]] = {}
+        self._local: Dict[Tuple[Hashable, float],
+                          Tuple[float, float]] = {}
+        self._batches = LRUCache(maxsize)
+
+    def clear(self) -> None:
+        """ Forget the registered q and the stored results """
+        self.q.clear()
+        self._local.clear()
+        self._batches.clear()
+
+    def evaluate(
+            self,
+            x: np.ndarray,
+            q: float,
+            params: Dict[str, float]
+    ) -> np.ndarray:
+        """ Model for one domain, of shape (x.size,) """
+        return self._row(x, q, params, 'values')
+
+    def jacobian(
+            self,
+            x: np.ndarray,
+            q: float,
+            params: Dict[str, float]
+    ) -> np.ndarray:
+        """ Derivatives of the model for one domain, of shape (number of
+        parameters, x.size), see :meth:`ModelSpec.jacobian` """
+        return self._row(x, q, params, 'jacobian')
+
+    def _row(
+            self,
+            x: np.ndarray,
+            q: float,
+            params: Dict[str, float],
+            kind: str
+    ) -> np.ndarray:
+        """ Model (`kind` is `values`) or derivatives (`jacobian`) of the
+        domain of `q`, from the results of all the q registered for the grid
+        `x` and the parameters shared by the domains """
+        x = np.asarray(x, dtype=np.float64)
+        q = float(q)
+        grid = array_key(x)
+        params = dict(params)
+        local = (float(params.pop('scale', self.model.defaults['scale'])),
+                 float(params.pop('center', self.model.defaults['center'])))
+        self._local[grid, q] = local
+
+        key: Tuple[Hashable, ...] = (grid, tuple(sorted(params.items())))
+        batch = self._batches.get(key)
+        if batch is None:
+            registered = self.q.get(grid, [])
+            # a q evaluated with the previous parameters is a new step of
+            # the same fit, any other q the first domain of a new fit
+            domains = list(registered) if q in registered else [q]
+            batch = {'q': domains,
+                     'index': {item: i for i, item in enumerate(domains)},
+                     'evaluated': [],
+                     'values': None, 'jacobian': None,
+                     'local': {'values': None, 'jacobian': None}}
+            self._batches.put(key, batch)
+        elif q not in batch['index']:
+            # domain registered after the results were computed: its row is
+            # added, and computed below
+            batch['index'][q] = len(batch['q'])
+            batch['q'].append(q)
+            for name in ('values', 'jacobian'):
+                if batch[name] is not None:
+                    batch[name] = np.concatenate(
+                        [batch[name], np.zeros_like(batch[name][..., :1, :])],
+                        axis=-2)
+                    batch['local'][name].append(None)
+        if q not in batch['evaluated']:
+            batch['evaluated'].append(q)
+        self.q[grid] = batch['evaluated']
+        i = batch['index'][q]
+        if batch[kind] is None:
+            self._compute(batch, kind, x, slice(None),
+                          [self._local[grid, item] for item in batch['q']],
+                          params)
+        elif batch['local'][kind][i] != local:
+            # the other domains keep the rows computed with their values
+            self._compute(batch, kind, x, slice(i, i + 1), [local], params)
+        return batch[kind][..., i, :]
+
+    def _compute(
+            self,
+            batch: Dict,
+            kind: str,
+            x: np.ndarray,
+            rows: slice,
+            local: List[Tuple[float, float]],
+            params: Dict[str, float]
+    ) -> None:
+        """ Compute the `rows` of `kind` in `batch`, with the (scale,
+        center) `local` of their domains """
+        q = batch['q'][rows]
+        scale, center = np.array(local, dtype=np.float64).T
+        results = {}
+        if kind == 'jacobian':
+            results['jacobian'] = self.model.jacobian(
+                x, q, scale=scale, center=center, **params)
+            # the model is proportional to `scale`
+            results['values'] = scale[:, np.newaxis] * \
+                results['jacobian'][0]
+        else:
+            results['values'] = self.model.evaluate(
+                x, q, scale=scale, center=center, **params)
+        for name, result in results.items():
+            if batch[name] is None:
+                if rows != slice(None):
+                    continue
+                batch[name] = result
+                batch['local'][name] = list(local)
+            else:
+                batch[name][..., rows, :] = result
+                batch['local'][name][rows] = local
+
+
+def make_function_class(
+        model: Union[str, ModelSpec],
+        multi_domain: bool = True,
+        name: Optional[str] = None
+) -> type:
+    """ Mantid `IFunction1D` class of a model of the library
+
+    Parameters
+    ----------
+    model: str, callable or :class:`~QENSmodels.models.ModelSpec`
+        model of the library, see :func:`~QENSmodels.models.get_model`
+
+    multi_domain: bool
+        if True (default), the instances of the class share a
+        :class:`DomainPool`, available as the `pool` attribute of the class,
+        so that the domains of a multi-domain fit are evaluated together
+
+    name: str
+        name of the class, which is the name of the function in Mantid.
+        Default to the name of the `sqw` function of the model.
+
+    Return
+    ------
+    type
+        subclass of `mantid.api.IFunction1D`, with the parameters `scale`,
+        `center` and those of the model, and the attribute `Q`. The
+        parameters taking integer values, such as `Nsites`, are attributes.
+
+    """
+    try:
+        from mantid.api import IFunction1D
+    except ImportError:
+        raise ImportError('mantid is needed to create Mantid fit functions')
+
+    spec = get_model(model)
+    fitted = [item for item in spec.param_names if item not in spec.integer]
+    columns = [spec.param_names.index(item) for item in fitted]
+    pool = DomainPool(spec) if multi_domain else None
+
+    def init(self):
+        for item in fitted:
+            self.declareParameter(item, float(spec.defaults[item]))
+        self.declareAttribute('Q', 1.)
+        for item in spec.integer:
+            self.declareAttribute(item, int(spec.defaults[item]))
+
+    def category(self):
+        return 'QuasiElastic'
+
+    def arguments(self):
+        params = {item: self.getParameterValue(item) for item in fitted}
+        for item in spec.integer:
+            params[item] = self.getAttributeValue(item)
+        return self.getAttributeValue('Q'), params
+
+    def function1D(self, xvals):
+        q, params = self.arguments()
+        if self.pool is None:
+            return spec.evaluate(xvals, q, **params)[0]
+        return self.pool.evaluate(xvals, q, params)
+
+    def functionDeriv1D(self, xvals, jacobian):
+        q, params = self.arguments()
+        if self.pool is None:
+            derivatives = spec.jacobian(xvals, q, **params)[:, 0]
+        else:
+            derivatives = self.pool.jacobian(xvals, q, params)
+        for j, column in enumerate(derivatives[columns]):
+            for i, value in enumerate(column):
+                jacobian.set(i, j, value)
+
+    name = name or spec.sqw.__name__
+    return type(name, (IFunction1D,), {
+        '__doc__': 'Mantid fit function of {}'.format(spec.sqw.__name__),
+        'pool': pool,
+        'init': init,
+        'category': category,
+        'arguments': arguments,
+        'function1D': function1D,
+        'functionDeriv1D': functionDeriv1D,
+    })
+
+
+def make_function_classes(multi_domain: bool = True) -> Dict[str, type]:
+    """ Mantid `IFunction1D` classes of all the models of the library,
+    see :func:`make_function_class`, indexed by their names """
+    classes = [make_function_class(spec, multi_domain)
+               for spec in MODELS.values()]
+    return {item.__name__: item for item in classes}
+
+
+def subscribe_all(multi_domain: bool = True) -> Dict[str, type]:
+    """ Create the Mantid fit functions of all the models of the library
+    and add them to the `FunctionFactory` of Mantid
+
+    Return
+    ------
+    dict
+        classes of the fit functions, indexed by their names
+    """
+    from mantid.api import FunctionFactory
+
+    classes = make_function_classes(multi_domain)
+    for item in classes.values():
+        FunctionFactory.subscribe(item)
+    return classes
@@ -0,0 +1,545 @@
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple, Union
+
+from QENSmodels._bins import bin_widths
+from QENSmodels._cache import LRUCache, array_key
+
+try:
+    import QENSmodels
+except ImportError:
+    print('Module QENSmodels not found')
+
+# weights of the trapezoidal rule and spacing of the energy grids, which do
+# not change during a fit
+_grid_cache = LRUCache(16)
+
+# number of threads used by default by assemble, see set_num_threads, and
+# persistent pools of threads, one per number of threads
+_num_threads = 1
+_executors: Dict[int, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+# number of points of a model below which it is computed in a single thread,
+# the cost of dispatching the blocks dominating
+_PARALLEL_SIZE = 2 ** 15
+
+
+def set_num_threads(n: int) -> int:
+    """ Set the number of threads used by default by :func:`assemble`, and
+    thus by all the `sqw` functions of the library
+
+    Parameters
+    ----------
+    n: int
+        number of threads. 1, the default at import, computes the models in
+        the calling thread.
+
+    Return
+    ------
+    int
+        previous number of threads
+
+    Examples
+    --------
+    >>> previous = set_num_threads(4)
+    >>> set_num_threads(previous)
+    4
+    """
+    global _num_threads
+    if int(n) < 1:
+        raise ValueError('the number of threads should be at least 1')
+    previous, _num_threads = _num_threads, int(n)
+    return previous
+
+
+def get_num_threads() -> int:
+    """ Number of threads used by default by :func:`assemble`, see
+    :func:`set_num_threads` """
+    return _num_threads
+
+
+def assemble(
+        w: Union[float, list, np.ndarray],
+        hwhm: Union[list, np.ndarray],
+        eisf: Union[float, list, np.ndarray],
+        qisf: Union[list, np.ndarray],
+        scale: Union[float, list, np.ndarray] = 1.0,
+        center: Union[float, list, np.ndarray] = 0.0,
+        out: Optional[np.ndarray] = None,
+        dtype: Union[type, np.dtype] = np.float64,
+        atol: Optional[float] = None,
+        return_bound: bool = False,
+        binned: bool = False,
+        workers: Optional[int] = None
+) -> Union[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+    r""" Model built from a delta and a sum of Lorentzians, for all q at once
+
+    Parameters
+    ----------
+    w: float, list or :class:`~numpy:numpy.ndarray`
+        energy transfer
+
+    hwhm: list or :class:`~numpy:numpy.ndarray`
+        half widths at half maximum of the Lorentzians, of shape (q.size,
+        number of Lorentzians), or of any shape starting with q.size, as
+        returned by the `hwhm` and `components` functions. A width equal to
+        zero gives a delta.
+
+    eisf: float, list or :class:`~numpy:numpy.ndarray`
+        elastic incoherent structure factor, of size q.size
+
+    qisf: list or :class:`~numpy:numpy.ndarray`
+        weights of the Lorentzians, of the same shape as `hwhm`
+
+    scale: float, list or :class:`~numpy:numpy.ndarray`
+        scale factor, a number or one value per q. Default to 1.
+
+    center: float, list or :class:`~numpy:numpy.ndarray`
+        center of the peaks, a number or one value per q. Default to 0.
+
+    out: :class:`~numpy:numpy.ndarray`
+        array of shape (q.size, w.size) in which the model is written, for
+        example reused between the iterations of a fit. Default to None,
+        i.e. a new array.
+
+    dtype: data-type
+        precision of the computation, e.g. `numpy.float32` to halve the
+        memory traffic for large grids. Default to `numpy.float64`. The
+        precision of `out`, if given, can be different.
+
+    atol: float
+        absolute error allowed on each point of the model. If given, the
+        terms whose contribution is below the error are not computed, and
+        the Lorentzians are only computed in the window of the energy grid
+        where they are above it. Default to None, i.e. the model is
+        computed everywhere.
+
+    return_bound: bool
+        if True, the bound of the error due to `atol` is also returned.
+        Default to False.
+
+    binned: bool
+        if True, `w` contains the edges of the energy bins and the model is
+        integrated analytically over each bin, see Notes. It cannot be
+        combined with `atol`. Default to False.
+
+    workers: int
+        number of threads computing blocks of q at once, see Notes.
+        Default to None, i.e. the number set by :func:`set_num_threads`.
+
+    Return
+    ------
+    :class:`~numpy:numpy.ndarray`
+        model of shape (q.size, w.size), even for a single q, or
+        (q.size, w.size - 1) if `binned` is True
+
+    :class:`~numpy:numpy.ndarray`
+        if `return_bound` is True, bound of the absolute error due to
+        `atol` on each point of the model, one value per q, in addition to
+        the rounding errors. It is zero if `atol` is None.
+
+    Examples
+    --------
+    >>> assemble([-1, 0, 1], [[0.5], [1.]], [0.5, 0.], [[0.5], [1.]])
+    array([[0.06366198, 0.81830989, 0.06366198],
+           [0.15915494, 0.31830989, 0.15915494]])
+
+    Notes
+    -----
+    * The model is
+
+      .. math::
+
+        S(q, \omega) = \text{scale} \big(\text{eisf}(q)
+        \delta(\omega - \text{center}) + \sum_j \text{qisf}_j(q)
+        \text{Lorentzian}(\omega, 1, \text{center}, \text{hwhm}_j(q))\big)
+
+      with the delta of :func:`~QENSmodels.delta` and the Lorentzians,
+      renormalized on the grid, of :func:`~QENSmodels.lorentzian`.
+
+    * The Lorentzians are computed one term at a time for all q, in a
+      single buffer, so that the memory used does not grow with the
+      number of terms. The terms whose weights are zero for all q are
+      skipped.
+
+    * A new model only needs a function returning its widths, EISF and
+      QISF to be computed with :func:`assemble`.
+
+    * With `atol`, `atol` is shared between the terms. A term of weight
+      :math:`a` (including `scale`) and width :math:`\Gamma` is bounded by
+      :math:`a \Gamma / (\pi d^2)` at a distance :math:`d` of its center.
+      It is skipped if its maximum :math:`a / (\pi \Gamma)` is below its
+      share of `atol` for all q, otherwise it is set to zero beyond the
+      distance where this bound reaches its share. The area of the
+      Lorentzians used for their normalization is completed by the
+      integral of their tails, so that the renormalized terms stay within
+      the bound up to the discretization of this area. The energy grid
+      should be sorted in increasing order, otherwise the Lorentzians are
+      computed everywhere.
+
+    >>> w = np.linspace(-10, 10, 20001)
+    >>> model, bound = assemble(w, [[1e-3, 0.5]], 0., [[0.5, 1e-9]],
+    ...                         atol=1e-6, return_bound=True)
+    >>> error = model - assemble(w, [[1e-3, 0.5]], 0., [[0.5, 1e-9]])
+    >>> bool(np.abs(error).max() <= bound[0] <= 1e-6)
+    True
+
+    * With `binned`, the model is averaged over each bin with the
+      integrals of the delta and of the Lorentzians given by
+      :func:`~QENSmodels.delta` and :func:`~QENSmodels.lorentzian` with
+      ``binned=True``. The area of each term is then exact whatever its
+      width compared to the bins, without renormalization, so that a much
+      coarser grid gives the same accuracy as the sampled model.
+
+    >>> edges = np.linspace(-10, 10, 41)
+    >>> model = assemble(edges, [[1e-3, 0.5]], 0.5, [[0.25, 0.25]],
+    ...                  binned=True)
+    >>> model.shape
+    (1, 40)
+    >>> round(float(model[0] @ np.diff(edges)), 4)
+    0.992
+
+    * With several `workers`, the q are split into as many contiguous
+      blocks, computed concurrently by a persistent pool of threads and
+      written in disjoint rows of the output. numpy releasing the GIL in
+      its loops, the threads run in parallel without copies of the data.
+      The rows being independent, the model is the same as with a single
+      thread, except with `atol`, whose windows are then computed for each
+      block. Models of less than 32768 points are computed in a single
+      thread.
+
+    >>> w = np.linspace(-10, 10, 2001)
+    >>> hwhm = np.linspace(0.1, 2., 64)[:, np.newaxis]
+    >>> eisf, qisf = np.full(64, 0.2), np.full((64, 1), 0.8)
+    >>> bool(np.all(assemble(w, hwhm, eisf, qisf, workers=4)
+    ...             == assemble(w, hwhm, eisf, qisf, workers=1)))
+    True
+    """
+    if binned and atol is not None:
+        raise ValueError('atol cannot be used with binned')
+    x = np.atleast_1d(np.asarray(w, dtype=dtype))
+    if binned:
+        widths = bin_widths(x)
+    eisf = np.ravel(np.asarray(eisf, dtype=dtype))
+    n_q = eisf.size
+    hwhm = np.asarray(hwhm)
+    if not np.issubdtype(hwhm.dtype, np.floating):
+        hwhm = hwhm.astype(np.float64)
+    hwhm = np.reshape(hwhm, (n_q, -1))
+    qisf = np.reshape(np.asarray(qisf, dtype=dtype), (n_q, -1))
+    if hwhm.shape != qisf.shape:
+        raise ValueError('hwhm and qisf should have the same shape')
+    scale = _per_q(scale, n_q, 'scale', dtype)
+    center = _per_q(center, n_q, 'center', dtype)
+    column = scale[:, np.newaxis] if scale.ndim else scale
+
+    shape = (n_q, x.size - 1 if binned else x.size)
+    if out is None:
+        out = np.empty(shape, dtype=dtype)
+    elif out.shape != shape:
+        raise ValueError('out should be of shape (q.size, w.size), or '
+                         '(q.size, w.size - 1) if binned')
+
+    workers = _num_threads if workers is None else int(workers)
+    if workers > 1 and n_q > 1 and out.size >= _PARALLEL_SIZE:
+        # blocks of q computed in the threads, each in a single thread
+        limits = np.linspace(0, n_q, min(workers, n_q) + 1).astype(int)
+
+        def block(start: int, stop: int) -> np.ndarray:
+            rows = slice(start, stop)
+            return assemble(x, hwhm[rows], eisf[rows], qisf[rows],
+                            scale[rows] if scale.ndim else scale,
+                            center[rows] if center.ndim else center,
+                            out=out[rows], dtype=dtype, atol=atol,
+                            return_bound=True, binned=binned, workers=1)[1]
+
+        bound = np.concatenate(list(_executor(workers).map(
+            block, limits[:-1], limits[1:])))
+        if return_bound:
+            return out, bound
+        return out
+
+    # elastic line
+    if np.any(eisf):
+        np.multiply(eisf[:, np.newaxis],
+                    QENSmodels.delta(x, scale, center, binned=binned),
+                    out=out, casting='unsafe')
+    else:
+        out.fill(0.)
+
+    # quasielastic lines, one term for all q at a time
+    distance = x - center[:, np.newaxis] if center.ndim else x - center
+    if binned:
+        # product of the distances of the edges of each bin to the center,
+        # for the differences of the arctangents of QENSmodels.lorentzian
+        squared = np.broadcast_to(distance[..., :-1] * distance[..., 1:],
+                                  shape)
+    else:
+        squared = np.broadcast_to(distance ** 2, shape)
+    buffer = np.empty(shape, dtype=dtype)
+    active = [j for j in range(qisf.shape[1]) if np.any(qisf[:, j])]
+    bound = np.zeros(n_q)
+    for j in active:
+        gamma, weight = hwhm[:, j], qisf[:, j]
+        start, stop = 0, x.size
+        if atol is not None:
+            window = _window(x, center, gamma.astype(np.float64),
+                             np.abs(weight * scale).astype(np.float64),
+                             atol / len(active))
+            start, stop, error = window
+            bound += error
+            if start == stop:
+                continue
+        peak = buffer[:, start:stop]
+        # widths and their squares computed with the precision of hwhm and
+        # rounded to that of the computation, as in QENSmodels.lorentzian
+        gamma = gamma[:, np.newaxis]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            np.add(squared[:, start:stop], (gamma ** 2).astype(dtype),
+                   out=peak)
+            if binned:
+                np.arctan2(widths * gamma.astype(dtype), peak, out=peak)
+                peak /= widths
+            else:
+                np.divide(gamma.astype(dtype), peak, out=peak)
+        peak /= np.pi
+        zero_width = gamma[:, 0] == 0
+        if np.any(zero_width):
+            peak[zero_width] = QENSmodels.delta(
+                x, 1., center[zero_width] if center.ndim else center,
+                binned=binned
+            )[..., start:stop]
+        # area normalization of QENSmodels.lorentzian
+        if x.size > 1 and not binned:
+            area = peak @ _grid(x)[0][start:stop]
+            if stop - start < x.size:
+                area += _tails(x, start, stop, peak, center,
+                               gamma[:, 0].astype(np.float64))
+            renormalize = area > 1
+            if np.any(renormalize):
+                peak[renormalize] /= area[renormalize, np.newaxis]
+        if scale.ndim or scale != 1:
+            peak *= column
+        peak *= weight[:, np.newaxis]
+        np.add(out[:, start:stop], peak, out=out[:, start:stop],
+               casting='unsafe')
+    if return_bound:
+        return out, bound
+    return out
+
+
+def assemble_iqt(
+        t: Union[float, list, np.ndarray],
+        hwhm: Union[list, np.ndarray],
+        eisf: Union[float, list, np.ndarray],
+        qisf: Union[list, np.ndarray],
+        scale: Union[float, list, np.ndarray] = 1.0,
+        out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    r""" Intermediate scattering function of a model built from a delta and
+    a sum of Lorentzians, for all q at once
+
+    Parameters
+    ----------
+    t: float, list or :class:`~numpy:numpy.ndarray`
+        time, in the inverse unit of the widths (e.g. ps for widths in 1/ps)
+
+    hwhm, eisf, qisf, scale:
+        see :func:`assemble`
+
+    out: :class:`~numpy:numpy.ndarray`
+        array of shape (q.size, t.size) in which the result is written.
+        Default to None, i.e. a new array.
+
+    Return
+    ------
+    :class:`~numpy:numpy.ndarray`
+        intermediate scattering function of shape (q.size, t.size), even
+        for a single q
+
+    Examples
+    --------
+    >>> assemble_iqt([0, 1, 2], [[0.5], [1.]], [0.5, 0.], [[0.5], [1.]])
+    array([[1.        , 0.80326533, 0.68393972],
+           [1.        , 0.36787944, 0.13533528]])
+
+    Notes
+    -----
+    The Fourier transform of the model of :func:`assemble` is
+
+    .. math::
+
+        I(q, t) = \text{scale} \big(\text{eisf}(q) + \sum_j
+        \text{qisf}_j(q) \exp(-\text{hwhm}_j(q) |t|)\big)
+
+    The center of the peaks only gives a phase factor
+    :math:`\exp(-i \, \text{center} \, t)`, which is not included. The
+    Lorentzians are not renormalized on an energy grid.
+    """
+    x = np.abs(np.atleast_1d(np.asarray(t, dtype=np.float64)))
+    eisf = np.ravel(np.asarray(eisf, dtype=np.float64))
+    n_q = eisf.size
+    hwhm = np.reshape(np.asarray(hwhm, dtype=np.float64), (n_q, -1))
+    qisf = np.reshape(np.asarray(qisf, dtype=np.float64), (n_q, -1))
+    if hwhm.shape != qisf.shape:
+        raise ValueError('hwhm and qisf should have the same shape')
+    scale = _per_q(scale, n_q, 'scale', np.float64)
+
+    shape = (n_q, x.size)
+    if out is None:
+        out = np.empty(shape)
+    elif out.shape != shape:
+        raise ValueError('out should be of shape (q.size, t.size)')
+
+    out[...] = eisf[:, np.newaxis]
+    decay = np.empty(shape)
+    for gamma, weight in zip(hwhm.T, qisf.T):
+        if not np.any(weight):
+            continue
+        np.multiply(-gamma[:, np.newaxis], x, out=decay)
+        np.exp(decay, out=decay)
+        decay *= weight[:, np.newaxis]
+        out += decay
+    out *= scale[:, np.newaxis] if scale.ndim else scale
+    return out
+
+
+def _executor(workers: int) -> ThreadPoolExecutor:
+    """ Persistent pool of `workers` threads """
+    with _executors_lock:
+        if workers not in _executors:
+            _executors[workers] = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix='QENSmodels')
+        return _executors[workers]
+
+
+def _window(
+        x: np.ndarray,
+        center: np.ndarray,
+        gamma: np.ndarray,
+        amplitude: np.ndarray,
+        atol: float
+) -> Tuple[int, int, np.ndarray]:
+    """ Slice of the sorted grid `x` out of which the Lorentzians of
+    widths `gamma` and amplitudes `amplitude` are below `atol`, and bound of
+    the error per q. The slice is empty if they can be skipped
+    altogether. """
+    amplitude = np.broadcast_to(amplitude, gamma.shape)
+    relevant = amplitude > 0
+    if np.all(gamma[relevant] > 0):
+        maximum = np.zeros(gamma.shape)
+        maximum[relevant] = amplitude[relevant] / (np.pi * gamma[relevant])
+        if np.all(maximum <= atol):
+            return 0, 0, maximum
+    spacing = _grid(x)[1]
+    if np.isnan(spacing):
+        return 0, x.size, np.zeros(gamma.shape)
+    cutoff = np.sqrt(amplitude * gamma / (np.pi * atol))
+    lower = np.min(center - cutoff)
+    upper = np.max(center + cutoff)
+    # one more point on each side for the deltas of zero width terms
+    start = max(int(np.searchsorted(x, lower, side='left')) - 1, 0)
+    stop = min(int(np.searchsorted(x, upper, side='right')) + 1, x.size)
+    if stop - start < 2:
+        return 0, x.size, np.zeros(gamma.shape)
+    closest = np.full(gamma.shape, np.inf)
+    # bound of the error of the trapezoidal rule on the tails, whose
+    # integral replaces their sum in the area of the Lorentzians, from the
+    # variation of their derivative beyond the edges of the slice
+    variation = np.zeros(gamma.shape)
+    for outside, edge in ((start - 1, start), (stop, stop - 1)):
+        if 0 <= outside < x.size:
+            closest = np.minimum(closest, np.abs(x[outside] - center))
+            d = np.abs(x[edge] - center)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                variation += np.where(
+                    np.sqrt(3.) * d >= gamma,
+                    2. * gamma * d / (np.pi * (d ** 2 + gamma ** 2) ** 2),
+                    3. * np.sqrt(3.) / (4. * np.pi * gamma ** 2))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        error = amplitude * gamma / (np.pi * (closest ** 2 + gamma ** 2)) \
+            + amplitude / (np.pi * gamma) * spacing ** 2 / 12. * variation
+    return start, stop, np.where(relevant & (gamma > 0), error, 0.)
+
+
+def _tails(
+        x: np.ndarray,
+        start: int,
+        stop: int,
+        peak: np.ndarray,
+        center: np.ndarray,
+        gamma: np.ndarray
+) -> np.ndarray:
+    """ Area of the Lorentzians of unit scale out of the slice
+    `start:stop` of the grid `x`, integrated analytically, with the
+    correction of the trapezoidal weights of the ends of the slice """
+    weights = _grid(x)[0]
+    area = np.zeros(gamma.shape)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if start > 0:
+            area += (np.arctan((x[start] - center) / gamma)
+                     - np.arctan((x[0] - center) / gamma)) / np.pi
+            area -= (weights[start] - 0.5 * (x[start + 1] - x[start])) \
+                * peak[:, 0]
+        if stop < x.size:
+            area += (np.arctan((x[-1] - center) / gamma)
+                     - np.arctan((x[stop - 1] - center) / gamma)) / np.pi
+            area -= (weights[stop - 1] - 0.5 * (x[stop - 1] - x[stop - 2])) \
+                * peak[:, -1]
+    return np.where(gamma > 0, np.nan_to_num(area), 0.)
+
+
+def _grid(x: np.ndarray) -> Tuple[np.ndarray, float]:
+    """ Weights `c` such that `y @ c` is `numpy.trapz(y, x)`, and largest
+    spacing of the grid `x`, NaN if it is not increasing, cached per
+    grid """
+    key = array_key(x)
+    cached = _grid_cache.get(key)
+    if cached is None:
+        steps = np.diff(x)
+        half = 0.5 * steps
+        weights = np.zeros(x.size, dtype=x.dtype)
+        weights[:-1] += half
+        weights[1:] += half
+        weights.flags.writeable = False
+        if steps.size and np.all(steps > 0):
+            spacing = float(steps.max())
+        else:
+            spacing = np.nan
+        cached = (weights, spacing)
+        _grid_cache.put(key, cached)
+    return cached
+
+
+def _per_q(
+        value: Union[float, list, np.ndarray],
+        size: int,
+        name: str,
+        dtype: Union[type, np.dtype]
+) -> np.ndarray:
+    """ A number or an array of size `size` """
+    value = np.asarray(value, dtype=dtype)
+    if value.size == 1:
+        return np.reshape(value, ())
+    if value.size != size:
+        raise ValueError('{} should be a number or an array with one value '
+                         'per q'.format(name))
+    return np.ravel(value)
+
+
+def _expand_per_q(
+        value: Union[float, list, np.ndarray],
+        size: int,
+        name: str
+) -> np.ndarray:
+    """ One value of a parameter of a model per q, as a float array of size
+    `size` """
+    value = np.asarray(value, dtype=np.float64)
+    if value.size == 1:
+        return np.full(size, value.item())
+    if value.size != size:
+        raise ValueError(
+            'If {0}.size>1, it should match the size of q'.format(name))
+    return np.reshape(value, size)
@@ -1,12 +1,16 @@
 import numpy as np
-from numpy.polynomial import Polynomial
 from typing import Union
 
+from QENSmodels._cache import LRUCache, array_key
+
+# Vandermonde matrices of the energy grids, which do not change during a fit
+_vandermonde_cache = LRUCache(16)
+
 
 def background_polynomials(
         x: Union[float, list, np.ndarray],
-        list_coefficients: Union[float, list] = 0.
-) -> Polynomial:
+        list_coefficients: Union[float, list, np.ndarray] = 0.
+) -> Union[float, np.ndarray]:
     r"""
     Polynomials of variable `w` and with coefficients contained in
     `list_coefficients`
@@ -17,15 +21,17 @@ def background_polynomials(
     x: list or :class:`~numpy:numpy.ndarray`
         domain of the function
 
-    list_coefficients: list or float
-        list of coefficients for the polynomials in ascending order, i.e.
+    list_coefficients: float, list or :class:`~numpy:numpy.ndarray`
+        coefficients of the polynomials in ascending order, i.e.
         the first element is the coefficient for the constant term.
-        Default to 0 (no background).
+        A 2D array of shape (number of q, degree + 1) gives one polynomial
+        per q. Default to 0 (no background).
 
     Return
     ------
     `numpy.float64` or :class:`~numpy:numpy.ndarray`
-        output number or array
+        output number or array, of the shape of `x`. For 2D coefficients,
+        the output has shape (number of q,) + `x.shape`.
 
     Examples
     --------
@@ -38,22 +44,88 @@ def background_polynomials(
     >>> background_polynomials([1,2,3], [1,2,3])
     array([ 6., 17., 34.])
 
+    >>> background_polynomials([1, 2, 3], [[1, 0], [0, 1]])
+    array([[1., 1., 1.],
+           [1., 2., 3.]])
+
 
     Mathematically, `background_polynomials(x, [1,2,3])` corresponds to
     :math: 1 + 2x + 3x^2.
-    """
 
+    Notes
+    -----
+    The polynomials are evaluated as the product of the coefficients by the
+    Vandermonde matrix of `x`, which is cached per grid, see
+    :func:`background_polynomials_jacobian`.
+    """
     x = np.asarray(x)
+    coefficients = _coefficients(list_coefficients)
+
+    if x.ndim == 0:
+        return np.polynomial.polynomial.polyval(x, coefficients.T)
+
+    vandermonde = background_polynomials_jacobian(
+        x, coefficients.shape[-1] - 1)
+    # the Vandermonde matrix is of the flattened x
+    return (coefficients @ vandermonde.T).reshape(
+        coefficients.shape[:-1] + x.shape)
+
+
+def background_polynomials_jacobian(
+        x: Union[float, list, np.ndarray],
+        degree: int
+) -> np.ndarray:
+    r"""
+    Derivatives of `background_polynomials` with respect to its
+    coefficients
+
+    Parameters
+    ----------
+
+    x: list or :class:`~numpy:numpy.ndarray`
+        domain of the function
 
-    # check that list_coefficients is a list and all elements are numbers
-    if isinstance(list_coefficients, list) and \
-            all(isinstance(w, (int, float)) for w in list_coefficients):
+    degree: int
+        degree of the polynomials
 
-        return Polynomial(list_coefficients)(x)
+    Return
+    ------
+    :class:`~numpy:numpy.ndarray`
+        read-only array of shape (`x.size`, degree + 1). The element (i, k)
+        is the derivative of the polynomial at `x[i]` with respect to the
+        k-th coefficient, that is :math:`x_i^k`, whatever the values of the
+        coefficients and the number of q.
 
-    elif isinstance(list_coefficients, (int, float)):
+    Examples
+    --------
+    >>> background_polynomials_jacobian([1, 2, 3], 2)
+    array([[1., 1., 1.],
+           [1., 2., 4.],
+           [1., 3., 9.]])
 
-        return Polynomial(list_coefficients)(x)
+    """
+    x = np.ravel(np.asarray(x, dtype=np.float64))
+    key = (array_key(x), degree)
+    vandermonde = _vandermonde_cache.get(key)
+    if vandermonde is None:
+        vandermonde = np.polynomial.polynomial.polyvander(x, degree)
+        vandermonde.flags.writeable = False
+        _vandermonde_cache.put(key, vandermonde)
+    return vandermonde
+
+
+def _coefficients(
+        list_coefficients: Union[float, list, np.ndarray]
+) -> np.ndarray:
+    """ Coefficients as an array of floats of dimension 1 or 2 """
+    try:
+        coefficients = np.asarray(list_coefficients)
+    except ValueError:
+        raise ValueError('problem with input')
 
-    else:
+    if not (np.issubdtype(coefficients.dtype, np.integer)
+            or np.issubdtype(coefficients.dtype, np.floating)) \
+            or coefficients.ndim > 2 or coefficients.size == 0:
         raise ValueError('problem with input')
+
+    return np.atleast_1d(coefficients.astype(np.float64))
@@ -64,25 +64,42 @@ def hwhmBrownianTranslationalDiffusion(
 
     """
     # Input validation
-    q = np.asarray(q, dtype=np.float32)
+    _validate(D)
 
-    eisf = np.zeros(q.size)
-    qisf = np.ones(q.size)
+    return _hwhm(q, D)
 
-    if D > 0:
-        hwhm = D * q ** 2
-    else:
-        raise ValueError('D, the diffusion coefficient, should be positive')
 
-    # TODO discuss with users to find most suitable option for units
-    # Convert units: (A^2 / ps) * A^-2 = ps^-1 --> meV
-    # coefficient peta to convert eV s -> meV ps
-    # hwhm *= csts.physical_constants["Planck constant over 2 pi in eV s"][0] * csts.peta  # noqa
+def componentsBrownianTranslationalDiffusion(
+        q: Union[float, list, np.ndarray],
+        D: float = 1.
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ Widths, EISF and QISF of `sqwBrownianTranslationalDiffusion` as
+    functions of the momentum transfer `q`, from which
+    :func:`~QENSmodels.assemble` builds the model
 
-    # Force hwhm to be numpy array, even if single value
-    hwhm = np.asarray(hwhm, dtype=np.float32)
-    hwhm = np.reshape(hwhm, hwhm.size)
-    return hwhm, eisf, qisf
+    Parameters
+    ----------
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer (non-fitting, in 1/Angstrom)
+
+    D: float
+        diffusion coefficient (in Angstrom**2/ps). Default to 1.
+
+    Returns
+    -------
+    hwhm, eisf, qisf: :class:`~numpy:numpy.ndarray`
+        see :func:`~QENSmodels.assemble`
+
+    Examples
+    --------
+    >>> hwhm, eisf, qisf = componentsBrownianTranslationalDiffusion([1., 2.])
+    >>> hwhm
+    array([[1.],
+           [4.]], dtype=float32)
+
+    """
+    _validate(D)
+    return _components(q, D)
 
 
 def sqwBrownianTranslationalDiffusion(
@@ -186,15 +203,11 @@ def sqwBrownianTranslationalDiffusion(
 
     q = np.asarray(q, dtype=np.float32)
 
-    # Create output array
-    sqw = np.zeros((q.size, w.size))
-
     # Get widths, EISFs and QISFs of model
-    hwhm, eisf, qisf = hwhmBrownianTranslationalDiffusion(q, D)
+    hwhm, eisf, qisf = componentsBrownianTranslationalDiffusion(q, D)
 
-    # Model
-    for i in range(q.size):
-        sqw[i, :] = QENSmodels.lorentzian(w, scale, center, hwhm[i])
+    # Model, for all q at once
+    sqw = QENSmodels.assemble(w, hwhm, eisf, qisf, scale, center)
 
     # For Bumps use (needed for final plotting)
     # Using a "Curve" in bumps for each Q --> needs vector array
@@ -202,3 +215,104 @@ def sqwBrownianTranslationalDiffusion(
         sqw = np.reshape(sqw, w.size)
 
     return sqw
+
+
+def iqtBrownianTranslationalDiffusion(
+        t: Union[float, list, np.ndarray],
+        q: Union[float, list, np.ndarray],
+        scale: float = 1.,
+        D: float = 1.
+) -> Union[float, list, np.ndarray]:
+    r""" Intermediate scattering function of
+    `sqwBrownianTranslationalDiffusion`, i.e. its Fourier transform from energy
+    transfer to time
+
+    Parameters
+    ----------
+    t: float, list or :class:`~numpy:numpy.ndarray`
+        time (in ps)
+
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer (non-fitting, in 1/Angstrom)
+
+    scale: float
+        scale factor. Default to 1.
+
+    D: float
+        diffusion coefficient (in Angstrom**2/ps). Default to 1.
+
+    Return
+    ------
+    :class:`~numpy:numpy.ndarray`
+        output array, of shape (q.size, t.size), or (t.size,) for a single q
+
+    Examples
+    --------
+    >>> iqt = iqtBrownianTranslationalDiffusion([0., 1., 2.], 1.)
+    >>> iqt.round(4)
+    array([1.    , 0.3679, 0.1353])
+
+    Notes
+    -----
+    The intermediate scattering function is the sum of the EISF and of
+    exponential decays whose rates are the half widths of the Lorentzians of
+    `sqwBrownianTranslationalDiffusion`, see :func:`~QENSmodels.assemble_iqt`.
+    The center of the peaks only gives a phase in the time domain and is not a
+    parameter.
+
+    """
+    # Input validation
+    t = np.asarray(t)
+
+    q = np.asarray(q, dtype=np.float32)
+
+    # Get widths, EISFs and QISFs of model
+    hwhm, eisf, qisf = componentsBrownianTranslationalDiffusion(q, D)
+
+    # Intermediate scattering function, for all q at once
+    iqt = QENSmodels.assemble_iqt(t, hwhm, eisf, qisf, scale)
+
+    if q.size == 1:
+        iqt = np.reshape(iqt, t.size)
+
+    return iqt
+
+
+def _validate(D: float) -> None:
+    """ Check the values of the parameters of the model """
+    if not D > 0:
+        raise ValueError('D, the diffusion coefficient, should be positive')
+
+
+def _hwhm(
+        q: Union[float, list, np.ndarray],
+        D: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ `hwhmBrownianTranslationalDiffusion` without the validation of the
+    parameters """
+    q = np.asarray(q, dtype=np.float32)
+
+    eisf = np.zeros(q.size)
+    qisf = np.ones(q.size)
+
+    hwhm = D * q ** 2
+
+    # TODO discuss with users to find most suitable option for units
+    # Convert units: (A^2 / ps) * A^-2 = ps^-1 --> meV
+    # coefficient peta to convert eV s -> meV ps
+    # hwhm *= csts.physical_constants["Planck constant over 2 pi in eV s"][0] * csts.peta  # noqa
+
+    # Force hwhm to be numpy array, even if single value
+    hwhm = np.asarray(hwhm, dtype=np.float32)
+    hwhm = np.reshape(hwhm, hwhm.size)
+    return hwhm, eisf, qisf
+
+
+def _components(
+        q: Union[float, list, np.ndarray],
+        D: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ `componentsBrownianTranslationalDiffusion` without the validation of
+    the parameters """
+    hwhm, eisf, qisf = _hwhm(q, D)
+    return hwhm[:, np.newaxis], eisf, qisf[:, np.newaxis]
@@ -52,23 +52,46 @@ def hwhmChudleyElliottDiffusion(
     array([1., 1.])
 
     """
-    # input validation
-    if D <= 0:
-        raise ValueError('The diffusion coefficient, D, should be positive')
-    if L <= 0:
-        raise ValueError('The jump length, L, should be positive')
+    # Input validation
+    _validate(D, L)
 
-    q = np.asarray(q, dtype=np.float32)
+    return _hwhm(q, D, L)
 
-    eisf = np.zeros(q.size)
-    qisf = np.ones(q.size)
-    hwhm = 6. * D * (1. - np.sinc(q * L / np.pi)) / L ** 2
 
-    # Force hwhm to be numpy array, even if single value
-    hwhm = np.asarray(hwhm, dtype=np.float32)
-    hwhm = np.reshape(hwhm, hwhm.size)
+def componentsChudleyElliottDiffusion(
+        q: Union[float, list, np.ndarray],
+        D: float = 0.23,
+        L: float = 1.0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ Widths, EISF and QISF of `sqwChudleyElliottDiffusion` as functions of
+    the momentum transfer `q`, from which :func:`~QENSmodels.assemble` builds
+    the model
 
-    return hwhm, eisf, qisf
+    Parameters
+    ----------
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer (non-fitting, in 1/Angstrom)
+
+    D: float
+        diffusion coefficient (in Angstrom^2/ps). Default to 0.23.
+
+    L: float
+        jump length (in Angstrom). Default to 1.0.
+
+    Returns
+    -------
+    hwhm, eisf, qisf: :class:`~numpy:numpy.ndarray`
+        see :func:`~QENSmodels.assemble`
+
+    Examples
+    --------
+    >>> hwhm, eisf, qisf = componentsChudleyElliottDiffusion([1., 2.], 0.5, 1.5)  # noqa: E501
+    >>> hwhm.shape, eisf.shape, qisf.shape
+    ((2, 1), (2,), (2, 1))
+
+    """
+    _validate(D, L)
+    return _components(q, D, L)
 
 
 def sqwChudleyElliottDiffusion(
@@ -168,15 +191,11 @@ def sqwChudleyElliottDiffusion(
 
     q = np.asarray(q, dtype=np.float32)
 
-    # Create output array
-    sqw = np.zeros((q.size, w.size))
-
     # Get widths, EISFs and QISFs of model
-    hwhm, eisf, qisf = hwhmChudleyElliottDiffusion(q, D, L)
+    hwhm, eisf, qisf = componentsChudleyElliottDiffusion(q, D, L)
 
-    # Model
-    for i in range(q.size):
-        sqw[i, :] = QENSmodels.lorentzian(w, scale, center, hwhm[i])
+    # Model, for all q at once
+    sqw = QENSmodels.assemble(w, hwhm, eisf, qisf, scale, center)
 
     # For Bumps use (needed for final plotting)
     # Using a 'Curve' in bumps for each Q --> needs vector array
@@ -184,3 +203,109 @@ def sqwChudleyElliottDiffusion(
         sqw = np.reshape(sqw, w.size)
 
     return sqw
+
+
+def iqtChudleyElliottDiffusion(
+    t: Union[float, list, np.ndarray],
+    q: Union[float, list, np.ndarray],
+    scale: float = 1,
+    D: float = 0.23,
+    L: float = 1.0
+) -> Union[float, list, np.ndarray]:
+    r""" Intermediate scattering function of `sqwChudleyElliottDiffusion`, i.e.
+    its Fourier transform from energy transfer to time
+
+    Parameters
+    ----------
+    t: float, list or :class:`~numpy:numpy.ndarray`
+        time (in ps)
+
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer (non-fitting, in 1/Angstrom).
+
+    scale: float
+        scale factor. Default to 1.
+
+    D: float
+        diffusion coefficient (in Angstrom^2/ps). Default to 0.23.
+
+    L: float
+        jump distance (in Angstrom). Default to 1.0.
+
+    Return
+    ------
+    :class:`~numpy:numpy.ndarray`
+        output array, of shape (q.size, t.size), or (t.size,) for a single q
+
+    Examples
+    --------
+    >>> iqt = iqtChudleyElliottDiffusion([0., 1., 2.], 1.)
+    >>> iqt.round(4)
+    array([1.    , 0.8035, 0.6456])
+
+    Notes
+    -----
+    The intermediate scattering function is the sum of the EISF and of
+    exponential decays whose rates are the half widths of the Lorentzians of
+    `sqwChudleyElliottDiffusion`, see :func:`~QENSmodels.assemble_iqt`. The
+    center of the peaks only gives a phase in the time domain and is not a
+    parameter.
+
+    """
+    # Input validation
+    t = np.asarray(t)
+
+    q = np.asarray(q, dtype=np.float32)
+
+    # Get widths, EISFs and QISFs of model
+    hwhm, eisf, qisf = componentsChudleyElliottDiffusion(q, D, L)
+
+    # Intermediate scattering function, for all q at once
+    iqt = QENSmodels.assemble_iqt(t, hwhm, eisf, qisf, scale)
+
+    if q.size == 1:
+        iqt = np.reshape(iqt, t.size)
+
+    return iqt
+
+
+def _validate(
+        D: float,
+        L: float
+) -> None:
+    """ Check the values of the parameters of the model """
+    if D <= 0:
+        raise ValueError('The diffusion coefficient, D, should be positive')
+    if L <= 0:
+        raise ValueError('The jump length, L, should be positive')
+
+
+def _hwhm(
+        q: Union[float, list, np.ndarray],
+        D: float,
+        L: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ `hwhmChudleyElliottDiffusion` without the validation of the
+    parameters """
+    q = np.asarray(q, dtype=np.float32)
+
+    eisf = np.zeros(q.size)
+    qisf = np.ones(q.size)
+    hwhm = 6. * D * (1. - np.sinc(q * L / np.pi)) / L ** 2
+
+    # Force hwhm to be numpy array, even if single value
+    hwhm = np.asarray(hwhm, dtype=np.float32)
+    hwhm = np.reshape(hwhm, hwhm.size)
+
+    return hwhm, eisf, qisf
+
+
+def _components(
+        q: Union[float, list, np.ndarray],
+        D: float,
+        L: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ `componentsChudleyElliottDiffusion` without the validation of
+    the parameters """
+    hwhm, eisf, qisf = _hwhm(q, D, L)
+    return hwhm[:, np.newaxis], eisf, qisf[:, np.newaxis]
@@ -0,0 +1,352 @@
+import numpy as np
+from typing import Dict, List, Optional, Tuple, Union
+
+try:
+    import QENSmodels
+except ImportError:
+    print('Module QENSmodels not found')
+
+
+class Term:
+    """ Base class of the components which can be combined into a
+    :class:`Sum` with ``+`` and scaled with ``*``
+
+    Parameters
+    ----------
+    prefix: str
+        prefix of the names of the parameters of the component. By default,
+        the components of a sum are numbered per kind, e.g. `lorentzian1_`,
+        `lorentzian2_`.
+    """
+
+    kind = ''
+    parameters: Tuple[str, ...] = ()
+    defaults: Tuple[float, ...] = ()
+
+    def __init__(self, prefix: Optional[str] = None):
+        self.prefix = prefix
+
+    def __add__(self, other: Union['Term', 'Sum']) -> 'Sum':
+        return Sum([(self, 1., None)]) + other
+
+    def __mul__(self, factor: Union[float, str]) -> 'Sum':
+        return Sum([(self, 1., None)]) * factor
+
+    __rmul__ = __mul__
+
+    def __call__(self, w, resolution=None, temperature=None, unit='meV',
+                 **params) -> np.ndarray:
+        return Sum([(self, 1., None)])(w, resolution=resolution,
+                                       temperature=temperature, unit=unit,
+                                       **params)
+
+    def __repr__(self) -> str:
+        if self.prefix is None:
+            return '{}()'.format(type(self).__name__)
+        return '{}(prefix={!r})'.format(type(self).__name__, self.prefix)
+
+
+class Delta(Term):
+    """ Delta function, see :func:`~QENSmodels.delta` """
+    kind = 'delta'
+    parameters = ('scale', 'center')
+    defaults = (1., 0.)
+
+
+class Lorentzian(Term):
+    """ Lorentzian, see :func:`~QENSmodels.lorentzian` """
+    kind = 'lorentzian'
+    parameters = ('scale', 'center', 'hwhm')
+    defaults = (1., 0., 1.)
+
+
+class Background(Term):
+    """ Polynomial background of degree `deg`, see
+    :func:`~QENSmodels.background_polynomials`. Its parameters are the
+    coefficients `c0`, `c1`, ... in ascending order.
+    """
+    kind = 'background'
+
+    def __init__(self, deg: int = 0, prefix: Optional[str] = None):
+        super().__init__(prefix)
+        if int(deg) != deg or deg < 0:
+            raise ValueError('deg should be a positive integer')
+        self.deg = int(deg)
+        self.parameters = tuple('c{}'.format(i) for i in range(deg + 1))
+        self.defaults = (0.,) * (deg + 1)
+
+    def __repr__(self) -> str:
+        if self.prefix is None:
+            return 'Background(deg={})'.format(self.deg)
+        return 'Background(deg={}, prefix={!r})'.format(self.deg,
+                                                        self.prefix)
+
+
+class Sum:
+    r""" Sum of :class:`Delta`, :class:`Lorentzian` and :class:`Background`
+    terms, each of them multiplied by a fixed number or by a parameter
+
+    The expression is analyzed once, when it is built. At evaluation, all the
+    Lorentzians are computed in a single broadcasted operation, all the
+    deltas are placed in a single array, and the resolution, if any, is
+    convolved once with the sum of the peaks.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> model = Delta() + Lorentzian() * 0.5 + Background(deg=1)
+    >>> model.param_names  # doctest: +NORMALIZE_WHITESPACE
+    ['delta1_scale', 'delta1_center', 'lorentzian1_scale',
+     'lorentzian1_center', 'lorentzian1_hwhm', 'background1_c0',
+     'background1_c1']
+    >>> result = model([-1, 0, 1], delta1_scale=2, background1_c0=0.1)
+    >>> [round(item, 3) for item in result]
+    [0.18, 2.259, 0.18]
+
+    >>> model = Lorentzian() * 'fraction' + Lorentzian() * 'fraction'
+    >>> model.param_names  # doctest: +NORMALIZE_WHITESPACE
+    ['lorentzian1_scale', 'lorentzian1_center', 'lorentzian1_hwhm',
+     'lorentzian2_scale', 'lorentzian2_center', 'lorentzian2_hwhm',
+     'fraction']
+
+    Notes
+    -----
+    * The background is added after the convolution with the resolution.
+
+    * A factor given as a string is a parameter of the model. The same
+      name can be used for several terms, to tie their amplitudes.
+
+    """
+
+    def __init__(self, terms: List[Tuple[Term, float, Optional[str]]]):
+        # each term is stored with a fixed factor and the name of the
+        # parameter it is multiplied by (None if there is no such parameter)
+        self.terms = list(terms)
+        self._analyze()
+
+    def __add__(self, other: Union[Term, 'Sum']) -> 'Sum':
+        if isinstance(other, Term):
+            other = Sum([(other, 1., None)])
+        if not isinstance(other, Sum):
+            return NotImplemented
+        return Sum(self.terms + other.terms)
+
+    __radd__ = __add__
+
+    def __mul__(self, factor: Union[float, str]) -> 'Sum':
+        if isinstance(factor, str):
+            if any(name is not None for _, _, name in self.terms):
+                raise ValueError('a term can only be multiplied by one '
+                                 'parameter')
+            return Sum([(term, number, factor)
+                        for term, number, _ in self.terms])
+        if not isinstance(factor, (int, float, np.number)):
+            return NotImplemented
+        return Sum([(term, number * float(factor), name)
+                    for term, number, name in self.terms])
+
+    __rmul__ = __mul__
+
+    def __repr__(self) -> str:
+        return ' + '.join(
+            ' * '.join([repr(term)]
+                       + ([repr(number)] if number != 1. else [])
+                       + ([repr(name)] if name is not None else []))
+            for term, number, name in self.terms)
+
+    def _analyze(self) -> None:
+        """ Name the parameters and group the terms by kind """
+        counter: Dict[str, int] = {}
+        self.param_names: List[str] = []
+        self.defaults: Dict[str, float] = {}
+        names = []
+        for term, _, _ in self.terms:
+            counter[term.kind] = counter.get(term.kind, 0) + 1
+            prefix = term.prefix
+            if prefix is None:
+                prefix = '{}{}_'.format(term.kind, counter[term.kind])
+            term_names = [prefix + item for item in term.parameters]
+            for name, default in zip(term_names, term.defaults):
+                if name in self.defaults:
+                    raise ValueError('parameter {} is defined twice'.format(
+                        name))
+                self.param_names.append(name)
+                self.defaults[name] = default
+            names.append(term_names)
+
+        # factors given as parameters
+        for _, _, name in self.terms:
+            if name is not None and name not in self.defaults:
+                self.param_names.append(name)
+                self.defaults[name] = 1.
+
+        def group(kind):
+            return [(term_names, number, name)
+                    for (term, number, name), term_names
+                    in zip(self.terms, names)
+                    if term.kind == kind]
+
+        self._deltas = group('delta')
+        self._lorentzians = group('lorentzian')
+        self._backgrounds = group('background')
+
+    def __call__(
+            self,
+            w: Union[float, list, np.ndarray],
+            resolution: Optional['QENSmodels.Resolution'] = None,
+            temperature: Optional[float] = None,
+            unit: str = 'meV',
+            **params
+    ) -> np.ndarray:
+        """ Evaluate the model at energy transfers `w`
+
+        Parameters not given as keyword arguments take their default values
+        (1 for scales, hwhms and factors, 0 for centers and coefficients).
+        If a `temperature` is given, the deltas and Lorentzians are
+        multiplied by the detailed balance factor, with `w` in `unit`, see
+        :func:`~QENSmodels.detailed_balance_factor`. If a
+        :class:`~QENSmodels.Resolution` is given, they are then convolved
+        with it.
+        """
+        unknown = set(params) - set(self.defaults)
+        if unknown:
+            raise ValueError('unknown parameter(s): {}'.format(
+                ', '.join(sorted(unknown))))
+        values = dict(self.defaults)
+        values.update(params)
+
+        w = np.asarray(w, dtype=np.float64)
+        x = np.atleast_1d(w)
+        model = self._convolved_peaks(x, values, resolution, temperature,
+                                      unit)
+        if model is None:
+            model = self._peaks(x, values, resolution, temperature, unit)
+
+        for term_names, number, name in self._backgrounds:
+            coefficients = [values[item] for item in term_names]
+            model += _factor_value(number, name, values) * \
+                QENSmodels.background_polynomials(x, coefficients)
+
+        if w.ndim == 0:
+            return model[0]
+        return model
+
+    def _peaks(
+            self,
+            x: np.ndarray,
+            values: Dict[str, float],
+            resolution: Optional['QENSmodels.Resolution'],
+            temperature: Optional[float],
+            unit: str
+    ) -> np.ndarray:
+        """ Deltas and Lorentzians summed, then convolved """
+        model = np.zeros(x.size)
+
+        if self._lorentzians:
+            scale, center, hwhm = _gather(self._lorentzians, values)
+            model += _sum_lorentzians(x, scale, center, hwhm)
+
+        if self._deltas:
+            scale, center = _gather(self._deltas, values)
+            _add_deltas(model, x, scale, center)
+
+        if temperature is not None:
+            model *= QENSmodels.detailed_balance_factor(x, temperature,
+                                                        unit=unit)
+
+        if resolution is not None:
+            model = resolution.convolve(model, x)
+        return model
+
+    def _convolved_peaks(
+            self,
+            x: np.ndarray,
+            values: Dict[str, float],
+            resolution: Optional['QENSmodels.Resolution'],
+            temperature: Optional[float],
+            unit: str
+    ) -> Optional[np.ndarray]:
+        """ Deltas and Lorentzians as a combination of the convolved
+        Lorentzians cached by the resolution, a delta being of zero width.
+        None is returned when the model is cheaper to convolve directly,
+        see :meth:`~QENSmodels.Resolution._convolved_lorentzians`. """
+        if resolution is None or not resolution._single \
+                or not (self._lorentzians or self._deltas) or x.size < 2:
+            return None
+        scales, centers, widths = [], [], []
+        if self._lorentzians:
+            scale, center, hwhm = _gather(self._lorentzians, values)
+            scales.append(scale)
+            centers.append(center)
+            widths.append(hwhm)
+        if self._deltas:
+            scale, center = _gather(self._deltas, values)
+            scales.append(scale)
+            centers.append(center)
+            widths.append(np.zeros(len(scale)))
+        peaks = resolution._convolved_lorentzians(
+            x, np.concatenate(widths)[np.newaxis],
+            np.concatenate(centers)[np.newaxis], temperature, unit, budget=1)
+        if peaks is None:
+            return None
+        return np.concatenate(scales) @ peaks[0][0]
+
+
+def _factor_value(
+        number: float,
+        name: Optional[str],
+        values: Dict[str, float]
+) -> float:
+    """ Numerical value of the factor of a term """
+    if name is None:
+        return number
+    return number * values[name]
+
+
+def _gather(
+        terms: List[Tuple[List[str], float, Optional[str]]],
+        values: Dict[str, float]
+) -> List[np.ndarray]:
+    """ Arrays of parameters of terms of the same kind, the first one
+    (scale) being multiplied by the factor of each term """
+    table = np.array([[values[item] for item in term_names]
+                      for term_names, _, _ in terms], dtype=np.float64)
+    factors = np.array([_factor_value(number, name, values)
+                        for _, number, name in terms])
+    table[:, 0] *= factors
+    return list(table.T)
+
+
+def _sum_lorentzians(
+        x: np.ndarray,
+        scale: np.ndarray,
+        center: np.ndarray,
+        hwhm: np.ndarray
+) -> np.ndarray:
+    """ Sum of Lorentzians computed in one broadcasted operation, with the
+    same normalization as :func:`~QENSmodels.lorentzian` """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        peaks = hwhm[:, np.newaxis] / (
+            (x - center[:, np.newaxis]) ** 2 + hwhm[:, np.newaxis] ** 2
+        ) / np.pi
+
+    zero_width = hwhm == 0
+    if np.any(zero_width):
+        peaks[zero_width] = QENSmodels.delta(x, 1., center[zero_width])
+
+    if x.size > 1:
+        area = np.trapz(peaks, x, axis=-1)
+        renormalize = area > 1
+        peaks[renormalize] /= area[renormalize, np.newaxis]
+
+    return scale @ peaks
+
+
+def _add_deltas(
+        model: np.ndarray,
+        x: np.ndarray,
+        scale: np.ndarray,
+        center: np.ndarray
+) -> None:
+    """ Add all the deltas to `model` at once """
+    model += QENSmodels.delta(x, scale, center).sum(axis=0)
@@ -0,0 +1,233 @@
+import numpy as np
+from typing import Optional, Union
+
+from QENSmodels._cache import LRUCache, array_key
+
+# Boltzmann constant in meV/K
+BOLTZMANN_CONSTANT = 0.08617333262
+
+# Boltzmann constant per K in the units of energy transfer of the library:
+# meV, micro-eV and 1/ps, i.e. angular frequency with E = hbar w as in the
+# docstrings of the models
+BOLTZMANN_CONSTANTS = {'meV': BOLTZMANN_CONSTANT,
+                       'ueV': 86.17333262,
+                       '1/ps': 0.1309203391}
+
+# Boltzmann factors of the energy grids, which do not change during a fit
+_boltzmann_cache = LRUCache(16)
+
+
+def _boltzmann_constant(
+        boltzmann_constant: Optional[float],
+        unit: str
+) -> float:
+    """ Boltzmann constant given explicitly or by the unit of `w` """
+    if boltzmann_constant is not None:
+        return float(boltzmann_constant)
+    if unit not in BOLTZMANN_CONSTANTS:
+        raise ValueError('unit should be one of {}'.format(
+            ', '.join(BOLTZMANN_CONSTANTS)))
+    return BOLTZMANN_CONSTANTS[unit]
+
+
+def detailed_balance_factor(
+        w: Union[float, list, np.ndarray],
+        temperature: float,
+        boltzmann_constant: Optional[float] = None,
+        unit: str = 'meV'
+) -> np.ndarray:
+    r""" Detailed balance factor :math:`\exp(\hbar\omega / 2 k_B T)`
+
+    Parameters
+    ----------
+    w: float, list or :class:`~numpy:numpy.ndarray`
+        energy transfer, in `unit`
+
+    temperature: float
+        temperature (in K)
+
+    boltzmann_constant: float
+        Boltzmann constant in units of `w` per K, overriding `unit`
+
+    unit: str
+        unit of `w`: `meV` (default), `ueV` or `1/ps`. With `1/ps`, the
+        unit of the models of the library, `w` is an angular frequency,
+        :math:`E = \hbar\omega`.
+
+    Return
+    ------
+    :class:`~numpy:numpy.ndarray`
+        read-only array of the same shape as `w`. It is cached per grid and
+        temperature, so that repeated fit iterations reuse it.
+
+    Examples
+    --------
+    >>> result = detailed_balance_factor([-1., 0., 1.], 300.)
+    >>> [round(item, 4) for item in result]
+    [0.9808, 1.0, 1.0195]
+    >>> result = detailed_balance_factor([-1., 0., 1.], 300., unit='1/ps')
+    >>> [round(item, 4) for item in result]
+    [0.9874, 1.0, 1.0128]
+
+    """
+    if temperature <= 0:
+        raise ValueError('temperature should be strictly positive')
+    boltzmann_constant = _boltzmann_constant(boltzmann_constant, unit)
+    w = np.asarray(w, dtype=np.float64)
+    key = (array_key(w), float(temperature), float(boltzmann_constant))
+    factor = _boltzmann_cache.get(key)
+    if factor is None:
+        factor = np.exp(w / (2. * boltzmann_constant * temperature))
+        factor.flags.writeable = False
+        _boltzmann_cache.put(key, factor)
+    return factor
+
+
+def debye_waller_factor(
+        q: Union[float, list, np.ndarray],
+        msd: float
+) -> np.ndarray:
+    r""" Debye-Waller factor :math:`\exp(-q^2 \langle u^2 \rangle / 3)`
+
+    Parameters
+    ----------
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer (in 1/Angstrom)
+
+    msd: float
+        mean square displacement :math:`\langle u^2 \rangle`
+        (in Angstrom^2)
+
+    Return
+    ------
+    :class:`~numpy:numpy.ndarray`
+        array of size `q.size`
+
+    Examples
+    --------
+    >>> result = debye_waller_factor([0.5, 1.], 0.3)
+    >>> [round(item, 4) for item in result]
+    [0.9753, 0.9048]
+
+    """
+    if msd < 0:
+        raise ValueError('msd, the mean square displacement, should be '
+                         'positive')
+    q = np.ravel(np.asarray(q, dtype=np.float64))
+    return np.exp(-q ** 2 * msd / 3.)
+
+
+def correction_factor(
+        w: Union[float, list, np.ndarray],
+        q: Union[float, list, np.ndarray],
+        temperature: Optional[float] = None,
+        msd: Optional[float] = None,
+        boltzmann_constant: Optional[float] = None,
+        unit: str = 'meV'
+) -> Optional[np.ndarray]:
+    """ Product of the detailed balance and Debye-Waller factors, see
+    :func:`apply_corrections`
+
+    Return
+    ------
+    :class:`~numpy:numpy.ndarray`
+        array of shape (q.size, w.size) with `msd`, (w.size,) with only
+        `temperature`, or None without correction
+
+    Examples
+    --------
+    >>> correction_factor([-1., 0., 1.], [0.5, 1.], msd=0.3).shape
+    (2, 3)
+    >>> correction_factor([-1., 0., 1.], [0.5, 1.]) is None
+    True
+
+    """
+    factor = None
+    if temperature is not None:
+        factor = detailed_balance_factor(w, temperature, boltzmann_constant,
+                                         unit)
+    if msd is not None:
+        debye_waller = debye_waller_factor(q, msd)[:, np.newaxis]
+        if factor is None:
+            factor = np.broadcast_to(debye_waller,
+                                     (debye_waller.shape[0], np.size(w)))
+        else:
+            factor = debye_waller * factor
+    return factor
+
+
+def apply_corrections(
+        sqw: np.ndarray,
+        w: Union[float, list, np.ndarray],
+        q: Union[float, list, np.ndarray],
+        temperature: Optional[float] = None,
+        msd: Optional[float] = None,
+        boltzmann_constant: Optional[float] = None,
+        unit: str = 'meV'
+) -> np.ndarray:
+    r""" Multiply a model by the detailed balance and Debye-Waller factors
+
+    Parameters
+    ----------
+    sqw: :class:`~numpy:numpy.ndarray`
+        model as returned by the `sqw` functions, of shape (q.size, w.size),
+        or (w.size,) for a single q
+
+    w: float, list or :class:`~numpy:numpy.ndarray`
+        energy transfer, in `unit`
+
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer (in 1/Angstrom)
+
+    temperature: float
+        temperature (in K). If None (default), no detailed balance factor
+        is applied.
+
+    msd: float
+        mean square displacement (in Angstrom^2). If None (default), no
+        Debye-Waller factor is applied.
+
+    boltzmann_constant: float
+        Boltzmann constant in units of `w` per K, overriding `unit`
+
+    unit: str
+        unit of `w`: `meV` (default), `ueV` or `1/ps`. With `1/ps`, the
+        unit of the models of the library, `w` is an angular frequency,
+        :math:`E = \hbar\omega`.
+
+    Return
+    ------
+    :class:`~numpy:numpy.ndarray`
+        corrected model, of the same shape as `sqw`
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> sqw = np.ones((2, 3))
+    >>> apply_corrections(sqw, [-1., 0., 1.], [0.5, 1.], 300., 0.3).round(4)
+    array([[0.9566, 0.9753, 0.9944],
+           [0.8875, 0.9048, 0.9225]])
+
+    Notes
+    -----
+    The correction is
+
+    .. math::
+
+        S(q, \omega) \exp\big(\frac{\hbar\omega}{2 k_B T}\big)
+        \exp\big(-\frac{q^2 \langle u^2 \rangle}{3}\big)
+
+    and should be applied before the convolution with the resolution.
+    Both factors are applied in a single broadcasted multiplication. The
+    models are also corrected when evaluated or fitted with a `temperature`
+    or a `msd`, see :meth:`~QENSmodels.models.ModelSpec.evaluate` and
+    :func:`~QENSmodels.fitting.fit_model`.
+    """
+    sqw = np.asarray(sqw)
+    factor = correction_factor(w, q, temperature, msd, boltzmann_constant,
+                               unit)
+    if factor is None:
+        return sqw * 1.
+    if sqw.ndim == 1 and factor.ndim == 2:
+        factor = factor[0]
+    return sqw * factor
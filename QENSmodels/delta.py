@@ -1,11 +1,19 @@
 import numpy as np
-from typing import Union
+from typing import Union, Tuple
+
+from QENSmodels._bins import bin_widths
+from QENSmodels._cache import LRUCache, array_key
+
+# sorting and spacing of the energy grids, which do not change during a fit
+_grid_cache = LRUCache(16)
 
 
 def delta(
         x: Union[float, list, np.ndarray],
         scale: Union[float, list, np.ndarray] = 1,
-        center: Union[float, list, np.ndarray] = 0
+        center: Union[float, list, np.ndarray] = 0,
+        spread: bool = False,
+        binned: bool = False
 ) -> Union[float, list, np.ndarray]:
     r""" Dirac Delta function
 
@@ -16,16 +24,31 @@ def delta(
     x: list or :class:`~numpy:numpy.ndarray`
         domain of the function
 
-    scale: float
+    scale: float, list or :class:`~numpy:numpy.ndarray`
         integrated intensity of the curve. Default to 1.
 
-    center: float
+    center: float, list or :class:`~numpy:numpy.ndarray`
         position of the peak. Default to 0.
 
+    spread: bool
+        if True, the intensity is shared linearly between the two grid
+        points on each side of `center`, so that the result is a continuous
+        function of `center`. Default to False.
+
+    binned: bool
+        if True, `x` contains the edges of the bins of a histogram and the
+        result is the average of the function over each bin, i.e. `scale`
+        divided by the width of the bin containing `center`, whatever the
+        position of `center` in the bin. `spread` is then ignored. Default
+        to False.
+
     Return
     ------
     :class:`~numpy:numpy.ndarray`
-        output array containing an impulse signal
+        output array containing an impulse signal. If `scale` or `center`
+        is a list or an array (e.g. one value per q), the output has shape
+        (number of values, `x.size`), with `x.size - 1` bins instead of
+        `x.size` points if `binned` is True.
 
     Examples
     --------
@@ -35,6 +58,16 @@ def delta(
     >>> delta([0, 1, 2, 3, 4], 5, 2)
     array([0., 0., 5., 0., 0.])
 
+    >>> delta([0, 1, 2, 3, 4], [1, 2], [1, 2.25])
+    array([[0., 1., 0., 0., 0.],
+           [0., 0., 2., 0., 0.]])
+
+    >>> delta([0, 1, 2, 3, 4], 1, 2.25, spread=True)
+    array([0.  , 0.  , 0.75, 0.25, 0.  ])
+
+    >>> delta([0, 0.5, 2, 3], 1, 1.25, binned=True)
+    array([0.        , 0.66666667, 0.        ])
+
 
     Notes
     -----
@@ -47,7 +80,12 @@ def delta(
 
 
     * For non-zero values, the amplitude of the Delta function is divided by
-      the x-spacing.
+      the x-spacing, or by the width of the bin if `binned` is True. The
+      bins include their lower edge, and the last one also its upper edge.
+
+    * The sorting and the spacing of the grid `x` are cached, so that
+      repeated calls with the same grid only search the position of
+      `center` in the grid.
 
     * **Equivalence between different implementations**
 
@@ -62,24 +100,78 @@ def delta(
       +-------------+--------------------+
 
     """
-    # Input validation
-    if isinstance(x, (float, int)):
-        x = [float(x)]
-
-    x = np.asarray(x)
-
-    model = np.zeros(x.size)
-
-    try:
-        if min(x) <= center <= max(x):
-            # if center within x-range, delta is non-zero in this interval
-            # otherwise do nothing
-            idx = np.argmin(np.abs(x - center))
-            if len(x) > 1:
-                dx = (max(x) - min(x)) / (len(x) - 1)  # domain spacing
-            else:
-                dx = 1.
-            model[idx] = scale / dx
-
-    finally:
-        return model
+    x = np.asarray(x, dtype=np.float64)
+    if x.ndim == 0:
+        x = np.reshape(x, 1)
+
+    center = np.asarray(center, dtype=np.float64)
+    scale = np.asarray(scale, dtype=np.float64)
+    vector = center.ndim > 0 or scale.ndim > 0
+    center, scale = np.broadcast_arrays(np.atleast_1d(center),
+                                        np.atleast_1d(scale))
+    rows = np.arange(center.size)
+
+    if binned:
+        widths = bin_widths(x)
+        model = np.zeros((center.size, widths.size))
+        inside = (center >= x[0]) & (center <= x[-1])
+        rows, center, scale = rows[inside], center[inside], scale[inside]
+        bins = np.minimum(np.searchsorted(x, center, side='right') - 1,
+                          widths.size - 1)
+        model[rows, bins] = scale / widths[bins]
+        return model if vector else model[0]
+
+    order, x_sorted, dx = _grid(x)
+
+    model = np.zeros((center.size, x.size))
+
+    # if center within x-range, delta is non-zero in this interval
+    # otherwise do nothing
+    inside = (center >= x_sorted[0]) & (center <= x_sorted[-1])
+    rows, center, scale = rows[inside], center[inside], scale[inside]
+
+    # indices of the grid points on each side of center (the first one of
+    # repeated values, as numpy.argmin)
+    upper = np.clip(np.searchsorted(x_sorted, center), 1, x.size - 1)
+    lower = np.searchsorted(x_sorted, x_sorted[upper - 1])
+    if x.size == 1:
+        upper = lower = np.zeros(center.size, dtype=int)
+
+    if spread:
+        span = x_sorted[upper] - x_sorted[lower]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fraction = np.where(span > 0,
+                                (center - x_sorted[lower]) / span, 0.)
+        np.add.at(model, (rows, order[lower]), (1. - fraction) * scale / dx)
+        np.add.at(model, (rows, order[upper]), fraction * scale / dx)
+    else:
+        # closest grid point, the first one in x in case of a tie
+        distance_lower = center - x_sorted[lower]
+        distance_upper = x_sorted[upper] - center
+        closest = np.where(
+            distance_lower == distance_upper,
+            np.minimum(order[lower], order[upper]),
+            np.where(distance_lower < distance_upper,
+                     order[lower], order[upper]))
+        model[rows, closest] = scale / dx
+
+    if not vector:
+        return model[0]
+    return model
+
+
+def _grid(x: np.ndarray) -> Tuple[np.ndarray, np.ndarray, float]:
+    """ Sorting order, sorted values and spacing of the grid `x`, cached
+    per grid """
+    key = array_key(x)
+    cached = _grid_cache.get(key)
+    if cached is None:
+        order = np.argsort(x, kind='stable')
+        x_sorted = x[order]
+        if x.size > 1:
+            dx = (x_sorted[-1] - x_sorted[0]) / (x.size - 1)  # domain spacing
+        else:
+            dx = 1.
+        cached = (order, x_sorted, dx)
+        _grid_cache.put(key, cached)
+    return cached
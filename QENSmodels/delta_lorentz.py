@@ -1,5 +1,7 @@
 import numpy as np
-from typing import Union
+from typing import Union, Tuple
+
+from QENSmodels.assemble import _expand_per_q
 
 try:
     import QENSmodels
@@ -76,53 +78,22 @@ def sqwDeltaLorentz(
     A0 = np.asarray(A0)
     hwhm = np.asarray(hwhm)
 
-    # Create output array
-    sqw = np.zeros((q.size, w.size))
-
-    # Model
     if q.size > 1:
-        # if only a single float is given for A0, adapt to size of q
-        if A0.size == 1:
-            A0 = A0 * np.ones(q.size)
-        # else check that enough values of A0 are given to match the size of q
-        else:
+        # check that enough values of A0 are given to match the size of q
+        if A0.size > 1:
             assert A0.shape == q.shape, \
                 "If A0.size>1, it should match the size of q"
 
         # same procedure for hwhm
-        if hwhm.size == 1:
-            hwhm = hwhm * np.ones(q.size)
-        else:
+        if hwhm.size > 1:
             assert hwhm.shape == q.shape, \
                 "If hwhm.size>1, it should match the size of q"
 
-        # Validator for A0. We must have 0<= A0 <= 1
-        if any(item > 1 or item < 0 for item in A0):
-            raise ValueError('The proportion of immobile atoms, A0, '
-                             'should be comprised between 0 and 1, included.')
-
-        try:
-            for i in range(q.size):
-                sqw[i, :] = A0[i] * QENSmodels.delta(w, scale, center)
-                sqw[i, :] += (1 - A0[i]) * QENSmodels.lorentzian(
-                    w,
-                    scale,
-                    center,
-                    hwhm[i])
-
-        except TypeError as detail:
-            msg = "At least one parameter has an incorrect type"
-            raise TypeError(detail.__str__() + "\n" + msg)
-        except IndexError as detail:
-            msg = "At least one array has an incorrect size"
-            raise IndexError(detail.__str__() + "\n" + msg)
-    else:
-        if A0 > 1 or A0 < 0:
-            raise ValueError('The proportion of immobile atoms, A0, '
-                             'should be comprised between 0 and 1, included.')
-
-        sqw[0, :] = A0 * QENSmodels.delta(w, scale, center)
-        sqw[0, :] += (1 - A0) * QENSmodels.lorentzian(w, scale, center, hwhm)
+    # Validator for A0. We must have 0<= A0 <= 1 (see componentsDeltaLorentz)
+    widths, eisf, qisf = componentsDeltaLorentz(q, A0, hwhm)
+
+    # Model, for all q at once
+    sqw = QENSmodels.assemble(w, widths, eisf, qisf, scale, center)
 
     # For Bumps use (needed for final plotting)
     # Using a 'Curve' in bumps for each Q --> needs vector array
@@ -130,3 +101,129 @@ def sqwDeltaLorentz(
         sqw = np.reshape(sqw, w.size)
 
     return sqw
+
+
+def iqtDeltaLorentz(
+    t: Union[float, list, np.ndarray],
+    q: Union[float, list, np.ndarray],
+    scale: float = 1.0,
+    A0: Union[float, list, np.ndarray] = 0.0,
+    hwhm: Union[float, list, np.ndarray] = 1.0
+) -> Union[float, list, np.ndarray]:
+    r""" Intermediate scattering function of `sqwDeltaLorentz`, i.e. its
+    Fourier transform from energy transfer to time
+
+    Parameters
+    ----------
+    t: float, list or :class:`~numpy:numpy.ndarray`
+        time (in ps)
+
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer (non-fitting, in 1/Angstrom)
+
+    scale: float
+        scale factor. Default to 1.
+
+    A0: float, list or :class:`~numpy:numpy.ndarray` of the same size as q
+        proportion of immobile atoms, must be between 0 and 1. Default to 0.
+
+    hwhm: float, list or :class:`~numpy:numpy.ndarray` of the same size as q
+        half width half maximum. Default to 1.
+
+    Return
+    ------
+    :class:`~numpy:numpy.ndarray`
+        output array, of shape (q.size, t.size), or (t.size,) for a single q
+
+    Examples
+    --------
+    >>> iqt = iqtDeltaLorentz([0., 1., 2.], 1.)
+    >>> iqt.round(4)
+    array([1.    , 0.3679, 0.1353])
+
+    Notes
+    -----
+    The intermediate scattering function is the sum of the EISF and of
+    exponential decays whose rates are the half widths of the Lorentzians of
+    `sqwDeltaLorentz`, see :func:`~QENSmodels.assemble_iqt`. The center of the
+    peaks only gives a phase in the time domain and is not a parameter.
+
+    """
+    # Input validation
+    t = np.asarray(t)
+
+    q = np.asarray(q, dtype=np.float32)
+
+    # Get widths, EISFs and QISFs of model
+    widths, eisf, qisf = componentsDeltaLorentz(q, A0, hwhm)
+
+    # Intermediate scattering function, for all q at once
+    iqt = QENSmodels.assemble_iqt(t, widths, eisf, qisf, scale)
+
+    if q.size == 1:
+        iqt = np.reshape(iqt, t.size)
+
+    return iqt
+
+
+def componentsDeltaLorentz(
+        q: Union[float, list, np.ndarray],
+        A0: Union[float, list, np.ndarray] = 0.0,
+        hwhm: Union[float, list, np.ndarray] = 1.0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ Widths, EISF and QISF of `sqwDeltaLorentz` as functions of the momentum
+    transfer `q`, from which :func:`~QENSmodels.assemble` builds the model
+
+    Parameters
+    ----------
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer (non-fitting, in 1/Angstrom)
+
+    A0: float, list or :class:`~numpy:numpy.ndarray` of the same size as q
+        proportion of immobile atoms, must be between 0 and 1. Default to 0.
+
+    hwhm: float, list or :class:`~numpy:numpy.ndarray` of the same size as q
+        half width half maximum. Default to 1.
+
+    Returns
+    -------
+    hwhm, eisf, qisf: :class:`~numpy:numpy.ndarray`
+        see :func:`~QENSmodels.assemble`
+
+    Examples
+    --------
+    >>> hwhm, eisf, qisf = componentsDeltaLorentz([0.1, 0.2], 0.3, [1., 2.])
+    >>> hwhm
+    array([[1.],
+           [2.]])
+    >>> eisf
+    array([0.3, 0.3])
+    >>> qisf
+    array([[0.7],
+           [0.7]])
+
+    """
+    _validate(A0)
+    return _components(q, A0, hwhm)
+
+
+def _validate(A0: Union[float, list, np.ndarray]) -> None:
+    """ Check the values of the parameters of the model """
+    # Validator for A0. We must have 0<= A0 <= 1
+    A0 = np.asarray(A0)
+    if np.any((A0 > 1) | (A0 < 0)):
+        raise ValueError('The proportion of immobile atoms, A0, '
+                         'should be comprised between 0 and 1, included.')
+
+
+def _components(
+        q: Union[float, list, np.ndarray],
+        A0: Union[float, list, np.ndarray],
+        hwhm: Union[float, list, np.ndarray]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ `componentsDeltaLorentz` without the validation of the
+    parameters """
+    q = np.asarray(q, dtype=np.float32)
+    A0 = _expand_per_q(A0, q.size, 'A0')
+    hwhm = _expand_per_q(hwhm, q.size, 'hwhm')
+    return hwhm[:, np.newaxis], A0, (1. - A0)[:, np.newaxis]
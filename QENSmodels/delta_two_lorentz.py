@@ -1,5 +1,7 @@
 import numpy as np
-from typing import Union
+from typing import Union, Tuple
+
+from QENSmodels.assemble import _expand_per_q
 
 try:
     import QENSmodels
@@ -109,82 +111,29 @@ def sqwDeltaTwoLorentz(
 
     q = np.asarray(q, dtype=np.float32)
 
-    # Create output array
-    sqw = np.zeros((q.size, w.size))
-
-    # Model
     if q.size > 1:
-        try:
-            # if only a single float is given for A0, adapt to size of q
-            if A0.size == 1:
-                A0 = A0 * np.ones(q.size)
-            # else
-            # check that enough values of A0 are given to match the size of q
-            else:
-                assert A0.shape == q.shape, \
-                    "If A0.size>1, it should match the size of q"
-
-            # same procedure for A1
-            if A1.size == 1:
-                A1 = A1 * np.ones(q.size)
-            # else
-            # check that enough values of A1 are given to match the size of q
-            else:
-                assert A1.shape == q.shape, \
-                    "If A1.size>1, it should match the size of q"
-
-            # same procedure for hwhm1
-            if hwhm1.size == 1:
-                hwhm1 = hwhm1 * np.ones(q.size)
-            else:
-                assert hwhm1.shape == q.shape, \
-                    "If hwhm1.size>1, it should match the size of q"
-
-            # same procedure for hwhm2
-            if hwhm2.size == 1:
-                hwhm2 = hwhm2 * np.ones(q.size)
-            else:
-                assert hwhm2.shape == q.shape, \
-                    "If hwhm2.size>1, it should match the size of q"
-
-            for i in range(q.size):
-                sqw[i, :] = A0[i] * QENSmodels.delta(w, scale, center)
-                sqw[i, :] += A1[i] * QENSmodels.lorentzian(
-                    w,
-                    scale,
-                    center,
-                    hwhm1[i]
-                )
-                sqw[i, :] += (1 - A0[i] - A1[i]) * QENSmodels.lorentzian(
-                    w,
-                    scale,
-                    center,
-                    hwhm2[i]
-                )
-        except TypeError as detail:
-            msg = "At least one parameter has an incorrect type"
-            raise TypeError(detail.__str__() + "\n" + msg)
-        except IndexError as detail:
-            msg = "At least one array has an incorrect size"
-            raise IndexError(detail.__str__() + "\n" + msg)
-    else:
-        sqw[0, :] = A0 * QENSmodels.delta(
-            w,
-            scale,
-            center
-        )
-        sqw[0, :] += A1 * QENSmodels.lorentzian(
-            w,
-            scale,
-            center,
-            hwhm1
-        )
-        sqw[0, :] += (1. - A0 - A1) * QENSmodels.lorentzian(
-            w,
-            scale,
-            center,
-            hwhm2
-        )
+        # check that enough values of A0 are given to match the size of q
+        if A0.size > 1:
+            assert A0.shape == q.shape, \
+                "If A0.size>1, it should match the size of q"
+
+        # same procedure for A1, hwhm1 and hwhm2
+        if A1.size > 1:
+            assert A1.shape == q.shape, \
+                "If A1.size>1, it should match the size of q"
+
+        if hwhm1.size > 1:
+            assert hwhm1.shape == q.shape, \
+                "If hwhm1.size>1, it should match the size of q"
+
+        if hwhm2.size > 1:
+            assert hwhm2.shape == q.shape, \
+                "If hwhm2.size>1, it should match the size of q"
+
+    hwhm, eisf, qisf = componentsDeltaTwoLorentz(q, A0, A1, hwhm1, hwhm2)
+
+    # Model, for all q at once
+    sqw = QENSmodels.assemble(w, hwhm, eisf, qisf, scale, center)
 
     # For Bumps use (needed for final plotting)
     # Using a 'Curve' in bumps for each Q --> needs vector array
@@ -192,3 +141,129 @@ def sqwDeltaTwoLorentz(
         sqw = np.reshape(sqw, w.size)
 
     return sqw
+
+
+def iqtDeltaTwoLorentz(
+    t: Union[float, list, np.ndarray],
+    q: Union[float, list, np.ndarray],
+    scale: float = 1,
+    A0: Union[float, list, np.ndarray] = 1,
+    A1: Union[float, list, np.ndarray] = 1,
+    hwhm1: Union[float, list, np.ndarray] = 1,
+    hwhm2: Union[float, list, np.ndarray] = 1
+) -> Union[float, list, np.ndarray]:
+    r""" Intermediate scattering function of `sqwDeltaTwoLorentz`, i.e. its
+    Fourier transform from energy transfer to time
+
+    Parameters
+    ----------
+    t: float, list or :class:`~numpy:numpy.ndarray`
+        time (in ps)
+
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer (non-fitting, in 1/Angstrom)
+
+    scale: float
+        scale factor. Default to 1.
+
+    A0: float, list or :class:`~numpy:numpy.ndarray` of the same size as q
+        amplitude of the delta function. Default to 1.
+
+    A1: float, list or :class:`~numpy:numpy.ndarray` of the same size as q
+        amplitude of the first Lorentzian. Default to 1.
+
+    hwhm1: float, list or :class:`~numpy:numpy.ndarray` of the same size as q
+        half-width half maximum of the first Lorentzian. Default to 1.
+
+    hwhm2: float, list or :class:`~numpy:numpy.ndarray` of the same size as q
+        half-width half maximum of the second Lorentzian. Default to 1.
+
+    Return
+    ------
+    :class:`~numpy:numpy.ndarray`
+        output array, of shape (q.size, t.size), or (t.size,) for a single q
+
+    Examples
+    --------
+    >>> iqt = iqtDeltaTwoLorentz([0., 1., 2.], 1.)
+    >>> iqt.round(4)
+    array([1., 1., 1.])
+
+    Notes
+    -----
+    The intermediate scattering function is the sum of the EISF and of
+    exponential decays whose rates are the half widths of the Lorentzians of
+    `sqwDeltaTwoLorentz`, see :func:`~QENSmodels.assemble_iqt`. The center of
+    the peaks only gives a phase in the time domain and is not a parameter.
+
+    """
+    # Input validation
+    t = np.asarray(t)
+
+    q = np.asarray(q, dtype=np.float32)
+
+    # Get widths, EISFs and QISFs of model
+    hwhm, eisf, qisf = componentsDeltaTwoLorentz(q, A0, A1, hwhm1, hwhm2)
+
+    # Intermediate scattering function, for all q at once
+    iqt = QENSmodels.assemble_iqt(t, hwhm, eisf, qisf, scale)
+
+    if q.size == 1:
+        iqt = np.reshape(iqt, t.size)
+
+    return iqt
+
+
+def componentsDeltaTwoLorentz(
+        q: Union[float, list, np.ndarray],
+        A0: Union[float, list, np.ndarray] = 1,
+        A1: Union[float, list, np.ndarray] = 1,
+        hwhm1: Union[float, list, np.ndarray] = 1,
+        hwhm2: Union[float, list, np.ndarray] = 1
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ Widths, EISF and QISF of `sqwDeltaTwoLorentz` as functions of the
+    momentum transfer `q`, from which :func:`~QENSmodels.assemble` builds the
+    model
+
+    Parameters
+    ----------
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer (non-fitting, in 1/Angstrom)
+
+    A0: float, list or :class:`~numpy:numpy.ndarray` of the same size as q
+        amplitude of the delta function. Default to 1.
+
+    A1: float, list or :class:`~numpy:numpy.ndarray` of the same size as q
+        amplitude of the first Lorentzian. Default to 1.
+
+    hwhm1: float, list or :class:`~numpy:numpy.ndarray` of the same size as q
+        half-width half maximum of the first Lorentzian. Default to 1.
+
+    hwhm2: float, list or :class:`~numpy:numpy.ndarray` of the same size as q
+        half-width half maximum of the second Lorentzian. Default to 1.
+
+    Returns
+    -------
+    hwhm, eisf, qisf: :class:`~numpy:numpy.ndarray`
+        see :func:`~QENSmodels.assemble`
+
+    Examples
+    --------
+    >>> hwhm, eisf, qisf = componentsDeltaTwoLorentz(0.1, 0.2, 0.3, 1., 2.)
+    >>> hwhm
+    array([[1., 2.]])
+    >>> eisf
+    array([0.2])
+    >>> qisf
+    array([[0.3, 0.5]])
+
+    """
+    q = np.asarray(q, dtype=np.float32)
+    A0 = _expand_per_q(A0, q.size, 'A0')
+    A1 = _expand_per_q(A1, q.size, 'A1')
+    hwhm1 = _expand_per_q(hwhm1, q.size, 'hwhm1')
+    hwhm2 = _expand_per_q(hwhm2, q.size, 'hwhm2')
+
+    hwhm = np.column_stack([hwhm1, hwhm2])
+    qisf = np.column_stack([A1, 1. - A0 - A1])
+    return hwhm, A0, qisf
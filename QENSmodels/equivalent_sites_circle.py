@@ -62,47 +62,51 @@ def hwhmEquivalentSitesCircle(
     0.13616
 
     """
-    # input validation
-    q = np.asarray(q, dtype=np.float32)
-
-    if radius <= 0:
-        raise ValueError("radius, the radius of the circle, "
-                         "should be positive")
+    # Input validation
+    _validate(Nsites, radius, resTime)
 
-    if resTime < 0:
-        raise ValueError("resTime, the residence time, should be positive")
+    return _hwhm(q, Nsites, radius, resTime)
 
-    if Nsites < 2:
-        raise ValueError("the minimum number of sites N is 2")
 
-    # number of sites has to be an integer
-    Nsites = int(Nsites)
+def componentsEquivalentSitesCircle(
+        q: Union[float, list, np.ndarray],
+        Nsites: int = 3,
+        radius: float = 1.0,
+        resTime: float = 1.0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ Widths, EISF and QISF of `sqwEquivalentSitesCircle` as functions of the
+    momentum transfer `q`, from which :func:`~QENSmodels.assemble` builds the
+    model
 
-    # index of sites in circle
-    sites = np.arange(Nsites)
+    Parameters
+    ----------
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer (non-fitting, in 1/Angstrom)
 
-    hwhm = 2.0 / resTime * np.sin(sites * np.pi / Nsites) ** 2
-    hwhm = np.tile(hwhm, (q.size, 1))
+    Nsites: integer
+        number of sites in circle (non-fitting). Default to 3.
 
-    # jump distances between sites
-    jump_distance = 2.0 * radius * np.sin(sites * np.pi / Nsites)
+    radius: float
+        radius of rotation (in Angstrom). Default to 1.
 
-    # QR matrix [q.size, N] and corresponding spherical Bessel functions
-    QR = np.outer(q, jump_distance)
-    sphBessel = np.ones(QR.shape)
-    idx = np.nonzero(QR)
-    sphBessel[idx] = np.sin(QR[idx]) / QR[idx]
+    resTime: float
+        residence time in a site before jumping to another site (in ps).
+        Default to 1.
 
-    isf = np.zeros(QR.shape)
-    for i in range(Nsites):
-        for j in range(Nsites):
-            isf[:, i] += sphBessel[:, j] * np.cos(2. * i * j * np.pi / Nsites)
-        isf[:, i] /= Nsites
+    Returns
+    -------
+    hwhm, eisf, qisf: :class:`~numpy:numpy.ndarray`
+        see :func:`~QENSmodels.assemble`
 
-    eisf = isf[:, 0]
-    qisf = isf[:, 1:]
+    Examples
+    --------
+    >>> hwhm, eisf, qisf = componentsEquivalentSitesCircle([1., 2.], 4)
+    >>> hwhm.shape, eisf.shape, qisf.shape
+    ((2, 3), (2,), (2, 3))
 
-    return hwhm, eisf, qisf
+    """
+    _validate(Nsites, radius, resTime)
+    return _components(q, Nsites, radius, resTime)
 
 
 def sqwEquivalentSitesCircle(
@@ -212,29 +216,16 @@ def sqwEquivalentSitesCircle(
 
     """ # noqa
     # Input validation
-
     w = np.asarray(w)
 
     q = np.asarray(q, dtype=np.float32)
 
-    # Create output array
-    sqw = np.zeros((q.size, w.size))
-
     # Get widths, EISFs and QISFs of model
-    hwhm, eisf, qisf = hwhmEquivalentSitesCircle(q, Nsites, radius, resTime)
-    # Number of Lorentzians (= N-1)
-    numberLorentz = hwhm.shape[1] - 1
-    # Sum of Lorentzians
-    # (Note that hwhm has dimensions [q.size, N], as hwhm[:,0]
-    # contains a width=0, corresponding to the elastic line
-    # (eisf), while qisf has dimensions [q.size, N-1])
-    for i in range(q.size):
-        sqw[i, :] = eisf[i] * QENSmodels.delta(w, scale, center)
-        for j in range(numberLorentz):
-            sqw[i, :] += qisf[i, j] * QENSmodels.lorentzian(w,
-                                                            scale,
-                                                            center,
-                                                            hwhm[i, j + 1])
+    hwhm, eisf, qisf = componentsEquivalentSitesCircle(
+        q, Nsites, radius, resTime)
+
+    # Model, for all q at once
+    sqw = QENSmodels.assemble(w, hwhm, eisf, qisf, scale, center)
 
     # For Bumps use (needed for final plotting)
     # Using a 'Curve' in bumps for each Q --> needs vector array
@@ -242,3 +233,143 @@ def sqwEquivalentSitesCircle(
         sqw = np.reshape(sqw, w.size)
 
     return sqw
+
+
+def iqtEquivalentSitesCircle(
+        t: Union[float, list, np.ndarray],
+        q: Union[float, list, np.ndarray],
+        scale: float = 1.0,
+        Nsites: int = 3,
+        radius: float = 1.0,
+        resTime: float = 1.0
+) -> Union[float, list, np.ndarray]:
+    r""" Intermediate scattering function of `sqwEquivalentSitesCircle`, i.e.
+    its Fourier transform from energy transfer to time
+
+    Parameters
+    ----------
+    t: float, list or :class:`~numpy:numpy.ndarray`
+        time (in ps)
+
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer (non-fitting, in 1/Angstrom)
+
+    scale: float
+        scale factor. Default to 1.
+
+    Nsites: integer
+        number of sites in circle (non-fitting). Default to 3.
+
+    radius: float
+        radius of rotation (in Angstrom). Default to 1.
+
+    resTime: float
+        residence time in a site before jumping to another site (in ps).
+        Default to 1.
+
+    Return
+    ------
+    :class:`~numpy:numpy.ndarray`
+        output array, of shape (q.size, t.size), or (t.size,) for a single q
+
+    Examples
+    --------
+    >>> iqt = iqtEquivalentSitesCircle([0., 1., 2.], 1.)
+    >>> iqt.round(4)
+    array([1.    , 0.7772, 0.7275])
+
+    Notes
+    -----
+    The intermediate scattering function is the sum of the EISF and of
+    exponential decays whose rates are the half widths of the Lorentzians of
+    `sqwEquivalentSitesCircle`, see :func:`~QENSmodels.assemble_iqt`. The
+    center of the peaks only gives a phase in the time domain and is not a
+    parameter.
+
+    """
+    # Input validation
+    t = np.asarray(t)
+
+    q = np.asarray(q, dtype=np.float32)
+
+    # Get widths, EISFs and QISFs of model
+    hwhm, eisf, qisf = componentsEquivalentSitesCircle(
+        q, Nsites, radius, resTime)
+
+    # Intermediate scattering function, for all q at once
+    iqt = QENSmodels.assemble_iqt(t, hwhm, eisf, qisf, scale)
+
+    if q.size == 1:
+        iqt = np.reshape(iqt, t.size)
+
+    return iqt
+
+
+def _validate(
+        Nsites: int,
+        radius: float,
+        resTime: float
+) -> None:
+    """ Check the values of the parameters of the model """
+    if radius <= 0:
+        raise ValueError("radius, the radius of the circle, "
+                         "should be positive")
+
+    if resTime < 0:
+        raise ValueError("resTime, the residence time, should be positive")
+
+    if Nsites < 2:
+        raise ValueError("the minimum number of sites N is 2")
+
+
+def _hwhm(
+        q: Union[float, list, np.ndarray],
+        Nsites: int,
+        radius: float,
+        resTime: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ `hwhmEquivalentSitesCircle` without the validation of the
+    parameters """
+    q = np.asarray(q, dtype=np.float32)
+
+    # number of sites has to be an integer
+    Nsites = int(Nsites)
+
+    # index of sites in circle
+    sites = np.arange(Nsites)
+
+    hwhm = 2.0 / resTime * np.sin(sites * np.pi / Nsites) ** 2
+    hwhm = np.tile(hwhm, (q.size, 1))
+
+    # jump distances between sites
+    jump_distance = 2.0 * radius * np.sin(sites * np.pi / Nsites)
+
+    # QR matrix [q.size, N] and corresponding spherical Bessel functions
+    QR = np.outer(q, jump_distance)
+    sphBessel = np.ones(QR.shape)
+    idx = np.nonzero(QR)
+    sphBessel[idx] = np.sin(QR[idx]) / QR[idx]
+
+    isf = np.zeros(QR.shape)
+    for i in range(Nsites):
+        for j in range(Nsites):
+            isf[:, i] += sphBessel[:, j] * np.cos(2. * i * j * np.pi / Nsites)
+        isf[:, i] /= Nsites
+
+    eisf = isf[:, 0]
+    qisf = isf[:, 1:]
+
+    return hwhm, eisf, qisf
+
+
+def _components(
+        q: Union[float, list, np.ndarray],
+        Nsites: int,
+        radius: float,
+        resTime: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ `componentsEquivalentSitesCircle` without the validation of
+    the parameters """
+    hwhm, eisf, qisf = _hwhm(q, Nsites, radius, resTime)
+    # the first column of hwhm corresponds to the elastic line
+    return hwhm[:, 1:], eisf, qisf
@@ -0,0 +1,579 @@
+"""
+Initial values of the parameters of the models estimated from the spectral
+moments of the data, to start the fits without handcrafted guesses
+"""
+import warnings
+import numpy as np
+from typing import Callable, Dict, NamedTuple, Optional, Union
+
+from QENSmodels.models import ModelSpec, get_model
+from QENSmodels.resolution import Resolution, grid_spacing
+
+# bounds of the half width at half maximum of the Lorentzian, relative to the
+# half width of the energy window, searched by bisection
+_WIDTH_RANGE = (1e-6, 1e2)
+_BISECTIONS = 60
+# number of radii of the localized models compared with the EISF
+_RADII = 200
+
+
+class SpectralMoments(NamedTuple):
+    """ Moments of spectra, one value per q
+
+    Attributes
+    ----------
+    area: :class:`~numpy:numpy.ndarray`
+        zeroth moment over `window`
+
+    center: :class:`~numpy:numpy.ndarray`
+        first moment divided by the zeroth moment, over the whole grid
+
+    second: :class:`~numpy:numpy.ndarray`
+        second moment about `center`, over `window`
+
+    fourth: :class:`~numpy:numpy.ndarray`
+        fourth moment about `center`, over `window`
+
+    height: :class:`~numpy:numpy.ndarray`
+        maximum of the spectra
+
+    window: :class:`~numpy:numpy.ndarray`
+        half width of the energy range, symmetric about `center`, over which
+        the moments are computed
+    """
+    area: np.ndarray
+    center: np.ndarray
+    second: np.ndarray
+    fourth: np.ndarray
+    height: np.ndarray
+    window: np.ndarray
+
+
+class ComponentsEstimate(NamedTuple):
+    """ Parameters of a delta and a Lorentzian describing spectra, one
+    value per q, see :func:`estimate_components`
+    """
+    scale: np.ndarray
+    center: np.ndarray
+    eisf: np.ndarray
+    hwhm: np.ndarray
+
+
+def spectral_moments(
+        w: Union[list, np.ndarray],
+        sqw: np.ndarray,
+        error: Optional[np.ndarray] = None,
+        snr: float = 5.
+) -> SpectralMoments:
+    r""" Moments of spectra sampled on a uniform energy grid
+
+    Parameters
+    ----------
+    w: list or :class:`~numpy:numpy.ndarray`
+        energy transfer
+
+    sqw: :class:`~numpy:numpy.ndarray`
+        spectra, of shape (w.size,) or (q.size, w.size)
+
+    error: float or :class:`~numpy:numpy.ndarray`
+        uncertainties of `sqw`, broadcastable to its shape. If given, the
+        moments are computed over the energy range where the spectra are
+        larger than `snr` times their uncertainties, which excludes the noise
+        of their tails. Default to None.
+
+    snr: float
+        signal to noise ratio defining the range of the moments when
+        `error` is given. Default to 5.
+
+    Return
+    ------
+    :class:`SpectralMoments`
+        arrays of size q.size
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> w = np.linspace(-2, 2, 401)
+    >>> moments = spectral_moments(w, np.exp(-(w - 0.1) ** 2 / 0.02))
+    >>> round(moments.center[0], 4), round(moments.second[0], 4)
+    (0.1, 0.0025)
+
+    Notes
+    -----
+    The moments are computed over the largest window
+    :math:`|\omega - \omega_0| \leq W` of the grid, symmetric about the
+    center :math:`\omega_0`, so that they are not biased by an off-center
+    energy range.
+    """
+    w = np.asarray(w, dtype=np.float64)
+    sqw = np.atleast_2d(np.asarray(sqw, dtype=np.float64))
+    dw = grid_spacing(w)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        center = np.trapz(sqw * w, dx=dw, axis=-1) \
+            / np.trapz(sqw, dx=dw, axis=-1)
+    center = np.where(np.isfinite(center), center, 0.5 * (w[0] + w[-1]))
+    center = np.clip(center, w[0], w[-1])
+    distance = w - center[:, np.newaxis]
+    window = np.minimum(center - w[0], w[-1] - center)
+    height = np.max(sqw, axis=-1)
+    if error is not None:
+        signal = sqw > snr * np.broadcast_to(error, sqw.shape)
+        window = np.minimum(window, np.max(np.where(
+            signal, np.abs(distance), 0.), axis=-1))
+
+    inside = np.where(np.abs(distance) <= window[:, np.newaxis] + 0.5 * dw,
+                      sqw, 0.)
+    squared = distance ** 2
+    area = np.trapz(inside, dx=dw, axis=-1)
+    second = np.trapz(inside * squared, dx=dw, axis=-1)
+    fourth = np.trapz(inside * squared ** 2, dx=dw, axis=-1)
+    return SpectralMoments(area, center, second, fourth, height,
+                           window)
+
+
+def estimate_components(
+        w: Union[list, np.ndarray],
+        sqw: np.ndarray,
+        error: Optional[np.ndarray] = None,
+        resolution: Optional[Resolution] = None
+) -> ComponentsEstimate:
+    r""" Estimate the delta and Lorentzian describing spectra from their
+    moments
+
+    Parameters
+    ----------
+    w: list or :class:`~numpy:numpy.ndarray`
+        energy transfer, on a uniform grid
+
+    sqw: :class:`~numpy:numpy.ndarray`
+        spectra, of shape (w.size,) or (q.size, w.size)
+
+    error: :class:`~numpy:numpy.ndarray`
+        uncertainties of `sqw`, used to ignore the tails of the spectra
+        dominated by noise, see :func:`spectral_moments`. Default to None.
+
+    resolution: :class:`~QENSmodels.Resolution`
+        resolution with which the spectra are convolved. Its moments are
+        removed from those of the spectra. Default to None.
+
+    Return
+    ------
+    :class:`ComponentsEstimate`
+        `scale`, `center`, elastic incoherent structure factor `eisf` and
+        half width at half maximum `hwhm` of the spectra, modelled by
+        `scale * (eisf * delta + (1 - eisf) * Lorentzian(hwhm))`, as arrays
+        of size q.size
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> import QENSmodels
+    >>> w = np.linspace(-2, 2, 401)
+    >>> sqw = QENSmodels.sqwDeltaLorentz(w, [0.5, 1.], 2., 0., 0.3, 0.1)
+    >>> estimate = estimate_components(w, sqw)
+    >>> estimate.eisf.round(2), estimate.hwhm.round(2)
+    (array([0.3, 0.3]), array([0.1, 0.1]))
+
+    Notes
+    -----
+    Over the window :math:`[-W, W]` about its center, a Lorentzian of
+    amplitude :math:`a` and half width :math:`\Gamma` has the second and
+    fourth moments
+
+    .. math::
+
+        m_2 = \frac{a\Gamma}{\pi} \big(2W - 2\Gamma \arctan\frac{W}{\Gamma}
+        \big)
+
+        m_4 = \frac{a\Gamma}{\pi} \big(\frac{2W^3}{3} - 2\Gamma^2 W
+        + 2\Gamma^3 \arctan\frac{W}{\Gamma}\big)
+
+    while the delta does not contribute. :math:`\Gamma` is found by
+    bisection on the ratio :math:`m_4 / m_2`, for all q at once, then
+    :math:`a` from :math:`m_2` and the elastic intensity from the
+    remaining area. The moments of the convolution with a resolution of
+    unit area are :math:`m_2 + r_2 m_0` and
+    :math:`m_4 + 6 r_2 m_2 + r_4 m_0`, where :math:`r_k` are the moments
+    of the resolution.
+    """
+    w = np.asarray(w, dtype=np.float64)
+    moments = spectral_moments(w, sqw, error)
+    area, window = moments.area, moments.window
+    second, fourth = moments.second, moments.fourth
+    if resolution is not None:
+        grid = w - 0.5 * (w[0] + w[-1])
+        kernel = np.atleast_2d(resolution.evaluate(grid))
+        norm = np.trapz(kernel, grid, axis=-1)
+        r2 = np.trapz(kernel * grid ** 2, grid, axis=-1) / norm
+        r4 = np.trapz(kernel * grid ** 4, grid, axis=-1) / norm
+        second = second - r2 * area
+        fourth = fourth - 6. * r2 * second - r4 * area
+
+    quasielastic = second > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(quasielastic, fourth / second / window ** 2, 0.)
+    # relative half width u = hwhm / window, with m4 / m2 / W^2 increasing
+    # from 1/3 (u -> 0) to 3/5 (u -> infinity)
+    lower = np.full(ratio.shape, np.log(_WIDTH_RANGE[0]))
+    upper = np.full(ratio.shape, np.log(_WIDTH_RANGE[1]))
+    for _ in range(_BISECTIONS):
+        middle = 0.5 * (lower + upper)
+        larger = _moments_ratio(np.exp(middle)) < ratio
+        lower = np.where(larger, middle, lower)
+        upper = np.where(larger, upper, middle)
+    u = np.exp(0.5 * (lower + upper))
+    hwhm = u * window
+
+    # amplitude of the whole Lorentzian and its part inside the window
+    arctan = np.arctan(1. / u)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        amplitude = np.pi * second / (hwhm * window * (2. - 2. * u
+                                                       * arctan))
+    amplitude = np.where(quasielastic & np.isfinite(amplitude), amplitude,
+                         0.)
+    elastic = np.clip(area - amplitude * 2. / np.pi * arctan, 0., None)
+    scale = elastic + amplitude
+    with np.errstate(divide='ignore', invalid='ignore'):
+        eisf = np.where(scale > 0, elastic / scale, 1.)
+    hwhm = np.where(quasielastic, hwhm, grid_spacing(w))
+    return ComponentsEstimate(scale, moments.center, eisf, hwhm)
+
+
+def _moments_ratio(u: np.ndarray) -> np.ndarray:
+    """ m4 / m2 / W^2 of a Lorentzian of half width u * W over [-W, W] """
+    arctan = np.arctan(1. / u)
+    return (2. / 3. - 2. * u ** 2 + 2. * u ** 3 * arctan) \
+        / (2. - 2. * u * arctan)
+
+
+def initial_guess(
+        model: Union[str, Callable, ModelSpec],
+        w: Union[list, np.ndarray],
+        q: Union[float, list, np.ndarray],
+        sqw: np.ndarray,
+        error: Optional[np.ndarray] = None,
+        resolution: Optional[Resolution] = None,
+        p0: Optional[Dict[str, Union[float, np.ndarray]]] = None
+) -> Dict[str, Union[float, np.ndarray]]:
+    r""" Initial values of the parameters of a model for a (q, w) dataset
+
+    Parameters
+    ----------
+    model: str, callable or :class:`~QENSmodels.models.ModelSpec`
+        model of the library, see :func:`~QENSmodels.models.get_model`
+
+    w: list or :class:`~numpy:numpy.ndarray`
+        energy transfer, on a uniform grid
+
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer
+
+    sqw: :class:`~numpy:numpy.ndarray`
+        measured intensities, of shape (q.size, w.size)
+
+    error: :class:`~numpy:numpy.ndarray`
+        uncertainties of `sqw`, see :func:`estimate_components`. Default to
+        None.
+
+    resolution: :class:`~QENSmodels.Resolution`
+        resolution with which the data are convolved. Default to None.
+
+    p0: dict
+        known values of some parameters, e.g. `Nsites`, returned as given
+        and used to estimate the others. Default to None.
+
+    Return
+    ------
+    dict
+        values of the parameters, with arrays of size q.size for `scale` and
+        `center`, as expected by `p0` of
+        :func:`~QENSmodels.fitting.fit_model`
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> import QENSmodels
+    >>> w = np.linspace(-2, 2, 401)
+    >>> q = np.linspace(0.3, 1.5, 5)
+    >>> sqw = QENSmodels.sqwJumpTranslationalDiffusion(w, q, 1., 0., 0.3, 1.)
+    >>> guess = initial_guess('JumpTranslationalDiffusion', w, q, sqw)
+    >>> round(guess['D'], 2), round(guess['resTime'], 2)
+    (0.3, 1.0)
+
+    Notes
+    -----
+    The widths :math:`\Gamma` and elastic fractions estimated per q by
+    :func:`estimate_components` are fitted by weighted least squares
+
+    * `BrownianTranslationalDiffusion`: :math:`\Gamma = D q^2`
+
+    * `JumpTranslationalDiffusion`: :math:`1 / \Gamma = 1 / (D q^2) + \tau`
+
+    * `ChudleyElliottDiffusion`: as `JumpTranslationalDiffusion`, with the
+      jump length :math:`L = \sqrt{6 D \tau}` giving the same widths at low
+      and high q
+
+    * `IsotropicRotationalDiffusion`, `EquivalentSitesCircle` and
+      `JumpSitesLogNormDist`: `radius` whose EISF is the closest to the
+      elastic fractions, then `DR` or `1 / resTime` proportional to the
+      widths, compared with the mean width of the quasi-elastic terms of
+      the model
+
+    * `GaussianModel3D`: `variance_ux` of the EISF
+      :math:`\exp(-q^2 \langle u_x^2 \rangle)`, then `D` as above
+
+    * `DeltaLorentz`: mean `A0` and `hwhm`
+
+    * `DeltaTwoLorentz`: mean `A0`, and the quasi-elastic signal split
+      evenly between Lorentzians half and twice as broad as the mean `hwhm`
+
+    The parameters taking integer values, such as `Nsites`, keep their
+    values. The parameters of the other models, such as `WaterTeixeira`,
+    whose translation and rotation cannot be told apart from a single
+    Lorentzian, keep their default values, with a warning.
+    """
+    spec = get_model(model)
+    q = np.atleast_1d(np.asarray(q, dtype=np.float64))
+    p0 = p0 or {}
+    estimate = estimate_components(w, sqw, error, resolution)
+    guess: Dict[str, Union[float, np.ndarray]] = dict(spec.defaults)
+    guess.update(scale=estimate.scale, center=estimate.center)
+    guess.update(p0)
+    if spec.name not in _ESTIMATES:
+        warnings.warn('no estimate of the parameters of {}, other than '
+                      'scale and center: they keep their default '
+                      'values'.format(spec.name))
+        return guess
+
+    # widths of spectra without quasi-elastic signal are not informative
+    weights = estimate.scale * (1. - estimate.eisf)
+    if not np.any(weights > 0):
+        return guess
+    guess.update(_ESTIMATES[spec.name](spec, q, estimate, weights, guess))
+    guess.update(p0)
+    return guess
+
+
+def _delta_lorentz(
+        spec: ModelSpec,
+        q: np.ndarray,
+        estimate: ComponentsEstimate,
+        weights: np.ndarray,
+        guess: Dict
+) -> Dict[str, float]:
+    """ Mean A0 and hwhm """
+    return dict(A0=float(np.average(estimate.eisf, weights=estimate.scale)),
+                hwhm=float(np.average(estimate.hwhm, weights=weights)))
+
+
+def _delta_two_lorentz(
+        spec: ModelSpec,
+        q: np.ndarray,
+        estimate: ComponentsEstimate,
+        weights: np.ndarray,
+        guess: Dict
+) -> Dict[str, float]:
+    """ Mean A0, and Lorentzians of different widths, so that the fit can
+    tell them apart """
+    values = _delta_lorentz(spec, q, estimate, weights, guess)
+    return dict(A0=values['A0'], A1=0.5 * (1. - values['A0']),
+                hwhm1=0.5 * values['hwhm'], hwhm2=2. * values['hwhm'])
+
+
+def _brownian(
+        spec: ModelSpec,
+        q: np.ndarray,
+        estimate: ComponentsEstimate,
+        weights: np.ndarray,
+        guess: Dict
+) -> Dict[str, float]:
+    """ D of hwhm = D q^2 """
+    return dict(D=_diffusion(q, estimate.hwhm, weights))
+
+
+def _jump(
+        spec: ModelSpec,
+        q: np.ndarray,
+        estimate: ComponentsEstimate,
+        weights: np.ndarray,
+        guess: Dict
+) -> Dict[str, float]:
+    """ D and resTime of the jump diffusion """
+    D, resTime = _jump_diffusion(q, estimate.hwhm, weights)
+    return dict(D=D, resTime=resTime)
+
+
+def _chudley_elliott(
+        spec: ModelSpec,
+        q: np.ndarray,
+        estimate: ComponentsEstimate,
+        weights: np.ndarray,
+        guess: Dict
+) -> Dict[str, float]:
+    """ D, and L giving the widths of the jump diffusion at low and high q
+    """
+    D, resTime = _jump_diffusion(q, estimate.hwhm, weights)
+    if resTime > 0:
+        return dict(D=D, L=float(np.sqrt(6. * D * resTime)))
+    return dict(D=D)
+
+
+def _rotation(
+        spec: ModelSpec,
+        q: np.ndarray,
+        estimate: ComponentsEstimate,
+        weights: np.ndarray,
+        guess: Dict
+) -> Dict[str, float]:
+    """ radius from the EISF and DR from the widths """
+    radius = _radius(spec, q, estimate, guess)
+    widths = _mean_width(spec, q, guess, radius=radius, DR=1.)
+    values = dict(radius=radius)
+    DR = _slope(widths, estimate.hwhm, weights)
+    if DR > 0:
+        values['DR'] = DR
+    return values
+
+
+def _sites(
+        spec: ModelSpec,
+        q: np.ndarray,
+        estimate: ComponentsEstimate,
+        weights: np.ndarray,
+        guess: Dict
+) -> Dict[str, float]:
+    """ radius from the EISF and resTime from the widths """
+    radius = _radius(spec, q, estimate, guess)
+    widths = _mean_width(spec, q, guess, radius=radius, resTime=1.)
+    values = dict(radius=radius)
+    rate = _slope(widths, estimate.hwhm, weights)
+    if rate > 0:
+        values['resTime'] = 1. / rate
+    return values
+
+
+def _gaussian(
+        spec: ModelSpec,
+        q: np.ndarray,
+        estimate: ComponentsEstimate,
+        weights: np.ndarray,
+        guess: Dict
+) -> Dict[str, float]:
+    """ variance_ux of eisf = exp(-q^2 variance_ux) and D from the widths
+    """
+    valid = (estimate.eisf > 0) & (estimate.eisf < 1) & (q > 0)
+    if not np.any(valid):
+        return {}
+    variance = _slope(q[valid] ** 2, -np.log(estimate.eisf[valid]),
+                      estimate.scale[valid])
+    widths = _mean_width(spec, q, guess, D=1., variance_ux=variance)
+    values = dict(variance_ux=variance)
+    D = _slope(widths, estimate.hwhm, weights)
+    if D > 0:
+        values['D'] = D
+    return values
+
+
+# estimates of the parameters of the models, by name of model
+_ESTIMATES: Dict[str, Callable] = {
+    'BrownianTranslationalDiffusion': _brownian,
+    'ChudleyElliottDiffusion': _chudley_elliott,
+    'DeltaLorentz': _delta_lorentz,
+    'DeltaTwoLorentz': _delta_two_lorentz,
+    'EquivalentSitesCircle': _sites,
+    'GaussianModel3D': _gaussian,
+    'IsotropicRotationalDiffusion': _rotation,
+    'JumpSitesLogNormDist': _sites,
+    'JumpTranslationalDiffusion': _jump,
+}
+
+
+def _components(
+        spec: ModelSpec,
+        q: np.ndarray,
+        guess: Dict,
+        **values
+) -> tuple:
+    """ Widths, EISF and QISF of the model with the parameters of `guess`
+    replaced by `values` """
+    params = dict(guess, **values)
+    return spec.kernel(q, *[params[name] for name in spec.parameters])
+
+
+def _radius(
+        spec: ModelSpec,
+        q: np.ndarray,
+        estimate: ComponentsEstimate,
+        guess: Dict
+) -> float:
+    """ radius whose EISF is the closest to the estimated one, searched on a
+    logarithmic grid of q * radius from 0.1 to 10 """
+    q_range = q[q > 0]
+    if q_range.size == 0:
+        return float(guess['radius'])
+    candidates = np.geomspace(0.1 / q_range.max(), 10. / q_range.min(),
+                              _RADII)
+    residuals = [np.sum(estimate.scale * (
+        _components(spec, q, guess, radius=item)[1] - estimate.eisf) ** 2)
+        for item in candidates]
+    return float(candidates[np.argmin(residuals)])
+
+
+def _mean_width(
+        spec: ModelSpec,
+        q: np.ndarray,
+        guess: Dict,
+        **values
+) -> np.ndarray:
+    """ Mean width of the quasi-elastic terms of the model, weighted by
+    their amplitudes, for each q """
+    hwhm, _, qisf = _components(spec, q, guess, **values)
+    hwhm = np.reshape(hwhm, (q.size, -1))
+    qisf = np.reshape(qisf, (q.size, -1))
+    total = np.sum(qisf, axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(total > 0, np.sum(hwhm * qisf, axis=-1) / total, 0.)
+
+
+def _slope(
+        x: np.ndarray,
+        y: np.ndarray,
+        weights: np.ndarray
+) -> float:
+    """ a of y = a x, by weighted least squares, or 0 if x is zero """
+    denominator = np.sum(weights * x ** 2)
+    if not denominator > 0:
+        return 0.
+    return float(np.sum(weights * x * y) / denominator)
+
+
+def _diffusion(
+        q: np.ndarray,
+        hwhm: np.ndarray,
+        weights: np.ndarray
+) -> float:
+    """ D of hwhm = D q^2, by weighted least squares """
+    return _slope(q ** 2, hwhm, weights)
+
+
+def _jump_diffusion(
+        q: np.ndarray,
+        hwhm: np.ndarray,
+        weights: np.ndarray
+) -> tuple:
+    """ D and resTime of 1 / hwhm = 1 / (D q^2) + resTime, by weighted least
+    squares. The relative uncertainty of 1 / hwhm being that of hwhm, the
+    weights are multiplied by hwhm^2. """
+    valid = (weights > 0) & (hwhm > 0) & (q > 0)
+    if np.count_nonzero(valid) < 2:
+        return _diffusion(q, hwhm, weights), 0.
+    x = 1. / q[valid] ** 2
+    y = 1. / hwhm[valid]
+    sqrt_weights = np.sqrt(weights[valid]) * hwhm[valid]
+    design = np.column_stack([x, np.ones_like(x)]) * sqrt_weights[:, None]
+    (slope, intercept), *_ = np.linalg.lstsq(design, y * sqrt_weights,
+                                             rcond=None)
+    if slope <= 0:
+        return _diffusion(q, hwhm, weights), 0.
+    return float(1. / slope), float(max(intercept, 0.))
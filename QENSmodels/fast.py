@@ -0,0 +1,123 @@
+"""
+Models of the library without the validation of their parameters
+
+The functions of this module compute the same values as the functions of
+the same names of the package, e.g. ``fast.sqwDeltaLorentz`` and
+:func:`~QENSmodels.sqwDeltaLorentz`, with the same arithmetic, but skip the
+checks of the values and sizes of the parameters. They are meant to be
+called many times with parameters checked once beforehand, e.g. with
+:meth:`~QENSmodels.models.ModelSpec.validate` when a fit is set up. Invalid
+parameters give wrong results, or errors raised by numpy, instead of a
+`ValueError`.
+
+Examples
+--------
+>>> import QENSmodels
+>>> from QENSmodels import fast
+>>> w = [-1., 0., 1.]
+>>> bool(np.all(fast.sqwDeltaLorentz(w, 1., 1., 0., 0.4, 0.2)
+...             == QENSmodels.sqwDeltaLorentz(w, 1., 1., 0., 0.4, 0.2)))
+True
+>>> fast.sqwJumpTranslationalDiffusion(w, [0.5, 1.], D=0.2).shape
+(2, 3)
+"""
+import inspect
+import numpy as np
+from typing import Callable
+
+try:
+    import QENSmodels
+except ImportError:
+    print('Module QENSmodels not found')
+
+
+def _sqw(
+        components: Callable,
+        public: Callable,
+        single_precision: bool = False
+) -> Callable:
+    """ `sqw` function of a model, with the signature of the function
+    `public` of the package, assembled from the unchecked `components`
+
+    If `single_precision` is True, the energy transfers are cast to and the
+    model is computed in single precision, as in `sqwWaterTeixeira`. """
+
+    signature = inspect.signature(public)
+    size = len(signature.parameters)
+
+    def sqw(*args, **kwargs) -> np.ndarray:
+        if kwargs or len(args) != size:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            args = bound.args
+        w, q, scale, center, *parameters = args
+        q = np.asarray(q)
+        hwhm, eisf, qisf = components(q, *parameters)
+        if single_precision:
+            w = np.asarray(w, dtype=np.float32)
+            sqw = QENSmodels.assemble(w, hwhm, eisf, qisf, scale, center,
+                                      out=np.empty((q.size, w.size)),
+                                      dtype=np.float32)
+        else:
+            w = np.asarray(w)
+            sqw = QENSmodels.assemble(w, hwhm, eisf, qisf, scale, center)
+        if q.size == 1:
+            sqw = np.reshape(sqw, w.size)
+        return sqw
+
+    sqw.__name__ = sqw.__qualname__ = public.__name__
+    sqw.__signature__ = signature
+    sqw.__doc__ = """ `{0}` without the validation of the
+    parameters, see :func:`~QENSmodels.{0}` """.format(public.__name__)
+    return sqw
+
+
+componentsBrownianTranslationalDiffusion = \
+    QENSmodels.brownian_translational_diffusion._components
+componentsChudleyElliottDiffusion = \
+    QENSmodels.chudley_elliott_diffusion._components
+componentsDeltaLorentz = QENSmodels.delta_lorentz._components
+# the components of this model have no validation
+componentsDeltaTwoLorentz = QENSmodels.componentsDeltaTwoLorentz
+componentsEquivalentSitesCircle = \
+    QENSmodels.equivalent_sites_circle._components
+componentsGaussianModel3D = QENSmodels.gaussian_model_3d._components
+componentsIsotropicRotationalDiffusion = \
+    QENSmodels.isotropic_rotational_diffusion._components
+componentsJumpSitesLogNormDist = \
+    QENSmodels.jump_sites_log_norm_dist._components
+componentsJumpTranslationalDiffusion = \
+    QENSmodels.jump_translational_diffusion._components
+componentsWaterTeixeira = QENSmodels.water_teixeira._components
+
+sqwBrownianTranslationalDiffusion = _sqw(
+    componentsBrownianTranslationalDiffusion,
+    QENSmodels.sqwBrownianTranslationalDiffusion)
+sqwChudleyElliottDiffusion = _sqw(
+    componentsChudleyElliottDiffusion,
+    QENSmodels.sqwChudleyElliottDiffusion)
+sqwDeltaLorentz = _sqw(
+    componentsDeltaLorentz,
+    QENSmodels.sqwDeltaLorentz)
+sqwDeltaTwoLorentz = _sqw(
+    componentsDeltaTwoLorentz,
+    QENSmodels.sqwDeltaTwoLorentz)
+sqwEquivalentSitesCircle = _sqw(
+    componentsEquivalentSitesCircle,
+    QENSmodels.sqwEquivalentSitesCircle)
+sqwGaussianModel3D = _sqw(
+    componentsGaussianModel3D,
+    QENSmodels.sqwGaussianModel3D)
+sqwIsotropicRotationalDiffusion = _sqw(
+    componentsIsotropicRotationalDiffusion,
+    QENSmodels.sqwIsotropicRotationalDiffusion)
+sqwJumpSitesLogNormDist = _sqw(
+    componentsJumpSitesLogNormDist,
+    QENSmodels.sqwJumpSitesLogNormDist)
+sqwJumpTranslationalDiffusion = _sqw(
+    componentsJumpTranslationalDiffusion,
+    QENSmodels.sqwJumpTranslationalDiffusion)
+sqwWaterTeixeira = _sqw(
+    componentsWaterTeixeira,
+    QENSmodels.sqwWaterTeixeira,
+    single_precision=True)
@@ -0,0 +1,318 @@
+"""
+Persistent cache of the results of the fits, so that a fit already done
+with the same data, model and settings, e.g. when a notebook or a script is
+run again, is read from the disk instead of being computed
+
+The cache is a directory with one file per fit, named by a hash of all the
+inputs of the fit. It can be inspected and pruned from the command line::
+
+    python -m QENSmodels.fit_cache info
+    python -m QENSmodels.fit_cache list
+    python -m QENSmodels.fit_cache prune --max-size 100
+    python -m QENSmodels.fit_cache clear
+
+or with the ``qensmodels-cache`` command once the package is installed.
+"""
+import argparse
+import hashlib
+import os
+import tempfile
+import time
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import QENSmodels
+except ImportError:
+    print('Module QENSmodels not found')
+
+# environment variable giving the default directory of the cache
+ENVIRONMENT_VARIABLE = 'QENSMODELS_CACHE'
+
+
+def default_directory() -> str:
+    """ Directory of the cache given by the environment variable
+    `QENSMODELS_CACHE`, or `~/.cache/QENSmodels/fits` """
+    return os.environ.get(ENVIRONMENT_VARIABLE) or os.path.join(
+        os.path.expanduser('~'), '.cache', 'QENSmodels', 'fits')
+
+
+class FitCache:
+    r""" Results of fits stored on the disk, by hash of the inputs of the
+    fits
+
+    Parameters
+    ----------
+    directory: str
+        directory of the cache, created if needed. Default to
+        :func:`default_directory`.
+
+    max_size: int
+        maximum size of the cache in bytes. The results used the least
+        recently are removed when it is exceeded. Default to 256 MiB.
+
+    Examples
+    --------
+    >>> import QENSmodels
+    >>> w = np.linspace(-2, 2, 201)
+    >>> data = QENSmodels.sqwDeltaLorentz(w, [0.5, 1.], 2., 0., 0.3, 0.2)
+    >>> directory = tempfile.TemporaryDirectory()
+    >>> cache = FitCache(directory.name)
+    >>> first = QENSmodels.fit_model('DeltaLorentz', w, [0.5, 1.], data,
+    ...                              p0={'A0': 0.5, 'hwhm': 0.5},
+    ...                              cache=cache)
+    >>> again = QENSmodels.fit_model('DeltaLorentz', w, [0.5, 1.], data,
+    ...                              p0={'A0': 0.5, 'hwhm': 0.5},
+    ...                              cache=cache)
+    >>> len(cache), first.cached, again.cached
+    (1, False, True)
+    >>> round(again.params['hwhm'], 6)
+    0.2
+    >>> cache.clear()
+    1
+    >>> directory.cleanup()
+
+    Notes
+    -----
+    The key of a fit is the SHA-256 hash of
+
+    * the version of the package, and the name and the `sqw` function of
+      the model
+
+    * the energy and momentum transfers, the data, their uncertainties,
+      the corrections of the model and the resolution evaluated on the
+      energy transfers
+
+    * the initial values, the parameters fitted per q, the fixed parameters,
+      the bounds of all the parameters and the options of the optimizer
+
+    so that any change of these inputs gives a new fit. The options given
+    as arrays or lists of numbers (e.g. `x_scale`) are hashed through their
+    values, as the data. The others are hashed through their
+    representation, such that callables given as options (e.g. a custom
+    loss) do not give the same key from one session to the next.
+
+    """
+
+    def __init__(
+            self,
+            directory: Optional[str] = None,
+            max_size: int = 256 * 2 ** 20
+    ):
+        if max_size < 0:
+            raise ValueError('max_size should be positive or zero')
+        self.directory = directory or default_directory()
+        self.max_size = int(max_size)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def __repr__(self) -> str:
+        return 'FitCache({!r})'.format(self.directory)
+
+    def __len__(self) -> int:
+        return len(self.entries())
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    @staticmethod
+    def key(
+            spec: 'QENSmodels.models.ModelSpec',
+            dataset: 'QENSmodels.fitting.Dataset',
+            p0: Dict,
+            per_q: Iterable[str],
+            fixed: Iterable[str],
+            bounds: Dict[str, Tuple[float, float]],
+            options: Dict
+    ) -> str:
+        """ Hash of the inputs of a fit, see Notes of :class:`FitCache` """
+        digest = hashlib.sha256()
+
+        def add(*items):
+            for item in items:
+                if isinstance(item, np.ndarray):
+                    item = np.ascontiguousarray(item)
+                    digest.update(repr((item.dtype.str, item.shape))
+                                  .encode())
+                    digest.update(item.tobytes())
+                else:
+                    digest.update(repr(item).encode())
+                digest.update(b'\0')
+
+        add(QENSmodels.__version__, spec.name,
+            '{}.{}'.format(spec.sqw.__module__, spec.sqw.__qualname__))
+        add(dataset.w, dataset.q, dataset.data, dataset.error,
+            dataset.temperature, dataset.msd, dataset.unit)
+        if dataset.resolution is not None:
+            add(dataset.resolution.evaluate(dataset.w))
+        else:
+            add(None)
+        for name in sorted(p0):
+            add(name, np.asarray(p0[name], dtype=np.float64))
+        add(sorted(per_q), sorted(fixed),
+            sorted(dict(spec.bounds, **bounds).items()))
+        for name in sorted(options):
+            value = options[name]
+            if isinstance(value, (list, tuple)):
+                # the representation of long arrays is truncated
+                array = np.asarray(value)
+                if array.dtype != object:
+                    value = array
+            add(name, value)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional['QENSmodels.fitting.FitResult']:
+        """ Result stored for `key`, or None """
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as stored:
+                result = _unpack(stored)
+        except (OSError, KeyError, ValueError):
+            # missing, or partially written by an interrupted process
+            return None
+        # the modification time gives the order of eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return result
+
+    def put(self, key: str, result: 'QENSmodels.fitting.FitResult'):
+        """ Store `result` for `key`, then remove the results used the
+        least recently if the cache is too large """
+        handle, temporary = tempfile.mkstemp(suffix='.tmp',
+                                             dir=self.directory)
+        try:
+            with os.fdopen(handle, 'wb') as stream:
+                np.savez(stream, **_pack(result))
+            # atomic, so that concurrent fits never read partial results
+            os.replace(temporary, self._path(key))
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        self.prune()
+
+    def entries(self) -> List[Tuple[str, int, float]]:
+        """ (key, size in bytes, time of last use) of the stored results,
+        from the least to the most recently used """
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.npz'):
+                continue
+            try:
+                status = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((name[:-4], status.st_size, status.st_mtime))
+        return sorted(entries, key=lambda item: item[2])
+
+    @property
+    def size(self) -> int:
+        """ Size of the stored results in bytes """
+        return sum(size for _, size, _ in self.entries())
+
+    def prune(self, max_size: Optional[int] = None) -> int:
+        """ Remove the results used the least recently until the cache is
+        smaller than `max_size` bytes, by default :attr:`max_size`, and
+        return the number of results removed """
+        max_size = self.max_size if max_size is None else max_size
+        entries = self.entries()
+        size = sum(item[1] for item in entries)
+        removed = 0
+        for key, item_size, _ in entries:
+            if size <= max_size:
+                break
+            self._remove(key)
+            size -= item_size
+            removed += 1
+        return removed
+
+    def clear(self) -> int:
+        """ Remove all the stored results and return their number """
+        return self.prune(0)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.npz')
+
+    def _remove(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            # already removed by another process
+            pass
+
+
+def _pack(result: 'QENSmodels.fitting.FitResult') -> Dict[str, np.ndarray]:
+    """ Arrays storing `result` """
+    arrays = {'param/' + name: np.asarray(value)
+              for name, value in result.params.items()}
+    arrays.update({'stderr/' + name: np.asarray(value)
+                   for name, value in result.stderr.items()})
+    for name in ('chisq', 'redchi', 'nfev', 'njev', 'success', 'message',
+                 'seed'):
+        arrays[name] = np.asarray(getattr(result, name))
+    for name in ('best_fit', 'covariance'):
+        if getattr(result, name) is not None:
+            arrays[name] = getattr(result, name)
+    return arrays
+
+
+def _unpack(stored) -> 'QENSmodels.fitting.FitResult':
+    """ Result stored by :func:`_pack` """
+    def value(name):
+        item = stored[name]
+        return item.item() if item.ndim == 0 else item
+
+    def group(prefix):
+        return {name[len(prefix):]: value(name) for name in stored.files
+                if name.startswith(prefix)}
+
+    return QENSmodels.fitting.FitResult(
+        params=group('param/'), stderr=group('stderr/'),
+        chisq=value('chisq'), redchi=value('redchi'), nfev=value('nfev'),
+        njev=value('njev'), success=value('success'),
+        message=value('message'), seed=value('seed'),
+        best_fit=stored['best_fit'] if 'best_fit' in stored.files else None,
+        covariance=stored['covariance']
+        if 'covariance' in stored.files else None,
+        cached=True)
+
+
+def main(argv: Optional[List[str]] = None):
+    """ Command line interface to inspect and prune a cache """
+    parser = argparse.ArgumentParser(
+        prog='python -m QENSmodels.fit_cache',
+        description='Inspect and prune the cache of the fits of QENSmodels')
+    parser.add_argument('--directory', default=None,
+                        help='directory of the cache (default: '
+                             '${} or ~/.cache/QENSmodels/fits)'.format(
+                                 ENVIRONMENT_VARIABLE))
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('info', help='number and size of the results')
+    commands.add_parser('list', help='stored results, the least recently '
+                                     'used first')
+    prune = commands.add_parser(
+        'prune', help='remove the results used the least recently')
+    prune.add_argument('--max-size', type=float, required=True,
+                       help='maximum size of the cache in MiB')
+    commands.add_parser('clear', help='remove all the results')
+    arguments = parser.parse_args(argv)
+
+    cache = FitCache(arguments.directory)
+    if arguments.command == 'info':
+        print('directory: {}'.format(cache.directory))
+        print('results:   {}'.format(len(cache)))
+        print('size:      {:.2f} MiB'.format(cache.size / 2 ** 20))
+    elif arguments.command == 'list':
+        for key, size, used in cache.entries():
+            print('{}  {:>10} B  {}'.format(
+                key, size, time.strftime('%Y-%m-%d %H:%M:%S',
+                                         time.localtime(used))))
+    elif arguments.command == 'prune':
+        removed = cache.prune(int(arguments.max_size * 2 ** 20))
+        print('{} result(s) removed'.format(removed))
+    else:
+        print('{} result(s) removed'.format(cache.clear()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,1078 @@
+"""
+Fitting of the models of the library to (q, w) datasets with
+:func:`scipy.optimize.least_squares`, using the analytic derivatives of
+:mod:`QENSmodels.models`
+"""
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from scipy.optimize import least_squares
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, \
+    Sequence, Tuple, Union
+
+from QENSmodels.estimators import estimate_components, initial_guess
+from QENSmodels.models import ModelSpec, get_model
+from QENSmodels.resolution import Resolution
+
+if TYPE_CHECKING:
+    # not imported at run time, so that the command line interface of
+    # QENSmodels.fit_cache can be run with python -m
+    from QENSmodels.fit_cache import FitCache
+
+
+@dataclass
+class Dataset:
+    """ Measured intensities of one sample, for several q
+
+    Parameters
+    ----------
+    w: :class:`~numpy:numpy.ndarray`
+        energy transfer, common to all q
+
+    q: :class:`~numpy:numpy.ndarray`
+        momentum transfer
+
+    data: :class:`~numpy:numpy.ndarray`
+        intensities, of shape (q.size, w.size)
+
+    error: :class:`~numpy:numpy.ndarray`
+        uncertainties of `data`, of the same shape. The points with an
+        uncertainty lower than or equal to zero are not fitted. Default to
+        one for all the points.
+
+    resolution: :class:`~QENSmodels.Resolution`
+        resolution function, with one spectrum or one spectrum per q. If
+        None (default), the model is not convolved.
+
+    temperature: float
+        temperature of the sample (in K). If given, the model is multiplied
+        by the detailed balance factor before the convolution, see
+        :func:`~QENSmodels.detailed_balance_factor`. Default to None.
+
+    msd: float
+        mean square displacement (in Angstrom^2). If given, the model is
+        multiplied by the Debye-Waller factor, see
+        :func:`~QENSmodels.debye_waller_factor`. Default to None.
+
+    unit: str
+        unit of `w` for the detailed balance factor: `meV` (default), `ueV`
+        or `1/ps`
+    """
+    w: np.ndarray
+    q: np.ndarray
+    data: np.ndarray
+    error: Optional[np.ndarray] = None
+    resolution: Optional[Resolution] = None
+    temperature: Optional[float] = None
+    msd: Optional[float] = None
+    unit: str = 'meV'
+
+    def __post_init__(self):
+        self.w = np.asarray(self.w, dtype=np.float64)
+        self.q = np.atleast_1d(np.asarray(self.q, dtype=np.float64))
+        shape = (self.q.size, self.w.size)
+        self.data = np.reshape(np.asarray(self.data, dtype=np.float64),
+                               shape)
+        self.error = np.ones(shape) if self.error is None \
+            else np.reshape(np.asarray(self.error, dtype=np.float64), shape)
+
+    @property
+    def corrections(self) -> Dict:
+        """ Corrections of the model, as keyword arguments of
+        :meth:`~QENSmodels.models.ModelSpec.evaluate` """
+        return dict(temperature=self.temperature, msd=self.msd,
+                    unit=self.unit)
+
+
+@dataclass
+class FitResult:
+    """ Result of :func:`fit_model`
+
+    Attributes
+    ----------
+    params: dict
+        values of all the parameters of the model, as arrays of size q.size
+        for the parameters fitted per q
+
+    stderr: dict
+        standard errors of the fitted parameters, scaled by the square root
+        of the reduced chi-square
+
+    chisq: float
+        sum of the squared normalized residuals
+
+    redchi: float
+        chi-square divided by the number of degrees of freedom
+
+    nfev: int
+        number of evaluations of the model
+
+    njev: int
+        number of evaluations of its derivatives
+
+    success: bool
+        whether the optimizer converged
+
+    message: str
+        message of the optimizer
+
+    seed: str
+        origin of the initial values, see :func:`fit_scan`
+
+    best_fit: :class:`~numpy:numpy.ndarray`
+        model for the fitted parameters
+
+    covariance: :class:`~numpy:numpy.ndarray`
+        covariance matrix of the fitted parameters, in the order of
+        `stderr`, the parameters fitted per q being expanded q by q
+
+    cached: bool
+        whether the result was read from a
+        :class:`~QENSmodels.fit_cache.FitCache`
+    """
+    params: Dict[str, Union[float, np.ndarray]]
+    stderr: Dict[str, Union[float, np.ndarray]]
+    chisq: float
+    redchi: float
+    nfev: int
+    njev: int
+    success: bool
+    message: str
+    seed: str = 'initial'
+    best_fit: Optional[np.ndarray] = field(default=None, repr=False)
+    covariance: Optional[np.ndarray] = field(default=None, repr=False)
+    cached: bool = False
+
+
+class _Problem:
+    """ Residuals of a model and their derivatives as functions of the
+    vector of the fitted parameters """
+
+    def __init__(
+            self,
+            spec: ModelSpec,
+            dataset: Dataset,
+            p0: Dict[str, Union[float, np.ndarray]],
+            per_q: Iterable[str],
+            fixed: Iterable[str],
+            bounds: Dict[str, Tuple[float, float]]
+    ):
+        self.spec = spec
+        self.dataset = dataset
+        self.mask = dataset.error > 0
+        self.weights = np.divide(1., dataset.error, where=self.mask,
+                                 out=np.zeros_like(dataset.error))
+        self.per_q = tuple(per_q)
+        unknown = (set(p0) | set(self.per_q) | set(fixed) | set(bounds)) \
+            - set(spec.param_names)
+        if unknown:
+            raise ValueError('unknown parameter(s): {}'.format(
+                ', '.join(sorted(unknown))))
+
+        n_q = dataset.q.size
+        self.values = {}
+        for name in spec.param_names:
+            value = np.asarray(p0.get(name, spec.defaults[name]),
+                               dtype=np.float64)
+            if name in self.per_q:
+                value = np.broadcast_to(value, (n_q,)).copy()
+            elif value.ndim:
+                raise ValueError('{} is not fitted per q and should be a '
+                                 'number'.format(name))
+            else:
+                value = float(value)
+            self.values[name] = value
+        for name in spec.integer:
+            self.values[name] = int(round(self.values[name]))
+        # the model is then evaluated without validation at each iteration
+        spec.validate(dataset.q, **self.values)
+
+        # (name, index of q or None) of the fitted parameters
+        self.columns: List[Tuple[str, Optional[int]]] = []
+        for name in spec.param_names:
+            if name in spec.integer or name in fixed:
+                continue
+            if name in self.per_q:
+                self.columns += [(name, i) for i in range(n_q)]
+            else:
+                self.columns.append((name, None))
+        all_bounds = dict(spec.bounds, **bounds)
+        self.lower = np.array([all_bounds[name][0]
+                               for name, _ in self.columns])
+        self.upper = np.array([all_bounds[name][1]
+                               for name, _ in self.columns])
+        # rows of the residuals of each q, which are contiguous
+        offsets = np.concatenate([[0], np.cumsum(self.mask.sum(axis=1))])
+        self.blocks = [slice(start, stop)
+                       for start, stop in zip(offsets[:-1], offsets[1:])]
+
+    def vector(self, values: Dict) -> np.ndarray:
+        """ Vector of the fitted parameters, inside the bounds """
+        x = np.array([values[name] if index is None else values[name][index]
+                      for name, index in self.columns], dtype=np.float64)
+        return np.clip(x, self.lower, self.upper)
+
+    def unpack(self, x: np.ndarray) -> Dict:
+        """ Values of all the parameters for the vector `x` """
+        values = {name: np.copy(value) if np.ndim(value) else value
+                  for name, value in self.values.items()}
+        for (name, index), value in zip(self.columns, x):
+            if index is None:
+                values[name] = value
+            else:
+                values[name][index] = value
+        return values
+
+    def model(self, x: np.ndarray) -> np.ndarray:
+        """ Model for all q, convolved with the resolution """
+        dataset = self.dataset
+        return self.spec.evaluate(dataset.w, dataset.q, check=False,
+                                  resolution=dataset.resolution,
+                                  **dataset.corrections, **self.unpack(x))
+
+    def residuals(self, x: np.ndarray) -> np.ndarray:
+        return ((self.model(x) - self.dataset.data)
+                * self.weights)[self.mask]
+
+    def derivatives(self, x: np.ndarray) -> np.ndarray:
+        """ Derivatives of the model with respect to all the parameters,
+        convolved with the resolution """
+        dataset = self.dataset
+        return self.spec.jacobian(dataset.w, dataset.q,
+                                  resolution=dataset.resolution,
+                                  **dataset.corrections, **self.unpack(x))
+
+    def jacobian(self, x: np.ndarray) -> np.ndarray:
+        derivatives = self.derivatives(x) * self.weights
+
+        jacobian = np.zeros((int(self.mask.sum()), len(self.columns)))
+        for k, (name, index) in enumerate(self.columns):
+            derivative = derivatives[self.spec.index[name]]
+            if index is None:
+                jacobian[:, k] = derivative[self.mask]
+            else:
+                # a parameter of one q only changes the residuals of that q
+                jacobian[self.blocks[index], k] = \
+                    derivative[index][self.mask[index]]
+        return jacobian
+
+
+class _TimeProblem(_Problem):
+    """ Residuals of the intermediate scattering function of a model,
+    multiplied by the Fourier transform of the resolution, and their
+    derivatives. `dataset.w` holds the times. """
+
+    def __init__(
+            self,
+            spec: ModelSpec,
+            dataset: Dataset,
+            p0: Dict[str, Union[float, np.ndarray]],
+            per_q: Iterable[str],
+            fixed: Iterable[str],
+            bounds: Dict[str, Tuple[float, float]],
+            resolution: Optional[np.ndarray]
+    ):
+        # the center only gives a phase in the time domain
+        super().__init__(spec, dataset, p0, per_q,
+                         tuple(fixed) + ('center',), bounds)
+        self.resolution = resolution
+
+    def model(self, x: np.ndarray) -> np.ndarray:
+        """ Intermediate scattering function for all q, multiplied by the
+        transform of the resolution """
+        dataset = self.dataset
+        model = self.spec.evaluate_iqt(dataset.w, dataset.q, check=False,
+                                       **self.unpack(x))
+        if self.resolution is not None:
+            model *= self.resolution
+        return model
+
+    def derivatives(self, x: np.ndarray) -> np.ndarray:
+        dataset = self.dataset
+        derivatives = self.spec.jacobian_iqt(dataset.w, dataset.q,
+                                             **self.unpack(x))
+        if self.resolution is not None:
+            derivatives *= self.resolution
+        return derivatives
+
+
+def fit_model(
+        model: Union[str, Callable, ModelSpec],
+        w: Union[list, np.ndarray],
+        q: Union[float, list, np.ndarray],
+        data: np.ndarray,
+        error: Optional[np.ndarray] = None,
+        resolution: Optional[Resolution] = None,
+        p0: Optional[Dict[str, Union[float, np.ndarray]]] = None,
+        per_q: Iterable[str] = ('scale', 'center'),
+        fixed: Iterable[str] = (),
+        bounds: Optional[Dict[str, Tuple[float, float]]] = None,
+        temperature: Optional[float] = None,
+        msd: Optional[float] = None,
+        unit: str = 'meV',
+        cache: Optional['FitCache'] = None,
+        **kwargs
+) -> FitResult:
+    """ Fit a model of the library to a (q, w) dataset
+
+    Parameters
+    ----------
+    model: str, callable or :class:`~QENSmodels.models.ModelSpec`
+        model of the library, see :func:`~QENSmodels.models.get_model`
+
+    w, q, data, error, resolution, temperature, msd, unit:
+        dataset to fit and corrections of the model, see :class:`Dataset`
+
+    p0: dict
+        initial values of the parameters, numbers or arrays of size q.size
+        for the parameters in `per_q`. Default to the default values of the
+        model.
+
+    per_q: iterable of str
+        names of the parameters fitted per q. The other parameters are
+        shared by all q. Default to `scale` and `center`.
+
+    fixed: iterable of str
+        names of the parameters which are not fitted. The parameters taking
+        integer values, such as `Nsites`, are never fitted.
+
+    bounds: dict
+        (lower, upper) bounds of some parameters, overriding those of the
+        model, see :attr:`~QENSmodels.models.ModelSpec.bounds`
+
+    cache: :class:`~QENSmodels.fit_cache.FitCache`
+        persistent cache from which the result is read if the same fit was
+        already done, and in which it is stored otherwise. Default to None,
+        i.e. the fit is always done.
+
+    kwargs:
+        options of :func:`scipy.optimize.least_squares`
+
+    Return
+    ------
+    :class:`FitResult`
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> import QENSmodels
+    >>> w = np.linspace(-2, 2, 201)
+    >>> q = [0.5, 1.]
+    >>> data = QENSmodels.sqwDeltaLorentz(w, q, 2., 0., 0.3, 0.2)
+    >>> result = fit_model('DeltaLorentz', w, q, data,
+    ...                    p0={'A0': 0.5, 'hwhm': 0.5})
+    >>> round(result.params['A0'], 6), round(result.params['hwhm'], 6)
+    (0.3, 0.2)
+
+    """
+    dataset = Dataset(w, q, data, error, resolution, temperature, msd, unit)
+    return _fit(get_model(model), dataset, p0 or {}, per_q, fixed,
+                bounds or {}, kwargs, cache)
+
+
+def _fit(
+        spec: ModelSpec,
+        dataset: Dataset,
+        p0: Dict,
+        per_q: Iterable[str],
+        fixed: Iterable[str],
+        bounds: Dict,
+        options: Dict,
+        cache: Optional['FitCache'] = None
+) -> FitResult:
+    """ Fit of `spec` to `dataset`, see :func:`fit_model`, read from
+    `cache` if it was already done """
+    if cache is None:
+        return _solve(_Problem(spec, dataset, p0, per_q, fixed, bounds),
+                      options)
+    key = cache.key(spec, dataset, p0, per_q, fixed, bounds, options)
+    result = cache.get(key)
+    if result is None:
+        result = _solve(_Problem(spec, dataset, p0, per_q, fixed, bounds),
+                        options)
+        cache.put(key, result)
+    return result
+
+
+def _solve(problem: _Problem, options: Dict) -> FitResult:
+    """ Least-squares solution of `problem` """
+    options = dict(dict(x_scale='jac'), **options)
+    solution = least_squares(problem.residuals, problem.vector(problem.values),
+                             jac=problem.jacobian,
+                             bounds=(problem.lower, problem.upper), **options)
+
+    chisq = float(np.sum(solution.fun ** 2))
+    dof = max(solution.fun.size - solution.x.size, 1)
+    redchi = chisq / dof
+    # covariance from the derivatives at the solution, as in lmfit
+    covariance = np.linalg.pinv(solution.jac.T @ solution.jac) * redchi
+    errors = np.sqrt(np.abs(np.diag(covariance)))
+
+    params = problem.unpack(solution.x)
+    stderr = problem.unpack(errors)
+    stderr = {name: stderr[name] for name, _ in problem.columns}
+    return FitResult(params=params, stderr=stderr, chisq=chisq,
+                     redchi=redchi, nfev=solution.nfev,
+                     njev=solution.njev or 0, success=solution.success,
+                     message=solution.message,
+                     best_fit=problem.model(solution.x),
+                     covariance=covariance)
+
+
+def fit_iqt(
+        model: Union[str, Callable, ModelSpec],
+        t: Union[list, np.ndarray],
+        q: Union[float, list, np.ndarray],
+        data: np.ndarray,
+        error: Optional[np.ndarray] = None,
+        resolution: Optional[Union[Resolution, np.ndarray]] = None,
+        p0: Optional[Dict[str, Union[float, np.ndarray]]] = None,
+        per_q: Iterable[str] = ('scale',),
+        fixed: Iterable[str] = (),
+        bounds: Optional[Dict[str, Tuple[float, float]]] = None,
+        **kwargs
+) -> FitResult:
+    """ Fit the intermediate scattering function of a model of the library
+    to time-domain data, such as neutron spin-echo data or Fourier
+    transformed spectra
+
+    Parameters
+    ----------
+    model: str, callable or :class:`~QENSmodels.models.ModelSpec`
+        model of the library, see :func:`~QENSmodels.models.get_model`
+
+    t: list or :class:`~numpy:numpy.ndarray`
+        time, in the inverse unit of the energy transfer of the model
+
+    q, data, error:
+        dataset to fit, of shape (q.size, t.size), see :class:`Dataset`
+
+    resolution: :class:`~QENSmodels.Resolution` or array
+        resolution by which the model is multiplied: a resolution function,
+        whose Fourier transform is used (see
+        :meth:`~QENSmodels.Resolution.fourier`), or its transform sampled at
+        `t`, of shape (t.size,) or (q.size, t.size). If None (default), the
+        data are assumed to be divided by the transform of the resolution.
+
+    p0, per_q, fixed, bounds, kwargs:
+        see :func:`fit_model`. `center`, which only gives a phase in the
+        time domain, is not fitted.
+
+    Return
+    ------
+    :class:`FitResult`
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> import QENSmodels
+    >>> t = np.linspace(0., 10., 51)
+    >>> data = QENSmodels.iqtJumpTranslationalDiffusion(t, [0.5, 1.], 0.8,
+    ...                                                 0.3, 1.2)
+    >>> result = fit_iqt('JumpTranslationalDiffusion', t, [0.5, 1.], data,
+    ...                  p0={'D': 0.1, 'resTime': 0.5})
+    >>> round(result.params['D'], 4), round(result.params['resTime'], 4)
+    (0.3, 1.2)
+
+    Notes
+    -----
+    The convolution with the resolution in energy becomes a product in
+    time, and the Lorentzians become exponential decays, so that each
+    evaluation of the model is much cheaper than in :func:`fit_model`.
+    """
+    dataset = Dataset(t, q, data, error)
+    if isinstance(resolution, Resolution):
+        resolution = resolution.fourier(dataset.w)
+    elif resolution is not None:
+        resolution = np.asarray(resolution, dtype=np.float64)
+    problem = _TimeProblem(get_model(model), dataset, p0 or {}, per_q, fixed,
+                           bounds or {}, resolution)
+    return _solve(problem, kwargs)
+
+
+def rebin(
+        w: Union[list, np.ndarray],
+        data: np.ndarray,
+        error: Optional[np.ndarray] = None,
+        factor: int = 2
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ Average groups of `factor` consecutive energy transfers
+
+    Parameters
+    ----------
+    w: list or :class:`~numpy:numpy.ndarray`
+        energy transfer
+
+    data: :class:`~numpy:numpy.ndarray`
+        intensities, of shape (..., w.size)
+
+    error: :class:`~numpy:numpy.ndarray`
+        uncertainties of `data`, of the same shape. The points with an
+        uncertainty lower than or equal to zero are left out of the
+        averages. Default to one for all the points.
+
+    factor: int
+        number of points per group. Default to 2.
+
+    Return
+    ------
+    tuple of :class:`~numpy:numpy.ndarray`
+        energy transfers, intensities and uncertainties of the groups. The
+        groups without any valid point have a zero uncertainty.
+
+    Examples
+    --------
+    >>> w, data, error = rebin([0., 1., 2., 3., 4.], [1., 3., 2., 2., 7.])
+    >>> w, data, error
+    (array([0.5, 2.5]), array([2., 2.]), array([0.70710678, 0.70710678]))
+
+    Notes
+    -----
+    The last ``w.size % factor`` points, which do not fill a group, are
+    left out, so that a uniform grid stays uniform.
+    """
+    w = np.asarray(w, dtype=np.float64)
+    data = np.asarray(data, dtype=np.float64)
+    error = np.ones(data.shape) if error is None \
+        else np.asarray(error, dtype=np.float64)
+    if factor < 1 or w.size < factor:
+        raise ValueError('factor should be between 1 and w.size')
+    size = w.size // factor * factor
+    groups = (-1, factor)
+
+    def grouped(values):
+        values = values[..., :size]
+        return np.reshape(values, values.shape[:-1] + groups)
+
+    valid = grouped(error > 0)
+    count = valid.sum(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        data = np.where(valid, grouped(data), 0.).sum(axis=-1) / count
+        error = np.sqrt(np.where(valid, grouped(error) ** 2, 0.)
+                        .sum(axis=-1)) / count
+    empty = count == 0
+    data[empty] = 0.
+    error[empty] = 0.
+    return grouped(w).mean(axis=-1), data, error
+
+
+def _rebin_dataset(dataset: Dataset, factor: int) -> Dataset:
+    """ `dataset` averaged over groups of `factor` energy transfers, with
+    its resolution averaged in the same way """
+    w, data, error = rebin(dataset.w, dataset.data, dataset.error, factor)
+    resolution = dataset.resolution
+    if resolution is not None:
+        # resolution already centered, sampled on the grid of the data
+        spectra = rebin(dataset.w, resolution.evaluate(dataset.w),
+                        factor=factor)[1]
+        resolution = Resolution(w, spectra, center=False)
+    return Dataset(w, dataset.q, data, error, resolution,
+                   dataset.temperature, dataset.msd, dataset.unit)
+
+
+def fit_multiresolution(
+        model: Union[str, Callable, ModelSpec],
+        w: Union[list, np.ndarray],
+        q: Union[float, list, np.ndarray],
+        data: np.ndarray,
+        error: Optional[np.ndarray] = None,
+        resolution: Optional[Resolution] = None,
+        p0: Optional[Dict[str, Union[float, np.ndarray]]] = None,
+        per_q: Iterable[str] = ('scale', 'center'),
+        fixed: Iterable[str] = (),
+        bounds: Optional[Dict[str, Tuple[float, float]]] = None,
+        temperature: Optional[float] = None,
+        msd: Optional[float] = None,
+        unit: str = 'meV',
+        factors: Sequence[int] = (16, 4),
+        **kwargs
+) -> List[FitResult]:
+    """ Fit a model of the library to a (q, w) dataset from coarse to fine
+    energy grids, each fit starting from the parameters of the previous one
+
+    Parameters
+    ----------
+    model, w, q, data, error, resolution, p0, per_q, fixed, bounds:
+        see :func:`fit_model`
+
+    temperature, msd, unit, kwargs:
+        see :func:`fit_model`
+
+    factors: sequence of int
+        numbers of energy transfers averaged together by :func:`rebin` on
+        the coarse levels, from the coarsest. The levels with fewer than
+        four energy transfers, or fewer points than fitted parameters, are
+        skipped. The last fit always uses the full dataset. Default to
+        (16, 4).
+
+    Return
+    ------
+    list of :class:`FitResult`
+        one result per level, the last one for the full dataset. Their
+        `seed` attribute is `initial` for the first level and `previous`
+        for the others.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> import QENSmodels
+    >>> w = np.linspace(-2, 2, 801)
+    >>> data = QENSmodels.sqwDeltaLorentz(w, [0.5, 1.], 2., 0., 0.3, 0.2)
+    >>> results = fit_multiresolution('DeltaLorentz', w, [0.5, 1.], data,
+    ...                               p0={'A0': 0.5, 'hwhm': 0.5})
+    >>> [item.best_fit.shape[1] for item in results]
+    [50, 200, 801]
+    >>> round(results[-1].params['hwhm'], 6)
+    0.2
+
+    Notes
+    -----
+    The intensities, their uncertainties and the resolution are averaged
+    over groups of energy transfers, while the model is still sampled at
+    the center of the groups. The coarse levels are therefore only used to
+    bring the parameters close to their optimum, where the fit of the full
+    dataset converges in a few iterations: most evaluations of the model
+    are done on grids with `factors` times fewer points.
+    """
+    spec = get_model(model)
+    dataset = Dataset(w, q, data, error, resolution, temperature, msd, unit)
+    seed = dict(p0 or {})
+    bounds = bounds or {}
+    per_q = tuple(per_q)
+    results: List[FitResult] = []
+    for factor in list(factors) + [1]:
+        if factor == 1:
+            level = dataset
+        elif dataset.w.size // factor >= 4:
+            level = _rebin_dataset(dataset, factor)
+        else:
+            continue
+        problem = _Problem(spec, level, seed, per_q, fixed, bounds)
+        if factor != 1 and problem.mask.sum() < len(problem.columns):
+            continue
+        result = _solve(problem, kwargs)
+        if results:
+            result.seed = 'previous'
+        results.append(result)
+        seed = result.params
+    return results
+
+
+def fit_scan(
+        model: Union[str, Callable, ModelSpec],
+        datasets: Sequence[Dataset],
+        p0: Optional[Dict[str, Union[float, np.ndarray]]] = None,
+        per_q: Iterable[str] = ('scale', 'center'),
+        fixed: Iterable[str] = (),
+        bounds: Optional[Dict[str, Tuple[float, float]]] = None,
+        extrapolate: bool = False,
+        tolerance: float = 2.,
+        cache: Optional['FitCache'] = None,
+        **kwargs
+) -> List[FitResult]:
+    r""" Fit a model to an ordered sequence of datasets, such as a
+    temperature or a q scan, each fit starting from the parameters found
+    for the previous dataset
+
+    Parameters
+    ----------
+    model: str, callable or :class:`~QENSmodels.models.ModelSpec`
+        model of the library, see :func:`~QENSmodels.models.get_model`
+
+    datasets: sequence of :class:`Dataset`
+        datasets, ordered so that the parameters vary smoothly from one to
+        the next. The model of each dataset is corrected with its own
+        `temperature` and `msd`, e.g. along a temperature scan.
+
+    p0: dict
+        initial values of the parameters for the first dataset, also used
+        for the cold starts
+
+    per_q, fixed, bounds, cache, kwargs:
+        see :func:`fit_model`
+
+    extrapolate: bool
+        if True, the initial values are extrapolated linearly from the
+        results of the two previous datasets, instead of being those of the
+        previous one. Default to False.
+
+    tolerance: float
+        if the reduced chi-square of a warm-started fit is larger than
+        `tolerance` times that of the previous dataset, or if the fit did not
+        converge, the dataset is also fitted from `p0` and the best of the
+        two fits is kept. Default to 2.
+
+    Return
+    ------
+    list of :class:`FitResult`
+        one result per dataset. Their `seed` attribute is `initial` for the
+        first dataset, `previous` or `extrapolated` for the warm starts and
+        `cold` when the fit from `p0` was kept.
+
+    Notes
+    -----
+    The parameters fitted per q are only propagated between datasets with
+    the same number of q. Otherwise their values in `p0` are used.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> import QENSmodels
+    >>> w = np.linspace(-2, 2, 201)
+    >>> rng = np.random.default_rng(1)
+    >>> datasets = []
+    >>> for hwhm in (0.1, 0.2, 0.3):
+    ...     data = QENSmodels.sqwDeltaLorentz(w, [0.5, 1.], 2., 0., 0.3, hwhm)
+    ...     data += rng.normal(0., 0.01, data.shape)
+    ...     datasets.append(Dataset(w, [0.5, 1.], data, 0.01 + 0. * data))
+    >>> results = fit_scan('DeltaLorentz', datasets,
+    ...                    p0={'A0': 0.5, 'hwhm': 0.5}, extrapolate=True)
+    >>> [round(item.params['hwhm'], 2) for item in results]
+    [0.1, 0.2, 0.3]
+    >>> [item.seed for item in results]
+    ['initial', 'previous', 'extrapolated']
+
+    """
+    spec = get_model(model)
+    p0 = dict(p0 or {})
+    per_q = tuple(per_q)
+    bounds = bounds or {}
+    results: List[FitResult] = []
+    for k, dataset in enumerate(datasets):
+        if not results:
+            result = _fit(spec, dataset, p0, per_q, fixed, bounds, kwargs,
+                          cache)
+            results.append(result)
+            continue
+
+        previous = results[-1]
+        seed = _propagate(previous.params, p0, dataset.q.size)
+        origin = 'previous'
+        if extrapolate and len(results) > 1:
+            before = _propagate(results[-2].params, p0, dataset.q.size)
+            seed = {name: 2. * np.asarray(value) - before[name]
+                    if name not in spec.integer else value
+                    for name, value in seed.items()}
+            origin = 'extrapolated'
+        seed = _inside(spec, seed, bounds)
+
+        result = _fit(spec, dataset, seed, per_q, fixed, bounds, kwargs,
+                      cache)
+        result.seed = origin
+        if not result.success or result.redchi > tolerance * previous.redchi:
+            cold = _fit(spec, dataset, p0, per_q, fixed, bounds, kwargs,
+                        cache)
+            cold.nfev += result.nfev
+            cold.njev += result.njev
+            cold.seed = 'cold'
+            if cold.chisq < result.chisq:
+                result = cold
+        results.append(result)
+    return results
+
+
+def _propagate(
+        params: Dict[str, Union[float, np.ndarray]],
+        p0: Dict[str, Union[float, np.ndarray]],
+        size: int
+) -> Dict[str, Union[float, np.ndarray]]:
+    """ Parameters of a previous fit as initial values for a dataset with
+    `size` q values """
+    seed = {}
+    for name, value in params.items():
+        if np.ndim(value) and np.size(value) != size:
+            if name in p0:
+                seed[name] = p0[name]
+        else:
+            seed[name] = value
+    return seed
+
+
+def _inside(
+        spec: ModelSpec,
+        seed: Dict[str, Union[float, np.ndarray]],
+        bounds: Dict[str, Tuple[float, float]]
+) -> Dict[str, Union[float, np.ndarray]]:
+    """ Initial values moved inside the bounds, so that an extrapolation
+    does not start the fit on a boundary """
+    all_bounds = dict(spec.bounds, **bounds)
+    inside = {}
+    for name, value in seed.items():
+        if name in all_bounds:
+            lower, upper = all_bounds[name]
+            margin = 1e-6 * np.maximum(np.abs(value), 1e-3)
+            value = np.clip(value, lower + margin, upper - margin)
+        inside[name] = value
+    return inside
+
+
+@dataclass
+class TwoStageResult:
+    """ Result of :func:`fit_two_stage`
+
+    Attributes
+    ----------
+    per_q: list of :class:`FitResult`
+        fits of `sqwDeltaLorentz` to the data of each q
+
+    hwhm: :class:`FitResult`
+        fit of the widths of the Lorentzians as a function of q
+
+    global_fit: :class:`FitResult`
+        fit of the model to the whole dataset, started from the two first
+        stages, or None if it was not requested
+    """
+    per_q: List[FitResult]
+    hwhm: FitResult
+    global_fit: Optional[FitResult] = None
+
+
+def fit_per_q(
+        w: Union[list, np.ndarray],
+        q: Union[float, list, np.ndarray],
+        data: np.ndarray,
+        error: Optional[np.ndarray] = None,
+        resolution: Optional[Resolution] = None,
+        workers: Optional[int] = None,
+        **kwargs
+) -> List[FitResult]:
+    """ Fit a delta and a Lorentzian (`sqwDeltaLorentz`) to the data of each
+    q independently
+
+    Parameters
+    ----------
+    w, q, data, error, resolution:
+        dataset to fit, see :class:`Dataset`
+
+    workers: int
+        number of threads running the fits. Default to None, i.e. the
+        default of :class:`concurrent.futures.ThreadPoolExecutor`. With 1,
+        the fits are run one after the other.
+
+    kwargs:
+        options of :func:`scipy.optimize.least_squares`
+
+    Return
+    ------
+    list of :class:`FitResult`
+        one result per q. The initial values are estimated from the moments
+        of the data, see :func:`~QENSmodels.estimators.estimate_components`.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> import QENSmodels
+    >>> w = np.linspace(-2, 2, 201)
+    >>> data = np.array([QENSmodels.sqwDeltaLorentz(w, 1., 1., 0., 0.3, hwhm)
+    ...                  for hwhm in (0.1, 0.2)])
+    >>> results = fit_per_q(w, [0.5, 1.], data)
+    >>> [round(item.params['hwhm'], 6) for item in results]
+    [0.1, 0.2]
+
+    """
+    dataset = Dataset(w, q, data, error, resolution)
+    spec = get_model('DeltaLorentz')
+    estimate = estimate_components(dataset.w, dataset.data, error,
+                                   resolution)
+
+    def fit(i: int) -> FitResult:
+        if resolution is None or resolution.n_spectra == 1:
+            spectrum = resolution
+        else:
+            spectrum = resolution.spectrum(i)
+        rows = slice(i, i + 1)
+        p0 = dict(scale=estimate.scale[i], center=estimate.center[i],
+                  A0=estimate.eisf[i], hwhm=estimate.hwhm[i])
+        return _fit(spec, Dataset(dataset.w, dataset.q[rows],
+                                  dataset.data[rows], dataset.error[rows],
+                                  spectrum), p0, (), (), {}, kwargs)
+
+    if workers == 1:
+        return [fit(i) for i in range(dataset.q.size)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(fit, range(dataset.q.size)))
+
+
+def fit_hwhm(
+        model: Union[str, Callable, ModelSpec],
+        q: Union[float, list, np.ndarray],
+        hwhm: np.ndarray,
+        error: Optional[np.ndarray] = None,
+        p0: Optional[Dict[str, float]] = None,
+        bounds: Optional[Dict[str, Tuple[float, float]]] = None,
+        **kwargs
+) -> FitResult:
+    r""" Fit the q-dependence of the width of the Lorentzian of a model
+
+    Parameters
+    ----------
+    model: str, callable or :class:`~QENSmodels.models.ModelSpec`
+        model of the library with a single Lorentzian, such as
+        `BrownianTranslationalDiffusion`, `JumpTranslationalDiffusion` or
+        `ChudleyElliottDiffusion`
+
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer
+
+    hwhm: :class:`~numpy:numpy.ndarray`
+        half widths at half maximum, one per q
+
+    error: :class:`~numpy:numpy.ndarray`
+        uncertainties of `hwhm`. The widths with an uncertainty which is not
+        strictly positive and finite are not fitted. Default to one for all
+        the widths.
+
+    p0: dict
+        initial values of the parameters. Default to the default values of
+        the model.
+
+    bounds: dict
+        (lower, upper) bounds of some parameters, overriding those of the
+        model
+
+    kwargs:
+        options of :func:`scipy.optimize.least_squares`
+
+    Return
+    ------
+    :class:`FitResult`
+        fitted parameters of the model, other than `scale` and `center`,
+        and the fitted widths as `best_fit`
+
+    Examples
+    --------
+    >>> import QENSmodels
+    >>> q = [0.3, 0.6, 0.9, 1.2]
+    >>> hwhm = QENSmodels.hwhmJumpTranslationalDiffusion(q, 0.3, 1.)[0]
+    >>> result = fit_hwhm('JumpTranslationalDiffusion', q, hwhm)
+    >>> round(result.params['D'], 3), round(result.params['resTime'], 3)
+    (0.3, 1.0)
+
+    """
+    spec = get_model(model)
+    q = np.atleast_1d(np.asarray(q, dtype=np.float64))
+    hwhm = np.ravel(np.asarray(hwhm, dtype=np.float64))
+    error = np.ones(q.size) if error is None \
+        else np.ravel(np.asarray(error, dtype=np.float64))
+    mask = np.isfinite(error) & (error > 0) & np.isfinite(hwhm)
+    values = dict(spec.defaults, **(p0 or {}))
+    widths = spec.tables(q, **values)[0]
+    if widths.shape[-1] != 1:
+        raise ValueError('the width of {} is not given by a single '
+                         'Lorentzian'.format(spec.name))
+
+    names = [name for name in spec.parameters if name not in spec.integer]
+    all_bounds = dict(spec.bounds, **(bounds or {}))
+    lower = np.array([all_bounds[name][0] for name in names])
+    upper = np.array([all_bounds[name][1] for name in names])
+
+    def widths(x):
+        return spec.tables(q, **dict(values, **dict(zip(names, x))))[0][:, 0]
+
+    def residuals(x):
+        return (widths(x) - hwhm)[mask] / error[mask]
+
+    # the widths are computed in single precision
+    options = dict(dict(x_scale='jac', diff_step=1e-3), **kwargs)
+    x0 = np.clip([values[name] for name in names], lower, upper)
+    solution = least_squares(residuals, x0, bounds=(lower, upper), **options)
+
+    chisq = float(np.sum(solution.fun ** 2))
+    redchi = chisq / max(solution.fun.size - solution.x.size, 1)
+    covariance = np.linalg.pinv(solution.jac.T @ solution.jac) * redchi
+    errors = np.sqrt(np.abs(np.diag(covariance)))
+    params = dict(values, **dict(zip(names, solution.x.tolist())))
+    params.pop('scale')
+    params.pop('center')
+    return FitResult(params=params, stderr=dict(zip(names, errors.tolist())),
+                     chisq=chisq, redchi=redchi, nfev=solution.nfev,
+                     njev=solution.njev or 0, success=solution.success,
+                     message=solution.message,
+                     best_fit=widths(solution.x))
+
+
+def fit_two_stage(
+        model: Union[str, Callable, ModelSpec],
+        w: Union[list, np.ndarray],
+        q: Union[float, list, np.ndarray],
+        data: np.ndarray,
+        error: Optional[np.ndarray] = None,
+        resolution: Optional[Resolution] = None,
+        p0: Optional[Dict[str, float]] = None,
+        global_fit: bool = True,
+        workers: Optional[int] = None,
+        **kwargs
+) -> TwoStageResult:
+    r""" Fit a model with a single Lorentzian in two stages: one free
+    Lorentzian per q, then the q-dependence of its width
+
+    Parameters
+    ----------
+    model: str, callable or :class:`~QENSmodels.models.ModelSpec`
+        model of the library with a single Lorentzian, see :func:`fit_hwhm`
+
+    w, q, data, error, resolution:
+        dataset to fit, see :class:`Dataset`
+
+    p0: dict
+        initial values of the parameters of the fit of the widths. Default
+        to the values estimated by
+        :func:`~QENSmodels.estimators.initial_guess`.
+
+    global_fit: bool
+        if True (default), the model is then fitted to the whole dataset,
+        starting from the results of the two first stages
+
+    workers: int
+        number of threads running the fits of the first stage, see
+        :func:`fit_per_q`
+
+    kwargs:
+        options of :func:`scipy.optimize.least_squares`
+
+    Return
+    ------
+    :class:`TwoStageResult`
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> import QENSmodels
+    >>> w = np.linspace(-2, 2, 201)
+    >>> q = np.linspace(0.3, 1.5, 6)
+    >>> data = QENSmodels.sqwJumpTranslationalDiffusion(w, q, 1., 0., 0.3, 1.)
+    >>> result = fit_two_stage('JumpTranslationalDiffusion', w, q, data,
+    ...                        global_fit=False)
+    >>> widths = result.hwhm.params
+    >>> round(widths['D'], 2), round(widths['resTime'], 2)
+    (0.3, 1.0)
+
+    Notes
+    -----
+    The fits of the first stage, with four parameters each, and the fit of
+    the widths are much cheaper than the fit of the whole dataset, whose
+    number of evaluations is reduced when started close to the solution.
+    The widths are weighted by their standard errors.
+    """
+    spec = get_model(model)
+    dataset = Dataset(w, q, data, error, resolution)
+    per_q = fit_per_q(dataset.w, dataset.q, dataset.data, error, resolution,
+                      workers=workers, **kwargs)
+    hwhm = np.array([item.params['hwhm'] for item in per_q])
+    hwhm_error = np.array([item.stderr['hwhm'] if item.success else np.inf
+                           for item in per_q])
+    if p0 is None:
+        guess = initial_guess(spec, dataset.w, dataset.q, dataset.data,
+                              error, resolution)
+        p0 = {name: guess[name] for name in spec.parameters}
+    widths = fit_hwhm(spec, dataset.q, hwhm, hwhm_error, p0=p0, **kwargs)
+    result = TwoStageResult(per_q=per_q, hwhm=widths)
+
+    if global_fit:
+        seed = dict(widths.params)
+        seed.update(scale=np.array([item.params['scale'] for item in per_q]),
+                    center=np.array([item.params['center']
+                                     for item in per_q]))
+        result.global_fit = _fit(spec, dataset, seed, ('scale', 'center'),
+                                 (), {}, kwargs)
+    return result
@@ -0,0 +1,78 @@
+"""
+Fourier transform of spectra from energy transfer to time, to fit the
+intermediate scattering functions of the models to transformed data
+"""
+import numpy as np
+from typing import Optional, Tuple, Union
+
+
+def fourier_transform(
+        w: Union[list, np.ndarray],
+        sqw: Union[list, np.ndarray],
+        t: Union[float, list, np.ndarray],
+        error: Optional[Union[list, np.ndarray]] = None
+) -> Union[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+    r""" Cosine transform of spectra sampled in energy transfer
+
+    Parameters
+    ----------
+    w: list or :class:`~numpy:numpy.ndarray`
+        energy transfer, in increasing order
+
+    sqw: list or :class:`~numpy:numpy.ndarray`
+        spectra, of shape (..., w.size)
+
+    t: float, list or :class:`~numpy:numpy.ndarray`
+        time, in the inverse unit of `w`
+
+    error: list or :class:`~numpy:numpy.ndarray`
+        uncertainties of `sqw`, of the same shape. If given, their
+        propagation to the transform is also returned.
+
+    Return
+    ------
+    :class:`~numpy:numpy.ndarray`
+        transform of shape (..., t.size)
+
+    :class:`~numpy:numpy.ndarray`
+        if `error` is given, uncertainties of the transform, of the same
+        shape
+
+    Examples
+    --------
+    >>> import QENSmodels
+    >>> w = np.linspace(-200, 200, 400001)
+    >>> sqw = QENSmodels.lorentzian(w, 1., 0., 0.5)
+    >>> fourier_transform(w, sqw, [0., 1., 2.]).round(3)
+    array([0.998, 0.607, 0.368])
+
+    Notes
+    -----
+    The transform is
+
+    .. math::
+
+        I(t) = \int S(\omega) \cos(\omega t) d\omega
+
+    computed with the trapezoidal rule. It is the real part of the
+    intermediate scattering function, equal to it for spectra symmetric
+    around zero. The uncertainties are propagated assuming independent
+    points. The time range is limited by the spacing of `w` (Nyquist
+    time :math:`\pi / \Delta\omega`) and the time resolution by its range.
+    """
+    w = np.asarray(w, dtype=np.float64)
+    sqw = np.asarray(sqw, dtype=np.float64)
+    t = np.atleast_1d(np.asarray(t, dtype=np.float64))
+    if sqw.shape[-1] != w.size:
+        raise ValueError('the last dimension of sqw should match the size '
+                         'of w')
+    half = 0.5 * np.diff(w)
+    weights = np.zeros(w.size)
+    weights[:-1] += half
+    weights[1:] += half
+    kernel = weights[:, np.newaxis] * np.cos(np.outer(w, t))
+    iqt = sqw @ kernel
+    if error is None:
+        return iqt
+    error = np.broadcast_to(np.asarray(error, dtype=np.float64), sqw.shape)
+    return iqt, np.sqrt(error ** 2 @ kernel ** 2)
@@ -1,6 +1,9 @@
 import numpy as np
+from scipy.special import erf, erfc
 from typing import Union
 
+from QENSmodels._bins import bin_widths
+
 try:
     import QENSmodels
 except ImportError:
@@ -11,7 +14,8 @@ def gaussian(
         x: Union[float, list, np.ndarray],
         scale: float = 1.,
         center: float = 0.,
-        sigma: float = 1.
+        sigma: float = 1.,
+        binned: bool = False
 ) -> Union[float, list, np.ndarray]:
     r""" Gaussian model
 
@@ -29,10 +33,16 @@ def gaussian(
     sigma: float
         width parameter. Default to 1.
 
+    binned: bool
+        if True, `x` contains the edges of the bins of a histogram and the
+        normalized function is integrated analytically over each bin.
+        Default to False.
+
     Return
     ------
     float or :class:`~numpy:numpy.ndarray`
-       output number or array
+       output number or array, with `x.size - 1` values (the averages of
+       the function over the bins) if `binned` is True
 
     Examples
     --------
@@ -48,6 +58,9 @@ def gaussian(
     >>> round(result[1], 3)
     0.119
 
+    >>> gaussian([-1, 0, 1, 3], 1, 0, 1, binned=True).round(4)
+    array([0.3413, 0.3413, 0.0787])
+
 
     Notes
     -----
@@ -94,9 +107,38 @@ def gaussian(
       and used to renormalize the returned function whenever the integral
       is larger than 1.
 
+    * With `binned`, the average over the bin :math:`[a, b]` is
+
+    .. math::
+
+       \frac{\text{scale}}{2 (b - a)} \big(\text{erf}
+       \frac{b-\text{center}}{\sqrt{2}\sigma} - \text{erf}
+       \frac{a-\text{center}}{\sqrt{2}\sigma}\big)
+
+      computed with :math:`\text{erfc}` in the tails to keep its accuracy.
+      The integral is exact at any width, down to the delta of zero width,
+      so that no renormalization is needed and coarser energy grids can
+      be used.
+
     """
     x = np.asarray(x)
 
+    if binned:
+        x = x.astype(np.float64)
+        widths = bin_widths(x)
+        if sigma == 0:
+            model = QENSmodels.delta(x, 1.0, center, binned=True)
+        else:
+            edges = (x - center) / (np.sqrt(2.) * sigma)
+            lower, upper = edges[:-1], edges[1:]
+            # difference of the complementary error functions on the same
+            # side of the center, where the error functions round to 1
+            model = np.where(
+                lower > 0, erfc(lower) - erfc(upper),
+                np.where(upper < 0, erfc(-upper) - erfc(-lower),
+                         erf(upper) - erf(lower))) / (2. * widths)
+        return model * np.asarray(scale)
+
     if sigma == 0:
         model = QENSmodels.delta(x, 1.0, center)
     else:
@@ -63,45 +63,49 @@ def hwhmGaussianModel3D(
 
     """
     # Input validation
-    if D <= 0:
-        raise ValueError("D, the diffusion coefficient, should be positive")
-    if variance_ux <= 0:
-        raise ValueError("variance_ux, the variance, should be "
-                         "strictly positive")
+    _validate(D, variance_ux)
 
-    q = np.asarray(q, dtype=np.float64)
+    return _hwhm(q, D, variance_ux)
 
-    numberLorentz = 100
 
-    qisf = np.zeros((q.size, numberLorentz))
-    hwhm = np.zeros((q.size, numberLorentz))
-    al = np.zeros((q.size, numberLorentz))
+def componentsGaussianModel3D(
+        q: Union[float, list, np.ndarray],
+        D: float = 1.,
+        variance_ux: float = 1.
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ Widths, EISF and QISF of `sqwGaussianModel3D` as functions of the
+    momentum transfer `q`, from which :func:`~QENSmodels.assemble` builds the
+    model
 
-    arg = q**2 * variance_ux
+    Parameters
+    ----------
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer (non-fitting, in 1/Angstrom)
 
-    if q.size == 1:
-        for i in range(numberLorentz):
-            if arg > 0:
-                al[:, i] = np.exp(-arg) * arg ** i / np.math.factorial(i)  # type: ignore[attr-defined]  # noqa
-            else:
-                if i == 0:
-                    al[:, 0] = 1.
-                else:
-                    al[:, i] = 0.
-    else:
-        al[:, 0] = [np.exp(-item) if item > 0 else 1. for item in arg]
+    D: float
+        diffusion coefficient (in Angstrom**2/ps). Default to 1.
 
-        for i in range(1, numberLorentz):
-            al[:, i] = [np.exp(-item) * item ** i / np.math.factorial(i)  # type: ignore[attr-defined]  # noqa
-                        if item > 0 else 0. for item in arg]
+    variance_ux: float
+        variance :math:`<u_x^2>` of Gaussian random variable u_x
+        (in Angstrom^2), displacement from the origin.
+        Default to 1.
 
-    eisf = al[:, 0]
+    Returns
+    -------
+    hwhm, eisf, qisf: :class:`~numpy:numpy.ndarray`
+        see :func:`~QENSmodels.assemble`
 
-    for i in range(1, numberLorentz):
-        hwhm[:, i] = np.repeat(i * D / variance_ux, q.size)
-        qisf[:, i] = al[:, i]
+    Examples
+    --------
+    >>> hwhm, eisf, qisf = componentsGaussianModel3D([1., 2.], 0.5, 1.5)
+    >>> hwhm.shape
+    (2, 99)
+    >>> round(hwhm[0, 0], 3), round(qisf[1, 0], 4)
+    (0.333, 0.0149)
 
-    return hwhm, eisf, qisf
+    """
+    _validate(D, variance_ux)
+    return _components(q, D, variance_ux)
 
 
 def sqwGaussianModel3D(
@@ -208,23 +212,11 @@ def sqwGaussianModel3D(
 
     q = np.asarray(q, dtype=np.float64)
 
-    # Create output array
-    sqw = np.zeros((q.size, w.size))
-
     # Get widths, EISFs and QISFs of model
-    hwhm, eisf, qisf = hwhmGaussianModel3D(q, D, variance_ux)
+    hwhm, eisf, qisf = componentsGaussianModel3D(q, D, variance_ux)
 
-    # # Number of Lorentzians used to represent the infinite sum in R
-    numberLorentz = hwhm.shape[1]
-
-    # Sum of Lorentzians
-    for i in range(q.size):
-        sqw[i, :] = eisf[i] * QENSmodels.delta(w, scale, center)
-        for j in range(1, numberLorentz):
-            sqw[i, :] += qisf[i, j] * QENSmodels.lorentzian(w,
-                                                            scale,
-                                                            center,
-                                                            hwhm[i, j])
+    # Model, for all q at once
+    sqw = QENSmodels.assemble(w, hwhm, eisf, qisf, scale, center)
 
     # For Bumps use (needed for final plotting)
     # Using a 'Curve' in bumps for each Q --> needs vector array
@@ -232,3 +224,134 @@ def sqwGaussianModel3D(
         sqw = np.reshape(sqw, w.size)
 
     return sqw
+
+
+def iqtGaussianModel3D(
+        t: Union[float, list, np.ndarray],
+        q: Union[float, list, np.ndarray],
+        scale: float = 1,
+        D: float = 1.,
+        variance_ux: float = 1.
+) -> Union[float, list, np.ndarray]:
+    r""" Intermediate scattering function of `sqwGaussianModel3D`, i.e. its
+    Fourier transform from energy transfer to time
+
+    Parameters
+    ----------
+    t: float, list or :class:`~numpy:numpy.ndarray`
+        time (in ps)
+
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer (non-fitting, in 1/Angstrom).
+
+    scale: float
+        scale factor. Default to 1.
+
+    D: float
+        diffusion coefficient (in Angstrom**2/ps). Default to 1.
+
+    variance_ux: float
+        variance :math:`<u_x^2>` of Gaussian random variable u_x
+        (in Angstrom^2), displacement from the origin.
+        Default to 1.
+
+    Return
+    ------
+    :class:`~numpy:numpy.ndarray`
+        output array, of shape (q.size, t.size), or (t.size,) for a single q
+
+    Examples
+    --------
+    >>> iqt = iqtGaussianModel3D([0., 1., 2.], 1.)
+    >>> iqt.round(4)
+    array([1.    , 0.5315, 0.4212])
+
+    Notes
+    -----
+    The intermediate scattering function is the sum of the EISF and of
+    exponential decays whose rates are the half widths of the Lorentzians of
+    `sqwGaussianModel3D`, see :func:`~QENSmodels.assemble_iqt`. The center of
+    the peaks only gives a phase in the time domain and is not a parameter.
+
+    """
+    # Input validation
+    t = np.asarray(t)
+
+    q = np.asarray(q, dtype=np.float64)
+
+    # Get widths, EISFs and QISFs of model
+    hwhm, eisf, qisf = componentsGaussianModel3D(q, D, variance_ux)
+
+    # Intermediate scattering function, for all q at once
+    iqt = QENSmodels.assemble_iqt(t, hwhm, eisf, qisf, scale)
+
+    if q.size == 1:
+        iqt = np.reshape(iqt, t.size)
+
+    return iqt
+
+
+def _validate(
+        D: float,
+        variance_ux: float
+) -> None:
+    """ Check the values of the parameters of the model """
+    if D <= 0:
+        raise ValueError("D, the diffusion coefficient, should be positive")
+    if variance_ux <= 0:
+        raise ValueError("variance_ux, the variance, should be "
+                         "strictly positive")
+
+
+def _hwhm(
+        q: Union[float, list, np.ndarray],
+        D: float,
+        variance_ux: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ `hwhmGaussianModel3D` without the validation of the
+    parameters """
+    q = np.asarray(q, dtype=np.float64)
+
+    numberLorentz = 100
+
+    qisf = np.zeros((q.size, numberLorentz))
+    hwhm = np.zeros((q.size, numberLorentz))
+    al = np.zeros((q.size, numberLorentz))
+
+    arg = q**2 * variance_ux
+
+    if q.size == 1:
+        for i in range(numberLorentz):
+            if arg > 0:
+                al[:, i] = np.exp(-arg) * arg ** i / np.math.factorial(i)  # type: ignore[attr-defined]  # noqa
+            else:
+                if i == 0:
+                    al[:, 0] = 1.
+                else:
+                    al[:, i] = 0.
+    else:
+        al[:, 0] = [np.exp(-item) if item > 0 else 1. for item in arg]
+
+        for i in range(1, numberLorentz):
+            al[:, i] = [np.exp(-item) * item ** i / np.math.factorial(i)  # type: ignore[attr-defined]  # noqa
+                        if item > 0 else 0. for item in arg]
+
+    eisf = al[:, 0]
+
+    for i in range(1, numberLorentz):
+        hwhm[:, i] = np.repeat(i * D / variance_ux, q.size)
+        qisf[:, i] = al[:, i]
+
+    return hwhm, eisf, qisf
+
+
+def _components(
+        q: Union[float, list, np.ndarray],
+        D: float,
+        variance_ux: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ `componentsGaussianModel3D` without the validation of
+    the parameters """
+    hwhm, eisf, qisf = _hwhm(q, D, variance_ux)
+    # the first column corresponds to the elastic line
+    return hwhm[:, 1:], eisf, qisf[:, 1:]
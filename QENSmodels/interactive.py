@@ -0,0 +1,190 @@
+"""
+Evaluation of the models in the background of interactive plots, e.g. of
+Jupyter notebooks with sliders of ipywidgets, without blocking the user
+interface
+"""
+import asyncio
+import functools
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Union
+
+from QENSmodels.models import ModelSpec, get_model
+
+
+class AsyncEvaluator:
+    r""" Evaluation of a model in a worker thread, driven by an asyncio
+    event loop such as the one of a Jupyter kernel
+
+    Each call of :meth:`update` waits for `delay` seconds without a new
+    call, so that the many changes of a slider being dragged lead to a
+    single evaluation, and cancels the evaluation requested before it. The
+    model is first computed on every `preview`-th energy transfer, then on
+    the full grid, and both results are given to `callback`.
+
+    Parameters
+    ----------
+    model: str, callable or :class:`~QENSmodels.models.ModelSpec`
+        model of the library, see :func:`~QENSmodels.models.get_model`
+
+    w: list or :class:`~numpy:numpy.ndarray`
+        energy transfer
+
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer
+
+    callback: callable
+        function of signature ``callback(w, model, final)`` called in the
+        event loop with the energy transfers and the model, of shape
+        (q.size, w.size), computed for the last values of the parameters.
+        `final` is False for the preview and True for the full grid.
+
+    delay: float
+        time in seconds without new values of the parameters before the
+        model is computed. Default to 0.05.
+
+    preview: int
+        step of the energy transfers of the preview. No preview is computed
+        if it is 1 or if the grid has less than 4 times `preview` points.
+        Default to 8.
+
+    params:
+        initial values of the parameters, see
+        :meth:`~QENSmodels.models.ModelSpec.evaluate`
+
+    Attributes
+    ----------
+    params: dict
+        last values of all the parameters
+
+    evaluations: int
+        number of models given to `callback`, previews included
+
+    Examples
+    --------
+    >>> import asyncio
+    >>> import numpy as np
+    >>> def show(w, model, final):
+    ...     print(w.size, model.shape, final)
+    >>> async def drag():
+    ...     evaluator = AsyncEvaluator('JumpTranslationalDiffusion',
+    ...                                np.linspace(-2., 2., 801),
+    ...                                [0.5, 1.], show)
+    ...     for D in np.linspace(0.1, 0.5, 20):
+    ...         evaluator.update(D=D)
+    ...     await evaluator.wait()
+    ...     evaluator.close()
+    ...     return evaluator.evaluations
+    >>> asyncio.run(drag())
+    101 (2, 101) False
+    801 (2, 801) True
+    2
+
+    In a notebook, the evaluator is linked to the sliders with, e.g.,
+    ``slider.observe(lambda change: evaluator.update(D=change['new']),
+    names='value')``, and the callback updates the data of the plot.
+
+    Notes
+    -----
+    An evaluation already started in the worker thread cannot be
+    interrupted: it is completed, but its result is discarded and the
+    evaluation requested after it starts when the thread is free. The
+    parameters are validated in :meth:`update`, so that invalid values
+    raise a `ValueError` in the callback of the slider, and the model is
+    then computed without checks.
+
+    """
+
+    def __init__(
+            self,
+            model: Union[str, Callable, ModelSpec],
+            w: Union[list, np.ndarray],
+            q: Union[float, list, np.ndarray],
+            callback: Callable[[np.ndarray, np.ndarray, bool], None],
+            delay: float = 0.05,
+            preview: int = 8,
+            **params
+    ):
+        if delay < 0:
+            raise ValueError('delay should be positive or zero')
+        if int(preview) < 1:
+            raise ValueError('preview should be a strictly positive integer')
+        self.spec = get_model(model)
+        self.w = np.asarray(w, dtype=np.float64)
+        self.q = np.atleast_1d(np.asarray(q, dtype=np.float64))
+        self.callback = callback
+        self.delay = delay
+        self.preview = int(preview)
+        self.spec.validate(self.q, **params)
+        self.params = dict(self.spec.defaults, **params)
+        self.evaluations = 0
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._task: Optional[asyncio.Task] = None
+
+    def update(self, **params) -> asyncio.Task:
+        """ Request the model for new values of some parameters, cancelling
+        the previous request
+
+        Parameters
+        ----------
+        params:
+            new values of some parameters. The others keep their last
+            values.
+
+        Return
+        ------
+        :class:`asyncio.Task`
+            task of the evaluation, whose result is the model on the full
+            grid. It is cancelled by the next call.
+
+        Raises
+        ------
+        ValueError
+            if the values of the parameters are not valid
+        """
+        values = dict(self.params, **params)
+        self.spec.validate(self.q, **values)
+        self.params = values
+        if self._task is not None:
+            self._task.cancel()
+        self._task = asyncio.get_running_loop().create_task(
+            self._run(values))
+        return self._task
+
+    async def wait(self) -> Optional[np.ndarray]:
+        """ Model on the full grid for the last request, including the
+        requests made while waiting, or None if nothing was requested or if
+        the last request was cancelled, e.g. by :meth:`close` """
+        task = self._task
+        while task is not None:
+            await asyncio.wait([task])
+            if task is self._task:
+                return None if task.cancelled() else task.result()
+            task = self._task
+        return None
+
+    def close(self):
+        """ Cancel the pending request and stop the worker thread """
+        if self._task is not None:
+            self._task.cancel()
+        self._executor.shutdown(wait=False)
+
+    async def _run(self, values: dict) -> np.ndarray:
+        """ Preview and full model, after the delay """
+        await asyncio.sleep(self.delay)
+        if self.preview > 1 and self.w.size >= 4 * self.preview:
+            w = self.w[::self.preview]
+            preview = await self._evaluate(w, values)
+            self.evaluations += 1
+            self.callback(w, preview, False)
+        model = await self._evaluate(self.w, values)
+        self.evaluations += 1
+        self.callback(self.w, model, True)
+        return model
+
+    async def _evaluate(self, w: np.ndarray, values: dict) -> np.ndarray:
+        """ Model computed in the worker thread """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(
+                self.spec.evaluate, w, self.q, check=False, **values))
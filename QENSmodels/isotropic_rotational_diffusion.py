@@ -73,39 +73,48 @@ def hwhmIsotropicRotationalDiffusion(
     0.0
 
     """
-    # input validation
-    if radius <= 0:
-        raise ValueError('radius should be strictly positive')
-    if DR <= 0:
-        raise ValueError('DR, the rotational diffusion coefficient, '
-                         'should be strictly positive')
+    # Input validation
+    _validate(radius, DR)
 
-    q = np.asarray(q, dtype=np.float32)
+    return _hwhm(q, radius, DR)
 
-    numberLorentz = 6
-    qisf = np.zeros((q.size, numberLorentz))
-    hwhm = np.zeros((q.size, numberLorentz))
-    jl = np.zeros((q.size, numberLorentz))
 
-    arg = q * radius
+def componentsIsotropicRotationalDiffusion(
+        q: Union[float, list, np.ndarray],
+        radius: float = 1.0,
+        DR: float = 1.0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ Widths, EISF and QISF of `sqwIsotropicRotationalDiffusion` as functions
+    of the momentum transfer `q`, from which :func:`~QENSmodels.assemble`
+    builds the model
 
-    idx = np.argwhere(arg == 0)
-    for i in range(numberLorentz):
+    Parameters
+    ----------
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer (non-fitting, in 1/Angstrom)
 
-        # to solve warnings for arg=0
-        jl[:, i] = spherical_jn(i, arg)
+    radius: float
+        radius of rotation (in Angstrom). Default to 1.
 
-        hwhm[:, i] = np.repeat(i * (i + 1) * DR, q.size)
+    DR: float
+        rotational diffusion coefficient (in 1/ps). Default to 1.
 
-        if idx.size > 0:
-            if i == 0:
-                jl[idx, i] = 1.0
-            else:
-                jl[idx, i] = 0.0
-    eisf = jl[:, 0] ** 2
-    for i in range(1, numberLorentz):
-        qisf[:, i] = (2 * i + 1) * jl[:, i] ** 2
-    return hwhm, eisf, qisf
+    Returns
+    -------
+    hwhm, eisf, qisf: :class:`~numpy:numpy.ndarray`
+        see :func:`~QENSmodels.assemble`
+
+    Examples
+    --------
+    >>> hwhm, eisf, qisf = componentsIsotropicRotationalDiffusion(1., 1., 1.)
+    >>> hwhm
+    array([[ 2.,  6., 12., 20., 30.]])
+    >>> round(eisf[0], 3), round(qisf[0, 0], 3)
+    (0.708, 0.272)
+
+    """
+    _validate(radius, DR)
+    return _components(q, radius, DR)
 
 
 def sqwIsotropicRotationalDiffusion(
@@ -200,30 +209,17 @@ def sqwIsotropicRotationalDiffusion(
     `link <https://aip.scitation.org/doi/abs/10.1063/1.1674374?journalCode=jcp>`__
 
     """
-
     # Input validation
     w = np.asarray(w)
 
     q = np.asarray(q, dtype=np.float32)
 
-    # Create output array
-    sqw = np.zeros((q.size, w.size))
-
     # Get widths, EISFs and QISFs of model
-    hwhm, eisf, qisf = hwhmIsotropicRotationalDiffusion(q, radius, DR)
-
-    # Number of Lorentzians used to represent the infinite sum in R
-    numberLorentz = hwhm.shape[1]
+    hwhm, eisf, qisf = componentsIsotropicRotationalDiffusion(
+        q, radius, DR)
 
-    # Sum of Lorentzians
-    for i in range(q.size):
-        sqw[i, :] = eisf[i] * QENSmodels.delta(w, scale, center)
-        for j in range(1, numberLorentz):
-            sqw[i, :] += qisf[i, j] * QENSmodels.lorentzian(
-                w,
-                scale,
-                center,
-                hwhm[i, j])
+    # Model, for all q at once
+    sqw = QENSmodels.assemble(w, hwhm, eisf, qisf, scale, center)
 
     # For Bumps use (needed for final plotting)
     # Using a 'Curve' in bumps for each Q --> needs vector array
@@ -231,3 +227,126 @@ def sqwIsotropicRotationalDiffusion(
         sqw = np.reshape(sqw, w.size)
 
     return sqw
+
+
+def iqtIsotropicRotationalDiffusion(
+        t: Union[float, list, np.ndarray],
+        q: Union[float, list, np.ndarray],
+        scale: float = 1.0,
+        radius: float = 1.0,
+        DR: float = 1.0
+) -> Union[float, list, np.ndarray]:
+    r""" Intermediate scattering function of `sqwIsotropicRotationalDiffusion`,
+    i.e. its Fourier transform from energy transfer to time
+
+    Parameters
+    ----------
+    t: float, list or :class:`~numpy:numpy.ndarray`
+        time (in ps)
+
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer (non-fitting, in 1/Angstrom)
+
+    scale: float
+        scale factor. Default to 1.
+
+    radius: float
+        radius of rotation (in Angstrom). Default to 1.
+
+    DR: float
+        rotational diffusion coefficient (in 1/ps). Default to 1.
+
+    Return
+    ------
+    :class:`~numpy:numpy.ndarray`
+        output array, of shape (q.size, t.size), or (t.size,) for a single q
+
+    Examples
+    --------
+    >>> iqt = iqtIsotropicRotationalDiffusion([0., 1., 2.], 1.)
+    >>> iqt.round(4)
+    array([1.    , 0.7449, 0.7131])
+
+    Notes
+    -----
+    The intermediate scattering function is the sum of the EISF and of
+    exponential decays whose rates are the half widths of the Lorentzians of
+    `sqwIsotropicRotationalDiffusion`, see :func:`~QENSmodels.assemble_iqt`.
+    The center of the peaks only gives a phase in the time domain and is not a
+    parameter.
+
+    """
+    # Input validation
+    t = np.asarray(t)
+
+    q = np.asarray(q, dtype=np.float32)
+
+    # Get widths, EISFs and QISFs of model
+    hwhm, eisf, qisf = componentsIsotropicRotationalDiffusion(q, radius, DR)
+
+    # Intermediate scattering function, for all q at once
+    iqt = QENSmodels.assemble_iqt(t, hwhm, eisf, qisf, scale)
+
+    if q.size == 1:
+        iqt = np.reshape(iqt, t.size)
+
+    return iqt
+
+
+def _validate(
+        radius: float,
+        DR: float
+) -> None:
+    """ Check the values of the parameters of the model """
+    if radius <= 0:
+        raise ValueError('radius should be strictly positive')
+    if DR <= 0:
+        raise ValueError('DR, the rotational diffusion coefficient, '
+                         'should be strictly positive')
+
+
+def _hwhm(
+        q: Union[float, list, np.ndarray],
+        radius: float,
+        DR: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ `hwhmIsotropicRotationalDiffusion` without the validation of the
+    parameters """
+    q = np.asarray(q, dtype=np.float32)
+
+    numberLorentz = 6
+    qisf = np.zeros((q.size, numberLorentz))
+    hwhm = np.zeros((q.size, numberLorentz))
+    jl = np.zeros((q.size, numberLorentz))
+
+    arg = q * radius
+
+    idx = np.argwhere(arg == 0)
+    for i in range(numberLorentz):
+
+        # to solve warnings for arg=0
+        jl[:, i] = spherical_jn(i, arg)
+
+        hwhm[:, i] = np.repeat(i * (i + 1) * DR, q.size)
+
+        if idx.size > 0:
+            if i == 0:
+                jl[idx, i] = 1.0
+            else:
+                jl[idx, i] = 0.0
+    eisf = jl[:, 0] ** 2
+    for i in range(1, numberLorentz):
+        qisf[:, i] = (2 * i + 1) * jl[:, i] ** 2
+    return hwhm, eisf, qisf
+
+
+def _components(
+        q: Union[float, list, np.ndarray],
+        radius: float,
+        DR: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ `componentsIsotropicRotationalDiffusion` without the validation of
+    the parameters """
+    hwhm, eisf, qisf = _hwhm(q, radius, DR)
+    # the first column corresponds to the elastic line
+    return hwhm[:, 1:], eisf, qisf[:, 1:]
@@ -12,7 +12,8 @@ def hwhmJumpSitesLogNormDist(
         Nsites: float = 3,
         radius: float = 1.0,
         resTime: float = 1.0,
-        sigma: float = 1.0
+        sigma: float = 1.0,
+        Nnodes: int = 0
 ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """ Returns some characteristics of `JumpSitesLogNormDist` as functions
     of the momentum transfer `q`:
@@ -38,6 +39,11 @@ def hwhmJumpSitesLogNormDist(
         standard deviation of the Gaussian distribution (no unit).
         Default to 1.
 
+    Nnodes: integer
+        number of nodes of the Gauss-Hermite quadrature of the distribution
+        (non-fitting). If 0, the distribution is sampled on 21 equally
+        spaced points, see Notes of `sqwJumpSitesLogNormDist`. Default to 0.
+
     Returns
     -------
 
@@ -63,64 +69,71 @@ def hwhmJumpSitesLogNormDist(
     >>> round(qisf[0, 2, 19], 6), round(qisf[1, 1, 5], 6)
     (0.000538, 0.000712)
 
+    >>> hwhm, eisf, qisf = hwhmJumpSitesLogNormDist([1., 2.], 4, 0.5, 1.5, 1.0,
+    ...                                             Nnodes=5)
+    >>> hwhm.shape, qisf.shape
+    ((2, 4, 5), (2, 3, 5))
+
     Notes
     -----
 
     """
     # Input validation
-    if radius <= 0:
-        raise ValueError("radius, the radius of the circle, "
-                         "should be positive")
-    if resTime < 0:
-        raise ValueError("resTime, the residence time, "
-                         "should be positive")
-    if Nsites < 2:
-        raise ValueError("the minimum number of sites N is 2")
+    _validate(Nsites, radius, resTime, sigma, Nnodes)
 
-    if sigma <= 0:
-        raise ValueError("sigma should be different from zero")
+    return _hwhm(q, Nsites, radius, resTime, sigma, Nnodes)
 
-    q = np.asarray(q, dtype=np.float32)
-
-    # number of sites has to be an integer
-    Nsites = int(Nsites)
 
-    hwhm_equiv, eisf, qisf_equiv = \
-        QENSmodels.hwhmEquivalentSitesCircle(q, Nsites, radius, resTime)
+def componentsJumpSitesLogNormDist(
+        q: Union[float, list, np.ndarray],
+        Nsites: int = 3,
+        radius: float = 1.,
+        resTime: float = 1.,
+        sigma: float = 1.,
+        Nnodes: int = 0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ Widths, EISF and QISF of `sqwJumpSitesLogNormDist` as functions of the
+    momentum transfer `q`, from which :func:`~QENSmodels.assemble` builds the
+    model
 
-    # number of lorentzians used in distribution is 2 * nmax + 1
-    n_max = 10
+    Parameters
+    ----------
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer (non-fitting, in 1/Angstrom)
 
-    # lower value of gi / max(gi) to be used
-    low_lim = 0.1
+    Nsites: integer
+        number of sites in circle (non-fitting). Default to 3.
 
-    # max(absolute) value of log(x) range to explore
-    range_gamma = sigma * np.sqrt(-2.0 * np.log(low_lim))
+    radius: float
+        radius of rotation (in Angstrom). Default to 1.
 
-    dgamma = range_gamma / float(n_max)
-    # vector of gamma_i / gamma_average values to use
-    ratio = np.exp(np.arange(2 * n_max + 1) * dgamma - range_gamma)
+    resTime: float
+        residence time in a site before jumping to another site (in 1/ps).
+        Default to 1.
 
-    # distribution  of weights
+    sigma: float
+        standard deviation of the Gaussian distribution (no unit).
+        Default to 1.
 
-    gi = np.exp(-0.5 * np.log(ratio) ** 2 / sigma ** 2)
-    gi /= np.sum(gi)  # normalize so sum gi = 1
+    Nnodes: integer
+        number of nodes of the Gauss-Hermite quadrature of the distribution
+        (non-fitting). If 0, the distribution is sampled on 21 equally
+        spaced points, see Notes of `sqwJumpSitesLogNormDist`. Default to 0.
 
-    # distribution of hwhm for each jumping distance
-    hwhm = np.zeros((q.size, Nsites, 2 * n_max + 1))
-    for qiter in range(q.size):
-        for isite in range(Nsites):
-            # corresponding hwhm for each gi and jumping distance
-            hwhm[qiter, isite, :] = hwhm_equiv[qiter, isite] * ratio
+    Returns
+    -------
+    hwhm, eisf, qisf: :class:`~numpy:numpy.ndarray`
+        see :func:`~QENSmodels.assemble`
 
-    # quasielastic terms
-    qisf = np.zeros((q.size, Nsites - 1, 2 * n_max + 1))
-    for qiter in range(q.size):
-        for ilor in range(2 * n_max + 1):
-            for isite in range(0, Nsites - 1):
-                qisf[qiter, isite, ilor] = qisf_equiv[qiter, isite] * gi[ilor]
+    Examples
+    --------
+    >>> hwhm, eisf, qisf = componentsJumpSitesLogNormDist([1., 2.], 4)
+    >>> hwhm.shape, eisf.shape, qisf.shape
+    ((2, 63), (2,), (2, 63))
 
-    return hwhm, eisf, qisf
+    """
+    _validate(Nsites, radius, resTime, sigma, Nnodes)
+    return _components(q, Nsites, radius, resTime, sigma, Nnodes)
 
 
 def sqwJumpSitesLogNormDist(
@@ -131,7 +144,8 @@ def sqwJumpSitesLogNormDist(
         Nsites: int = 3,
         radius: float = 1.,
         resTime: float = 1.,
-        sigma: float = 1.
+        sigma: float = 1.,
+        Nnodes: int = 0
 ) -> Union[float, list, np.ndarray]:
     r""" Model of jumps between Nsites equivalent sites in a circle with
     a log-norm distribution of relaxation times
@@ -147,7 +161,10 @@ def sqwJumpSitesLogNormDist(
     :math:`\exp(\sigma\sqrt{-2\ln A_{min}})`]
     where :math:`A_{min}` is the cut-off chosen for the value of the
     distribution function with respect to its maximum. This model uses
-    :math:`L=21` and :math:`A_{min}=0.1`
+    :math:`L=21` and :math:`A_{min}=0.1`, unless `Nnodes` is given, in
+    which case the :math:`\Gamma_{i,j}` and :math:`g_j` are the nodes and
+    weights of a Gauss-Hermite quadrature of order :math:`L=\text{Nnodes}`
+    in logarithmic scale, see Notes.
 
     Parameters
     ----------
@@ -178,6 +195,11 @@ def sqwJumpSitesLogNormDist(
         standard deviation of the Gaussian distribution (no unit).
         Default to 1.
 
+    Nnodes: integer
+        number of nodes of the Gauss-Hermite quadrature of the distribution
+        (non-fitting). If 0, the distribution is sampled on 21 equally
+        spaced points, see Notes of `sqwJumpSitesLogNormDist`. Default to 0.
+
     Return
     ------
     :class:`~numpy:numpy.ndarray`
@@ -232,6 +254,15 @@ def sqwJumpSitesLogNormDist(
       to an integer by the function. It should **not** be used as a fitting
       parameter.
 
+    * With `Nnodes`, :math:`\Gamma_{i,j} = \Gamma_i \exp(\sigma x_j)` and
+      :math:`g_j = w_j / \sqrt{2\pi}`, where :math:`x_j` and :math:`w_j`
+      are the nodes and weights of the Gauss-Hermite quadrature of order
+      `Nnodes` for the weight function :math:`\exp(-x^2/2)`. The
+      distribution is then integrated without truncation, and a model
+      computed with 5 to 7 nodes is at least as accurate as with the 21
+      equally spaced points, for about a third of the cost. The accuracy
+      can be compared with ``tools/benchmark_log_norm_dist.py``.
+
 
     References
     ----------
@@ -242,37 +273,16 @@ def sqwJumpSitesLogNormDist(
 
     """
     # Input validation
-
     w = np.asarray(w)
 
     q = np.asarray(q, dtype=np.float32)
 
-    # Create output array
-    sqw = np.zeros((q.size, w.size))
-
     # Get widths, EISFs and QISFs of model
-    hwhm, eisf, qisf = \
-        hwhmJumpSitesLogNormDist(q, Nsites, radius, resTime, sigma)
-    # Number of Lorentzians (= Nsites-1)
-    numberLorentz = hwhm.shape[1] - 1
-    # Number of samples for Gaussian distribution
-    numberSamplingDistrib = hwhm.shape[2]
-    # Sum of Lorentzians
-    # (Note that hwhm has dimensions [q.size, Nsites], as hwhm[:, 0]
-    # contains a width=0, corresponding to the elastic line
-    # (eisf), while qisf has dimensions [q.size, Nsites-1])
-    for i in range(q.size):
-        # elastic term
-        sqw[i, :] = eisf[i] * QENSmodels.delta(w, scale, center)
-        for j in range(numberLorentz):
-            for k in range(numberSamplingDistrib):
-                # quasielastic terms
-                sqw[i, :] += qisf[i, j, k] * QENSmodels.lorentzian(
-                    w,
-                    scale,
-                    center,
-                    hwhm[i, j + 1, k]
-                )
+    hwhm, eisf, qisf = componentsJumpSitesLogNormDist(
+        q, Nsites, radius, resTime, sigma, Nnodes)
+
+    # Model, for all q at once
+    sqw = QENSmodels.assemble(w, hwhm, eisf, qisf, scale, center)
 
     # For Bumps use (needed for final plotting)
     # Using a 'Curve' in bumps for each Q --> needs vector array
@@ -280,3 +290,188 @@ def sqwJumpSitesLogNormDist(
         sqw = np.reshape(sqw, w.size)
 
     return sqw
+
+
+def iqtJumpSitesLogNormDist(
+        t: Union[float, list, np.ndarray],
+        q: Union[float, list, np.ndarray],
+        scale: float = 1.,
+        Nsites: int = 3,
+        radius: float = 1.,
+        resTime: float = 1.,
+        sigma: float = 1.,
+        Nnodes: int = 0
+) -> Union[float, list, np.ndarray]:
+    r""" Intermediate scattering function of `sqwJumpSitesLogNormDist`, i.e.
+    its Fourier transform from energy transfer to time
+
+    Parameters
+    ----------
+    t: float, list or :class:`~numpy:numpy.ndarray`
+        time (in ps)
+
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer (non-fitting, in 1/Angstrom)
+
+    scale: float
+        scale factor. Default to 1.
+
+    Nsites: integer
+        number of sites in circle (non-fitting). Default to 3.
+
+    radius: float
+        radius of rotation (in Angstrom). Default to 1.
+
+    resTime: float
+        residence time in a site before jumping to another site (in 1/ps).
+        Default to 1.
+
+    sigma: float
+        standard deviation of the Gaussian distribution (no unit).
+        Default to 1.
+
+    Nnodes: integer
+        number of nodes of the Gauss-Hermite quadrature of the distribution
+        (non-fitting). If 0, the distribution is sampled on 21 equally
+        spaced points, see Notes of `sqwJumpSitesLogNormDist`. Default to 0.
+
+    Return
+    ------
+    :class:`~numpy:numpy.ndarray`
+        output array, of shape (q.size, t.size), or (t.size,) for a single q
+
+    Examples
+    --------
+    >>> iqt = iqtJumpSitesLogNormDist([0., 1., 2.], 1.)
+    >>> iqt.round(4)
+    array([1.    , 0.7926, 0.7516])
+
+    Notes
+    -----
+    The intermediate scattering function is the sum of the EISF and of
+    exponential decays whose rates are the half widths of the Lorentzians of
+    `sqwJumpSitesLogNormDist`, see :func:`~QENSmodels.assemble_iqt`. The center
+    of the peaks only gives a phase in the time domain and is not a parameter.
+
+    """
+    # Input validation
+    t = np.asarray(t)
+
+    q = np.asarray(q, dtype=np.float32)
+
+    # Get widths, EISFs and QISFs of model
+    hwhm, eisf, qisf = componentsJumpSitesLogNormDist(
+        q, Nsites, radius, resTime, sigma, Nnodes)
+
+    # Intermediate scattering function, for all q at once
+    iqt = QENSmodels.assemble_iqt(t, hwhm, eisf, qisf, scale)
+
+    if q.size == 1:
+        iqt = np.reshape(iqt, t.size)
+
+    return iqt
+
+
+def _validate(
+        Nsites: int,
+        radius: float,
+        resTime: float,
+        sigma: float,
+        Nnodes: int
+) -> None:
+    """ Check the values of the parameters of the model """
+    if radius <= 0:
+        raise ValueError("radius, the radius of the circle, "
+                         "should be positive")
+    if resTime < 0:
+        raise ValueError("resTime, the residence time, "
+                         "should be positive")
+    if Nsites < 2:
+        raise ValueError("the minimum number of sites N is 2")
+
+    if sigma <= 0:
+        raise ValueError("sigma should be different from zero")
+
+    if Nnodes < 0:
+        raise ValueError("Nnodes, the number of nodes of the quadrature, "
+                         "should be positive or zero")
+
+
+def _hwhm(
+        q: Union[float, list, np.ndarray],
+        Nsites: int,
+        radius: float,
+        resTime: float,
+        sigma: float,
+        Nnodes: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ `hwhmJumpSitesLogNormDist` without the validation of the
+    parameters """
+    q = np.asarray(q, dtype=np.float32)
+
+    # number of sites has to be an integer
+    Nsites = int(Nsites)
+
+    hwhm_equiv, eisf, qisf_equiv = \
+        QENSmodels.equivalent_sites_circle._hwhm(q, Nsites, radius, resTime)
+
+    # number of nodes of the quadrature has to be an integer
+    Nnodes = int(Nnodes)
+
+    if Nnodes > 0:
+        # Gauss-Hermite quadrature in log-space: log(gamma_i / gamma_average)
+        # is normally distributed with a standard deviation sigma
+        nodes, weights = np.polynomial.hermite_e.hermegauss(Nnodes)
+        ratio = np.exp(sigma * nodes)
+        gi = weights / np.sum(weights)
+    else:
+        # number of lorentzians used in distribution is 2 * nmax + 1
+        n_max = 10
+
+        # lower value of gi / max(gi) to be used
+        low_lim = 0.1
+
+        # max(absolute) value of log(x) range to explore
+        range_gamma = sigma * np.sqrt(-2.0 * np.log(low_lim))
+
+        dgamma = range_gamma / float(n_max)
+        # vector of gamma_i / gamma_average values to use
+        ratio = np.exp(np.arange(2 * n_max + 1) * dgamma - range_gamma)
+
+        # distribution  of weights
+
+        gi = np.exp(-0.5 * np.log(ratio) ** 2 / sigma ** 2)
+        gi /= np.sum(gi)  # normalize so sum gi = 1
+
+    # distribution of hwhm for each jumping distance
+    hwhm = np.zeros((q.size, Nsites, ratio.size))
+    for qiter in range(q.size):
+        for isite in range(Nsites):
+            # corresponding hwhm for each gi and jumping distance
+            hwhm[qiter, isite, :] = hwhm_equiv[qiter, isite] * ratio
+
+    # quasielastic terms
+    qisf = np.zeros((q.size, Nsites - 1, ratio.size))
+    for qiter in range(q.size):
+        for ilor in range(ratio.size):
+            for isite in range(0, Nsites - 1):
+                qisf[qiter, isite, ilor] = qisf_equiv[qiter, isite] * gi[ilor]
+
+    return hwhm, eisf, qisf
+
+
+def _components(
+        q: Union[float, list, np.ndarray],
+        Nsites: int,
+        radius: float,
+        resTime: float,
+        sigma: float,
+        Nnodes: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ `componentsJumpSitesLogNormDist` without the validation of
+    the parameters """
+    hwhm, eisf, qisf = _hwhm(q, Nsites, radius, resTime, sigma, Nnodes)
+    # one Lorentzian per jumping distance (the first one corresponding to
+    # the elastic line) and per sample of the distribution
+    return (hwhm[:, 1:, :].reshape(hwhm.shape[0], -1), eisf,
+            qisf.reshape(qisf.shape[0], -1))
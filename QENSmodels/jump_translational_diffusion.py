@@ -63,20 +63,47 @@ def hwhmJumpTranslationalDiffusion(
 
     """
     # Input validation
-    if D <= 0:
-        raise ValueError("D, the diffusion coefficient, should be positive")
-    if resTime < 0:
-        raise ValueError("resTime, the residence time, should be positive")
+    _validate(D, resTime)
 
-    q = np.asarray(q, dtype=np.float32)
+    return _hwhm(q, D, resTime)
 
-    eisf = np.zeros(q.size)
-    qisf = np.ones(q.size)
-    hwhm = D * q ** 2 / (1.0 + resTime * D * q ** 2)
-    # Force hwhm to be numpy array, even if single value
-    hwhm = np.asarray(hwhm, dtype=np.float32)
-    hwhm = np.reshape(hwhm, hwhm.size)
-    return hwhm, eisf, qisf
+
+def componentsJumpTranslationalDiffusion(
+        q: Union[float, list, np.ndarray],
+        D: float = 0.23,
+        resTime: float = 1.25
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ Widths, EISF and QISF of `sqwJumpTranslationalDiffusion` as functions
+    of the momentum transfer `q`, from which :func:`~QENSmodels.assemble`
+    builds the model
+
+    Parameters
+    ----------
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer (non-fitting, in 1/Angstrom)
+
+    D: float
+        diffusion coefficient (in Angstrom :math:`^2` /ps). Default to 0.23.
+
+    resTime: float
+        residence time (in ps). Default to 1.25.
+
+    Returns
+    -------
+    hwhm, eisf, qisf: :class:`~numpy:numpy.ndarray`
+        see :func:`~QENSmodels.assemble`
+
+    Examples
+    --------
+    >>> hwhm, eisf, qisf = componentsJumpTranslationalDiffusion(1., 1., 1.)
+    >>> hwhm
+    array([[0.5]], dtype=float32)
+    >>> eisf, qisf
+    (array([0.]), array([[1.]]))
+
+    """
+    _validate(D, resTime)
+    return _components(q, D, resTime)
 
 
 def sqwJumpTranslationalDiffusion(
@@ -174,15 +201,11 @@ def sqwJumpTranslationalDiffusion(
 
     q = np.asarray(q, dtype=np.float32)
 
-    # Create output array
-    sqw = np.zeros((q.size, w.size))
-
     # Get widths, EISFs and QISFs of model
-    hwhm, eisf, qisf = hwhmJumpTranslationalDiffusion(q, D, resTime)
+    hwhm, eisf, qisf = componentsJumpTranslationalDiffusion(q, D, resTime)
 
-    # Model
-    for i in range(q.size):
-        sqw[i, :] = QENSmodels.lorentzian(w, scale, center, hwhm[i])
+    # Model, for all q at once
+    sqw = QENSmodels.assemble(w, hwhm, eisf, qisf, scale, center)
 
     # For Bumps use (needed for final plotting)
     # Using a 'Curve' in bumps for each Q --> needs vector array
@@ -190,3 +213,107 @@ def sqwJumpTranslationalDiffusion(
         sqw = np.reshape(sqw, w.size)
 
     return sqw
+
+
+def iqtJumpTranslationalDiffusion(
+        t: Union[float, list, np.ndarray],
+        q: Union[float, list, np.ndarray],
+        scale: float = 1.,
+        D: float = 0.23,
+        resTime: float = 1.25
+) -> Union[float, list, np.ndarray]:
+    r""" Intermediate scattering function of `sqwJumpTranslationalDiffusion`,
+    i.e. its Fourier transform from energy transfer to time
+
+    Parameters
+    ----------
+    t: float, list or :class:`~numpy:numpy.ndarray`
+        time (in ps)
+
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer (non-fitting, in 1/Angstrom).
+
+    scale: float
+        scale factor. Default to 1.
+
+    D: float
+        diffusion coefficient (in Angstrom :math:`^2` /ps). Default to 0.23.
+
+    resTime: float
+        residence time (in ps). Default to 1.25.
+
+    Return
+    ------
+    :class:`~numpy:numpy.ndarray`
+        output array, of shape (q.size, t.size), or (t.size,) for a single q
+
+    Examples
+    --------
+    >>> iqt = iqtJumpTranslationalDiffusion([0., 1., 2.], 1.)
+    >>> iqt.round(4)
+    array([1.    , 0.8364, 0.6996])
+
+    Notes
+    -----
+    The intermediate scattering function is the sum of the EISF and of
+    exponential decays whose rates are the half widths of the Lorentzians of
+    `sqwJumpTranslationalDiffusion`, see :func:`~QENSmodels.assemble_iqt`. The
+    center of the peaks only gives a phase in the time domain and is not a
+    parameter.
+
+    """
+    # Input validation
+    t = np.asarray(t)
+
+    q = np.asarray(q, dtype=np.float32)
+
+    # Get widths, EISFs and QISFs of model
+    hwhm, eisf, qisf = componentsJumpTranslationalDiffusion(q, D, resTime)
+
+    # Intermediate scattering function, for all q at once
+    iqt = QENSmodels.assemble_iqt(t, hwhm, eisf, qisf, scale)
+
+    if q.size == 1:
+        iqt = np.reshape(iqt, t.size)
+
+    return iqt
+
+
+def _validate(
+        D: float,
+        resTime: float
+) -> None:
+    """ Check the values of the parameters of the model """
+    if D <= 0:
+        raise ValueError("D, the diffusion coefficient, should be positive")
+    if resTime < 0:
+        raise ValueError("resTime, the residence time, should be positive")
+
+
+def _hwhm(
+        q: Union[float, list, np.ndarray],
+        D: float,
+        resTime: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ `hwhmJumpTranslationalDiffusion` without the validation of the
+    parameters """
+    q = np.asarray(q, dtype=np.float32)
+
+    eisf = np.zeros(q.size)
+    qisf = np.ones(q.size)
+    hwhm = D * q ** 2 / (1.0 + resTime * D * q ** 2)
+    # Force hwhm to be numpy array, even if single value
+    hwhm = np.asarray(hwhm, dtype=np.float32)
+    hwhm = np.reshape(hwhm, hwhm.size)
+    return hwhm, eisf, qisf
+
+
+def _components(
+        q: Union[float, list, np.ndarray],
+        D: float,
+        resTime: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ `componentsJumpTranslationalDiffusion` without the validation of
+    the parameters """
+    hwhm, eisf, qisf = _hwhm(q, D, resTime)
+    return hwhm[:, np.newaxis], eisf, qisf[:, np.newaxis]
@@ -1,6 +1,8 @@
 import numpy as np
 from typing import Union
 
+from QENSmodels._bins import bin_widths
+
 try:
     import QENSmodels
 except ImportError:
@@ -11,7 +13,8 @@ def lorentzian(
         x: Union[float, list, np.ndarray],
         scale: Union[float, list, np.ndarray] = 1.0,
         center: Union[float, list, np.ndarray] = 0.0,
-        hwhm: Union[float, list, np.ndarray] = 1.0
+        hwhm: Union[float, list, np.ndarray] = 1.0,
+        binned: bool = False
 ) -> Union[float, list, np.ndarray]:
     r""" Lorentzian model
 
@@ -29,10 +32,16 @@ def lorentzian(
     hwhm: float
         Half Width at Half Maximum. Default to 1.
 
+    binned: bool
+        if True, `x` contains the edges of the bins of a histogram and the
+        function is integrated analytically over each bin. Default to
+        False.
+
     Return
     ------
     float or :class:`~numpy:numpy.ndarray`
-        output number or array
+        output number or array, with `x.size - 1` values (the averages of
+        the function over the bins) if `binned` is True
 
     Examples
     --------
@@ -48,6 +57,9 @@ def lorentzian(
     >>> round(result[1], 3)
     0.064
 
+    >>> lorentzian([-1, 0, 1, 3], 1., 0., 1., binned=True)
+    array([0.25      , 0.25      , 0.07379181])
+
     Notes
     -----
     * A Lorentzian function is defined as
@@ -94,11 +106,36 @@ def lorentzian(
       and used to renormalize the returned function whenever the integral
       is larger than 1.
 
+    * With `binned`, the average over the bin :math:`[a, b]` is
+
+    .. math::
+
+       \frac{\text{scale}}{\pi (b - a)} \big(\arctan\frac{b-\text{center}}
+       {\text{hwhm}} - \arctan\frac{a-\text{center}}{\text{hwhm}}\big)
+
+      computed as :math:`\arctan` of a single ratio so that it stays
+      accurate in the tails. The integral is exact at any width, down to
+      the delta of zero width, so that no renormalization is needed and
+      coarser energy grids can be used.
+
     """
     # Input validation
     x = np.asarray(x)
     hwhm = np.asarray(hwhm)
 
+    if binned:
+        x = x.astype(np.float64)
+        widths = bin_widths(x)
+        if hwhm == 0:
+            model = QENSmodels.delta(x, 1.0, center, binned=True)
+        else:
+            # difference of the arctangents of the edges
+            lower = x[:-1] - center
+            upper = x[1:] - center
+            model = np.arctan2(widths * hwhm, hwhm ** 2 + lower * upper) \
+                / (np.pi * widths)
+        return model * np.asarray(scale)
+
     if hwhm == 0:
         model = QENSmodels.delta(x, 1.0, center)
     else:
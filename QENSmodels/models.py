@@ -0,0 +1,1026 @@
+"""
+Registry of the models of the library, with a vectorized evaluation over q
+and the derivatives with respect to the parameters, as needed by the
+adapters to fitting packages (see :mod:`QENSmodels.adapters`).
+"""
+import functools
+import inspect
+import numpy as np
+from typing import Callable, Dict, Optional, Tuple, Union
+
+try:
+    import QENSmodels
+except ImportError:
+    print('Module QENSmodels not found')
+
+
+class ModelSpec:
+    r""" Description of a model of the library
+
+    A model is a delta and a sum of Lorentzians, whose widths and amplitudes
+    only depend on `q`, as given by its `components` function:
+
+    .. math::
+
+        S(q, \omega) = \text{scale} \big(\text{eisf}(q)\ \delta(\omega -
+        \text{center}) + \sum_j \text{qisf}_j(q)\ \text{Lorentzian}(\omega,
+        1, \text{center}, \text{hwhm}_j(q))\big)
+
+    Parameters
+    ----------
+    name: str
+        name of the model, e.g. `BrownianTranslationalDiffusion`
+
+    sqw: callable
+        function of the library computing the model, of signature
+        ``sqw(w, q, scale, center, *parameters)``
+
+    components: callable
+        function of signature ``components(q, *parameters)`` returning the
+        widths, EISF and QISF of the model
+
+    kernel: callable
+        `components` function without the validation of the parameters,
+        see :mod:`QENSmodels.fast`. Default to `components`.
+
+    integer: tuple of str
+        names of the parameters taking integer values, such as a number of
+        sites. They are not differentiated.
+
+    bounds: dict
+        bounds of the parameters for which they are not (-inf, inf) for
+        `center` and (0, inf) for the others
+
+    Attributes
+    ----------
+    parameters: tuple of str
+        names of the parameters of the model, other than `scale` and
+        `center`, in the order of the signature of `sqw`
+
+    defaults: dict
+        default values of all the parameters
+
+    bounds: dict
+        (lower, upper) bounds of all the parameters, except those listed in
+        `integer`
+
+    index: dict
+        position of each parameter in :attr:`param_names`, i.e. in a
+        :class:`ParameterVector` of the model
+
+    """
+
+    def __init__(
+            self,
+            name: str,
+            sqw: Callable,
+            components: Callable,
+            kernel: Optional[Callable] = None,
+            integer: Tuple[str, ...] = (),
+            bounds: Optional[Dict[str, Tuple[float, float]]] = None
+    ):
+        self.name = name
+        self.sqw = sqw
+        self.components = components
+        self.kernel = kernel or components
+        self.integer = tuple(integer)
+        signature = inspect.signature(sqw).parameters
+        self.parameters = tuple(signature)[4:]
+        self.defaults = {name: item.default for name, item in
+                         signature.items() if name not in ('w', 'q')}
+        self.bounds = {name: (-np.inf, np.inf) if name == 'center'
+                       else (0., np.inf) for name in self.param_names
+                       if name not in self.integer}
+        self.bounds.update(bounds or {})
+        self.index = {name: i for i, name in enumerate(self.param_names)}
+        self._integer_index = [self.index[name] for name in self.integer]
+
+    @property
+    def param_names(self) -> Tuple[str, ...]:
+        """ Names of all the parameters, starting with `scale` and
+        `center` """
+        return ('scale', 'center') + self.parameters
+
+    def __repr__(self) -> str:
+        return 'ModelSpec({!r})'.format(self.name)
+
+    def evaluate(
+            self,
+            w: Union[float, list, np.ndarray],
+            q: Union[float, list, np.ndarray],
+            atol: Optional[float] = None,
+            binned: bool = False,
+            check: bool = True,
+            temperature: Optional[float] = None,
+            msd: Optional[float] = None,
+            unit: str = 'meV',
+            resolution: Optional['QENSmodels.Resolution'] = None,
+            **params
+    ) -> np.ndarray:
+        r""" Model for all `q` at once
+
+        Parameters
+        ----------
+        w: float, list or :class:`~numpy:numpy.ndarray`
+            energy transfer
+
+        q: float, list or :class:`~numpy:numpy.ndarray`
+            momentum transfer
+
+        atol: float
+            absolute error allowed on each point of the model, to skip the
+            negligible terms and tails of the Lorentzians, see
+            :func:`~QENSmodels.assemble`. Default to None, i.e. the model
+            is computed everywhere.
+
+        binned: bool
+            if True, `w` contains the edges of the energy bins and the
+            model is integrated analytically over each bin, see
+            :func:`~QENSmodels.assemble`. Default to False.
+
+        check: bool
+            if False, the parameters are not validated, see
+            :meth:`validate`. Default to True.
+
+        temperature: float
+            temperature (in K). If given, the model is multiplied by the
+            detailed balance factor, see
+            :func:`~QENSmodels.detailed_balance_factor`. Default to None.
+
+        msd: float
+            mean square displacement (in Angstrom^2). If given, the model is
+            multiplied by the Debye-Waller factor, see
+            :func:`~QENSmodels.debye_waller_factor`. Default to None.
+
+        unit: str
+            unit of `w` for the detailed balance factor: `meV` (default),
+            `ueV` or `1/ps`
+
+        resolution: :class:`~QENSmodels.Resolution`
+            resolution with which the model is convolved, see Notes.
+            Default to None.
+
+        params:
+            values of the parameters, see :attr:`param_names`. The
+            parameters which are not given take their default values.
+            They can also be arrays of size q.size, with one value per q.
+            The model is then computed q by q, except if only `scale` and
+            `center` are given per q.
+
+        Return
+        ------
+        :class:`~numpy:numpy.ndarray`
+            array of shape (q.size, w.size), even for a single q, or
+            (q.size, w.size - 1) if `binned` is True
+
+        Examples
+        --------
+        >>> model = get_model('BrownianTranslationalDiffusion')
+        >>> model.evaluate([-1, 0, 1], [0.5, 1.], D=0.2).round(4)
+        array([[0.0025, 0.9975, 0.0025],
+               [0.037 , 0.963 , 0.037 ]])
+        >>> model.evaluate([-1, 0, 1], [0.5, 1.], temperature=10.,
+        ...                D=0.2).round(4)
+        array([[0.0014, 0.9975, 0.0044],
+               [0.0207, 0.963 , 0.0662]])
+
+        Notes
+        -----
+        * The corrections by `temperature` and `msd` are applied to the
+          model before the convolution with a resolution. With `binned`,
+          the detailed balance factor is taken at the centers of the bins.
+          `atol` is the error allowed on the model before the corrections.
+
+        * With a `resolution`, the model is built from the resolution
+          convolved with its delta and Lorentzians, cached per width and
+          center (see :meth:`~QENSmodels.Resolution.convolve_components`),
+          so that changing only amplitudes, e.g. `scale` or `A0`, needs no
+          convolution. The model is convolved directly when more
+          Lorentzians than q would be convolved, unless the same widths and
+          centers were already requested, and with `atol`, `binned` or
+          parameters other than `scale` and `center` given per q.
+
+        """
+        values = self._values(params)
+        if resolution is not None and (atol is not None or binned
+                                       or self._per_q(values)):
+            model = self.evaluate(w, q, atol=atol, binned=binned,
+                                  check=check, temperature=temperature,
+                                  msd=msd, unit=unit, **params)
+            return resolution.convolve(model, w)
+        if self._per_q(values):
+            return self._rows(functools.partial(
+                self.evaluate, atol=atol, binned=binned, check=check,
+                temperature=temperature, msd=msd, unit=unit), w, q, values)
+        x = np.atleast_1d(np.asarray(w, dtype=np.float64))
+        hwhm, eisf, qisf = self._tables(q, values, check)
+        scale, center = self._scale_center(values, hwhm.shape[0])
+        if resolution is not None:
+            profiles = resolution._convolved_lorentzians(
+                x, _with_delta(hwhm), center, temperature, unit,
+                budget=hwhm.shape[0])
+            if profiles is not None:
+                peaks, = profiles
+                model = eisf[:, np.newaxis] * peaks[:, 0]
+                model += np.einsum('ij,ijk->ik', qisf, peaks[:, 1:])
+                model *= scale
+                # the detailed balance factor is in the convolved peaks
+                return _corrected(model, x, q, False, None, msd, unit)
+        model = QENSmodels.assemble(x, hwhm, eisf, qisf, scale, center,
+                                    atol=atol, binned=binned)
+        model = _corrected(model, x, q, binned, temperature, msd, unit)
+        if resolution is not None:
+            model = resolution.convolve(model, x)
+        return model
+
+    def jacobian(
+            self,
+            w: Union[float, list, np.ndarray],
+            q: Union[float, list, np.ndarray],
+            temperature: Optional[float] = None,
+            msd: Optional[float] = None,
+            unit: str = 'meV',
+            resolution: Optional['QENSmodels.Resolution'] = None,
+            **params
+    ) -> np.ndarray:
+        r""" Derivatives of the model with respect to its parameters
+
+        Parameters
+        ----------
+        w: float, list or :class:`~numpy:numpy.ndarray`
+            energy transfer
+
+        q: float, list or :class:`~numpy:numpy.ndarray`
+            momentum transfer
+
+        temperature, msd, unit:
+            corrections of the model, see :meth:`evaluate`. They do not
+            depend on the parameters and multiply all the derivatives.
+
+        resolution: :class:`~QENSmodels.Resolution`
+            resolution with which the derivatives are convolved, from the
+            cached convolved Lorentzians and their derivatives as in
+            :meth:`evaluate`. Default to None.
+
+        params:
+            values of the parameters, see :attr:`param_names`. As in
+            :meth:`evaluate`, they can be given per q.
+
+        Return
+        ------
+        :class:`~numpy:numpy.ndarray`
+            array of shape (number of parameters, q.size, w.size), in the
+            order of :attr:`param_names`. If a parameter is given per q,
+            the row i of its derivative is the derivative with respect to
+            its i-th value.
+
+        Examples
+        --------
+        >>> model = get_model('DeltaLorentz')
+        >>> model.jacobian([-1, 0, 1], 1., A0=0.5, hwhm=0.2).shape
+        (4, 1, 3)
+
+        Notes
+        -----
+        * The derivatives of the Lorentzians with respect to `center` and to
+          their widths are analytic, including the area renormalization of
+          :func:`~QENSmodels.lorentzian`. The derivatives of the widths and
+          amplitudes, which only depend on q, are computed by central finite
+          differences of the `components` function, on arrays of size
+          (q.size, number of Lorentzians). The step is adapted to single
+          precision, in which some of these arrays are computed.
+
+        * The delta being sampled at the closest point of the grid, its
+          derivative with respect to `center` is zero.
+
+        * The derivatives with respect to the parameters listed in
+          :attr:`integer` are zero.
+
+        """
+        values = self._values(params)
+        if self._per_q(values):
+            jacobian = self._rows(functools.partial(
+                self.jacobian, temperature=temperature, msd=msd, unit=unit),
+                w, q, values)
+            if resolution is not None:
+                jacobian = resolution.convolve(jacobian, w)
+            return jacobian
+        x = np.atleast_1d(np.asarray(w, dtype=np.float64))
+        hwhm, eisf, qisf = self._tables(q, values)
+        scale, center = self._scale_center(values, hwhm.shape[0])
+        profiles = None
+        if resolution is not None:
+            profiles = resolution._convolved_lorentzians(
+                x, _with_delta(hwhm), center, temperature, unit,
+                derivatives=True,
+                budget=len(self.param_names) * hwhm.shape[0])
+        if profiles is not None:
+            peaks, d_center, d_hwhm = (item[:, 1:] for item in profiles)
+            elastic = profiles[0][:, 0]
+        else:
+            peaks, d_center, d_hwhm = _lorentzians(x, center, hwhm,
+                                                   derivatives=True)
+            elastic = QENSmodels.delta(x, 1., center)
+
+        jacobian = np.zeros((len(self.param_names), hwhm.shape[0], x.size))
+        jacobian[0] = eisf[:, np.newaxis] * elastic
+        jacobian[0] += np.einsum('ij,ijk->ik', qisf, peaks)
+        jacobian[1] = scale * np.einsum('ij,ijk->ik', qisf, d_center)
+        for k, name in enumerate(self.parameters, start=2):
+            if name in self.integer:
+                continue
+            dhwhm, deisf, dqisf = self._table_derivatives(q, values, name)
+            jacobian[k] = deisf[:, np.newaxis] * elastic
+            jacobian[k] += np.einsum('ij,ijk->ik', dqisf, peaks)
+            jacobian[k] += np.einsum('ij,ijk->ik', qisf * dhwhm, d_hwhm)
+            jacobian[k] *= scale
+        if profiles is not None:
+            # the detailed balance factor is in the convolved peaks
+            return _corrected(jacobian, x, q, False, None, msd, unit)
+        jacobian = _corrected(jacobian, x, q, False, temperature, msd, unit)
+        if resolution is not None:
+            jacobian = resolution.convolve(jacobian, x)
+        return jacobian
+
+    def vector(self, **params) -> 'ParameterVector':
+        """ :class:`ParameterVector` of the model with the values `params`
+        and the defaults of the other parameters """
+        return ParameterVector(self, **params)
+
+    def evaluate_vector(
+            self,
+            w: Union[float, list, np.ndarray],
+            q: Union[float, list, np.ndarray],
+            params: Union['ParameterVector', np.ndarray],
+            atol: Optional[float] = None,
+            binned: bool = False,
+            check: bool = True,
+            temperature: Optional[float] = None,
+            msd: Optional[float] = None,
+            unit: str = 'meV'
+    ) -> np.ndarray:
+        """ Model for all `q` at once, with the parameters given as a flat
+        vector
+
+        Parameters
+        ----------
+        w, q, atol, binned, check, temperature, msd, unit:
+            see :meth:`evaluate`
+
+        params: :class:`ParameterVector` or :class:`~numpy:numpy.ndarray`
+            values of all the parameters, in the order of
+            :attr:`param_names`. They are shared by all q.
+
+        Return
+        ------
+        :class:`~numpy:numpy.ndarray`
+            array of shape (q.size, w.size), even for a single q
+
+        Examples
+        --------
+        >>> model = get_model('BrownianTranslationalDiffusion')
+        >>> model.evaluate_vector([-1, 0, 1], [0.5, 1.],
+        ...                       [1., 0., 0.2]).round(4)
+        array([[0.0025, 0.9975, 0.0025],
+               [0.037 , 0.963 , 0.037 ]])
+
+        Notes
+        -----
+        The values are passed to the `components` function of the model by
+        position, without the lookup of the names and defaults of
+        :meth:`evaluate`, whose cost dominates for small grids, e.g. when an
+        optimizer or a fitting package calls the model at each iteration
+        with its own vector of parameters.
+        """
+        values = self._vector_values(params)
+        components = self.components if check else self.kernel
+        hwhm, eisf, qisf = components(q, *values[2:])
+        model = QENSmodels.assemble(w, hwhm, eisf, qisf, values[0],
+                                    values[1], atol=atol, binned=binned)
+        return _corrected(model, np.atleast_1d(np.asarray(w, np.float64)),
+                          q, binned, temperature, msd, unit)
+
+    def jacobian_vector(
+            self,
+            w: Union[float, list, np.ndarray],
+            q: Union[float, list, np.ndarray],
+            params: Union['ParameterVector', np.ndarray],
+            temperature: Optional[float] = None,
+            msd: Optional[float] = None,
+            unit: str = 'meV'
+    ) -> np.ndarray:
+        """ Derivatives of the model with respect to its parameters, given
+        as a flat vector, see :meth:`jacobian` and :meth:`evaluate_vector`
+        """
+        values = self._vector_values(params)
+        return self.jacobian(w, q, temperature=temperature, msd=msd,
+                             unit=unit,
+                             **dict(zip(self.param_names, values)))
+
+    def _vector_values(
+            self,
+            params: Union['ParameterVector', np.ndarray]
+    ) -> list:
+        """ Values of a vector of parameters, as numbers, with the
+        parameters listed in :attr:`integer` rounded """
+        if isinstance(params, ParameterVector):
+            params = params.values
+        values = np.asarray(params, dtype=np.float64).tolist()
+        if len(values) != len(self.param_names) or \
+                not isinstance(values[0], float):
+            raise ValueError('the vector of parameters should be of size '
+                             '{}'.format(len(self.param_names)))
+        for i in self._integer_index:
+            values[i] = int(round(values[i]))
+        return values
+
+    def evaluate_iqt(
+            self,
+            t: Union[float, list, np.ndarray],
+            q: Union[float, list, np.ndarray],
+            check: bool = True,
+            **params
+    ) -> np.ndarray:
+        r""" Intermediate scattering function of the model for all `q` at
+        once
+
+        Parameters
+        ----------
+        t: float, list or :class:`~numpy:numpy.ndarray`
+            time
+
+        q: float, list or :class:`~numpy:numpy.ndarray`
+            momentum transfer
+
+        check: bool
+            if False, the parameters are not validated, see
+            :meth:`validate`. Default to True.
+
+        params:
+            values of the parameters, see :meth:`evaluate`. `center`, which
+            only gives a phase in the time domain, is ignored.
+
+        Return
+        ------
+        :class:`~numpy:numpy.ndarray`
+            array of shape (q.size, t.size), even for a single q
+
+        Examples
+        --------
+        >>> model = get_model('BrownianTranslationalDiffusion')
+        >>> model.evaluate_iqt([0, 1, 2], [0.5, 1.], D=0.2).round(4)
+        array([[1.    , 0.9512, 0.9048],
+               [1.    , 0.8187, 0.6703]])
+
+        """
+        values = self._values(params)
+        if self._per_q(values):
+            return self._rows(functools.partial(self.evaluate_iqt,
+                                                check=check),
+                              t, q, values)
+        hwhm, eisf, qisf = self._tables(q, values, check)
+        scale, _ = self._scale_center(values, hwhm.shape[0])
+        return QENSmodels.assemble_iqt(t, hwhm, eisf, qisf, scale)
+
+    def jacobian_iqt(
+            self,
+            t: Union[float, list, np.ndarray],
+            q: Union[float, list, np.ndarray],
+            **params
+    ) -> np.ndarray:
+        """ Derivatives of the intermediate scattering function with respect
+        to the parameters
+
+        Parameters
+        ----------
+        t, q, params:
+            see :meth:`evaluate_iqt`
+
+        Return
+        ------
+        :class:`~numpy:numpy.ndarray`
+            array of shape (number of parameters, q.size, t.size), in the
+            order of :attr:`param_names`, see :meth:`jacobian`. The
+            derivative with respect to `center` is zero.
+
+        Examples
+        --------
+        >>> model = get_model('DeltaLorentz')
+        >>> model.jacobian_iqt([0, 1, 2], 1., A0=0.5, hwhm=0.2).shape
+        (4, 1, 3)
+
+        """
+        values = self._values(params)
+        if self._per_q(values):
+            return self._rows(self.jacobian_iqt, t, q, values)
+        x = np.abs(np.atleast_1d(np.asarray(t, dtype=np.float64)))
+        hwhm, eisf, qisf = self._tables(q, values)
+        scale, _ = self._scale_center(values, hwhm.shape[0])
+        hwhm = np.reshape(hwhm, (hwhm.shape[0], -1)).astype(np.float64)
+        qisf = np.reshape(qisf, hwhm.shape)
+        decays = np.exp(-hwhm[..., np.newaxis] * x)
+
+        jacobian = np.zeros((len(self.param_names), hwhm.shape[0], x.size))
+        jacobian[0] = eisf[:, np.newaxis]
+        jacobian[0] += np.einsum('ij,ijk->ik', qisf, decays)
+        for k, name in enumerate(self.parameters, start=2):
+            if name in self.integer:
+                continue
+            dhwhm, deisf, dqisf = self._table_derivatives(q, values, name)
+            dhwhm = np.reshape(dhwhm, hwhm.shape)
+            dqisf = np.reshape(dqisf, hwhm.shape)
+            jacobian[k] = deisf[:, np.newaxis]
+            jacobian[k] += np.einsum('ij,ijk->ik', dqisf, decays)
+            jacobian[k] -= np.einsum('ij,ijk->ik', qisf * dhwhm, decays) * x
+            jacobian[k] *= scale
+        return jacobian
+
+    def _values(self, params: Dict[str, float]) -> Dict[str, float]:
+        """ Values of all the parameters, with their defaults """
+        unknown = set(params) - set(self.defaults)
+        if unknown:
+            raise ValueError('unknown parameter(s): {}'.format(
+                ', '.join(sorted(unknown))))
+        values = dict(self.defaults)
+        values.update(params)
+        return values
+
+    def _per_q(self, values: Dict[str, float]) -> bool:
+        """ Whether some parameters other than `scale` and `center` are
+        given per q """
+        return any(np.ndim(values[name]) for name in self.parameters)
+
+    def _rows(
+            self,
+            method: Callable,
+            w: Union[float, list, np.ndarray],
+            q: Union[float, list, np.ndarray],
+            values: Dict[str, float]
+    ) -> np.ndarray:
+        """ `method` computed q by q, with the i-th value of the
+        parameters given per q """
+        q = np.atleast_1d(q)
+        for name, value in values.items():
+            if np.ndim(value) and np.size(value) != q.size:
+                raise ValueError('{} should be a number or an array with one '
+                                 'value per q'.format(name))
+        rows = [method(w, item, **{name: value[i] if np.ndim(value) else value
+                                   for name, value in values.items()})
+                for i, item in enumerate(q)]
+        return np.concatenate(rows, axis=-2)
+
+    def tables(
+            self,
+            q: Union[float, list, np.ndarray],
+            **params
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """ Widths, EISF and QISF of the model, of shapes (q.size, number
+        of Lorentzians), (q.size,) and (q.size, number of Lorentzians), as
+        given by its `components` function. `scale` and `center`, if given,
+        are ignored. """
+        return self._tables(q, self._values(params))
+
+    def validate(self, q: Union[float, list, np.ndarray], **params):
+        """ Check the values of the parameters, given as in
+        :meth:`evaluate`, once for all the evaluations with ``check=False``
+
+        Raises
+        ------
+        ValueError
+            if some values are outside the domain of the model, or if the
+            parameters given per q do not match the size of `q`
+
+        Examples
+        --------
+        >>> model = get_model('DeltaLorentz')
+        >>> model.validate([0.5, 1.], A0=[0.2, 0.4], hwhm=0.1)
+        >>> model.validate([0.5, 1.], A0=1.5)
+        Traceback (most recent call last):
+        ...
+        ValueError: The proportion of immobile atoms, A0, should be \
+comprised between 0 and 1, included.
+
+        """
+        values = self._values(params)
+        q = np.atleast_1d(q)
+        self._scale_center(values, q.size)
+        if not self._per_q(values):
+            self._tables(q, values)
+            return
+        for name, value in values.items():
+            if np.ndim(value) and np.size(value) != q.size:
+                raise ValueError('{} should be a number or an array with one '
+                                 'value per q'.format(name))
+        for i, item in enumerate(q):
+            self._tables(item, {name: value[i] if np.ndim(value) else value
+                                for name, value in values.items()})
+
+    def _scale_center(
+            self,
+            values: Dict[str, float],
+            size: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """ `scale` as a number or a column of `size` rows, and `center` as
+        a number or an array of size `size` """
+        scale = np.asarray(values['scale'], dtype=np.float64)
+        center = np.asarray(values['center'], dtype=np.float64)
+        for name, value in (('scale', scale), ('center', center)):
+            if value.ndim > 1 or (value.ndim == 1 and value.size != size):
+                raise ValueError('{} should be a number or an array with one '
+                                 'value per q'.format(name))
+        if scale.ndim == 1:
+            scale = scale[:, np.newaxis]
+        return scale, center
+
+    def _tables(
+            self,
+            q: Union[float, list, np.ndarray],
+            values: Dict[str, float],
+            check: bool = True
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """ Widths, EISF and QISF as float arrays of shape (q.size, m),
+        (q.size,) and (q.size, m), computed without the validation of the
+        parameters if `check` is False """
+        components = self.components if check else self.kernel
+        hwhm, eisf, qisf = components(
+            q, *[values[name] for name in self.parameters])
+        return np.atleast_2d(hwhm), np.atleast_1d(eisf), np.atleast_2d(qisf)
+
+    def _table_derivatives(
+            self,
+            q: Union[float, list, np.ndarray],
+            values: Dict[str, float],
+            name: str
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """ Finite-difference derivatives of the widths, EISF and QISF
+        with respect to the parameter `name`. A one-sided difference is used
+        next to the limit of the domain of the parameter. """
+        value = float(values[name])
+        tables = self._tables(q, values)
+        # several models compute their tables in single precision
+        step = np.cbrt(np.finfo(np.float32).eps) * (abs(value) or 1.)
+
+        def shifted(delta: float) -> Optional[Tuple[np.ndarray, ...]]:
+            try:
+                return self._tables(q, dict(values, **{name: value + delta}))
+            except ValueError:
+                return None
+
+        upper, lower = shifted(step), shifted(-step)
+        if upper is not None and lower is not None:
+            return tuple((a - b) / (2. * step) for a, b in zip(upper, lower))
+        if upper is not None:
+            return tuple((a - b) / step for a, b in zip(upper, tables))
+        if lower is not None:
+            return tuple((a - b) / step for a, b in zip(tables, lower))
+        raise ValueError('{} of model {} cannot be differentiated at '
+                         '{}'.format(name, self.name, value))
+
+
+class ParameterVector:
+    r""" Values of all the parameters of a model, as a flat array
+
+    Parameters
+    ----------
+    model: str, callable or :class:`ModelSpec`
+        model of the library, see :func:`get_model`
+
+    values: list or :class:`~numpy:numpy.ndarray`
+        values of all the parameters, in the order of
+        :attr:`ModelSpec.param_names`. Default to their default values.
+
+    params:
+        values of some parameters, by name, overriding `values`
+
+    Attributes
+    ----------
+    model: :class:`ModelSpec`
+        model of the parameters
+
+    values: :class:`~numpy:numpy.ndarray`
+        values of the parameters, which can be modified in place, e.g. by an
+        optimizer
+
+    Examples
+    --------
+    >>> params = ParameterVector('DeltaLorentz', A0=0.4)
+    >>> params
+    ParameterVector('DeltaLorentz', scale=1.0, center=0.0, A0=0.4, hwhm=1.0)
+    >>> params['hwhm'] = 0.2
+    >>> params.model.index['hwhm'], params.values[3]
+    (3, 0.2)
+    >>> params.model.evaluate_vector([-1, 0, 1], 1., params).round(4)
+    array([[0.0222, 0.9778, 0.0222]])
+
+    Notes
+    -----
+    * The position of each parameter is given by :attr:`ModelSpec.index`,
+      fixed for each model, and the bounds by :attr:`lower` and
+      :attr:`upper`.
+
+    * Optimizers without bounds can work on the unbounded variables of
+      :meth:`to_unbounded`, mapped back to the parameters with
+      :meth:`from_unbounded`. As in MINUIT, a parameter bounded on both
+      sides is :math:`a + (b - a)(\sin u + 1) / 2`, a parameter with a
+      lower bound :math:`a - 1 + \sqrt{u^2 + 1}`, a parameter with an
+      upper bound :math:`b + 1 - \sqrt{u^2 + 1}` and the other parameters
+      are not transformed.
+    """
+    __slots__ = ('model', 'values')
+
+    def __init__(
+            self,
+            model: Union[str, Callable, ModelSpec],
+            values: Optional[Union[list, np.ndarray]] = None,
+            **params
+    ):
+        self.model = get_model(model)
+        if values is None:
+            values = [self.model.defaults[name]
+                      for name in self.model.param_names]
+        self.values = np.array(values, dtype=np.float64)
+        if self.values.shape != (len(self.model.param_names),):
+            raise ValueError('values should be of size {}'.format(
+                len(self.model.param_names)))
+        for name, value in params.items():
+            self[name] = value
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        """ Names of the parameters, see :attr:`ModelSpec.param_names` """
+        return self.model.param_names
+
+    @property
+    def lower(self) -> np.ndarray:
+        """ Lower bounds of the parameters, -inf for the parameters listed
+        in :attr:`ModelSpec.integer` """
+        return np.array([self.model.bounds.get(name, (-np.inf, np.inf))[0]
+                         for name in self.names])
+
+    @property
+    def upper(self) -> np.ndarray:
+        """ Upper bounds of the parameters, inf for the parameters listed
+        in :attr:`ModelSpec.integer` """
+        return np.array([self.model.bounds.get(name, (-np.inf, np.inf))[1]
+                         for name in self.names])
+
+    def __len__(self) -> int:
+        return self.values.size
+
+    def __getitem__(self, name: str) -> float:
+        return float(self.values[self._position(name)])
+
+    def __setitem__(self, name: str, value: float):
+        self.values[self._position(name)] = value
+
+    def __array__(self, dtype=None) -> np.ndarray:
+        return self.values if dtype is None else self.values.astype(dtype)
+
+    def __repr__(self) -> str:
+        return 'ParameterVector({!r}, {})'.format(
+            self.model.name, ', '.join('{}={}'.format(name, value)
+                                       for name, value in
+                                       zip(self.names, self.values.tolist())))
+
+    def _position(self, name: str) -> int:
+        try:
+            return self.model.index[name]
+        except KeyError:
+            raise ValueError('unknown parameter: {}'.format(name))
+
+    def copy(self) -> 'ParameterVector':
+        """ Copy of the vector, with its own array of values """
+        return ParameterVector(self.model, self.values)
+
+    def as_dict(self) -> Dict[str, float]:
+        """ Values of the parameters by name, as accepted by
+        :meth:`ModelSpec.evaluate` """
+        return dict(zip(self.names, self.model._vector_values(self.values)))
+
+    def clip(self) -> 'ParameterVector':
+        """ Move the values out of bounds to the closest bound, in place """
+        np.clip(self.values, self.lower, self.upper, out=self.values)
+        return self
+
+    def to_unbounded(self) -> np.ndarray:
+        """ Unbounded variables corresponding to the values of the
+        parameters, see Notes """
+        lower, upper = self.lower, self.upper
+        values = np.clip(self.values, lower, upper)
+        result = values.copy()
+        both, low, high = _bounded(lower, upper)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result[both] = np.arcsin(np.clip(
+                2. * (values[both] - lower[both])
+                / (upper[both] - lower[both]) - 1., -1., 1.))
+            result[low] = np.sqrt((values[low] - lower[low] + 1.) ** 2 - 1.)
+            result[high] = np.sqrt((upper[high] - values[high] + 1.) ** 2
+                                   - 1.)
+        return result
+
+    @classmethod
+    def from_unbounded(
+            cls,
+            model: Union[str, Callable, ModelSpec],
+            unbounded: Union[list, np.ndarray]
+    ) -> 'ParameterVector':
+        """ Parameters corresponding to the unbounded variables of
+        :meth:`to_unbounded`
+
+        Examples
+        --------
+        >>> params = ParameterVector('DeltaLorentz', A0=0.3, hwhm=0.2)
+        >>> same = ParameterVector.from_unbounded('DeltaLorentz',
+        ...                                       params.to_unbounded())
+        >>> same.values.round(12).tolist()
+        [1.0, 0.0, 0.3, 0.2]
+        """
+        result = cls(model)
+        u = np.asarray(unbounded, dtype=np.float64)
+        lower, upper = result.lower, result.upper
+        values = u.copy()
+        both, low, high = _bounded(lower, upper)
+        values[both] = lower[both] + (upper[both] - lower[both]) \
+            * (np.sin(u[both]) + 1.) / 2.
+        values[low] = lower[low] - 1. + np.sqrt(u[low] ** 2 + 1.)
+        values[high] = upper[high] + 1. - np.sqrt(u[high] ** 2 + 1.)
+        result.values[...] = values
+        return result
+
+
+def _corrected(
+        model: np.ndarray,
+        w: np.ndarray,
+        q: Union[float, list, np.ndarray],
+        binned: bool,
+        temperature: Optional[float],
+        msd: Optional[float],
+        unit: str
+) -> np.ndarray:
+    """ `model`, or its derivatives, of shape (..., q.size, w.size)
+    multiplied in place by the detailed balance and Debye-Waller factors,
+    see :func:`~QENSmodels.apply_corrections` """
+    if temperature is None and msd is None:
+        return model
+    if binned:
+        w = 0.5 * (w[1:] + w[:-1])
+    model *= QENSmodels.correction_factor(w, q, temperature, msd, unit=unit)
+    return model
+
+
+def _with_delta(hwhm: np.ndarray) -> np.ndarray:
+    """ Widths of the Lorentzians preceded by the zero width of the delta
+    """
+    return np.hstack([np.zeros((hwhm.shape[0], 1), dtype=hwhm.dtype), hwhm])
+
+
+def _bounded(
+        lower: np.ndarray,
+        upper: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ Masks of the parameters bounded on both sides, only below and only
+    above """
+    finite_lower, finite_upper = np.isfinite(lower), np.isfinite(upper)
+    return (finite_lower & finite_upper, finite_lower & ~finite_upper,
+            ~finite_lower & finite_upper)
+
+
+def _lorentzians(
+        x: np.ndarray,
+        center: Union[float, np.ndarray],
+        hwhm: np.ndarray,
+        derivatives: bool = False
+):
+    """ Lorentzians of unit scale for all the widths at once, of shape
+    hwhm.shape + (x.size,), with the normalization of
+    :func:`~QENSmodels.lorentzian`, and optionally their derivatives with
+    respect to `center` and to their widths. `center` is a number or an
+    array with one value per row of `hwhm`. """
+    hwhm = np.asarray(hwhm)
+    if not np.issubdtype(hwhm.dtype, np.floating):
+        hwhm = hwhm.astype(np.float64)
+    gamma = hwhm.astype(np.float64)[..., np.newaxis]
+    # squared with the precision of the widths, as in QENSmodels.assemble
+    gamma_squared = (hwhm ** 2).astype(np.float64)[..., np.newaxis]
+    center = np.asarray(center, dtype=np.float64)
+    centers = np.broadcast_to(center[..., np.newaxis], gamma.shape[:-1])
+    if center.ndim:
+        distance = x - center[:, np.newaxis, np.newaxis]
+    else:
+        distance = x - center
+    with np.errstate(divide='ignore', invalid='ignore'):
+        denominator = distance ** 2 + gamma_squared
+        peaks = gamma / denominator / np.pi
+        if derivatives:
+            d_center = 2. * gamma * distance / denominator ** 2 / np.pi
+            d_hwhm = (distance ** 2 - gamma_squared) / denominator ** 2 / np.pi
+
+    zero_width = gamma[..., 0] == 0
+    if np.any(zero_width):
+        peaks[zero_width] = QENSmodels.delta(x, 1., centers[zero_width])
+        if derivatives:
+            d_center[zero_width] = 0.
+            d_hwhm[zero_width] = 0.
+
+    if x.size > 1:
+        area = np.trapz(peaks, x, axis=-1)
+        renormalize = area > 1
+        if np.any(renormalize):
+            area = area[renormalize][:, np.newaxis]
+            if derivatives:
+                unnormalized = peaks[renormalize]
+                for derivative in (d_center, d_hwhm):
+                    d_area = np.trapz(derivative[renormalize], x,
+                                      axis=-1)[:, np.newaxis]
+                    derivative[renormalize] = \
+                        derivative[renormalize] / area \
+                        - unnormalized * d_area / area ** 2
+            peaks[renormalize] /= area
+
+    if derivatives:
+        return peaks, d_center, d_hwhm
+    return peaks
+
+
+MODELS = {spec.name: spec for spec in [
+    ModelSpec('BrownianTranslationalDiffusion',
+              QENSmodels.sqwBrownianTranslationalDiffusion,
+              QENSmodels.componentsBrownianTranslationalDiffusion,
+              QENSmodels.fast.componentsBrownianTranslationalDiffusion),
+    ModelSpec('ChudleyElliottDiffusion',
+              QENSmodels.sqwChudleyElliottDiffusion,
+              QENSmodels.componentsChudleyElliottDiffusion,
+              QENSmodels.fast.componentsChudleyElliottDiffusion),
+    ModelSpec('DeltaLorentz',
+              QENSmodels.sqwDeltaLorentz,
+              QENSmodels.componentsDeltaLorentz,
+              QENSmodels.fast.componentsDeltaLorentz,
+              bounds={'A0': (0., 1.)}),
+    ModelSpec('DeltaTwoLorentz',
+              QENSmodels.sqwDeltaTwoLorentz,
+              QENSmodels.componentsDeltaTwoLorentz,
+              QENSmodels.fast.componentsDeltaTwoLorentz,
+              bounds={'A0': (0., 1.), 'A1': (0., 1.)}),
+    ModelSpec('EquivalentSitesCircle',
+              QENSmodels.sqwEquivalentSitesCircle,
+              QENSmodels.componentsEquivalentSitesCircle,
+              QENSmodels.fast.componentsEquivalentSitesCircle,
+              integer=('Nsites',)),
+    ModelSpec('GaussianModel3D',
+              QENSmodels.sqwGaussianModel3D,
+              QENSmodels.componentsGaussianModel3D,
+              QENSmodels.fast.componentsGaussianModel3D),
+    ModelSpec('IsotropicRotationalDiffusion',
+              QENSmodels.sqwIsotropicRotationalDiffusion,
+              QENSmodels.componentsIsotropicRotationalDiffusion,
+              QENSmodels.fast.componentsIsotropicRotationalDiffusion),
+    ModelSpec('JumpSitesLogNormDist',
+              QENSmodels.sqwJumpSitesLogNormDist,
+              QENSmodels.componentsJumpSitesLogNormDist,
+              QENSmodels.fast.componentsJumpSitesLogNormDist,
+              integer=('Nsites', 'Nnodes')),
+    ModelSpec('JumpTranslationalDiffusion',
+              QENSmodels.sqwJumpTranslationalDiffusion,
+              QENSmodels.componentsJumpTranslationalDiffusion,
+              QENSmodels.fast.componentsJumpTranslationalDiffusion),
+    ModelSpec('WaterTeixeira',
+              QENSmodels.sqwWaterTeixeira,
+              QENSmodels.componentsWaterTeixeira,
+              QENSmodels.fast.componentsWaterTeixeira),
+]}
+
+
+def get_model(model: Union[str, Callable, ModelSpec]) -> ModelSpec:
+    """ Description of a model of the library
+
+    Parameters
+    ----------
+    model: str, callable or :class:`ModelSpec`
+        name of the model, with or without the `sqw` prefix, or its `sqw`
+        function
+
+    Return
+    ------
+    :class:`ModelSpec`
+
+    Examples
+    --------
+    >>> import QENSmodels
+    >>> get_model(QENSmodels.sqwDeltaLorentz)
+    ModelSpec('DeltaLorentz')
+
+    >>> get_model('sqwEquivalentSitesCircle').parameters
+    ('Nsites', 'radius', 'resTime')
+
+    """
+    if isinstance(model, ModelSpec):
+        return model
+    if isinstance(model, str):
+        name = model[3:] if model.startswith('sqw') else model
+        if name in MODELS:
+            return MODELS[name]
+    else:
+        for spec in MODELS.values():
+            if spec.sqw is model:
+                return spec
+    raise ValueError('unknown model: {!r}'.format(model))
@@ -0,0 +1,511 @@
+import copy
+import numpy as np
+from scipy.interpolate import interp1d
+from scipy.fft import rfft, irfft, next_fast_len
+from typing import Optional, Union, Tuple
+
+from QENSmodels._cache import LRUCache, array_key
+from QENSmodels.fourier import fourier_transform
+
+try:
+    import QENSmodels
+except ImportError:
+    print('Module QENSmodels not found')
+
+
+class Resolution:
+    r""" Instrument resolution function built from tabulated data
+
+    The normalization, peak centering and interpolation of the tabulated
+    data are done once, when the object is created. The resolution sampled
+    on an energy grid and its Fourier transform are cached per grid, so that
+    :meth:`evaluate` and :meth:`convolve` are cheap when called repeatedly
+    with the same grid, as in a fitting loop.
+
+    Parameters
+    ----------
+    x: list or :class:`~numpy:numpy.ndarray`
+        energy transfer of the tabulated data
+
+    y: list or :class:`~numpy:numpy.ndarray`
+        tabulated resolution. It can be 1D, of the same size as `x`, or 2D
+        of shape (number of spectra, `x.size`), for example one vanadium
+        spectrum per q.
+
+    normalize: bool
+        if True, each spectrum is scaled to unit area. Default to True.
+
+    center: bool
+        if True, each spectrum is shifted so that its peak is at zero
+        energy transfer. Default to True.
+
+    kind: str
+        kind of interpolation, passed to :class:`scipy.interpolate.interp1d`.
+        Default to 'cubic'.
+
+    cache_size: int
+        minimum number of convolved deltas and Lorentzians kept by
+        :meth:`convolve_components` and the fits of the models. The cache
+        is enlarged to keep those of two evaluations of a model, whatever
+        its number of Lorentzians. Default to 512.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> x = np.linspace(-1, 1, 201)
+    >>> res = Resolution(x, np.exp(-(x - 0.1) ** 2 / 0.02))
+    >>> round(res.peak_center[0], 3)
+    0.1
+    >>> w = np.linspace(-0.5, 0.5, 101)
+    >>> round(np.trapz(res.evaluate(w), w), 3)
+    1.0
+
+    Notes
+    -----
+    * Outside the range of the tabulated data, the resolution is set to zero.
+
+    * The convolution of a model `m` sampled on a uniform grid `w` is
+
+      .. math::
+
+        (R \otimes m)(w_i) = \sum_j m(w_j) R(w_i - w_j) \Delta w
+
+      so that the convolution of a delta function, as defined in
+      :func:`~QENSmodels.delta`, with the resolution gives back the
+      resolution.
+
+    """
+
+    def __init__(
+            self,
+            x: Union[list, np.ndarray],
+            y: Union[list, np.ndarray],
+            normalize: bool = True,
+            center: bool = True,
+            kind: str = 'cubic',
+            cache_size: int = 512
+    ):
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+
+        # Input validation
+        if x.ndim != 1 or x.size < 4:
+            raise ValueError('x should be a 1D array with at least 4 values')
+        if y.ndim not in (1, 2) or y.shape[-1] != x.size:
+            raise ValueError('y should be of shape (x.size,) or '
+                             '(number of spectra, x.size)')
+
+        # a single spectrum gives 1D outputs
+        self._single = y.ndim == 1
+
+        order = np.argsort(x)
+        x = x[order]
+        y = np.atleast_2d(y)[:, order]
+
+        if normalize:
+            area = np.trapz(y, x, axis=-1)
+            if np.any(area <= 0):
+                raise ValueError('the area of the resolution should be '
+                                 'strictly positive')
+            y = y / area[:, np.newaxis]
+
+        if center:
+            self.peak_center = np.array([_peak_position(x, item)
+                                         for item in y])
+        else:
+            self.peak_center = np.zeros(y.shape[0])
+
+        self.x = x
+        self.y = y
+        self._interpolators = [
+            interp1d(x - shift, item, kind=kind, bounds_error=False,
+                     fill_value=0., assume_sorted=True)
+            for shift, item in zip(self.peak_center, y)
+        ]
+        self._evaluated = LRUCache()
+        self._kernels = LRUCache()
+        self._bases = LRUCache(cache_size)
+        # widths and centers already requested, see _convolved_lorentzians
+        self._requests = LRUCache()
+
+    @classmethod
+    def from_file(cls, filename: str, **kwargs) -> 'Resolution':
+        """ Create a resolution from a two-column text file (energy transfer
+        and intensity), such as `irf_iris.dat`. Keyword arguments are passed
+        to :class:`Resolution`.
+        """
+        data = np.loadtxt(filename)
+        return cls(data[:, 0], data[:, 1], **kwargs)
+
+    @property
+    def n_spectra(self) -> int:
+        """ Number of tabulated spectra """
+        return self.y.shape[0]
+
+    def spectrum(self, index: int) -> 'Resolution':
+        """ Resolution made of the single spectrum of index `index`, for
+        example to fit the data of one q
+
+        Examples
+        --------
+        >>> import numpy as np
+        >>> x = np.linspace(-1, 1, 201)
+        >>> res = Resolution(x, [np.exp(-x ** 2 / 0.02),
+        ...                      np.exp(-x ** 2 / 0.08)])
+        >>> res.spectrum(1).n_spectra
+        1
+        """
+        result = copy.copy(self)
+        result._single = True
+        result.y = self.y[[index]]
+        result.peak_center = self.peak_center[[index]]
+        result._interpolators = [self._interpolators[index]]
+        result._evaluated = LRUCache()
+        result._kernels = LRUCache()
+        result._bases = LRUCache(self._bases.maxsize)
+        result._requests = LRUCache()
+        return result
+
+    def evaluate(self, w: Union[list, np.ndarray]) -> np.ndarray:
+        """ Normalized and centered resolution at energy transfers `w`
+
+        Parameters
+        ----------
+        w: list or :class:`~numpy:numpy.ndarray`
+            energy transfer
+
+        Return
+        ------
+        :class:`~numpy:numpy.ndarray`
+            array of shape `w.shape` for a single spectrum or of shape
+            (number of spectra, `w.size`) otherwise
+        """
+        w = np.asarray(w, dtype=np.float64)
+        key = array_key(w)
+        result = self._evaluated.get(key)
+        if result is None:
+            result = np.array([f(w) for f in self._interpolators])
+            if self._single:
+                result = result[0]
+            result.flags.writeable = False
+            self._evaluated.put(key, result)
+        return result
+
+    def fourier(self, t: Union[float, list, np.ndarray]) -> np.ndarray:
+        """ Fourier transform of the normalized and centered resolution at
+        times `t`, by which the intermediate scattering function of a model
+        is multiplied, see :func:`~QENSmodels.fourier.fourier_transform`
+
+        Parameters
+        ----------
+        t: float, list or :class:`~numpy:numpy.ndarray`
+            time, in the inverse unit of the energy transfer
+
+        Return
+        ------
+        :class:`~numpy:numpy.ndarray`
+            array of shape (`t.size`,) for a single spectrum or of shape
+            (number of spectra, `t.size`) otherwise
+
+        Examples
+        --------
+        >>> import numpy as np
+        >>> x = np.linspace(-1, 1, 401)
+        >>> res = Resolution(x, np.exp(-(x - 0.1) ** 2 / 0.02))
+        >>> res.fourier([0., 10.]).round(4)
+        array([1.    , 0.6065])
+        """
+        result = np.array([fourier_transform(self.x - shift, item, t)
+                           for shift, item in zip(self.peak_center,
+                                                  self.y)])
+        if self._single:
+            result = result[0]
+        return result
+
+    def convolve(
+            self,
+            model: Union[list, np.ndarray],
+            w: Union[list, np.ndarray]
+    ) -> np.ndarray:
+        """ Convolution of `model` with the resolution
+
+        Parameters
+        ----------
+        model: list or :class:`~numpy:numpy.ndarray`
+            model sampled on `w`. It can be of shape (`w.size`,) or
+            (number of spectra, `w.size`), in which case each spectrum is
+            convolved with the corresponding spectrum of the resolution.
+
+        w: list or :class:`~numpy:numpy.ndarray`
+            uniform grid of energy transfer
+
+        Return
+        ------
+        :class:`~numpy:numpy.ndarray`
+            convolved model, sampled on `w`
+        """
+        model = np.asarray(model, dtype=np.float64)
+        kernel_fft, n_w, n_fft = self._kernel(w)
+        if model.shape[-1] != n_w:
+            raise ValueError('the last dimension of model should match '
+                             'the size of w')
+        if self._single:
+            kernel_fft = kernel_fft[0]
+        full = irfft(rfft(model, n_fft, axis=-1) * kernel_fft, n_fft, axis=-1)
+        return full[..., n_w - 1: 2 * n_w - 1]
+
+    def convolve_components(
+            self,
+            w: Union[list, np.ndarray],
+            hwhm: np.ndarray,
+            eisf: np.ndarray,
+            qisf: np.ndarray,
+            scale: Union[float, np.ndarray] = 1.,
+            center: Union[float, np.ndarray] = 0.,
+            q: Optional[Union[float, list, np.ndarray]] = None,
+            temperature: Optional[float] = None,
+            msd: Optional[float] = None,
+            unit: str = 'meV'
+    ) -> np.ndarray:
+        r""" Convolution with the resolution of a model made of a delta and
+        a sum of Lorentzians
+
+        The convolution being linear, the result is built from the
+        resolution convolved with a delta and with each Lorentzian. These
+        are cached per width, center, temperature and grid, so that no new
+        convolution is computed when only the amplitudes (`scale`, `eisf`,
+        `qisf`, `msd`) of the model change.
+
+        Parameters
+        ----------
+        w: list or :class:`~numpy:numpy.ndarray`
+            uniform grid of energy transfer
+
+        hwhm, eisf, qisf: :class:`~numpy:numpy.ndarray`
+            widths, EISF and QISF of the model, as returned by the
+            `components` functions, see :func:`~QENSmodels.assemble`
+
+        scale: float or :class:`~numpy:numpy.ndarray`
+            scale factor, a number or one value per q. Default to 1.
+
+        center: float or :class:`~numpy:numpy.ndarray`
+            center of the peaks, a number or one value per q. Default to 0.
+
+        q: float, list or :class:`~numpy:numpy.ndarray`
+            momentum transfer, only needed with `msd`
+
+        temperature: float
+            temperature (in K). If given, the model is multiplied by the
+            detailed balance factor before the convolution, see
+            :func:`~QENSmodels.detailed_balance_factor`.
+
+        msd: float
+            mean square displacement. If given, the model is multiplied by
+            the Debye-Waller factor, see
+            :func:`~QENSmodels.debye_waller_factor`.
+
+        unit: str
+            unit of `w` for the detailed balance factor: `meV` (default),
+            `ueV` or `1/ps`
+
+        Return
+        ------
+        :class:`~numpy:numpy.ndarray`
+            array of shape (q.size, `w.size`). If the resolution has several
+            spectra, their number should be equal to q.size.
+
+        Examples
+        --------
+        >>> import numpy as np
+        >>> import QENSmodels
+        >>> w = np.linspace(-2, 2, 401)
+        >>> res = Resolution(w, np.exp(-w ** 2 / 0.01))
+        >>> result = res.convolve_components(
+        ...     w, *QENSmodels.componentsDeltaLorentz([0.5, 1.], 0.3, 0.2),
+        ...     center=[0., 0.1])
+        >>> result.shape
+        (2, 401)
+
+        """
+        w = np.asarray(w, dtype=np.float64)
+        hwhm = np.atleast_2d(hwhm)
+        qisf = np.atleast_2d(qisf)
+        eisf = np.atleast_1d(eisf)
+        n_q = hwhm.shape[0]
+        scale = np.asarray(scale, dtype=np.float64)
+        center = np.asarray(center, dtype=np.float64)
+        for name, value in (('scale', scale), ('center', center)):
+            if value.ndim > 1 or (value.ndim == 1 and value.size != n_q):
+                raise ValueError('{} should be a number or an array with one '
+                                 'value per q'.format(name))
+
+        if msd is not None:
+            if q is None:
+                raise ValueError('q is needed to apply the Debye-Waller '
+                                 'factor')
+            factor = QENSmodels.debye_waller_factor(q, msd)
+            if factor.size != n_q:
+                raise ValueError('the number of q values should match the '
+                                 'shape of the components')
+            eisf = eisf * factor
+            qisf = qisf * factor[:, np.newaxis]
+
+        # the delta is the Lorentzian of zero width
+        peaks, = self._convolved_lorentzians(
+            w, QENSmodels.models._with_delta(hwhm), center, temperature,
+            unit)
+        sqw = eisf[:, np.newaxis] * peaks[:, 0]
+        sqw += np.einsum('ij,ijk->ik', qisf, peaks[:, 1:])
+        sqw *= scale[:, np.newaxis] if scale.ndim else scale
+        return sqw
+
+    def _convolved_lorentzians(
+            self,
+            w: np.ndarray,
+            hwhm: np.ndarray,
+            center: Union[float, np.ndarray],
+            temperature: Optional[float] = None,
+            unit: str = 'meV',
+            derivatives: bool = False,
+            budget: Optional[int] = None
+    ) -> Optional[Tuple[np.ndarray, ...]]:
+        """ Resolution convolved with Lorentzians of unit scale, with the
+        normalization of :func:`~QENSmodels.lorentzian` and the detailed
+        balance factor of `temperature`, and optionally with their
+        derivatives with respect to their center and widths
+
+        `hwhm` is of shape (number of rows, number of Lorentzians), a zero
+        width giving a delta, and the row i is convolved with the spectrum i
+        of the resolution, if it has several. `center` is a number, one
+        value per row or an array of the shape of `hwhm`. The convolved
+        Lorentzians are cached, in a cache large enough to keep those of
+        two calls. They are returned as arrays of shape `hwhm.shape` +
+        (w.size,).
+
+        If `budget` is given and more than `budget` convolutions are needed,
+        None is returned, so that the caller convolves its model directly,
+        unless the same widths and centers were already requested: they
+        are then expected to come again, e.g. while only amplitudes are
+        fitted, and are convolved and cached.
+        """
+        hwhm = np.asarray(hwhm)
+        if not np.issubdtype(hwhm.dtype, np.floating):
+            hwhm = hwhm.astype(np.float64)
+        n_rows = hwhm.shape[0]
+        if not self._single and n_rows != self.n_spectra:
+            raise ValueError('the number of q values should match the '
+                             'number of spectra of the resolution')
+        center = np.asarray(center, dtype=np.float64)
+        if center.ndim == 1:
+            center = center[:, np.newaxis]
+        centers = np.broadcast_to(center, hwhm.shape)
+        spectra = np.broadcast_to(
+            np.zeros((n_rows, 1), dtype=int) if self._single
+            else np.arange(n_rows)[:, np.newaxis], hwhm.shape)
+
+        grid = array_key(w)
+        correction = None if temperature is None \
+            else (float(temperature), unit)
+        kinds = ('peak', 'd_center', 'd_hwhm') if derivatives else ('peak',)
+        terms = list(zip(spectra.ravel().tolist(), hwhm.ravel().tolist(),
+                         centers.ravel().tolist()))
+        unique = list(dict.fromkeys(terms))
+        self._bases.maxsize = max(self._bases.maxsize,
+                                  2 * len(kinds) * len(unique))
+
+        # the widths are squared with their own precision
+        precision = hwhm.dtype.str
+
+        def key(term, kind):
+            return term + (kind, precision, correction, grid)
+
+        bases = {}
+        missing = []
+        for term in unique:
+            found = [self._bases.get(key(term, kind)) for kind in kinds]
+            if any(item is None for item in found):
+                missing.append(term)
+            else:
+                bases.update((key(term, kind), item)
+                             for kind, item in zip(kinds, found))
+
+        if budget is not None and len(kinds) * len(missing) > budget:
+            request = (grid, correction, derivatives, array_key(hwhm),
+                       array_key(np.ascontiguousarray(centers)))
+            if request not in self._requests:
+                self._requests.put(request, True)
+                return None
+
+        # convolve all the missing Lorentzians at once
+        if missing:
+            widths = np.array([term[1] for term in missing],
+                              dtype=hwhm.dtype)[:, np.newaxis]
+            profiles = QENSmodels.models._lorentzians(
+                w, np.array([term[2] for term in missing]), widths,
+                derivatives=derivatives)
+            if not derivatives:
+                profiles = (profiles,)
+            models = np.concatenate([item[:, 0] for item in profiles])
+            if temperature is not None:
+                models *= QENSmodels.detailed_balance_factor(
+                    w, temperature, unit=unit)
+            kernel_fft, n_w, n_fft = self._kernel(w)
+            rows = np.tile([term[0] for term in missing], len(kinds))
+            full = irfft(rfft(models, n_fft, axis=-1) * kernel_fft[rows],
+                         n_fft, axis=-1)[:, n_w - 1: 2 * n_w - 1]
+            full = full.reshape(len(kinds), len(missing), n_w)
+            for kind, results in zip(kinds, full):
+                for term, basis in zip(missing, results):
+                    bases[key(term, kind)] = basis
+                    self._bases.put(key(term, kind), basis)
+
+        return tuple(np.array([bases[key(term, kind)] for term in terms])
+                     .reshape(hwhm.shape + (w.size,)) for kind in kinds)
+
+    def _kernel(self, w: Union[list, np.ndarray]) -> Tuple[np.ndarray, int,
+                                                           int]:
+        """ Fourier transform of the resolution sampled at all the
+        differences of energy transfers of the grid `w` """
+        w = np.asarray(w, dtype=np.float64)
+        key = array_key(w)
+        cached = self._kernels.get(key)
+        if cached is not None:
+            return cached
+
+        dw = grid_spacing(w)
+        n_w = w.size
+        # differences w_i - w_j, from -(n_w - 1) dw to (n_w - 1) dw
+        shifts = np.arange(-(n_w - 1), n_w) * dw
+        kernel = np.atleast_2d(self.evaluate(shifts)) * abs(dw)
+        # linear (not circular) convolution
+        n_fft = next_fast_len(3 * n_w - 2, real=True)
+        cached = (rfft(kernel, n_fft, axis=-1), n_w, n_fft)
+        self._kernels.put(key, cached)
+        return cached
+
+
+def grid_spacing(w: np.ndarray) -> float:
+    """ Spacing of a uniform grid. A ValueError is raised if the grid is
+    not uniform. """
+    w = np.asarray(w)
+    if w.ndim != 1 or w.size < 2:
+        raise ValueError('the energy grid should be a 1D array with at '
+                         'least 2 values')
+    dw = (w[-1] - w[0]) / (w.size - 1)
+    if dw == 0 or not np.allclose(np.diff(w), dw, rtol=1e-3, atol=0):
+        raise ValueError('the energy grid should be uniform')
+    return dw
+
+
+def _peak_position(x: np.ndarray, y: np.ndarray) -> float:
+    """ Position of the maximum of y, refined with a parabola through the
+    three points around the maximum """
+    idx = int(np.argmax(y))
+    if idx == 0 or idx == x.size - 1:
+        return x[idx]
+    y0, y1, y2 = y[idx - 1: idx + 2]
+    denominator = y0 - 2. * y1 + y2
+    if denominator == 0:
+        return x[idx]
+    offset = 0.5 * (y0 - y2) / denominator
+    return x[idx] + offset * 0.5 * (x[idx + 1] - x[idx - 1])
@@ -0,0 +1,393 @@
+"""
+Selection of the model of a sample among candidate models of the library,
+fitted concurrently to the same dataset and ranked by information criteria
+"""
+import multiprocessing
+import warnings
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, \
+    Sequence, Tuple, Union
+
+from QENSmodels.estimators import _ESTIMATES, initial_guess
+from QENSmodels.fitting import Dataset, FitResult, _Problem, _solve
+from QENSmodels.models import ModelSpec, get_model
+from QENSmodels.resolution import Resolution
+
+if TYPE_CHECKING:
+    # only available from Python 3.8, and imported when the candidates are
+    # fitted in several processes
+    from multiprocessing.shared_memory import SharedMemory
+
+CRITERIA = ('chisq', 'aic', 'bic')
+
+
+@dataclass
+class Candidate:
+    r""" Result of the fit of one candidate model, see :func:`compare_models`
+
+    Attributes
+    ----------
+    model: str
+        name of the model
+
+    fit: :class:`~QENSmodels.fitting.FitResult`
+        result of the fit, or None if it was stopped early
+
+    chisq: float
+        chi-square of the fit, or the lowest one reached before it was
+        stopped
+
+    aic: float
+        Akaike information criterion, :math:`\chi^2 + 2 k`
+
+    bic: float
+        Bayesian information criterion, :math:`\chi^2 + k \ln n`
+
+    n_params: int
+        number :math:`k` of fitted parameters
+
+    n_points: int
+        number :math:`n` of fitted points
+
+    nfev: int
+        number of evaluations of the model
+
+    stopped: bool
+        whether the fit was abandoned because the candidate was clearly
+        worse than a candidate already fitted
+
+    error: str
+        message of the error raised by the fit, e.g. by initial values
+        outside the domain of the model, or None
+    """
+    model: str
+    fit: Optional[FitResult]
+    chisq: float
+    aic: float
+    bic: float
+    n_params: int
+    n_points: int
+    nfev: int
+    stopped: bool = False
+    error: Optional[str] = None
+
+
+class _Stopped(Exception):
+    """ Raised in the residuals to abandon a fit """
+
+
+class _Shared:
+    """ Dataset read from a block of shared memory, and the best criterion
+    of the candidates fitted so far, written at the end of the block """
+
+    def __init__(
+            self,
+            buffer,
+            n_q: int,
+            n_w: int,
+            resolution: Optional[Resolution],
+            lock
+    ):
+        values = np.ndarray((n_w + n_q + 2 * n_q * n_w + 1,),
+                            dtype=np.float64, buffer=buffer)
+        size = n_q * n_w
+        self.w = values[:n_w]
+        self.q = values[n_w:n_w + n_q]
+        self.data = values[n_w + n_q:n_w + n_q + size]
+        self.error = values[n_w + n_q + size:-1]
+        self.best = values[-1:]
+        self.resolution = resolution
+        self.lock = lock
+
+    def dataset(self) -> Dataset:
+        return Dataset(self.w, self.q, self.data, self.error,
+                       self.resolution)
+
+    def improve(self, value: float):
+        """ Record the criterion of a fitted candidate """
+        with self.lock:
+            self.best[0] = min(self.best[0], value)
+
+
+class _Candidate(_Problem):
+    """ Fit of a candidate model, raising :class:`_Stopped` when its
+    criterion stays larger than `stop_ratio` times the best one """
+
+    def __init__(
+            self,
+            shared: _Shared,
+            criterion: str,
+            stop_ratio: Optional[float],
+            patience: int,
+            *args
+    ):
+        super().__init__(*args)
+        self.shared = shared
+        self.n_points = int(self.mask.sum())
+        self.penalty = {'chisq': 0., 'aic': 2. * len(self.columns),
+                        'bic': len(self.columns) * np.log(self.n_points)
+                        }[criterion]
+        self.stop_ratio = stop_ratio
+        self.patience = patience
+        self.nfev = 0
+        self.chisq = np.inf
+
+    def residuals(self, x: np.ndarray) -> np.ndarray:
+        residuals = super().residuals(x)
+        self.nfev += 1
+        self.chisq = min(self.chisq, float(residuals @ residuals))
+        if self.stop_ratio is not None and self.nfev >= self.patience and \
+                self.chisq + self.penalty \
+                > self.stop_ratio * self.shared.best[0]:
+            raise _Stopped
+        return residuals
+
+
+# dataset of the processes fitting the candidates, see _attach
+_shared: Optional[_Shared] = None
+_memory: Optional['SharedMemory'] = None
+
+
+def _attach(
+        name: str,
+        n_q: int,
+        n_w: int,
+        resolution: Optional[Resolution],
+        lock
+):
+    """ Read the dataset from the shared memory `name`, once per process """
+    from multiprocessing.shared_memory import SharedMemory
+
+    global _shared, _memory
+    _memory = SharedMemory(name=name)
+    _shared = _Shared(_memory.buf, n_q, n_w, resolution, lock)
+
+
+def _fit_candidate(
+        model: str,
+        p0: Dict[str, Union[float, np.ndarray]],
+        per_q: Tuple[str, ...],
+        fixed: Tuple[str, ...],
+        bounds: Dict[str, Tuple[float, float]],
+        options: Dict,
+        criterion: str,
+        stop_ratio: Optional[float],
+        patience: int,
+        shared: Optional[_Shared] = None
+) -> Candidate:
+    """ Fit of a candidate to the dataset of `shared`, by default that of
+    the process """
+    shared = shared or _shared
+    spec = get_model(model)
+    dataset = shared.dataset()
+    try:
+        with warnings.catch_warnings():
+            # models without estimates are reported by compare_models
+            warnings.simplefilter('ignore')
+            guess = initial_guess(spec, dataset.w, dataset.q, dataset.data,
+                                  dataset.error, dataset.resolution, p0)
+        # parameters guessed per q but shared by all q
+        guess = {name: float(np.mean(value))
+                 if np.ndim(value) and name not in per_q else value
+                 for name, value in guess.items()}
+        problem = _Candidate(shared, criterion, stop_ratio, patience, spec,
+                             dataset, guess, per_q, fixed, bounds)
+    except ValueError as error:
+        return Candidate(model=spec.name, fit=None, chisq=np.inf,
+                         aic=np.inf, bic=np.inf, n_params=0, n_points=0,
+                         nfev=0, error=str(error))
+
+    try:
+        fit = _solve(problem, options)
+        chisq, stopped = fit.chisq, False
+    except _Stopped:
+        fit, chisq, stopped = None, problem.chisq, True
+    k, n = len(problem.columns), problem.n_points
+    result = Candidate(model=spec.name, fit=fit, chisq=chisq,
+                       aic=chisq + 2. * k, bic=chisq + k * np.log(n),
+                       n_params=k, n_points=n, nfev=problem.nfev,
+                       stopped=stopped)
+    if not stopped:
+        shared.improve(getattr(result, criterion))
+    return result
+
+
+def compare_models(
+        models: Sequence[Union[str, Callable, ModelSpec]],
+        w: Union[list, np.ndarray],
+        q: Union[float, list, np.ndarray],
+        data: np.ndarray,
+        error: Optional[np.ndarray] = None,
+        resolution: Optional[Resolution] = None,
+        p0: Optional[Dict[str, Dict[str, Union[float, np.ndarray]]]] = None,
+        per_q: Iterable[str] = ('scale', 'center'),
+        fixed: Optional[Dict[str, Iterable[str]]] = None,
+        bounds: Optional[Dict[str, Dict[str, Tuple[float, float]]]] = None,
+        criterion: str = 'bic',
+        stop_ratio: Optional[float] = 2.,
+        patience: int = 20,
+        workers: Optional[int] = None,
+        **kwargs
+) -> List[Candidate]:
+    r""" Fit candidate models to the same dataset in parallel processes and
+    rank them by an information criterion
+
+    Parameters
+    ----------
+    models: sequence of str, callable or :class:`~QENSmodels.models.ModelSpec`
+        candidate models of the library, see
+        :func:`~QENSmodels.models.get_model`
+
+    w, q, data, error, resolution:
+        dataset to fit, see :class:`~QENSmodels.fitting.Dataset`
+
+    p0: dict
+        initial values of the parameters of some models, by name of model.
+        The other parameters start from
+        :func:`~QENSmodels.estimators.initial_guess`. A warning is given
+        for the models whose parameters it does not estimate, as they
+        start from their default values and may be stopped early.
+
+    per_q: iterable of str
+        names of the parameters fitted per q, for all the models. Default to
+        `scale` and `center`.
+
+    fixed, bounds: dict
+        fixed parameters and bounds of some models, by name of model, see
+        :func:`~QENSmodels.fitting.fit_model`
+
+    criterion: str
+        criterion ranking the models, `chisq`, `aic` or `bic`. Default to
+        `bic`.
+
+    stop_ratio: float
+        a fit is abandoned when, after `patience` evaluations, its
+        criterion is still larger than `stop_ratio` times the lowest
+        criterion of the candidates already fitted. Default to 2. None
+        disables the early stopping.
+
+    patience: int
+        number of evaluations of a model before it can be abandoned.
+        Default to 20.
+
+    workers: int
+        number of processes fitting the candidates. Default to None, i.e.
+        the default of :class:`concurrent.futures.ProcessPoolExecutor`.
+        With 1, the candidates are fitted one after the other in the
+        calling process, in the order of `models`. Several processes need
+        Python 3.8 or later.
+
+    kwargs:
+        options of :func:`scipy.optimize.least_squares`
+
+    Return
+    ------
+    list of :class:`Candidate`
+        results sorted by increasing `criterion`, the candidates whose fit
+        was stopped or failed being last
+
+    Examples
+    --------
+    >>> import QENSmodels
+    >>> w = np.linspace(-2, 2, 401)
+    >>> q = np.linspace(0.4, 1.6, 4)
+    >>> rng = np.random.default_rng(0)
+    >>> data = QENSmodels.sqwJumpTranslationalDiffusion(w, q, 1., 0.,
+    ...                                                 0.3, 1.)
+    >>> data += rng.normal(0., 0.002, data.shape)
+    >>> ranking = compare_models(
+    ...     ['BrownianTranslationalDiffusion', 'JumpTranslationalDiffusion'],
+    ...     w, q, data, 0.002 + 0. * data, workers=1)
+    >>> [item.model for item in ranking]
+    ['JumpTranslationalDiffusion', 'BrownianTranslationalDiffusion']
+
+    Notes
+    -----
+    * The data are copied once into a block of shared memory, read by all
+      the processes without copies. The resolution is sent once to each
+      process.
+
+    * With Gaussian uncertainties, :math:`-2 \ln L = \chi^2` up to a
+      constant, so that the criteria of the models are
+      :math:`\text{AIC} = \chi^2 + 2 k` and
+      :math:`\text{BIC} = \chi^2 + k \ln n`, with :math:`k` fitted
+      parameters and :math:`n` fitted points.
+
+    * The early stopping compares the lowest chi-square reached by a fit,
+      completed by the penalty of its parameters, with the criteria of the
+      candidates already fitted by all the processes. A candidate stopped
+      early cannot be ranked, and is only known to be worse.
+
+    """
+    if criterion not in CRITERIA:
+        raise ValueError('criterion should be one of {}'.format(
+            ', '.join(CRITERIA)))
+    if stop_ratio is not None and stop_ratio < 1:
+        raise ValueError('stop_ratio should be larger than 1')
+    specs = [get_model(model) for model in models]
+    dataset = Dataset(w, q, data, error, resolution)
+    p0, fixed, bounds = p0 or {}, fixed or {}, bounds or {}
+    unknown = (set(p0) | set(fixed) | set(bounds)) \
+        - {spec.name for spec in specs}
+    if unknown:
+        raise ValueError('unknown model(s): {}'.format(
+            ', '.join(sorted(unknown))))
+    for spec in specs:
+        missing = [name for name in spec.parameters
+                   if name not in spec.integer
+                   and name not in p0.get(spec.name, {})]
+        if spec.name not in _ESTIMATES and missing:
+            warnings.warn('{} of {} start from their default values, not '
+                          'from estimates, and its fit may be stopped '
+                          'early: give them in p0'.format(
+                              ', '.join(missing), spec.name))
+    tasks = [(spec.name, p0.get(spec.name, {}), tuple(per_q),
+              tuple(fixed.get(spec.name, ())), bounds.get(spec.name, {}),
+              kwargs, criterion, stop_ratio, patience) for spec in specs]
+
+    n_q, n_w = dataset.data.shape
+    size = 8 * (n_w + n_q + 2 * n_q * n_w + 1)
+    if workers == 1:
+        memory, buffer = None, bytearray(size)
+    else:
+        try:
+            from multiprocessing.shared_memory import SharedMemory
+        except ImportError:
+            raise ImportError('Python 3.8 or later is needed to fit the '
+                              'candidates in several processes, use '
+                              'workers=1')
+        memory = SharedMemory(create=True, size=size)
+        buffer = memory.buf
+    try:
+        context = multiprocessing.get_context()
+        lock = context.Lock()
+        shared = _Shared(buffer, n_q, n_w, resolution, lock)
+        shared.w[:] = dataset.w
+        shared.q[:] = dataset.q
+        shared.data[:] = dataset.data.ravel()
+        shared.error[:] = dataset.error.ravel()
+        shared.best[0] = np.inf
+
+        if memory is None:
+            results = [_fit_candidate(*task, shared=shared)
+                       for task in tasks]
+        else:
+            with ProcessPoolExecutor(
+                    max_workers=workers, mp_context=context,
+                    initializer=_attach,
+                    initargs=(memory.name, n_q, n_w, resolution,
+                              lock)) as executor:
+                futures = [executor.submit(_fit_candidate, *task)
+                           for task in tasks]
+                results = [future.result() for future in futures]
+        # the views of the buffer should be released before closing it
+        del shared
+    finally:
+        if memory is not None:
+            memory.close()
+            memory.unlink()
+
+    return sorted(results, key=lambda item: (
+        item.stopped or item.error is not None, getattr(item, criterion)))
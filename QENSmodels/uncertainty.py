@@ -0,0 +1,394 @@
+"""
+Uncertainties of the parameters and of the models from many parameter sets
+at once: evaluation of a model for a batch of parameter sets, residual
+bootstrap and posterior predictive checks
+"""
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, \
+    Tuple, Union
+
+from QENSmodels.assemble import assemble
+from QENSmodels.fitting import Dataset, FitResult, _fit
+from QENSmodels.models import ModelSpec, get_model
+from QENSmodels.resolution import Resolution
+
+# number of points of the models assembled at once by evaluate_batch, small
+# enough for the temporary arrays to stay in the processor cache
+_BLOCK_SIZE = 2 ** 16
+
+
+@dataclass
+class BootstrapResult:
+    """ Result of :func:`bootstrap`
+
+    Attributes
+    ----------
+    fit: :class:`~QENSmodels.fitting.FitResult`
+        fit of the measured data
+
+    samples: dict
+        values of all the parameters for each replica, as arrays of shape
+        (n_samples,), or (n_samples, q.size) for the parameters fitted per
+        q, which can be given to :func:`evaluate_batch`
+
+    stderr: dict
+        standard deviations of the fitted parameters over the replicas
+
+    nfev: int
+        total number of evaluations of the model for the replicas
+    """
+    fit: FitResult
+    samples: Dict[str, np.ndarray] = field(repr=False)
+    stderr: Dict[str, Union[float, np.ndarray]]
+    nfev: int
+
+
+@dataclass
+class PredictiveCheck:
+    """ Result of :func:`posterior_predictive`
+
+    Attributes
+    ----------
+    bands: :class:`~numpy:numpy.ndarray`
+        percentiles of the replicated data, of shape (number of
+        percentiles, q.size, w.size)
+
+    chisq: :class:`~numpy:numpy.ndarray`
+        chi-square of the measured data for each parameter set
+
+    chisq_replicated: :class:`~numpy:numpy.ndarray`
+        chi-square of the replicated data for each parameter set
+
+    p_value: float
+        fraction of the parameter sets for which the replicated data fit
+        worse than the measured data. Values close to 0 show that the
+        model does not describe the data.
+    """
+    bands: np.ndarray = field(repr=False)
+    chisq: np.ndarray = field(repr=False)
+    chisq_replicated: np.ndarray = field(repr=False)
+    p_value: float
+
+
+def evaluate_batch(
+        model: Union[str, Callable, ModelSpec],
+        w: Union[list, np.ndarray],
+        q: Union[float, list, np.ndarray],
+        params: Dict[str, Union[float, np.ndarray]],
+        resolution: Optional[Resolution] = None,
+        atol: Optional[float] = None
+) -> np.ndarray:
+    """ Model for a batch of parameter sets, for all q at once
+
+    Parameters
+    ----------
+    model: str, callable or :class:`~QENSmodels.models.ModelSpec`
+        model of the library, see :func:`~QENSmodels.models.get_model`
+
+    w: list or :class:`~numpy:numpy.ndarray`
+        energy transfer
+
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer
+
+    params: dict
+        values of the parameters, numbers shared by all the sets or arrays
+        of shape (n_samples,). `scale` and `center` can also be arrays of
+        shape (n_samples, q.size), with one value per set and per q. The
+        parameters which are not given take their default values.
+
+    resolution: :class:`~QENSmodels.Resolution`
+        resolution function, with one spectrum or one spectrum per q. If
+        None (default), the model is not convolved.
+
+    atol: float
+        absolute error allowed on each point of the model, see
+        :func:`~QENSmodels.assemble`
+
+    Return
+    ------
+    :class:`~numpy:numpy.ndarray`
+        array of shape (n_samples, q.size, w.size)
+
+    Examples
+    --------
+    >>> import QENSmodels
+    >>> w = np.linspace(-1, 1, 5)
+    >>> model = evaluate_batch('DeltaLorentz', w, [0.5, 1.],
+    ...                        {'hwhm': [0.1, 0.2, 0.3]})
+    >>> model.shape
+    (3, 2, 5)
+    >>> np.allclose(model[1], QENSmodels.sqwDeltaLorentz(w, [0.5, 1.],
+    ...                                                 hwhm=0.2))
+    True
+
+    Notes
+    -----
+    The widths, EISF and QISF are computed once per distinct set of the
+    parameters other than `scale` and `center`, which is cheap as they only
+    depend on q. The models of all the sets are then assembled and
+    convolved by blocks of rows, so that the cost per set is that of a
+    single vectorized evaluation.
+    """
+    spec = get_model(model)
+    x = np.atleast_1d(np.asarray(w, dtype=np.float64))
+    q = np.atleast_1d(np.asarray(q, dtype=np.float64))
+    values = spec._values(params)
+    size = _batch_size(values, q.size)
+
+    columns = {}
+    for name, value in values.items():
+        value = np.asarray(value, dtype=np.float64)
+        if name in ('scale', 'center') and value.shape == (size, q.size):
+            columns[name] = value
+        elif value.ndim == 0 or value.shape == (size,):
+            columns[name] = np.broadcast_to(value, (size,))
+        else:
+            raise ValueError(
+                '{} should be a number, an array of shape (n_samples,){}'
+                .format(name, ' or (n_samples, q.size)'
+                        if name in ('scale', 'center') else ''))
+    scale = np.broadcast_to(np.reshape(columns['scale'], (size, -1)),
+                            (size, q.size))
+    center = np.broadcast_to(np.reshape(columns['center'], (size, -1)),
+                             (size, q.size))
+    hwhm, eisf, qisf = _batch_tables(spec, q, columns, size)
+
+    n_q, n_w = q.size, x.size
+    out = np.empty((size, n_q, n_w))
+    block = max(_BLOCK_SIZE // (n_q * n_w), 1)
+    for start in range(0, size, block):
+        rows = slice(start, start + block)
+        n_rows = out[rows].shape[0] * n_q
+        assemble(x, np.reshape(hwhm[rows], (n_rows, -1)), eisf[rows],
+                 np.reshape(qisf[rows], (n_rows, -1)), scale[rows],
+                 center[rows], out=np.reshape(out[rows], (n_rows, n_w)),
+                 atol=atol)
+        if resolution is not None:
+            out[rows] = resolution.convolve(out[rows], x)
+    return out
+
+
+def bootstrap(
+        model: Union[str, Callable, ModelSpec],
+        w: Union[list, np.ndarray],
+        q: Union[float, list, np.ndarray],
+        data: np.ndarray,
+        error: Optional[np.ndarray] = None,
+        resolution: Optional[Resolution] = None,
+        p0: Optional[Dict[str, Union[float, np.ndarray]]] = None,
+        n_samples: int = 100,
+        per_q: Iterable[str] = ('scale', 'center'),
+        fixed: Iterable[str] = (),
+        bounds: Optional[Dict[str, Tuple[float, float]]] = None,
+        rng: Optional[Union[int, np.random.Generator]] = None,
+        workers: Optional[int] = None,
+        **kwargs
+) -> BootstrapResult:
+    """ Uncertainties of the parameters by residual bootstrap
+
+    The data are fitted, then replicas of the data are built by adding to
+    the best fit the normalized residuals, drawn with replacement and
+    multiplied by the uncertainties. Each replica is fitted starting from
+    the parameters of the best fit.
+
+    Parameters
+    ----------
+    model, w, q, data, error, resolution, p0, per_q, fixed, bounds, kwargs:
+        see :func:`~QENSmodels.fitting.fit_model`
+
+    n_samples: int
+        number of replicas. Default to 100.
+
+    rng: int or :class:`~numpy:numpy.random.Generator`
+        seed or generator of the random numbers
+
+    workers: int
+        number of threads fitting the replicas. Default to None, i.e. the
+        default of :class:`concurrent.futures.ThreadPoolExecutor`. With 1,
+        the replicas are fitted one after the other.
+
+    Return
+    ------
+    :class:`BootstrapResult`
+
+    Examples
+    --------
+    >>> import QENSmodels
+    >>> w = np.linspace(-2, 2, 201)
+    >>> rng = np.random.default_rng(0)
+    >>> data = QENSmodels.sqwDeltaLorentz(w, [0.5, 1.], 2., 0., 0.3, 0.2)
+    >>> data += rng.normal(0., 0.01, data.shape)
+    >>> result = bootstrap('DeltaLorentz', w, [0.5, 1.], data,
+    ...                    0.01 + 0. * data, p0={'A0': 0.5, 'hwhm': 0.5},
+    ...                    n_samples=20, rng=1)
+    >>> result.samples['hwhm'].shape, result.samples['scale'].shape
+    ((20,), (20, 2))
+    >>> bool(result.stderr['hwhm'] < 0.01)
+    True
+
+    """
+    spec = get_model(model)
+    dataset = Dataset(w, q, data, error, resolution)
+    bounds = bounds or {}
+    fit = _fit(spec, dataset, p0 or {}, per_q, fixed, bounds, kwargs)
+
+    mask = dataset.error > 0
+    residuals = ((dataset.data - fit.best_fit) / np.where(
+        mask, dataset.error, 1.))[mask]
+    residuals -= residuals.mean()
+    generator = np.random.default_rng(rng)
+    draws = [generator.choice(residuals, residuals.size)
+             for _ in range(n_samples)]
+
+    def refit(draw: np.ndarray) -> FitResult:
+        replica = fit.best_fit.copy()
+        replica[mask] += dataset.error[mask] * draw
+        return _fit(spec, Dataset(dataset.w, dataset.q, replica,
+                                  dataset.error, resolution),
+                    fit.params, per_q, fixed, bounds, kwargs)
+
+    if workers == 1:
+        results = [refit(draw) for draw in draws]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(refit, draws))
+
+    samples = {name: np.array([item.params[name] for item in results])
+               for name in spec.param_names}
+    stderr = {name: samples[name].std(axis=0, ddof=1) if n_samples > 1
+              else np.zeros_like(samples[name][0]) for name in fit.stderr}
+    stderr = {name: float(value) if np.ndim(value) == 0 else value
+              for name, value in stderr.items()}
+    return BootstrapResult(fit=fit, samples=samples, stderr=stderr,
+                           nfev=sum(item.nfev for item in results))
+
+
+def posterior_predictive(
+        model: Union[str, Callable, ModelSpec],
+        w: Union[list, np.ndarray],
+        q: Union[float, list, np.ndarray],
+        samples: Dict[str, Union[float, np.ndarray]],
+        data: np.ndarray,
+        error: Optional[np.ndarray] = None,
+        resolution: Optional[Resolution] = None,
+        percentiles: Sequence[float] = (2.5, 50., 97.5),
+        rng: Optional[Union[int, np.random.Generator]] = None
+) -> PredictiveCheck:
+    r""" Posterior predictive check of a model against measured data
+
+    For each parameter set, replicated data are drawn from the model with
+    Gaussian noise of the uncertainties of the data, and their chi-square
+    is compared with that of the measured data.
+
+    Parameters
+    ----------
+    model: str, callable or :class:`~QENSmodels.models.ModelSpec`
+        model of the library, see :func:`~QENSmodels.models.get_model`
+
+    w, q, data, error, resolution:
+        measured dataset, see :class:`~QENSmodels.fitting.Dataset`
+
+    samples: dict
+        parameter sets, for example drawn from a posterior distribution or
+        the `samples` of :func:`bootstrap`, see :func:`evaluate_batch`
+
+    percentiles: sequence of float
+        percentiles of the replicated data returned as bands. Default to the
+        median and the 95% interval.
+
+    rng: int or :class:`~numpy:numpy.random.Generator`
+        seed or generator of the random numbers
+
+    Return
+    ------
+    :class:`PredictiveCheck`
+
+    Examples
+    --------
+    >>> import QENSmodels
+    >>> w = np.linspace(-2, 2, 201)
+    >>> rng = np.random.default_rng(0)
+    >>> data = QENSmodels.sqwDeltaLorentz(w, [0.5, 1.], 2., 0., 0.3, 0.2)
+    >>> data += rng.normal(0., 0.01, data.shape)
+    >>> error = 0.01 + 0. * data
+    >>> samples = {'scale': 2., 'A0': 0.3,
+    ...            'hwhm': rng.normal(0.2, 0.001, 50)}
+    >>> check = posterior_predictive('DeltaLorentz', w, [0.5, 1.], samples,
+    ...                              data, error, rng=1)
+    >>> check.bands.shape
+    (3, 2, 201)
+    >>> bool(check.p_value > 0.05)
+    True
+
+    Notes
+    -----
+    The chi-square is :math:`\sum ((y - m)/\sigma)^2` over the points with
+    a positive uncertainty, with :math:`y` the measured or replicated data
+    and :math:`m` the model of the parameter set.
+    """
+    dataset = Dataset(w, q, data, error, resolution)
+    models = evaluate_batch(model, dataset.w, dataset.q, samples, resolution)
+    mask = dataset.error > 0
+    weights = np.divide(1., dataset.error, where=mask,
+                        out=np.zeros_like(dataset.error))
+
+    generator = np.random.default_rng(rng)
+    noise = generator.standard_normal(models.shape) * mask
+    replicated = models + noise * dataset.error
+    chisq = np.sum(((dataset.data - models) * weights) ** 2, axis=(1, 2))
+    chisq_replicated = np.sum(noise ** 2, axis=(1, 2))
+    return PredictiveCheck(
+        bands=np.percentile(replicated, percentiles, axis=0),
+        chisq=chisq, chisq_replicated=chisq_replicated,
+        p_value=float(np.mean(chisq_replicated >= chisq)))
+
+
+def _batch_size(values: Dict[str, Union[float, np.ndarray]],
+                n_q: int) -> int:
+    """ Number of parameter sets, from the first dimension of the
+    parameters given as arrays """
+    sizes = {np.shape(value)[0] for value in values.values()
+             if np.ndim(value)}
+    if len(sizes) > 1:
+        raise ValueError('the parameters should have the same number of '
+                         'sets')
+    return sizes.pop() if sizes else 1
+
+
+def _batch_tables(
+        spec: ModelSpec,
+        q: np.ndarray,
+        columns: Dict[str, np.ndarray],
+        size: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ Widths, EISF and QISF of shapes (size, q.size, m), (size, q.size)
+    and (size, q.size, m), computed once per distinct parameter set. The
+    tables with fewer terms are completed with terms of zero weight. """
+    names = spec.parameters
+    if names:
+        matrix = np.stack([columns[name] for name in names], axis=1)
+        distinct, inverse = np.unique(matrix, axis=0, return_inverse=True)
+    else:
+        distinct, inverse = np.zeros((1, 0)), np.zeros(size, dtype=int)
+    tables: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+    for row in distinct:
+        values = {name: int(round(value)) if name in spec.integer
+                  else value for name, value in zip(names, row)}
+        hwhm, eisf, qisf = spec._tables(q, values)
+        tables.append((np.reshape(hwhm, (q.size, -1)), np.ravel(eisf),
+                       np.reshape(qisf, (q.size, -1))))
+
+    m = max(item[0].shape[1] for item in tables)
+    dtype = np.result_type(*[item[0] for item in tables])
+    hwhm = np.zeros((len(tables), q.size, m), dtype=dtype)
+    qisf = np.zeros((len(tables), q.size, m),
+                    dtype=np.result_type(*[item[2] for item in tables]))
+    eisf = np.array([item[1] for item in tables])
+    for k, (widths, _, weights) in enumerate(tables):
+        hwhm[k, :, :widths.shape[1]] = widths
+        qisf[k, :, :weights.shape[1]] = weights
+    inverse = np.ravel(inverse)
+    return hwhm[inverse], eisf[inverse], qisf[inverse]
@@ -1,5 +1,5 @@
 import numpy as np
-from typing import Union
+from typing import Union, Tuple
 
 try:
     import QENSmodels
@@ -94,33 +94,13 @@ def sqwWaterTeixeira(
 
     q = np.asarray(q, dtype=np.float32)
 
-    # Create output array
-    sqw = np.zeros((q.size, w.size))
-
-    # Get widths, EISFs and QISFs of each model
-    hwhm1, eisf1, qisf1 = QENSmodels.jump_translational_diffusion.\
-        hwhmJumpTranslationalDiffusion(q, D, resTime)
-    hwhm2, eisf2, qisf2 = QENSmodels.isotropic_rotational_diffusion.\
-        hwhmIsotropicRotationalDiffusion(q, radius, DR)
-
-    # Number of Lorentzians used to represent the infinite sum in R
-    numberLorentz = hwhm2.shape[1]
-
-    # Sum of Lorentzians giving the full model
-    for i in range(q.size):
-        sqw[i, :] = eisf2[i] * QENSmodels.lorentzian(
-            w,
-            scale,
-            center,
-            hwhm1[i]
-        )
-        for j in range(1, numberLorentz):
-            sqw[i, :] += qisf2[i, j] * QENSmodels.lorentzian(
-                w,
-                scale,
-                center,
-                hwhm1[i] + hwhm2[i, j]
-            )
+    # Get widths, EISFs and QISFs of model
+    hwhm, eisf, qisf = componentsWaterTeixeira(q, D, resTime, radius, DR)
+
+    # Model, for all q at once, computed in single precision
+    sqw = QENSmodels.assemble(w, hwhm, eisf, qisf, scale, center,
+                              out=np.empty((q.size, w.size)),
+                              dtype=np.float32)
 
     # For Bumps use (needed for final plotting)
     # Using a 'Curve' in bumps for each Q --> needs vector array
@@ -128,3 +108,144 @@ def sqwWaterTeixeira(
         sqw = np.reshape(sqw, w.size)
 
     return sqw
+
+
+def iqtWaterTeixeira(
+        t: Union[float, list, np.ndarray],
+        q: Union[float, list, np.ndarray],
+        scale: float = 1,
+        D: float = 0.23,
+        resTime: float = 1.25,
+        radius: float = 1,
+        DR: float = 1
+) -> Union[float, list, np.ndarray]:
+    r""" Intermediate scattering function of `sqwWaterTeixeira`, i.e. its
+    Fourier transform from energy transfer to time
+
+    Parameters
+    ----------
+    t: float, list or :class:`~numpy:numpy.ndarray`
+        time (in ps)
+
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer (non-fitting, in 1/Angstrom)
+
+    scale: float
+        scale factor. Default to 1.
+
+    D: float
+        Diffusion coefficient (in Angstrom^2/ps). Default to 1.
+
+    resTime: float
+        Residence time (in ps). Default to 1.
+
+    radius: float
+        radius of rotation (in Angstrom). Default to 1.
+
+    DR: float
+        rotational diffusion coefficient (in 1/ps). Default to 1.
+
+    Return
+    ------
+    :class:`~numpy:numpy.ndarray`
+        output array, of shape (q.size, t.size), or (t.size,) for a single q
+
+    Examples
+    --------
+    >>> iqt = iqtWaterTeixeira([0., 1., 2.], 1.)
+    >>> iqt.round(4)
+    array([1.    , 0.6231, 0.4988])
+
+    Notes
+    -----
+    The intermediate scattering function is the sum of the EISF and of
+    exponential decays whose rates are the half widths of the Lorentzians of
+    `sqwWaterTeixeira`, see :func:`~QENSmodels.assemble_iqt`. The center of the
+    peaks only gives a phase in the time domain and is not a parameter.
+
+    """
+    # Input validation
+    t = np.asarray(t)
+
+    q = np.asarray(q, dtype=np.float32)
+
+    # Get widths, EISFs and QISFs of model
+    hwhm, eisf, qisf = componentsWaterTeixeira(q, D, resTime, radius, DR)
+
+    # Intermediate scattering function, for all q at once
+    iqt = QENSmodels.assemble_iqt(t, hwhm, eisf, qisf, scale)
+
+    if q.size == 1:
+        iqt = np.reshape(iqt, t.size)
+
+    return iqt
+
+
+def componentsWaterTeixeira(
+        q: Union[float, list, np.ndarray],
+        D: float = 0.23,
+        resTime: float = 1.25,
+        radius: float = 1,
+        DR: float = 1
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ Widths, EISF and QISF of `sqwWaterTeixeira` as functions of the
+    momentum transfer `q`, from which :func:`~QENSmodels.assemble` builds the
+    model
+
+    Parameters
+    ----------
+    q: float, list or :class:`~numpy:numpy.ndarray`
+        momentum transfer (non-fitting, in 1/Angstrom)
+
+    D: float
+        Diffusion coefficient (in Angstrom^2/ps). Default to 0.23.
+
+    resTime: float
+        Residence time (in ps). Default to 1.25.
+
+    radius: float
+        radius of rotation (in Angstrom). Default to 1.
+
+    DR: float
+        rotational diffusion coefficient (in 1/ps). Default to 1.
+
+    Returns
+    -------
+    hwhm, eisf, qisf: :class:`~numpy:numpy.ndarray`
+        see :func:`~QENSmodels.assemble`
+
+    Examples
+    --------
+    >>> hwhm, eisf, qisf = componentsWaterTeixeira(1, 1, 1, 1, 1)
+    >>> hwhm
+    array([[ 0.5,  2.5,  6.5, 12.5, 20.5, 30.5]])
+    >>> eisf
+    array([0.])
+
+    """
+    QENSmodels.jump_translational_diffusion._validate(D, resTime)
+    QENSmodels.isotropic_rotational_diffusion._validate(radius, DR)
+    return _components(q, D, resTime, radius, DR)
+
+
+def _components(
+        q: Union[float, list, np.ndarray],
+        D: float,
+        resTime: float,
+        radius: float,
+        DR: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ `componentsWaterTeixeira` without the validation of the
+    parameters """
+    hwhm1, _, _ = QENSmodels.jump_translational_diffusion._hwhm(
+        q, D, resTime)
+    hwhm2, eisf2, qisf2 = QENSmodels.isotropic_rotational_diffusion._hwhm(
+        q, radius, DR)
+
+    # the translational Lorentzian is convolved with each term of the
+    # rotational model, whose first term is elastic
+    hwhm1 = hwhm1[:, np.newaxis]
+    hwhm = np.hstack([hwhm1, hwhm1 + hwhm2[:, 1:]]).astype(np.float64)
+    eisf = np.zeros(hwhm.shape[0])
+    qisf = np.hstack([eisf2[:, np.newaxis], qisf2[:, 1:]])
+    return hwhm, eisf, qisf
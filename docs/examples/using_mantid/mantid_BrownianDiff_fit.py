@@ -11,6 +11,7 @@ import mantid.simpleapi as mapi
 import matplotlib.pyplot as plt
 import numpy as np
 import QENSmodels
+from QENSmodels.adapters.mantid import make_function_class
 
 # make fake data
 # number of points for the x-axis
@@ -43,38 +44,13 @@ QENS_data = mapi.CreateWorkspace(DataX=hw,
                                  NSpec=selected_wi)
 
 
-# wrap to create mantid fitting function
-class my_sqwBrownian_Diffusion(mapi.IFunction1D):
-    """ """
-
-    def init(self):
-        self.declareParameter("scale", 7.)
-        self.declareParameter("center", 0.)
-        self.declareParameter("D", 2.)
-
-        self.declareAttribute("Q", 0.2)
-
-    def category(self):
-        return 'QuasiElastic'
-
-    def function1D(self, xvals):
-        scale = self.getParameterValue("scale")
-        center = self.getParameterValue("center")
-        D = self.getParameterValue("D")
-
-        q = self.getAttributeValue("Q")
-
-        return QENSmodels.sqwBrownianTranslationalDiffusion(
-            xvals,
-            q,
-            scale=scale,
-            center=center,
-            D=D
-        )
-
+# create the mantid fitting function of the model. It provides the
+# derivatives of the model and evaluates all the spectra of the fit at once.
+sqwBrownianTranslationalDiffusion = make_function_class(
+    QENSmodels.sqwBrownianTranslationalDiffusion)
 
 # add it to Mantid fitting functions
-mapi.FunctionFactory.subscribe(my_sqwBrownian_Diffusion)
+mapi.FunctionFactory.subscribe(sqwBrownianTranslationalDiffusion)
 
 """ Fitting
     The following analysis can also be done in Mantid Workbench Fit wizard
@@ -92,11 +68,11 @@ mapi.FunctionFactory.subscribe(my_sqwBrownian_Diffusion)
 """
 
 single_model_template = \
-    """name=my_sqwBrownian_Diffusion,
+    """name=sqwBrownianTranslationalDiffusion,
     $domains=i,scale=7.,center=0.,D=2.,Q=_Q_"""
 
 # Create the string representation of the global model for all spectra:
-global_model = "composite=MultiDomainFunction,NumDeriv=true;"
+global_model = "composite=MultiDomainFunction;"
 for wi in range(selected_wi):
     # insert Q-value
     single_model = single_model_template.replace("_Q_", str(Q[wi]))
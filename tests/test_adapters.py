@@ -0,0 +1,313 @@
+import unittest
+import numpy
+
+import QENSmodels
+from QENSmodels.adapters.mantid import DomainPool
+
+try:
+    import bumps
+    from QENSmodels.adapters.bumps import MultiQFitness
+except ImportError:
+    bumps = None
+
+try:
+    import lmfit
+    from QENSmodels.adapters.lmfit import make_model
+except ImportError:
+    lmfit = None
+
+
+class TestDomainPool(unittest.TestCase):
+    """ Tests QENSmodels.adapters.mantid.DomainPool """
+
+    def setUp(self):
+        self.w = numpy.linspace(-2, 2, 401)
+        self.q = [0.3, 0.8, 1.4]
+        self.params = dict(scale=2., center=0.05, D=0.2)
+
+    def test_evaluate(self):
+        """ Test that the domains are evaluated together """
+        pool = DomainPool('BrownianTranslationalDiffusion')
+        expected = pool.model.evaluate(self.w, self.q, **self.params)
+        jacobian = pool.model.jacobian(self.w, self.q, **self.params)
+
+        # the first pass registers the q values
+        for item in self.q:
+            pool.evaluate(self.w, item, self.params)
+
+        params = dict(self.params)
+        calls = []
+        evaluate = pool.model.evaluate
+        pool.model.evaluate = lambda *args, **kwargs: \
+            calls.append(args) or evaluate(*args, **kwargs)
+        try:
+            for i, item in enumerate(self.q):
+                numpy.testing.assert_array_equal(
+                    pool.evaluate(self.w, item, params), expected[i])
+            self.assertEqual(len(calls), 0)
+
+            params['D'] = 0.3
+            for item in self.q:
+                pool.evaluate(self.w, item, params)
+            self.assertEqual(len(calls), 1)
+        finally:
+            del pool.model.evaluate
+
+        for i, item in enumerate(self.q):
+            numpy.testing.assert_array_almost_equal(
+                pool.jacobian(self.w, item, self.params), jacobian[:, i],
+                decimal=12)
+            numpy.testing.assert_array_almost_equal(
+                pool.evaluate(self.w, item, self.params), expected[i],
+                decimal=12)
+
+        pool.clear()
+        self.assertEqual(pool.q, {})
+
+    def test_new_fit(self):
+        """ Test that the pool shared by the fits of a model only computes
+        the domains of the current fit """
+        pool = DomainPool('BrownianTranslationalDiffusion')
+        w = numpy.linspace(-2, 2, 11)
+        for item in (0.2, 0.4, 0.6):
+            pool.evaluate(w, item, self.params)
+
+        rows = []
+        evaluate = pool.model.evaluate
+        pool.model.evaluate = lambda x, q, **kwargs: \
+            rows.append(numpy.size(q)) or evaluate(x, q, **kwargs)
+        try:
+            params = dict(self.params, D=0.3)
+            for item in (1.2, 1.4):
+                numpy.testing.assert_allclose(
+                    pool.evaluate(w, item, params),
+                    evaluate(w, item, **params)[0], rtol=1e-6)
+            self.assertEqual(sum(rows), 2)
+
+            # the next step of the fit computes its two domains at once
+            rows.clear()
+            params['D'] = 0.35
+            for item in (1.2, 1.4):
+                pool.evaluate(w, item, params)
+            self.assertEqual(rows, [2])
+        finally:
+            del pool.model.evaluate
+        self.assertEqual(list(pool.q.values()), [[1.2, 1.4]])
+
+    def test_per_domain_parameters(self):
+        """ Test domains with their own scale and center, sharing the
+        other parameters, as in a multi-domain fit tying D. The widths of
+        this model are computed in single precision. """
+        pool = DomainPool('BrownianTranslationalDiffusion')
+        steps = [[dict(scale=1. + i + D, center=0.01 * i, D=D)
+                  for i in range(len(self.q))] for D in (0.2, 0.25, 0.3)]
+        expected = [[(pool.model.evaluate(self.w, item, **params)[0],
+                      pool.model.jacobian(self.w, item, **params)[:, 0])
+                     for item, params in zip(self.q, domains)]
+                    for domains in steps]
+
+        rows = []
+        for method in ('evaluate', 'jacobian'):
+            original = getattr(pool.model, method)
+
+            def counted(x, q, original=original, **kwargs):
+                rows.append(numpy.size(q))
+                return original(x, q, **kwargs)
+
+            setattr(pool.model, method, counted)
+        try:
+            for domains, results in zip(steps, expected):
+                rows.clear()
+                for item, params, (values, _) in zip(self.q, domains,
+                                                     results):
+                    numpy.testing.assert_allclose(
+                        pool.evaluate(self.w, item, params), values,
+                        rtol=1e-6)
+                for item, params, (_, jacobian) in zip(self.q, domains,
+                                                       results):
+                    numpy.testing.assert_allclose(
+                        pool.jacobian(self.w, item, params), jacobian,
+                        rtol=1e-4, atol=1e-12)
+                # at most twice the number of domains per kind of result
+                self.assertLessEqual(sum(rows), 4 * len(self.q))
+        finally:
+            del pool.model.evaluate
+            del pool.model.jacobian
+
+
+@unittest.skipIf(bumps is None, 'bumps is not installed')
+class TestMultiQFitness(unittest.TestCase):
+    """ Tests QENSmodels.adapters.bumps.MultiQFitness """
+
+    def setUp(self):
+        self.w = numpy.linspace(-2, 2, 401)
+        self.q = numpy.array([0.4, 0.8, 1.2])
+        self.resolution = QENSmodels.Resolution(
+            self.w, numpy.exp(-self.w ** 2 / 0.002))
+        self.data = numpy.ones((self.q.size, self.w.size))
+        self.dy = numpy.full(self.data.shape, 0.1)
+        self.dy[0, :5] = -1
+
+    def test_theory(self):
+        """ Test the model of all q against the sqw function """
+        fitness = MultiQFitness('DeltaLorentz', self.w, self.q, self.data,
+                                self.dy, resolution=self.resolution,
+                                scale=[1., 2., 3.], center=0.1, A0=0.3,
+                                hwhm=0.2)
+        self.assertEqual(fitness.numpoints(), self.data.size - 5)
+        expected = numpy.array([
+            self.resolution.convolve(
+                QENSmodels.sqwDeltaLorentz(self.w, item, i + 1., 0.1, 0.3,
+                                           0.2), self.w)
+            for i, item in enumerate(self.q)])
+        numpy.testing.assert_array_almost_equal(fitness.theory(), expected,
+                                                decimal=12)
+        residuals = fitness.residuals()
+        self.assertEqual(residuals.size, fitness.numpoints())
+        self.assertAlmostEqual(fitness.nllf(),
+                               0.5 * numpy.sum(residuals ** 2))
+
+        # a parameter per q other than scale and center
+        fitness.hwhm.value = 0.3
+        fitness.update()
+        other = MultiQFitness('DeltaLorentz', self.w, self.q, self.data,
+                              self.dy, resolution=self.resolution,
+                              per_q=('scale', 'hwhm'), scale=[1., 2., 3.],
+                              center=0.1, A0=0.3, hwhm=0.3)
+        numpy.testing.assert_array_almost_equal(other.theory(),
+                                                fitness.theory(),
+                                                decimal=12)
+
+    def test_corrections(self):
+        """ Test the corrections applied before the convolution """
+        fitness = MultiQFitness('DeltaLorentz', self.w, self.q, self.data,
+                                resolution=self.resolution, temperature=20.,
+                                msd=0.2, A0=0.3, hwhm=0.2)
+        model = QENSmodels.get_model('DeltaLorentz')
+        expected = self.resolution.convolve(
+            model.evaluate(self.w, self.q, temperature=20., msd=0.2, A0=0.3,
+                           hwhm=0.2), self.w)
+        numpy.testing.assert_array_almost_equal(fitness.theory(), expected,
+                                                decimal=12)
+
+    def test_ties(self):
+        """ Test that a parameter can be shared by two fitnesses """
+        first = MultiQFitness('BrownianTranslationalDiffusion', self.w,
+                              self.q, self.data, name='first', D=0.2)
+        second = MultiQFitness('BrownianTranslationalDiffusion', self.w,
+                               self.q[:2], self.data[:2], name='second',
+                               D=first.D)
+        self.assertIs(second.D, first.D)
+        self.assertEqual(len(first.scale), 3)
+        self.assertEqual(first.scale[1].name, 'first scale[1]')
+
+        with self.assertRaises(ValueError):
+            MultiQFitness('BrownianTranslationalDiffusion', self.w, self.q,
+                          self.data, radius=1.)
+
+        with self.assertRaises(ValueError):
+            MultiQFitness('BrownianTranslationalDiffusion', self.w, self.q,
+                          self.data[:2])
+
+
+@unittest.skipIf(lmfit is None, 'lmfit is not installed')
+class TestMultiQModel(unittest.TestCase):
+    """ Tests QENSmodels.adapters.lmfit.MultiQModel """
+
+    def setUp(self):
+        self.w = numpy.linspace(-2, 2, 401)
+        self.q = numpy.array([0.4, 0.8, 1.2])
+        self.resolution = QENSmodels.Resolution(
+            self.w, numpy.exp(-self.w ** 2 / 0.002))
+        self.model = make_model(QENSmodels.sqwJumpTranslationalDiffusion,
+                                self.q, resolution=self.resolution)
+        self.params = self.model.make_params(D=0.3, resTime=1.2)
+        for i in range(self.q.size):
+            self.params['scale_{}'.format(i)].set(value=i + 1.)
+            self.params['center_{}'.format(i)].set(value=0.02)
+
+    def test_eval(self):
+        """ Test the flattened model against the sqw function """
+        self.assertEqual(self.model.param_names,
+                         ['scale_0', 'scale_1', 'scale_2', 'center_0',
+                          'center_1', 'center_2', 'D', 'resTime'])
+        expected = numpy.array([
+            self.resolution.convolve(
+                QENSmodels.sqwJumpTranslationalDiffusion(
+                    self.w, item, i + 1., 0.02, 0.3, 1.2), self.w)
+            for i, item in enumerate(self.q)])
+        # the widths of this model are computed in single precision
+        numpy.testing.assert_array_almost_equal(
+            self.model.eval(self.params, w=self.w), expected.ravel(),
+            decimal=6)
+
+    def test_eval_jacobian(self):
+        """ Test the derivatives against finite differences """
+        jacobian = self.model.eval_jacobian(self.params, w=self.w)
+        self.assertEqual(jacobian.shape, (self.q.size * self.w.size, 8))
+        for k, name in enumerate(self.model.param_names):
+            params = self.params.copy()
+            value = params[name].value
+            step = 1e-2 * (abs(value) or 1.)
+            params[name].set(value=value + step)
+            upper = self.model.eval(params, w=self.w)
+            params[name].set(value=value - step)
+            lower = self.model.eval(params, w=self.w)
+            expected = (upper - lower) / (2. * step)
+            self.assertLess(numpy.abs(jacobian[:, k] - expected).max(),
+                            1e-2 * numpy.abs(expected).max(), msg=name)
+
+    def test_fit(self):
+        """ Test that a fit with the derivatives recovers the
+        parameters """
+        data = self.model.eval(self.params, w=self.w)
+        start = self.model.make_params(D=0.1, resTime=0.5)
+        start['D'].set(min=1e-3)
+        start['resTime'].set(min=1e-3)
+        for i in range(self.q.size):
+            start['scale_{}'.format(i)].set(value=1., min=0.)
+        result = self.model.fit(data, start, w=self.w)
+        self.assertAlmostEqual(result.params['D'].value, 0.3, places=4)
+        self.assertAlmostEqual(result.params['resTime'].value, 1.2,
+                               places=3)
+        self.assertAlmostEqual(result.params['scale_2'].value, 3.,
+                               places=4)
+
+    def test_corrections(self):
+        """ Test the corrections of the model and of its derivatives """
+        model = make_model(QENSmodels.sqwJumpTranslationalDiffusion, self.q,
+                           resolution=self.resolution, temperature=20.,
+                           msd=0.2)
+        factor = QENSmodels.correction_factor(self.w, self.q, 20., 0.2)
+        spec = QENSmodels.get_model('JumpTranslationalDiffusion')
+        values = dict(scale=numpy.arange(1., 4.), center=0.02, D=0.3,
+                      resTime=1.2)
+        numpy.testing.assert_array_almost_equal(
+            model.eval(self.params, w=self.w),
+            self.resolution.convolve(
+                spec.evaluate(self.w, self.q, **values) * factor,
+                self.w).ravel(), decimal=12)
+        numpy.testing.assert_array_almost_equal(
+            model.eval_jacobian(self.params, w=self.w)[:, -2],
+            self.resolution.convolve(
+                spec.jacobian(self.w, self.q, **values)[2] * factor,
+                self.w).ravel(), decimal=12)
+
+    def test_per_q(self):
+        """ Test parameters given per q other than scale and center """
+        model = make_model('DeltaLorentz', self.q, per_q=('hwhm',))
+        params = model.make_params(A0=0.3, hwhm_0=0.1, hwhm_1=0.2,
+                                   hwhm_2=0.3)
+        expected = numpy.vstack([
+            QENSmodels.sqwDeltaLorentz(self.w, item, 1., 0., 0.3,
+                                       0.1 * (i + 1))
+            for i, item in enumerate(self.q)])
+        numpy.testing.assert_array_almost_equal(
+            model.eval(params, w=self.w), expected.ravel(), decimal=12)
+
+        with self.assertRaises(ValueError):
+            make_model('EquivalentSitesCircle', self.q, per_q=('Nsites',))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+import unittest
+import numpy
+
+import QENSmodels
+
+
+class TestAssemble(unittest.TestCase):
+    """ Tests QENSmodels.assemble function """
+
+    def setUp(self):
+        self.w = numpy.linspace(-2, 2, 401)
+        self.hwhm = numpy.array([[0.1, 0.5], [0.2, 0.], [0.3, 1.2]])
+        self.eisf = numpy.array([0.5, 0.2, 0.])
+        self.qisf = numpy.array([[0.3, 0.2], [0.4, 0.4], [1., 0.]])
+
+    def expected(self, scale, center, binned=False):
+        """ Same model computed one q and one term at a time """
+        scale = numpy.broadcast_to(scale, self.eisf.shape)
+        center = numpy.broadcast_to(center, self.eisf.shape)
+        rows = []
+        for i in range(self.eisf.size):
+            row = self.eisf[i] * QENSmodels.delta(self.w, scale[i], center[i],
+                                                  binned=binned)
+            for gamma, weight in zip(self.hwhm[i], self.qisf[i]):
+                row = row + weight * QENSmodels.lorentzian(
+                    self.w, scale[i], center[i], gamma, binned=binned)
+            rows.append(row)
+        return numpy.array(rows)
+
+    def test_per_row(self):
+        """ Test the comparison with the functions of each component """
+        numpy.testing.assert_array_almost_equal(
+            QENSmodels.assemble(self.w, self.hwhm, self.eisf, self.qisf,
+                                2., 0.1),
+            self.expected(2., 0.1), decimal=12)
+
+        # one scale and one center per q
+        scale = [1., 2., 3.]
+        center = [0., 0.1, -0.2]
+        numpy.testing.assert_array_almost_equal(
+            QENSmodels.assemble(self.w, self.hwhm, self.eisf, self.qisf,
+                                scale, center),
+            self.expected(scale, center), decimal=12)
+
+    def test_out_and_dtype(self):
+        """ Test the buffer of the output and the single precision """
+        out = numpy.empty((3, self.w.size))
+        result = QENSmodels.assemble(self.w, self.hwhm, self.eisf, self.qisf,
+                                     out=out)
+        self.assertIs(result, out)
+        numpy.testing.assert_array_almost_equal(
+            out, self.expected(1., 0.), decimal=12)
+
+        result = QENSmodels.assemble(self.w, self.hwhm, self.eisf, self.qisf,
+                                     dtype=numpy.float32)
+        self.assertEqual(result.dtype, numpy.float32)
+        numpy.testing.assert_allclose(result, self.expected(1., 0.),
+                                      rtol=1e-5, atol=1e-6)
+
+    def test_atol(self):
+        """ Test the error bound of the skipped terms and tails """
+        w = numpy.linspace(-10, 10, 4001)
+        hwhm = numpy.array([[1e-3, 0.05, 0.5], [2e-3, 0.1, 0.3]])
+        qisf = numpy.array([[0.4, 0.3, 1e-12], [0.5, 0.3, 1e-12]])
+        expected = QENSmodels.assemble(w, hwhm, [0.3, 0.], qisf, 2., 0.1)
+        for atol in (1e-3, 1e-6):
+            with self.subTest(atol=atol):
+                model, bound = QENSmodels.assemble(
+                    w, hwhm, [0.3, 0.], qisf, 2., 0.1, atol=atol,
+                    return_bound=True)
+                self.assertTrue(numpy.all(bound <= 1.01 * atol))
+                rounding = 1e-15 * numpy.abs(expected).max(axis=1)
+                self.assertTrue(numpy.all(
+                    numpy.abs(model - expected).max(axis=1)
+                    <= bound + rounding))
+
+        # grid not sorted: only the negligible terms are skipped
+        model, bound = QENSmodels.assemble(
+            w[::-1], hwhm, [0.3, 0.], qisf, 2., 0.1, atol=1e-3,
+            return_bound=True)
+        self.assertTrue(numpy.all(bound < 1e-11))
+        numpy.testing.assert_allclose(
+            model, QENSmodels.assemble(w[::-1], hwhm, [0.3, 0.], qisf, 2.,
+                                       0.1), rtol=0., atol=1e-11)
+
+    def test_binned(self):
+        """ Test the integration over the bins delimited by w """
+        center = numpy.array([0., 0.1, -0.25])
+        model = QENSmodels.assemble(self.w, self.hwhm, self.eisf, self.qisf,
+                                    [1., 2., 3.], center, binned=True)
+        self.assertEqual(model.shape, (3, 400))
+        numpy.testing.assert_array_almost_equal(
+            model, self.expected([1., 2., 3.], center, binned=True),
+            decimal=13)
+
+        # exact area of narrow lines on a coarse grid
+        edges = numpy.linspace(-2, 2, 21)
+        model = QENSmodels.assemble(edges, [[1e-4]], 0.4, [[0.6]],
+                                    center=0.05, binned=True)
+        area = 0.4 + 0.6 / numpy.pi * (numpy.arctan(1.95e4)
+                                       + numpy.arctan(2.05e4))
+        self.assertAlmostEqual(model[0] @ numpy.diff(edges), area, places=14)
+
+        with self.assertRaises(ValueError):
+            QENSmodels.assemble(self.w, self.hwhm, self.eisf, self.qisf,
+                                atol=1e-6, binned=True)
+        with self.assertRaises(ValueError):
+            QENSmodels.assemble(self.w[::-1], self.hwhm, self.eisf,
+                                self.qisf, binned=True)
+
+    def test_workers(self):
+        """ Test the computation of blocks of q in several threads """
+        w = numpy.linspace(-10, 10, 2001)
+        hwhm = numpy.linspace(0.01, 2., 50)[:, numpy.newaxis] \
+            * [1., 3.]
+        eisf = numpy.linspace(0., 0.5, 50)
+        qisf = numpy.column_stack([0.5 * (1. - eisf), 0.5 * (1. - eisf)])
+        scale = numpy.linspace(1., 2., 50)
+        center = numpy.linspace(-0.1, 0.1, 50)
+        for kwargs in ({}, {'binned': True}, {'dtype': numpy.float32}):
+            expected = QENSmodels.assemble(w, hwhm, eisf, qisf, scale,
+                                           center, **kwargs)
+            out = numpy.zeros(expected.shape, dtype=expected.dtype)
+            result = QENSmodels.assemble(w, hwhm, eisf, qisf, scale, center,
+                                         out=out, workers=3, **kwargs)
+            self.assertIs(result, out)
+            numpy.testing.assert_array_equal(result, expected)
+
+        # the windows of atol are computed per block, within the bound
+        exact = QENSmodels.assemble(w, hwhm, eisf, qisf)
+        model, bound = QENSmodels.assemble(w, hwhm, eisf, qisf, atol=1e-6,
+                                           return_bound=True, workers=4)
+        self.assertEqual(bound.shape, (50,))
+        self.assertTrue(numpy.all(numpy.abs(model - exact).max(axis=1)
+                                  <= bound + 1e-12))
+
+        previous = QENSmodels.set_num_threads(2)
+        try:
+            self.assertEqual(QENSmodels.get_num_threads(), 2)
+            numpy.testing.assert_array_equal(
+                QENSmodels.sqwJumpTranslationalDiffusion(w, eisf + 0.1),
+                QENSmodels.assemble(w, *QENSmodels.
+                                    componentsJumpTranslationalDiffusion(
+                                        eisf + 0.1), workers=1))
+        finally:
+            QENSmodels.set_num_threads(previous)
+        with self.assertRaises(ValueError):
+            QENSmodels.set_num_threads(0)
+
+    def test_shapes(self):
+        """ Test the errors on the shapes of the inputs """
+        with self.assertRaises(ValueError):
+            QENSmodels.assemble(self.w, self.hwhm, self.eisf,
+                                self.qisf[:, :1])
+        with self.assertRaises(ValueError):
+            QENSmodels.assemble(self.w, self.hwhm, self.eisf, self.qisf,
+                                scale=[1., 2.])
+        with self.assertRaises(ValueError):
+            QENSmodels.assemble(self.w, self.hwhm, self.eisf, self.qisf,
+                                out=numpy.empty((3, 2)))
+
+
+if __name__ == '__main__':
+    unittest.main()
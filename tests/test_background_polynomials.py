@@ -39,6 +39,54 @@ class TestBackgroundPolynomials(unittest.TestCase):
                           [1, 2, 3],
                           [1, 2, 'a'])
 
+    def test_numpy_coefficients(self):
+        """ test that numpy arrays and numpy scalars are accepted as
+        coefficients
+        """
+        x = numpy.linspace(-1, 1, 11)
+        numpy.testing.assert_array_equal(
+            QENSmodels.background_polynomials(x, numpy.array([1., 2.])),
+            QENSmodels.background_polynomials(x, [1, 2]))
+        numpy.testing.assert_array_equal(
+            QENSmodels.background_polynomials(x, numpy.float32(0.5)),
+            0.5 * numpy.ones(11))
+
+    def test_coefficients_per_q(self):
+        """ test the evaluation of one polynomial per q at once """
+        x = numpy.linspace(-1, 1, 11)
+        coefficients = numpy.array([[1., 2., 3.],
+                                    [0.5, 0., -1.]])
+        output = QENSmodels.background_polynomials(x, coefficients)
+        self.assertEqual(output.shape, (2, 11))
+        for i in range(2):
+            numpy.testing.assert_array_almost_equal(
+                output[i],
+                QENSmodels.background_polynomials(x, list(coefficients[i])),
+                decimal=14)
+
+    def test_shape_of_x(self):
+        """ test that the output keeps the shape of a 2D x """
+        x = numpy.arange(6.).reshape(2, 3)
+        output = QENSmodels.background_polynomials(x, [1, 2])
+        self.assertEqual(output.shape, (2, 3))
+        numpy.testing.assert_array_equal(output, 1. + 2. * x)
+        output = QENSmodels.background_polynomials(x, [[1, 2], [0, 1]])
+        self.assertEqual(output.shape, (2, 2, 3))
+        numpy.testing.assert_array_equal(output[1], x)
+
+    def test_jacobian(self):
+        """ test the derivatives with respect to the coefficients """
+        x = numpy.linspace(-1, 1, 11)
+        jacobian = QENSmodels.background_polynomials_jacobian(x, 2)
+        self.assertEqual(jacobian.shape, (11, 3))
+        numpy.testing.assert_array_equal(jacobian[:, 2], x ** 2)
+        # the background is linear in its coefficients
+        coefficients = numpy.array([0.3, -0.2, 0.1])
+        numpy.testing.assert_array_almost_equal(
+            jacobian @ coefficients,
+            QENSmodels.background_polynomials(x, coefficients),
+            decimal=14)
+
     def test_reference_data(self):
         """ Test output values in comparison with reference data
         (file in 'reference data' folder)
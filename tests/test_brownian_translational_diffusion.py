@@ -84,6 +84,25 @@ class TestBrownianTranslationDiffusion(unittest.TestCase):
                           1,
                           -1)
 
+    def test_iqt(self):
+        """ Test that the intermediate scattering function is the sum of
+        the EISF and of exponential decays given by
+        componentsBrownianTranslationalDiffusion
+        """
+        t = numpy.linspace(0, 10, 101)
+        q = [0.3, 0.7]
+        hwhm, eisf, qisf = QENSmodels.componentsBrownianTranslationalDiffusion(
+            q, 1.)
+        expected = [
+            2. * (eisf[i] + sum(weight * numpy.exp(-width * t)
+                                for weight, width in zip(qisf[i], hwhm[i])))
+            for i in range(len(q))
+        ]
+        numpy.testing.assert_array_almost_equal(
+            QENSmodels.iqtBrownianTranslationalDiffusion(t, q, 2., 1.),
+            expected,
+            decimal=12)
+
     def test_reference_data(self):
         """ test output values in comparison with reference data
         (file in 'reference data' folder)
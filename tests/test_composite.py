@@ -0,0 +1,79 @@
+import unittest
+import numpy
+
+import QENSmodels
+from QENSmodels.composite import Background, Delta, Lorentzian
+
+
+class TestComposite(unittest.TestCase):
+    """ Tests QENSmodels.composite model expressions """
+
+    def setUp(self):
+        self.w = numpy.arange(-2, 2.01, 0.01)
+
+    def test_param_names(self):
+        """ Test naming of parameters """
+        model = Lorentzian(prefix='l_') + Lorentzian() * 'amp' + Delta()
+        self.assertEqual(model.param_names,
+                         ['l_scale', 'l_center', 'l_hwhm',
+                          'lorentzian2_scale', 'lorentzian2_center',
+                          'lorentzian2_hwhm', 'delta1_scale',
+                          'delta1_center', 'amp'])
+
+        with self.assertRaises(ValueError):
+            Lorentzian(prefix='a_') + Lorentzian(prefix='a_')
+
+        with self.assertRaises(ValueError):
+            (Lorentzian() * 'amp') * 'other'
+
+    def test_unknown_parameter(self):
+        """ Test that an unknown parameter raises an error """
+        model = Delta() + Lorentzian()
+        with self.assertRaises(ValueError):
+            model(self.w, hwhm=0.3)
+
+    def test_against_functions(self):
+        """ Test the fused evaluation against the individual functions """
+        model = Delta() + Lorentzian() * 0.3 + Lorentzian() * 'fraction' \
+            + Background(deg=2)
+        params = dict(delta1_scale=0.4, delta1_center=0.1,
+                      lorentzian1_scale=2., lorentzian1_center=0.1,
+                      lorentzian1_hwhm=0.2,
+                      lorentzian2_scale=1.5, lorentzian2_center=-0.2,
+                      lorentzian2_hwhm=0.005, fraction=0.7,
+                      background1_c0=0.1, background1_c1=0.02,
+                      background1_c2=0.003)
+        expected = QENSmodels.delta(self.w, 0.4, 0.1) \
+            + 0.3 * QENSmodels.lorentzian(self.w, 2., 0.1, 0.2) \
+            + 0.7 * QENSmodels.lorentzian(self.w, 1.5, -0.2, 0.005) \
+            + QENSmodels.background_polynomials(self.w, [0.1, 0.02, 0.003])
+        numpy.testing.assert_array_almost_equal(model(self.w, **params),
+                                                expected,
+                                                decimal=12)
+
+    def test_zero_width(self):
+        """ Test a Lorentzian of zero width """
+        model = Lorentzian()
+        numpy.testing.assert_array_equal(
+            model(self.w, lorentzian1_scale=0.3, lorentzian1_center=0.4,
+                  lorentzian1_hwhm=0.),
+            QENSmodels.lorentzian(self.w, 0.3, 0.4, 0.))
+
+    def test_resolution(self):
+        """ Test that the peaks are convolved once and the background is
+        not convolved """
+        resolution = QENSmodels.Resolution(
+            self.w, numpy.exp(-self.w ** 2 / 0.01))
+        model = 2 * (Delta() + Lorentzian()) + Background()
+        params = dict(lorentzian1_hwhm=0.1, background1_c0=0.5)
+        expected = resolution.convolve(
+            2 * QENSmodels.delta(self.w)
+            + 2 * QENSmodels.lorentzian(self.w, hwhm=0.1), self.w) + 0.5
+        numpy.testing.assert_array_almost_equal(
+            model(self.w, resolution=resolution, **params),
+            expected,
+            decimal=12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import unittest
+import numpy
+
+import QENSmodels
+from QENSmodels.composite import Delta, Lorentzian
+
+
+class TestCorrections(unittest.TestCase):
+    """ Tests QENSmodels.corrections functions """
+
+    def setUp(self):
+        self.w = numpy.linspace(-2, 2, 401)
+        self.q = numpy.array([0.5, 1., 1.5])
+
+    def test_detailed_balance_factor(self):
+        """ Test the values and caching of the detailed balance factor """
+        factor = QENSmodels.detailed_balance_factor(self.w, 10.)
+        numpy.testing.assert_array_almost_equal(
+            factor, numpy.exp(self.w / (2 * 0.08617333262 * 10.)),
+            decimal=12)
+        numpy.testing.assert_array_almost_equal(
+            factor * factor[::-1], numpy.ones(self.w.size), decimal=12)
+        self.assertIs(QENSmodels.detailed_balance_factor(self.w.copy(), 10.),
+                      factor)
+        self.assertFalse(factor.flags.writeable)
+
+        with self.assertRaises(ValueError):
+            QENSmodels.detailed_balance_factor(self.w, 0.)
+
+    def test_units(self):
+        """ Test the units of the energy transfer """
+        factor = QENSmodels.detailed_balance_factor(self.w, 10.)
+        numpy.testing.assert_array_almost_equal(
+            QENSmodels.detailed_balance_factor(1e3 * self.w, 10.,
+                                               unit='ueV'),
+            factor, decimal=12)
+        # hbar = 0.6582119569 meV ps
+        numpy.testing.assert_array_almost_equal(
+            QENSmodels.detailed_balance_factor(self.w / 0.6582119569, 10.,
+                                               unit='1/ps'),
+            factor, decimal=8)
+        numpy.testing.assert_array_almost_equal(
+            QENSmodels.detailed_balance_factor(self.w, 10., 1.),
+            numpy.exp(self.w / 20.), decimal=12)
+
+        with self.assertRaises(ValueError):
+            QENSmodels.detailed_balance_factor(self.w, 10., unit='K')
+
+    def test_debye_waller_factor(self):
+        """ Test the values of the Debye-Waller factor """
+        numpy.testing.assert_array_almost_equal(
+            QENSmodels.debye_waller_factor(self.q, 0.3),
+            numpy.exp(-self.q ** 2 * 0.1),
+            decimal=12)
+
+        with self.assertRaises(ValueError):
+            QENSmodels.debye_waller_factor(self.q, -0.3)
+
+    def test_apply_corrections(self):
+        """ Test the corrections against a loop over q """
+        sqw = QENSmodels.sqwDeltaLorentz(self.w, self.q, 1., 0., 0.3, 0.2)
+        expected = numpy.array([
+            sqw[i] * numpy.exp(self.w / (2 * 0.08617333262 * 50.))
+            * numpy.exp(-self.q[i] ** 2 * 0.2 / 3.)
+            for i in range(self.q.size)])
+        numpy.testing.assert_array_almost_equal(
+            QENSmodels.apply_corrections(sqw, self.w, self.q,
+                                         temperature=50., msd=0.2),
+            expected,
+            decimal=12)
+
+        numpy.testing.assert_array_equal(
+            QENSmodels.apply_corrections(sqw, self.w, self.q), sqw)
+
+        numpy.testing.assert_array_almost_equal(
+            QENSmodels.apply_corrections(sqw[1], self.w, 1., msd=0.2),
+            expected[1] / numpy.exp(self.w / (2 * 0.08617333262 * 50.)),
+            decimal=12)
+
+    def test_convolve_components(self):
+        """ Test the corrections applied before the convolution """
+        resolution = QENSmodels.Resolution(self.w,
+                                           numpy.exp(-self.w ** 2 / 0.01))
+        components = QENSmodels.componentsDeltaLorentz(self.q, 0.3, 0.2)
+        sqw = QENSmodels.sqwDeltaLorentz(self.w, self.q, 1., 0.1, 0.3, 0.2)
+        expected = resolution.convolve(
+            QENSmodels.apply_corrections(sqw, self.w, self.q,
+                                         temperature=50., msd=0.2),
+            self.w)
+        numpy.testing.assert_array_almost_equal(
+            resolution.convolve_components(self.w, *components, center=0.1,
+                                           q=self.q, temperature=50.,
+                                           msd=0.2),
+            expected,
+            decimal=12)
+
+        with self.assertRaises(ValueError):
+            resolution.convolve_components(self.w, *components, msd=0.2)
+
+    def test_evaluate(self):
+        """ Test the corrections of the models of the registry and of their
+        derivatives """
+        model = QENSmodels.get_model('DeltaLorentz')
+        params = dict(scale=2., center=0.1, A0=0.3, hwhm=0.2)
+        corrections = dict(temperature=50., msd=0.2, unit='1/ps')
+        expected = QENSmodels.apply_corrections(
+            model.evaluate(self.w, self.q, **params), self.w, self.q,
+            **corrections)
+        numpy.testing.assert_array_almost_equal(
+            model.evaluate(self.w, self.q, **corrections, **params),
+            expected, decimal=12)
+        # per-q parameters evaluated q by q
+        numpy.testing.assert_array_almost_equal(
+            model.evaluate(self.w, self.q, **corrections,
+                           **dict(params, hwhm=[0.2, 0.2, 0.2])),
+            expected, decimal=12)
+        numpy.testing.assert_array_almost_equal(
+            model.jacobian(self.w, self.q, **corrections, **params),
+            model.jacobian(self.w, self.q, **params)
+            * QENSmodels.correction_factor(self.w, self.q, **corrections),
+            decimal=12)
+
+    def test_fit(self):
+        """ Test the fit of corrected data """
+        model = QENSmodels.get_model('DeltaLorentz')
+        data = model.evaluate(self.w, self.q, temperature=20., msd=0.2,
+                              scale=2., A0=0.3, hwhm=0.2)
+        result = QENSmodels.fit_model('DeltaLorentz', self.w, self.q, data,
+                                      p0={'A0': 0.5, 'hwhm': 0.5},
+                                      per_q=('scale',), fixed=('center',),
+                                      temperature=20., msd=0.2)
+        self.assertAlmostEqual(result.params['A0'], 0.3, places=6)
+        self.assertAlmostEqual(result.params['hwhm'], 0.2, places=6)
+        numpy.testing.assert_array_almost_equal(result.params['scale'],
+                                                [2., 2., 2.], decimal=6)
+
+    def test_composite(self):
+        """ Test the detailed balance factor in model expressions """
+        model = Delta() + Lorentzian()
+        params = dict(delta1_center=0.1, lorentzian1_hwhm=0.2)
+        numpy.testing.assert_array_almost_equal(
+            model(self.w, temperature=50., **params),
+            model(self.w, **params)
+            * QENSmodels.detailed_balance_factor(self.w, 50.),
+            decimal=12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -30,6 +30,47 @@ class TestDelta(unittest.TestCase):
         output_array1 = QENSmodels.delta(input_nb1, 5, 2)
         self.assertIsInstance(output_array1, numpy.ndarray)
 
+    def test_center_outside_range(self):
+        """ Test that the output is zero if center is outside the x-range """
+        output_array = QENSmodels.delta([0, 1, 2, 3, 4], 5, 10)
+        numpy.testing.assert_array_equal(output_array, numpy.zeros(5))
+
+    def test_unsorted_input(self):
+        """ Test that the peak is placed at the closest value of x """
+        output_array = QENSmodels.delta([3, 0, 4, 1, 2], 2, 0.8)
+        numpy.testing.assert_array_equal(output_array, [0, 0, 0, 2, 0])
+
+    def test_vector_parameters(self):
+        """ Test one delta per value of center and scale """
+        x = numpy.arange(-2, 2.01, 0.01)
+        centers = [-3., 0., 0.503]
+        output_array = QENSmodels.delta(x, [1., 2., 3.], centers)
+        self.assertEqual(output_array.shape, (3, x.size))
+        for i, center in enumerate(centers):
+            numpy.testing.assert_array_equal(
+                output_array[i], QENSmodels.delta(x, i + 1., center))
+
+    def test_spread(self):
+        """ Test the linear sharing of the intensity between grid points """
+        x = numpy.arange(-2, 2.01, 0.01)
+        for center in [-2., -0.1234, 0., 0.777, 2.]:
+            output_array = QENSmodels.delta(x, 3, center, spread=True)
+            # area and first moment are those of the delta
+            self.assertAlmostEqual(numpy.sum(output_array) * 0.01, 3.)
+            self.assertAlmostEqual(numpy.sum(output_array * x) * 0.01,
+                                   3. * center)
+
+    def test_binned(self):
+        """ Test the assignment of the center to a single bin """
+        edges = [0., 0.5, 2., 3.]
+        numpy.testing.assert_array_equal(
+            QENSmodels.delta(edges, 3., [0., 0.5, 1.9, 3., 3.5], binned=True),
+            [[6., 0., 0.], [0., 2., 0.], [0., 2., 0.], [0., 0., 3.],
+             [0., 0., 0.]])
+
+        with self.assertRaises(ValueError):
+            QENSmodels.delta([1.], binned=True)
+
     def test_reference_data(self):
         """ Test output values in comparison with reference data
         (file in 'reference data' folder)
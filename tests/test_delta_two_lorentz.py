@@ -45,6 +45,24 @@ class TestDeltaTwoLorentz(unittest.TestCase):
         self.assertRaises(TypeError,
                           QENSmodels.sqwDeltaTwoLorentz, 1)
 
+    def test_iqt(self):
+        """ Test that the intermediate scattering function is the sum of
+        the EISF and of exponential decays given by componentsDeltaTwoLorentz
+        """
+        t = numpy.linspace(0, 10, 101)
+        q = [0.3, 0.7]
+        hwhm, eisf, qisf = QENSmodels.componentsDeltaTwoLorentz(
+            q, 0.01, 0.4, 0.25, 0.75)
+        expected = [
+            2. * (eisf[i] + sum(weight * numpy.exp(-width * t)
+                                for weight, width in zip(qisf[i], hwhm[i])))
+            for i in range(len(q))
+        ]
+        numpy.testing.assert_array_almost_equal(
+            QENSmodels.iqtDeltaTwoLorentz(t, q, 2., 0.01, 0.4, 0.25, 0.75),
+            expected,
+            decimal=12)
+
     def test_reference_data(self):
         """ Test output values in comparison with reference data
         (file in 'reference data' folder)
@@ -0,0 +1,134 @@
+import unittest
+import numpy
+
+import QENSmodels
+from QENSmodels.estimators import estimate_components, initial_guess, \
+    spectral_moments
+from QENSmodels.fitting import fit_model
+
+
+class TestEstimators(unittest.TestCase):
+    """ Tests QENSmodels.estimators """
+
+    def setUp(self):
+        self.w = numpy.linspace(-2, 2, 401)
+        self.q = numpy.linspace(0.3, 1.8, 12)
+        self.resolution = QENSmodels.Resolution(
+            self.w, QENSmodels.gaussian(self.w, 1., 0., 0.03))
+        self.rng = numpy.random.default_rng(0)
+
+    def measure(self, sqw, noise=0.003):
+        """ Convolve with the resolution and add noise """
+        data = self.resolution.convolve(sqw, self.w)
+        data = data + self.rng.normal(0., noise, data.shape)
+        return data, numpy.full(data.shape, noise)
+
+    def test_spectral_moments(self):
+        """ Test the moments of a Gaussian """
+        sigma = 0.1
+        sqw = numpy.array([[1.], [2.]]) / numpy.sqrt(2. * numpy.pi) / sigma \
+            * numpy.exp(-(self.w - 0.2) ** 2 / (2. * sigma ** 2))
+        moments = spectral_moments(self.w, sqw)
+        numpy.testing.assert_allclose(moments.area, [1., 2.], rtol=1e-6)
+        numpy.testing.assert_allclose(moments.center, 0.2, atol=1e-6)
+        numpy.testing.assert_allclose(
+            moments.second, numpy.array([1., 2.]) * sigma ** 2, rtol=1e-4)
+        numpy.testing.assert_allclose(
+            moments.fourth, numpy.array([3., 6.]) * sigma ** 4, rtol=1e-4)
+        numpy.testing.assert_allclose(moments.window, 1.8)
+
+        # the tails below the noise are excluded
+        moments = spectral_moments(self.w, sqw, error=1e-3)
+        self.assertTrue(numpy.all(moments.window < 0.6))
+
+    def test_estimate_components(self):
+        """ Test the delta and Lorentzian of sqwDeltaLorentz """
+        sqw = QENSmodels.sqwDeltaLorentz(self.w, self.q, 2., 0.05, 0.4, 0.2)
+        estimate = estimate_components(self.w, sqw)
+        numpy.testing.assert_allclose(estimate.scale, 2., rtol=1e-2)
+        numpy.testing.assert_allclose(estimate.center, 0.05, atol=1e-2)
+        numpy.testing.assert_allclose(estimate.eisf, 0.4, atol=1e-2)
+        numpy.testing.assert_allclose(estimate.hwhm, 0.2, rtol=1e-2)
+
+        data, error = self.measure(sqw)
+        estimate = estimate_components(self.w, data, error, self.resolution)
+        numpy.testing.assert_allclose(estimate.eisf, 0.4, atol=0.05)
+        numpy.testing.assert_allclose(estimate.hwhm, 0.2, rtol=0.15)
+
+        # no quasi-elastic signal
+        estimate = estimate_components(
+            self.w, QENSmodels.delta(self.w, 1., 0.))
+        numpy.testing.assert_allclose(estimate.eisf, 1.)
+
+    def test_initial_guess(self):
+        """ Test the estimated parameters of translational diffusion """
+        cases = [('BrownianTranslationalDiffusion', dict(D=0.2)),
+                 ('JumpTranslationalDiffusion', dict(D=0.3, resTime=1.)),
+                 ('ChudleyElliottDiffusion', dict(D=0.3, L=1.5))]
+        for name, params in cases:
+            with self.subTest(name):
+                spec = QENSmodels.get_model(name)
+                data, error = self.measure(
+                    spec.evaluate(self.w, self.q, **params))
+                guess = initial_guess(name, self.w, self.q, data, error,
+                                      self.resolution)
+                self.assertEqual(set(guess), set(spec.param_names))
+                numpy.testing.assert_allclose(guess['scale'], 1., rtol=0.5)
+                for item, value in params.items():
+                    self.assertAlmostEqual(guess[item], value,
+                                           delta=0.5 * value)
+
+                # the guess is good enough to converge
+                result = fit_model(spec, self.w, self.q, data, error,
+                                   self.resolution, p0=guess)
+                self.assertLess(result.redchi, 1.5)
+
+    def test_initial_guess_localized(self):
+        """ Test the estimated parameters of the localized motions and of
+        the delta and Lorentzians """
+        cases = [('IsotropicRotationalDiffusion', dict(radius=1.5, DR=0.1)),
+                 ('EquivalentSitesCircle',
+                  dict(Nsites=3, radius=1.5, resTime=2.)),
+                 ('JumpSitesLogNormDist',
+                  dict(Nsites=3, radius=1.5, resTime=2., sigma=1.)),
+                 ('GaussianModel3D', dict(D=0.1, variance_ux=0.8)),
+                 ('DeltaLorentz', dict(A0=0.4, hwhm=0.2)),
+                 ('DeltaTwoLorentz',
+                  dict(A0=0.4, A1=0.3, hwhm1=0.05, hwhm2=0.4))]
+        for name, params in cases:
+            with self.subTest(name):
+                spec = QENSmodels.get_model(name)
+                data, error = self.measure(
+                    spec.evaluate(self.w, self.q, **params))
+                known = {item: params[item] for item in spec.integer
+                         if item in params}
+                guess = initial_guess(name, self.w, self.q, data, error,
+                                      self.resolution, p0=known)
+                for item in known:
+                    self.assertEqual(guess[item], params[item])
+                if name == 'DeltaTwoLorentz':
+                    self.assertLess(guess['hwhm1'], guess['hwhm2'])
+                else:
+                    for item, value in params.items():
+                        self.assertAlmostEqual(guess[item], value,
+                                               delta=0.5 * value)
+
+                result = fit_model(spec, self.w, self.q, data, error,
+                                   self.resolution, p0=guess,
+                                   fixed=tuple(spec.integer))
+                self.assertLess(result.redchi, 1.5)
+
+    def test_initial_guess_defaults(self):
+        """ Test that the parameters of the models without estimates keep
+        their default values, with a warning """
+        spec = QENSmodels.get_model('WaterTeixeira')
+        sqw = spec.evaluate(self.w, self.q)
+        with self.assertWarns(UserWarning):
+            guess = initial_guess(spec, self.w, self.q, sqw)
+        for item in spec.parameters:
+            self.assertEqual(guess[item], spec.defaults[item])
+        self.assertEqual(guess['scale'].shape, self.q.shape)
+
+
+if __name__ == '__main__':
+    unittest.main()
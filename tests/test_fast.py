@@ -0,0 +1,67 @@
+import unittest
+import numpy
+
+import QENSmodels
+from QENSmodels import fast
+from QENSmodels.models import MODELS
+
+# values of the parameters other than their defaults
+PARAMS = {
+    'DeltaLorentz': dict(A0=0.3, hwhm=0.2),
+    'DeltaTwoLorentz': dict(A0=0.3, A1=0.4, hwhm1=0.02, hwhm2=0.3),
+}
+
+
+class TestFast(unittest.TestCase):
+    """ Tests QENSmodels.fast """
+
+    def setUp(self):
+        self.w = numpy.linspace(-2, 2, 401)
+
+    def test_identical(self):
+        """ Test that the unchecked models are identical to the models of
+        the package """
+        for name, spec in MODELS.items():
+            params = PARAMS.get(name, {})
+            for q in (0.7, [0.7], numpy.array([0.6, 1., 1.4])):
+                expected = spec.sqw(self.w, q, 2., 0.05, **params)
+                result = getattr(fast, 'sqw' + name)(self.w, q, 2., 0.05,
+                                                     **params)
+                self.assertEqual(result.dtype, expected.dtype)
+                numpy.testing.assert_array_equal(result, expected,
+                                                 err_msg=name)
+
+                values = [spec.defaults[item] for item in spec.parameters]
+                values = [params.get(item, value) for item, value in
+                          zip(spec.parameters, values)]
+                for result, expected in zip(
+                        getattr(fast, 'components' + name)(q, *values),
+                        spec.components(q, *values)):
+                    numpy.testing.assert_array_equal(result, expected,
+                                                     err_msg=name)
+
+    def test_no_validation(self):
+        """ Test that the values of the parameters are not checked """
+        with self.assertRaises(ValueError):
+            QENSmodels.componentsDeltaLorentz(1., 1.5, 0.1)
+        _, eisf, qisf = fast.componentsDeltaLorentz(1., 1.5, 0.1)
+        self.assertEqual(eisf[0], 1.5)
+        self.assertAlmostEqual(qisf[0, 0], -0.5)
+
+        with self.assertRaises(ValueError):
+            QENSmodels.sqwJumpTranslationalDiffusion(self.w, 1., D=-1.)
+        fast.sqwJumpTranslationalDiffusion(self.w, 1., D=-1.)
+
+    def test_signature(self):
+        """ Test the names, defaults and keywords of the unchecked models """
+        model = fast.sqwEquivalentSitesCircle
+        self.assertEqual(model.__name__, 'sqwEquivalentSitesCircle')
+        numpy.testing.assert_array_equal(
+            model(self.w, 1., Nsites=4),
+            QENSmodels.sqwEquivalentSitesCircle(self.w, 1., 1., 0., 4))
+        with self.assertRaises(TypeError):
+            model(self.w, 1., hwhm=0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
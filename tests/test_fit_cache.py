@@ -0,0 +1,152 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+import numpy
+
+import QENSmodels
+from QENSmodels.fit_cache import FitCache, main
+from QENSmodels.fitting import Dataset, fit_model
+from QENSmodels.models import get_model
+
+
+class TestFitCache(unittest.TestCase):
+    """ Tests QENSmodels.fit_cache """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = FitCache(self.directory.name)
+        self.w = numpy.linspace(-2, 2, 201)
+        self.q = numpy.array([0.5, 1.])
+        rng = numpy.random.default_rng(0)
+        self.data = QENSmodels.sqwDeltaLorentz(self.w, self.q, 2., 0., 0.3,
+                                               0.2)
+        self.data += rng.normal(0., 0.01, self.data.shape)
+        self.error = numpy.full(self.data.shape, 0.01)
+        self.p0 = {'A0': 0.5, 'hwhm': 0.5}
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def fit(self, **kwargs):
+        arguments = dict(data=self.data, error=self.error, p0=self.p0,
+                         cache=self.cache)
+        arguments.update(kwargs)
+        return fit_model('DeltaLorentz', self.w, self.q, **arguments)
+
+    def test_hit(self):
+        """ Test that a fit done again is read from the cache """
+        first = self.fit()
+        again = self.fit()
+        self.assertFalse(first.cached)
+        self.assertTrue(again.cached)
+        self.assertEqual(len(self.cache), 1)
+
+        self.assertEqual(set(again.params), set(first.params))
+        for name, value in first.params.items():
+            numpy.testing.assert_array_equal(again.params[name], value)
+        self.assertEqual(set(again.stderr), set(first.stderr))
+        for name, value in first.stderr.items():
+            numpy.testing.assert_array_equal(again.stderr[name], value)
+        for name in ('chisq', 'redchi', 'nfev', 'njev', 'success',
+                     'message', 'seed'):
+            self.assertEqual(getattr(again, name), getattr(first, name))
+        self.assertIsInstance(again.params['hwhm'], float)
+        numpy.testing.assert_array_equal(again.best_fit, first.best_fit)
+        # scale and center per q, A0 and hwhm
+        self.assertEqual(first.covariance.shape, (6, 6))
+        numpy.testing.assert_array_equal(again.covariance, first.covariance)
+
+    def test_keys(self):
+        """ Test that any change of the inputs gives a new fit """
+        self.fit()
+        data = self.data.copy()
+        data[0, 0] += 1e-12
+        for kwargs in ({'data': data}, {'error': 2. * self.error},
+                       {'p0': {'A0': 0.4, 'hwhm': 0.5}},
+                       {'bounds': {'hwhm': (0., 1.)}},
+                       {'fixed': ('center',)}, {'per_q': ('scale',)},
+                       {'ftol': 1e-10},
+                       {'resolution': QENSmodels.Resolution(
+                           self.w, QENSmodels.gaussian(self.w, 1., 0.,
+                                                       0.05))}):
+            self.assertFalse(self.fit(**kwargs).cached, kwargs)
+        self.assertEqual(len(self.cache), 9)
+        self.assertTrue(self.fit(per_q=('scale',)).cached)
+        self.assertFalse(fit_model('DeltaTwoLorentz', self.w, self.q,
+                                   self.data, self.error,
+                                   cache=self.cache).cached)
+
+    def test_long_options(self):
+        """ Test that options given as long arrays, whose representation is
+        truncated, give different keys when they differ """
+        spec = get_model('DeltaLorentz')
+        dataset = Dataset(self.w, self.q, self.data, self.error)
+        x_scale = numpy.ones(2000)
+        changed = x_scale.copy()
+        changed[1000] = 2.
+
+        def key(value):
+            return FitCache.key(spec, dataset, self.p0, ('scale',), (), {},
+                                {'x_scale': value})
+
+        self.assertNotEqual(key(x_scale), key(changed))
+        self.assertEqual(key(x_scale), key(list(x_scale)))
+        self.assertNotEqual(key(x_scale), key('jac'))
+
+    def test_eviction(self):
+        """ Test that the results used the least recently are removed """
+        self.fit()
+        size = self.cache.size
+        self.cache.max_size = 2 * size
+        self.fit(p0={'A0': 0.4, 'hwhm': 0.5})
+        first = self.cache.entries()[0][0]
+        os.utime(os.path.join(self.directory.name, first + '.npz'),
+                 (0, 0))
+        # reading the first result makes it the most recently used
+        self.assertTrue(self.fit().cached)
+        self.fit(p0={'A0': 0.3, 'hwhm': 0.5})
+        self.assertEqual(len(self.cache), 2)
+        self.assertIn(first, self.cache)
+        self.assertLessEqual(self.cache.size, self.cache.max_size)
+
+        self.assertEqual(self.cache.clear(), 2)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_corrupted(self):
+        """ Test that an unreadable result is fitted again """
+        self.fit()
+        key = self.cache.entries()[0][0]
+        with open(os.path.join(self.directory.name, key + '.npz'),
+                  'wb') as stream:
+            stream.write(b'partial')
+        self.assertIsNone(self.cache.get(key))
+        self.assertFalse(self.fit().cached)
+        self.assertTrue(self.fit().cached)
+
+        with self.assertRaises(ValueError):
+            FitCache(self.directory.name, max_size=-1)
+
+    def test_command_line(self):
+        """ Test the inspection and the pruning from the command line """
+        self.fit()
+        self.fit(p0={'A0': 0.4, 'hwhm': 0.5})
+
+        def run(*arguments):
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                main(['--directory', self.directory.name] + list(arguments))
+            return output.getvalue()
+
+        self.assertIn('results:   2', run('info'))
+        self.assertEqual(len(run('list').splitlines()), 2)
+        self.assertEqual(run('prune', '--max-size', '1000'),
+                         '0 result(s) removed\n')
+        self.assertEqual(run('prune', '--max-size', '0'),
+                         '2 result(s) removed\n')
+        self.assertEqual(run('clear'), '0 result(s) removed\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,254 @@
+import unittest
+import numpy
+
+import QENSmodels
+from QENSmodels.fitting import Dataset, _Problem, fit_hwhm, fit_iqt, \
+    fit_model, fit_multiresolution, fit_per_q, fit_scan, fit_two_stage, \
+    rebin
+
+
+class TestFitting(unittest.TestCase):
+    """ Tests QENSmodels.fitting """
+
+    def setUp(self):
+        self.w = numpy.linspace(-2, 2, 201)
+        self.q = numpy.array([0.5, 1., 1.5])
+        self.rng = numpy.random.default_rng(0)
+
+    def dataset(self, D, resTime, resolution=None):
+        data = QENSmodels.sqwJumpTranslationalDiffusion(
+            self.w, self.q, 2., 0., D, resTime)
+        if resolution is not None:
+            data = resolution.convolve(data, self.w)
+        data = data + self.rng.normal(0., 0.005, data.shape)
+        error = numpy.full(data.shape, 0.005)
+        return Dataset(self.w, self.q, data, error, resolution)
+
+    def test_fit_model(self):
+        """ Test the fit of a dataset convolved with a resolution """
+        resolution = QENSmodels.Resolution(
+            self.w, QENSmodels.gaussian(self.w, 1., 0., 0.05))
+        dataset = self.dataset(0.3, 1.2, resolution)
+        result = fit_model('JumpTranslationalDiffusion', dataset.w,
+                           dataset.q, dataset.data, dataset.error,
+                           resolution=resolution,
+                           p0={'D': 0.1, 'resTime': 0.5})
+        self.assertTrue(result.success)
+        self.assertAlmostEqual(result.params['D'], 0.3, delta=0.02)
+        self.assertAlmostEqual(result.params['resTime'], 1.2, delta=0.1)
+        self.assertEqual(result.params['scale'].shape, (3,))
+        self.assertEqual(set(result.stderr),
+                         {'scale', 'center', 'D', 'resTime'})
+        self.assertLess(result.redchi, 2.)
+        self.assertEqual(result.best_fit.shape, dataset.data.shape)
+
+    def test_fit_model_fixed(self):
+        """ Test fixed parameters, bounds and masked points """
+        dataset = self.dataset(0.3, 1.2)
+        error = dataset.error.copy()
+        error[:, :10] = 0.
+        result = fit_model('JumpTranslationalDiffusion', dataset.w,
+                           dataset.q, dataset.data, error,
+                           p0={'D': 0.1, 'center': 0.}, per_q=('scale',),
+                           fixed=('center',), bounds={'D': (0., 0.2)})
+        self.assertEqual(result.params['center'], 0.)
+        self.assertNotIn('center', result.stderr)
+        self.assertAlmostEqual(result.params['D'], 0.2)
+
+        with self.assertRaises(ValueError):
+            fit_model('JumpTranslationalDiffusion', self.w, self.q,
+                      dataset.data, p0={'hwhm': 0.1})
+
+        # the starting values are validated when the fit is set up
+        with self.assertRaises(ValueError):
+            fit_model('JumpTranslationalDiffusion', self.w, self.q,
+                      dataset.data, p0={'resTime': -1.})
+
+    def test_jacobian(self):
+        """ Test the derivatives of the residuals, with parameters per q and
+        masked points, against finite differences """
+        dataset = self.dataset(0.3, 1.2)
+        dataset.error[0, :10] = 0.
+        dataset.error[2, 50:] = 0.
+        problem = _Problem(QENSmodels.get_model('DeltaLorentz'), dataset,
+                           {'A0': 0.4, 'hwhm': [0.2, 0.3, 0.4]},
+                           ('scale', 'hwhm'), ('center',), {})
+        x = problem.vector(problem.values)
+        jacobian = problem.jacobian(x)
+        self.assertEqual(jacobian.shape, (int(problem.mask.sum()), 7))
+        for k in range(x.size):
+            step = numpy.zeros(x.size)
+            step[k] = 1e-6
+            numpy.testing.assert_allclose(
+                jacobian[:, k],
+                (problem.residuals(x + step) - problem.residuals(x - step))
+                / 2e-6, rtol=1e-4, atol=1e-4)
+
+    def test_fit_iqt(self):
+        """ Test the fit of an intermediate scattering function multiplied
+        by the transform of the resolution """
+        resolution = QENSmodels.Resolution(
+            self.w, QENSmodels.gaussian(self.w, 1., 0., 0.05))
+        t = numpy.linspace(0., 20., 81)
+        data = QENSmodels.iqtJumpTranslationalDiffusion(
+            t, self.q, 2., 0.3, 1.2) * resolution.fourier(t)
+        data = data + self.rng.normal(0., 0.005, data.shape)
+        error = numpy.full(data.shape, 0.005)
+        result = fit_iqt('JumpTranslationalDiffusion', t, self.q, data,
+                         error, resolution, p0={'D': 0.1, 'resTime': 0.5})
+        self.assertTrue(result.success)
+        self.assertAlmostEqual(result.params['D'], 0.3, delta=0.02)
+        self.assertAlmostEqual(result.params['resTime'], 1.2, delta=0.1)
+        self.assertNotIn('center', result.stderr)
+        self.assertLess(result.redchi, 2.)
+
+        # transform of the resolution given as an array
+        same = fit_iqt('JumpTranslationalDiffusion', t, self.q, data,
+                       error, resolution.fourier(t),
+                       p0={'D': 0.1, 'resTime': 0.5})
+        self.assertAlmostEqual(same.params['D'], result.params['D'])
+
+    def test_rebin(self):
+        """ Test the averages of groups of points, without the masked
+        points and the incomplete last group """
+        data = numpy.arange(14.).reshape(2, 7)
+        error = numpy.ones(data.shape)
+        error[0, :3] = 0.
+        error[1, 0] = 0.
+        w, rebinned, rebinned_error = rebin(numpy.arange(7.), data, error, 3)
+        numpy.testing.assert_array_equal(w, [1., 4.])
+        numpy.testing.assert_array_equal(rebinned, [[0., 4.], [8.5, 11.]])
+        numpy.testing.assert_array_almost_equal(
+            rebinned_error, [[0., 1. / numpy.sqrt(3.)],
+                             [1. / numpy.sqrt(2.), 1. / numpy.sqrt(3.)]])
+
+        with self.assertRaises(ValueError):
+            rebin(numpy.arange(7.), data, factor=8)
+
+    def test_fit_multiresolution(self):
+        """ Test that the coarse levels bring the fit of the full dataset
+        close to its solution """
+        self.w = numpy.linspace(-2, 2, 1601)
+        resolution = QENSmodels.Resolution(
+            self.w, numpy.exp(-self.w ** 2 / (2. * 0.05 ** 2)))
+        dataset = self.dataset(0.3, 1.2, resolution)
+        p0 = {'D': 1., 'resTime': 0.1}
+        results = fit_multiresolution(
+            'JumpTranslationalDiffusion', dataset.w, dataset.q, dataset.data,
+            dataset.error, resolution, p0=p0, per_q=('scale',))
+        self.assertEqual([item.best_fit.shape[1] for item in results],
+                         [100, 400, 1601])
+        self.assertEqual([item.seed for item in results],
+                         ['initial', 'previous', 'previous'])
+
+        full = fit_model('JumpTranslationalDiffusion', dataset.w, dataset.q,
+                         dataset.data, dataset.error, resolution, p0=p0,
+                         per_q=('scale',))
+        self.assertAlmostEqual(results[-1].params['D'], full.params['D'],
+                               places=4)
+        self.assertAlmostEqual(results[-1].params['resTime'],
+                               full.params['resTime'], places=3)
+        self.assertLess(results[-1].nfev, full.nfev)
+
+        # levels with too few points are skipped
+        results = fit_multiresolution(
+            'JumpTranslationalDiffusion', dataset.w, dataset.q, dataset.data,
+            dataset.error, resolution, p0=p0, factors=(1000, 4))
+        self.assertEqual(len(results), 2)
+
+    def test_fit_scan(self):
+        """ Test that warm starts need fewer evaluations than cold starts """
+        datasets = [self.dataset(D, 1.2)
+                    for D in numpy.linspace(0.2, 0.4, 5)]
+        p0 = {'D': 1., 'resTime': 0.1}
+        results = fit_scan('JumpTranslationalDiffusion', datasets, p0=p0,
+                           extrapolate=True)
+        self.assertEqual([item.seed for item in results],
+                         ['initial', 'previous'] + ['extrapolated'] * 3)
+        numpy.testing.assert_allclose(
+            [item.params['D'] for item in results],
+            numpy.linspace(0.2, 0.4, 5), rtol=0.05)
+
+        cold = [fit_model('JumpTranslationalDiffusion', item.w, item.q,
+                          item.data, item.error, p0=p0)
+                for item in datasets]
+        self.assertLess(sum(item.nfev for item in results),
+                        sum(item.nfev for item in cold))
+
+    def test_fit_scan_cold_start(self):
+        """ Test the fallback to a cold start when the chi-square degrades """
+        datasets = [self.dataset(0.3, 1.2), self.dataset(0.3, 1.2)]
+        p0 = {'D': 0.1, 'resTime': 0.5}
+        results = fit_scan('JumpTranslationalDiffusion', datasets, p0=p0)
+        self.assertEqual(results[1].seed, 'previous')
+
+        # any warm start is considered as degraded
+        results = fit_scan('JumpTranslationalDiffusion', datasets, p0=p0,
+                           tolerance=0.)
+        self.assertEqual(results[1].seed, 'cold')
+        self.assertAlmostEqual(results[1].params['D'], 0.3, delta=0.02)
+
+    def test_fit_per_q(self):
+        """ Test the fits of a Lorentzian per q with one resolution per q """
+        resolution = QENSmodels.Resolution(
+            self.w, [QENSmodels.gaussian(self.w, 1., 0., sigma)
+                     for sigma in (0.03, 0.04, 0.05)])
+        dataset = self.dataset(0.3, 1.2, resolution)
+        expected = QENSmodels.hwhmJumpTranslationalDiffusion(
+            self.q, 0.3, 1.2)[0]
+        results = fit_per_q(dataset.w, dataset.q, dataset.data,
+                            dataset.error, resolution)
+        hwhm = [item.params['hwhm'] for item in results]
+        numpy.testing.assert_allclose(hwhm, expected, rtol=0.05)
+        numpy.testing.assert_allclose([item.params['A0'] for item in results],
+                                      0., atol=0.02)
+
+        serial = fit_per_q(dataset.w, dataset.q, dataset.data,
+                           dataset.error, resolution, workers=1)
+        numpy.testing.assert_allclose(
+            [item.params['hwhm'] for item in serial], hwhm)
+
+    def test_fit_hwhm(self):
+        """ Test the fit of the widths as a function of q """
+        q = numpy.linspace(0.3, 1.8, 8)
+        hwhm = QENSmodels.hwhmChudleyElliottDiffusion(q, 0.3, 1.5)[0]
+        result = fit_hwhm('ChudleyElliottDiffusion', q, hwhm,
+                          0.01 * hwhm, p0={'D': 0.1, 'L': 1.})
+        self.assertAlmostEqual(result.params['D'], 0.3, places=3)
+        self.assertAlmostEqual(result.params['L'], 1.5, places=3)
+        numpy.testing.assert_allclose(result.best_fit, hwhm, rtol=1e-4)
+
+        # widths without uncertainty are not fitted
+        result = fit_hwhm('BrownianTranslationalDiffusion', q[:2],
+                          [10., 0.3 * q[1] ** 2], [numpy.inf, 0.01])
+        self.assertAlmostEqual(result.params['D'], 0.3, places=3)
+
+        with self.assertRaises(ValueError):
+            fit_hwhm('WaterTeixeira', q, hwhm)
+
+    def test_fit_two_stage(self):
+        """ Test that the two first stages start the global fit close to
+        its solution """
+        dataset = self.dataset(0.3, 1.2)
+        result = fit_two_stage('JumpTranslationalDiffusion', dataset.w,
+                               dataset.q, dataset.data, dataset.error)
+        self.assertEqual(len(result.per_q), 3)
+        self.assertAlmostEqual(result.hwhm.params['D'], 0.3, delta=0.02)
+        self.assertAlmostEqual(result.hwhm.params['resTime'], 1.2,
+                               delta=0.1)
+        self.assertAlmostEqual(result.global_fit.params['D'], 0.3,
+                               delta=0.02)
+
+        cold = fit_model('JumpTranslationalDiffusion', dataset.w, dataset.q,
+                         dataset.data, dataset.error,
+                         p0={'D': 1., 'resTime': 0.1})
+        self.assertLess(result.global_fit.nfev, cold.nfev)
+
+        result = fit_two_stage('JumpTranslationalDiffusion', dataset.w,
+                               dataset.q, dataset.data, dataset.error,
+                               global_fit=False)
+        self.assertIsNone(result.global_fit)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+import numpy
+
+from QENSmodels.fourier import fourier_transform
+
+
+class TestFourier(unittest.TestCase):
+    """ Tests QENSmodels.fourier """
+
+    def test_fourier_transform(self):
+        """ Test the transform of a Gaussian and its uncertainties """
+        w = numpy.linspace(-5, 5, 1001)
+        t = numpy.linspace(0., 10., 11)
+        sqw = numpy.array([[1.], [2.]]) / numpy.sqrt(2. * numpy.pi) / 0.2 \
+            * numpy.exp(-(w - 0.3) ** 2 / (2. * 0.2 ** 2))
+        error = numpy.full(sqw.shape, 0.1)
+        iqt, iqt_error = fourier_transform(w, sqw, t, error)
+        self.assertEqual(iqt.shape, (2, t.size))
+        # shifted Gaussian: real part of the transform
+        expected = numpy.exp(-(0.2 * t) ** 2 / 2.) * numpy.cos(0.3 * t)
+        numpy.testing.assert_array_almost_equal(iqt, [expected,
+                                                      2. * expected])
+
+        # at t = 0, the transform is the sum of the points
+        dw = w[1] - w[0]
+        self.assertAlmostEqual(
+            iqt_error[0, 0],
+            0.1 * dw * numpy.sqrt(w.size - 2 + 2 * 0.5 ** 2))
+
+        with self.assertRaises(ValueError):
+            fourier_transform(w[1:], sqw, t)
+
+
+if __name__ == '__main__':
+    unittest.main()
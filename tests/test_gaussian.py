@@ -3,6 +3,7 @@ import sys
 import unittest
 import numpy
 from os.path import join as pjn
+from scipy.stats import norm
 
 import QENSmodels
 
@@ -40,6 +41,28 @@ class TestGaussian(unittest.TestCase):
             QENSmodels.gaussian(x, 0.3, 0.4, 0.0),
             QENSmodels.delta(x, 0.3, 0.4))
 
+    def test_binned(self):
+        """ Test the integration over bins of any width """
+        edges = numpy.linspace(-5., 5., 11)
+        for sigma in (1e-6, 0.3, 1.):
+            model = QENSmodels.gaussian(edges, 2., 0.25, sigma, binned=True)
+            self.assertEqual(model.shape, (10,))
+            expected = 2. * norm.cdf(5., 0.25, sigma) \
+                - 2. * norm.cdf(-5., 0.25, sigma)
+            self.assertAlmostEqual(model @ numpy.diff(edges), expected,
+                                   places=12)
+
+        # accurate far in the tails
+        tail = norm.sf(10.) - norm.sf(11.)
+        model = QENSmodels.gaussian([10., 11.], 1., 0., 1., binned=True)
+        self.assertAlmostEqual(model[0] / tail, 1., places=9)
+        model = QENSmodels.gaussian([-11., -10.], 1., 0., 1., binned=True)
+        self.assertAlmostEqual(model[0] / tail, 1., places=9)
+
+        numpy.testing.assert_array_equal(
+            QENSmodels.gaussian(edges, 0.3, 0.4, 0., binned=True),
+            QENSmodels.delta(edges, 0.3, 0.4, binned=True))
+
     def test_reference_data(self):
         """ Test output values in comparison with reference data
         (file in 'reference data' folder)
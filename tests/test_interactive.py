@@ -0,0 +1,116 @@
+import asyncio
+import unittest
+import numpy
+
+from QENSmodels.interactive import AsyncEvaluator
+from QENSmodels.models import get_model
+
+
+class TestInteractive(unittest.TestCase):
+    """ Tests QENSmodels.interactive """
+
+    def setUp(self):
+        self.w = numpy.linspace(-2, 2, 401)
+        self.q = numpy.array([0.5, 1., 1.5])
+        self.results = []
+
+    def callback(self, w, model, final):
+        self.results.append((w, model, final))
+
+    def evaluator(self, **kwargs):
+        return AsyncEvaluator('JumpTranslationalDiffusion', self.w, self.q,
+                              self.callback, **kwargs)
+
+    def test_debounce(self):
+        """ Test that only the last of many requests is computed, with a
+        preview on a subsampled grid """
+        async def run():
+            evaluator = self.evaluator(resTime=0.5)
+            for D in numpy.linspace(0.1, 0.5, 10):
+                evaluator.update(D=D)
+            model = await evaluator.wait()
+            evaluator.close()
+            return evaluator, model
+
+        evaluator, model = asyncio.run(run())
+        self.assertEqual(evaluator.evaluations, 2)
+        self.assertEqual(evaluator.params['D'], 0.5)
+        self.assertEqual([item[2] for item in self.results], [False, True])
+
+        expected = get_model('JumpTranslationalDiffusion').evaluate(
+            self.w, self.q, D=0.5, resTime=0.5)
+        numpy.testing.assert_array_equal(model, expected)
+        numpy.testing.assert_array_equal(self.results[1][1], expected)
+        numpy.testing.assert_array_equal(self.results[0][0], self.w[::8])
+        numpy.testing.assert_array_equal(self.results[0][1],
+                                         expected[:, ::8])
+
+    def test_cancel(self):
+        """ Test that a request superseded after its preview does not give
+        its full result """
+        requests = []
+
+        def callback(w, model, final):
+            self.callback(w, model, final)
+            # new values while the first request computes the full model
+            if len(requests) == 1:
+                requests.append(evaluator.update(D=0.2))
+
+        async def run():
+            nonlocal evaluator
+            evaluator = AsyncEvaluator('JumpTranslationalDiffusion', self.w,
+                                       self.q, callback, delay=0.)
+            requests.append(evaluator.update(D=0.1))
+            await evaluator.wait()
+            evaluator.close()
+
+        evaluator = None
+        asyncio.run(run())
+        self.assertTrue(requests[0].cancelled())
+        self.assertEqual([item[2] for item in self.results],
+                         [False, False, True])
+
+    def test_close(self):
+        """ Test that waiting for a request cancelled by close gives None """
+        async def run():
+            evaluator = self.evaluator()
+            evaluator.update(D=0.3)
+            evaluator.close()
+            return await evaluator.wait()
+
+        self.assertIsNone(asyncio.run(run()))
+        self.assertEqual(self.results, [])
+
+    def test_no_preview(self):
+        """ Test the evaluation without preview """
+        async def run():
+            evaluator = self.evaluator(delay=0., preview=1)
+            evaluator.update(D=0.3)
+            await evaluator.wait()
+            evaluator.close()
+
+        asyncio.run(run())
+        self.assertEqual(len(self.results), 1)
+        self.assertEqual(self.results[0][1].shape, (3, 401))
+
+    def test_validation(self):
+        """ Test that invalid values are rejected when requested """
+        async def run():
+            evaluator = self.evaluator()
+            with self.assertRaises(ValueError):
+                evaluator.update(D=-1.)
+            with self.assertRaises(ValueError):
+                evaluator.update(hwhm=1.)
+            self.assertIsNone(await evaluator.wait())
+            evaluator.close()
+
+        asyncio.run(run())
+
+        with self.assertRaises(ValueError):
+            self.evaluator(delay=-1.)
+        with self.assertRaises(ValueError):
+            self.evaluator(preview=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
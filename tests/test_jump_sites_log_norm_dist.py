@@ -133,6 +133,59 @@ class TestJumpsSitesLogNorm(unittest.TestCase):
         self.assertEqual(output.size, 6)
         self.assertEqual(output.shape, (2, 3))
 
+    def test_iqt(self):
+        """ Test that the intermediate scattering function is the sum of
+        the EISF and of exponential decays given by
+        componentsJumpSitesLogNormDist
+        """
+        t = numpy.linspace(0, 10, 101)
+        q = [0.3, 0.7]
+        hwhm, eisf, qisf = QENSmodels.componentsJumpSitesLogNormDist(
+            q, 7, 5, 2, 0.6)
+        expected = [
+            2. * (eisf[i] + sum(weight * numpy.exp(-width * t)
+                                for weight, width in zip(qisf[i], hwhm[i])))
+            for i in range(len(q))
+        ]
+        numpy.testing.assert_array_almost_equal(
+            QENSmodels.iqtJumpSitesLogNormDist(t, q, 2., 7, 5, 2, 0.6),
+            expected,
+            decimal=12)
+
+    def test_gauss_hermite(self):
+        """ Test the Gauss-Hermite quadrature of the distribution against
+        the equally spaced sampling """
+        q = [0.5, 1., 1.5]
+        hwhm, eisf, qisf = QENSmodels.hwhmJumpSitesLogNormDist(
+            q, 4, 1., 1., 1., Nnodes=7)
+        self.assertEqual(hwhm.shape, (3, 4, 7))
+        self.assertEqual(qisf.shape, (3, 3, 7))
+        hwhm_equiv, eisf_equiv, qisf_equiv = \
+            QENSmodels.hwhmEquivalentSitesCircle(q, 4, 1., 1.)
+        numpy.testing.assert_array_equal(eisf, eisf_equiv)
+        numpy.testing.assert_array_almost_equal(qisf.sum(axis=-1),
+                                                qisf_equiv[:, :3])
+        # geometric mean of the widths
+        numpy.testing.assert_array_almost_equal(
+            numpy.exp(numpy.log(hwhm[:, 1:]) @ numpy.ones(7) / 7.),
+            hwhm_equiv[:, 1:], decimal=6)
+
+        # error on the quasielastic part, compared with a quadrature of
+        # high order
+        w = numpy.linspace(-5, 5, 1001)
+        errors = []
+        reference = QENSmodels.sqwJumpSitesLogNormDist(
+            w, q, 1., 0., 4, 1., 1., 1., 101)
+        for Nnodes in (0, 5, 7):
+            model = QENSmodels.sqwJumpSitesLogNormDist(
+                w, q, 1., 0., 4, 1., 1., 1., Nnodes)
+            errors.append(numpy.abs(model - reference).max())
+        self.assertLess(errors[1], errors[0])
+        self.assertLess(errors[2], errors[1])
+
+        with self.assertRaises(ValueError):
+            QENSmodels.hwhmJumpSitesLogNormDist(1., Nnodes=-1)
+
     def test_reference_data(self):
         """ Test output values in comparison with reference data
         (file in 'reference data' folder)
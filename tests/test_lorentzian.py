@@ -37,6 +37,30 @@ class TestLorentzian(unittest.TestCase):
             QENSmodels.lorentzian(x, 0.3, 0.4, 0.0),
             QENSmodels.delta(x, 0.3, 0.4))
 
+    def test_binned(self):
+        """ Test the integration over bins of any width """
+        edges = numpy.linspace(-5., 5., 11)
+        for hwhm in (1e-6, 0.3, 2.):
+            model = QENSmodels.lorentzian(edges, 2., 0.25, hwhm, binned=True)
+            self.assertEqual(model.shape, (10,))
+            expected = 2. / numpy.pi * (numpy.arctan((5. - 0.25) / hwhm)
+                                        - numpy.arctan((-5. - 0.25) / hwhm))
+            self.assertAlmostEqual(model @ numpy.diff(edges), expected,
+                                   places=12)
+
+        # accurate far in the tails
+        model = QENSmodels.lorentzian([1e6, 1e6 + 1.], 1., 0., 1.,
+                                      binned=True)
+        self.assertAlmostEqual(model[0] / (1. / numpy.pi / 1e12 / (1. + 1e-6)),
+                               1., places=9)
+
+        numpy.testing.assert_array_equal(
+            QENSmodels.lorentzian(edges, 0.3, 0.4, 0., binned=True),
+            QENSmodels.delta(edges, 0.3, 0.4, binned=True))
+
+        with self.assertRaises(ValueError):
+            QENSmodels.lorentzian([0., 2., 1.], binned=True)
+
     def test_reference_data(self):
         """ Test output values in comparison with reference data
         (file in 'reference data' folder)
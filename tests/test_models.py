@@ -0,0 +1,280 @@
+import unittest
+import numpy
+
+import QENSmodels
+from QENSmodels.models import MODELS, ParameterVector, get_model
+
+# values of the parameters other than their defaults
+PARAMS = {
+    'DeltaLorentz': dict(A0=0.3, hwhm=0.2),
+    'DeltaTwoLorentz': dict(A0=0.3, A1=0.4, hwhm1=0.02, hwhm2=0.3),
+}
+
+
+class TestModels(unittest.TestCase):
+    """ Tests QENSmodels.models registry """
+
+    def setUp(self):
+        self.w = numpy.linspace(-2, 2, 401)
+        self.q = numpy.array([0.6, 1., 1.4])
+
+    def params(self, spec):
+        params = dict(spec.defaults, scale=2., center=0.05)
+        params.update(PARAMS.get(spec.name, {}))
+        return params
+
+    def test_get_model(self):
+        """ Test the lookup of the models """
+        spec = get_model('BrownianTranslationalDiffusion')
+        self.assertIs(get_model('sqwBrownianTranslationalDiffusion'), spec)
+        self.assertIs(
+            get_model(QENSmodels.sqwBrownianTranslationalDiffusion), spec)
+        self.assertIs(get_model(spec), spec)
+        self.assertEqual(spec.param_names, ('scale', 'center', 'D'))
+
+        with self.assertRaises(ValueError):
+            get_model('lorentzian')
+
+        with self.assertRaises(ValueError):
+            spec.evaluate(self.w, self.q, hwhm=0.1)
+
+    def test_evaluate(self):
+        """ Test the vectorized evaluation against the sqw functions """
+        for spec in MODELS.values():
+            params = self.params(spec)
+            expected = spec.sqw(self.w, self.q, **params)
+            # some sqw functions compute their widths in single precision
+            numpy.testing.assert_array_almost_equal(
+                spec.evaluate(self.w, self.q, **params), expected,
+                decimal=5, err_msg=spec.name)
+
+    def test_components(self):
+        """ Test that each model is the sum of a delta and of Lorentzians
+        given by its components function """
+        for spec in MODELS.values():
+            params = self.params(spec)
+            hwhm, eisf, qisf = spec.components(
+                self.q, **{name: params[name] for name in spec.parameters})
+            expected = [
+                eisf[i] * QENSmodels.delta(self.w, params['scale'],
+                                           params['center'])
+                + sum(QENSmodels.lorentzian(self.w, params['scale'] * weight,
+                                            params['center'], width)
+                      for weight, width in zip(qisf[i], hwhm[i]))
+                for i in range(self.q.size)
+            ]
+            # the widths of some models are computed in single precision
+            numpy.testing.assert_array_almost_equal(
+                spec.sqw(self.w, self.q, **params), expected, decimal=6,
+                err_msg=spec.name)
+
+    def test_evaluate_resolution(self):
+        """ Test the models and their derivatives built from the convolved
+        Lorentzians cached by the resolution against the convolution of
+        the models """
+        x = numpy.linspace(-3, 3, 601)
+        resolution = QENSmodels.Resolution(x, numpy.exp(-x ** 2 / 0.01))
+        center = numpy.array([0.05, 0., -0.05])
+        for spec in MODELS.values():
+            params = dict(self.params(spec), center=center)
+            for _ in range(2):
+                # the second evaluation uses the cached Lorentzians
+                numpy.testing.assert_array_almost_equal(
+                    spec.evaluate(self.w, self.q, resolution=resolution,
+                                  temperature=300., **params),
+                    resolution.convolve(spec.evaluate(
+                        self.w, self.q, temperature=300., **params),
+                        self.w),
+                    decimal=12, err_msg=spec.name)
+                numpy.testing.assert_array_almost_equal(
+                    spec.jacobian(self.w, self.q, resolution=resolution,
+                                  **params),
+                    resolution.convolve(
+                        spec.jacobian(self.w, self.q, **params), self.w),
+                    decimal=12, err_msg=spec.name)
+
+        # changing amplitudes only does not add convolved Lorentzians
+        spec = get_model('DeltaTwoLorentz')
+        params = self.params(spec)
+        spec.evaluate(self.w, self.q, resolution=resolution, **params)
+        number_bases = len(resolution._bases)
+        self.assertGreater(number_bases, 0)
+        expected = resolution.convolve(
+            spec.evaluate(self.w, self.q, **dict(params, A0=0.1, A1=0.5)),
+            self.w)
+        numpy.testing.assert_array_almost_equal(
+            spec.evaluate(self.w, self.q, resolution=resolution,
+                          **dict(params, A0=0.1, A1=0.5)),
+            expected, decimal=10)
+        self.assertEqual(len(resolution._bases), number_bases)
+
+    def test_evaluate_binned(self):
+        """ Test that the binned model on a coarse grid has the area of the
+        model sampled on a fine grid """
+        edges = numpy.linspace(-2, 2, 21)
+        for spec in MODELS.values():
+            params = self.params(spec)
+            binned = spec.evaluate(edges, self.q, binned=True, **params)
+            self.assertEqual(binned.shape, (3, 20))
+            fine = spec.evaluate(self.w, self.q, **params)
+            numpy.testing.assert_array_almost_equal(
+                binned @ numpy.diff(edges), numpy.trapz(fine, self.w),
+                decimal=3, err_msg=spec.name)
+
+        # parameters given per q
+        spec = get_model('DeltaLorentz')
+        binned = spec.evaluate(edges, self.q, binned=True, A0=0.3,
+                               hwhm=[0.1, 0.2, 0.3])
+        for i, hwhm in enumerate((0.1, 0.2, 0.3)):
+            numpy.testing.assert_array_almost_equal(
+                binned[i], spec.evaluate(edges, self.q[i], binned=True,
+                                         A0=0.3, hwhm=hwhm)[0])
+
+    def test_evaluate_vector(self):
+        """ Test the evaluation with a flat vector of parameters """
+        for spec in MODELS.values():
+            params = self.params(spec)
+            vector = ParameterVector(spec, **params)
+            self.assertEqual(len(vector), len(spec.param_names))
+            numpy.testing.assert_array_equal(
+                spec.evaluate_vector(self.w, self.q, vector),
+                spec.evaluate(self.w, self.q, **params), err_msg=spec.name)
+            numpy.testing.assert_array_equal(
+                spec.jacobian_vector(self.w, self.q, vector.values),
+                spec.jacobian(self.w, self.q, **params), err_msg=spec.name)
+
+        spec = get_model('EquivalentSitesCircle')
+        vector = spec.vector(Nsites=4.4)
+        self.assertEqual(vector.as_dict()['Nsites'], 4)
+        numpy.testing.assert_array_equal(
+            spec.evaluate_vector(self.w, self.q, vector),
+            spec.evaluate(self.w, self.q, Nsites=4))
+
+        with self.assertRaises(ValueError):
+            spec.evaluate_vector(self.w, self.q, [1., 0.])
+        with self.assertRaises(ValueError):
+            spec.vector(hwhm=0.1)
+        with self.assertRaises(AttributeError):
+            vector.other = 1.
+
+    def test_validate(self):
+        """ Test the validation of the parameters, once for the evaluations
+        without checks """
+        for spec in MODELS.values():
+            params = self.params(spec)
+            spec.validate(self.q, **params)
+            numpy.testing.assert_array_equal(
+                spec.evaluate(self.w, self.q, check=False, **params),
+                spec.evaluate(self.w, self.q, **params), err_msg=spec.name)
+
+        spec = get_model('DeltaLorentz')
+        spec.validate(self.q, A0=[0.1, 0.2, 0.3])
+        with self.assertRaises(ValueError):
+            spec.validate(self.q, A0=[0.1, 1.2, 0.3])
+        with self.assertRaises(ValueError):
+            spec.validate(self.q, A0=[0.1, 0.2])
+        with self.assertRaises(ValueError):
+            spec.validate(self.q, scale=[1., 2.])
+        with self.assertRaises(ValueError):
+            get_model('EquivalentSitesCircle').validate(self.q, Nsites=1)
+
+    def test_parameter_vector_bounds(self):
+        """ Test the bounds and the unbounded variables """
+        vector = ParameterVector('DeltaLorentz', [2., -0.1, 1.5, -1.])
+        numpy.testing.assert_array_equal(vector.lower,
+                                         [0., -numpy.inf, 0., 0.])
+        numpy.testing.assert_array_equal(vector.upper,
+                                         [numpy.inf, numpy.inf, 1.,
+                                          numpy.inf])
+        copy = vector.copy().clip()
+        numpy.testing.assert_array_equal(copy.values, [2., -0.1, 1., 0.])
+        self.assertEqual(vector['A0'], 1.5)
+
+        # any unbounded variables give parameters inside the bounds
+        unbounded = numpy.array([-3., 0.5, 10., 0.2])
+        vector = ParameterVector.from_unbounded('DeltaLorentz', unbounded)
+        self.assertTrue(numpy.all(vector.values >= vector.lower))
+        self.assertTrue(numpy.all(vector.values <= vector.upper))
+        numpy.testing.assert_array_almost_equal(
+            ParameterVector.from_unbounded(
+                'DeltaLorentz', vector.to_unbounded()).values,
+            vector.values, decimal=12)
+
+    def test_jacobian(self):
+        """ Test the derivatives against finite differences """
+        for spec in MODELS.values():
+            params = self.params(spec)
+            jacobian = spec.jacobian(self.w, self.q, **params)
+            self.assertEqual(jacobian.shape,
+                             (len(spec.param_names), 3, self.w.size))
+            for k, name in enumerate(spec.param_names):
+                if name in spec.integer:
+                    numpy.testing.assert_array_equal(jacobian[k], 0.)
+                    continue
+                # the widths of some models are computed in single precision
+                step = 1e-2 * (abs(params[name]) or 1.)
+                upper = spec.evaluate(self.w, self.q,
+                                      **dict(params, **{name: params[name]
+                                                        + step}))
+                lower = spec.evaluate(self.w, self.q,
+                                      **dict(params, **{name: params[name]
+                                                        - step}))
+                expected = (upper - lower) / (2. * step)
+                error = numpy.abs(jacobian[k] - expected).max()
+                self.assertLess(error, 1e-2 * numpy.abs(expected).max(),
+                                msg='{} {}'.format(spec.name, name))
+
+    def test_jacobian_at_limit(self):
+        """ Test one-sided differences at the limit of a parameter """
+        spec = get_model('DeltaLorentz')
+        jacobian = spec.jacobian(self.w, self.q, A0=1., hwhm=0.2)
+        expected = QENSmodels.delta(self.w) \
+            - QENSmodels.lorentzian(self.w, hwhm=0.2)
+        numpy.testing.assert_array_almost_equal(
+            jacobian[2], numpy.tile(expected, (self.q.size, 1)), decimal=8)
+
+    def test_evaluate_iqt(self):
+        """ Test the intermediate scattering functions against the iqt
+        functions and the Fourier transform of the models """
+        t = numpy.linspace(0., 5., 11)
+        w = numpy.linspace(-200., 200., 200001)
+        for spec in MODELS.values():
+            params = dict(self.params(spec), center=0.)
+            iqt = spec.evaluate_iqt(t, self.q, **params)
+            iqt_function = getattr(QENSmodels, 'iqt' + spec.name)
+            del params['center']
+            numpy.testing.assert_array_almost_equal(
+                iqt, iqt_function(t, self.q, **params), decimal=12,
+                err_msg=spec.name)
+            # the Lorentzians are truncated by the energy range
+            numpy.testing.assert_allclose(
+                QENSmodels.fourier_transform(
+                    w, spec.evaluate(w, self.q, **params), t),
+                iqt, atol=2e-2, err_msg=spec.name)
+
+    def test_jacobian_iqt(self):
+        """ Test the derivatives of the intermediate scattering functions
+        against finite differences """
+        t = numpy.linspace(0., 5., 11)
+        for spec in MODELS.values():
+            params = self.params(spec)
+            jacobian = spec.jacobian_iqt(t, self.q, **params)
+            self.assertEqual(jacobian.shape,
+                             (len(spec.param_names), 3, t.size))
+            numpy.testing.assert_array_equal(jacobian[1], 0.)
+            for k, name in enumerate(spec.param_names):
+                if name in spec.integer or name == 'center':
+                    continue
+                step = 1e-2 * (abs(params[name]) or 1.)
+                upper = spec.evaluate_iqt(
+                    t, self.q, **dict(params, **{name: params[name] + step}))
+                lower = spec.evaluate_iqt(
+                    t, self.q, **dict(params, **{name: params[name] - step}))
+                expected = (upper - lower) / (2. * step)
+                error = numpy.abs(jacobian[k] - expected).max()
+                self.assertLessEqual(error, 1e-2 * numpy.abs(expected).max(),
+                                     msg='{} {}'.format(spec.name, name))
+
+
+if __name__ == '__main__':
+    unittest.main()
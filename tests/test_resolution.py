@@ -0,0 +1,183 @@
+import os
+import sys
+import unittest
+import numpy
+from os.path import join as pjn
+
+import QENSmodels
+
+# resolve path to example data
+this_module_path = sys.modules[__name__].__file__
+data_dir = pjn(os.path.dirname(this_module_path),
+               '..', 'docs', 'examples', 'data')
+
+
+class TestResolution(unittest.TestCase):
+    """ Tests QENSmodels.Resolution class """
+
+    def setUp(self):
+        self.x = numpy.linspace(-1, 1, 401)
+        self.y = numpy.exp(-(self.x - 0.05) ** 2 / 0.01)
+        self.w = numpy.linspace(-0.8, 0.8, 161)
+
+    def test_normalization_and_centering(self):
+        """ Test that the resolution has unit area and is centered """
+        res = QENSmodels.Resolution(self.x, self.y)
+        self.assertAlmostEqual(res.peak_center[0], 0.05, places=6)
+        values = res.evaluate(self.w)
+        self.assertAlmostEqual(numpy.trapz(values, self.w), 1., places=6)
+        self.assertEqual(numpy.argmax(values), 80)
+
+    def test_outside_tabulated_range(self):
+        """ Test that the resolution is zero outside the tabulated data """
+        res = QENSmodels.Resolution(self.x, self.y)
+        numpy.testing.assert_array_equal(res.evaluate([-5., 5.]), [0., 0.])
+
+    def test_convolve_delta(self):
+        """ Test that the convolution with a delta gives the resolution """
+        res = QENSmodels.Resolution(self.x, self.y)
+        convolved = res.convolve(QENSmodels.delta(self.w, 1, 0), self.w)
+        numpy.testing.assert_array_almost_equal(convolved,
+                                                res.evaluate(self.w),
+                                                decimal=12)
+
+    def test_convolve_direct_sum(self):
+        """ Test the convolution against a direct computation """
+        res = QENSmodels.Resolution(self.x, self.y)
+        model = QENSmodels.lorentzian(self.w, 1, 0.1, 0.1)
+        dw = self.w[1] - self.w[0]
+        expected = numpy.array([
+            numpy.sum(model * res.evaluate(item - self.w)) * dw
+            for item in self.w
+        ])
+        numpy.testing.assert_array_almost_equal(res.convolve(model, self.w),
+                                                expected,
+                                                decimal=12)
+
+    def test_several_spectra(self):
+        """ Test the convolution of each q with its own resolution """
+        res = QENSmodels.Resolution(self.x,
+                                    numpy.vstack([self.y, self.y ** 2]))
+        res0 = QENSmodels.Resolution(self.x, self.y ** 2)
+        model = numpy.vstack([QENSmodels.lorentzian(self.w, 1, 0, 0.1),
+                              QENSmodels.lorentzian(self.w, 1, 0, 0.2)])
+        convolved = res.convolve(model, self.w)
+        self.assertEqual(convolved.shape, (2, self.w.size))
+        numpy.testing.assert_array_almost_equal(
+            convolved[1], res0.convolve(model[1], self.w), decimal=12)
+
+    def test_fourier(self):
+        """ Test the Fourier transform of a Gaussian resolution """
+        res = QENSmodels.Resolution(self.x, numpy.vstack([self.y,
+                                                          self.y ** 2]))
+        t = numpy.linspace(0., 30., 7)
+        # variances of exp(-x^2/0.01) and of its square
+        expected = numpy.exp(-numpy.outer([0.005, 0.0025], t ** 2) / 2.)
+        numpy.testing.assert_array_almost_equal(res.fourier(t), expected,
+                                                decimal=6)
+        self.assertEqual(res.spectrum(0).fourier(t).shape, t.shape)
+
+    def test_convolve_components(self):
+        """ Test the convolution of a model built from cached convolved
+        deltas and Lorentzians """
+        res = QENSmodels.Resolution(self.x, self.y)
+        q = [0.5, 1.]
+        components = QENSmodels.componentsDeltaTwoLorentz(
+            q, [0.2, 0.1], 0.3, 0.05, 0.3)
+        expected = res.convolve(
+            QENSmodels.sqwDeltaTwoLorentz(self.w, q, 2., 0.1, [0.2, 0.1],
+                                          0.3, 0.05, 0.3), self.w)
+        numpy.testing.assert_array_almost_equal(
+            res.convolve_components(self.w, *components, scale=2.,
+                                    center=0.1),
+            expected,
+            decimal=12)
+
+        # changing amplitudes only does not add convolved Lorentzians
+        number_bases = len(res._bases)
+        components = QENSmodels.componentsDeltaTwoLorentz(
+            q, [0.4, 0.3], 0.1, 0.05, 0.3)
+        expected = res.convolve(
+            QENSmodels.sqwDeltaTwoLorentz(self.w, q, 3., 0.1, [0.4, 0.3],
+                                          0.1, 0.05, 0.3), self.w)
+        numpy.testing.assert_array_almost_equal(
+            res.convolve_components(self.w, *components, scale=3.,
+                                    center=0.1),
+            expected,
+            decimal=12)
+        self.assertEqual(len(res._bases), number_bases)
+
+    def test_convolve_components_per_q(self):
+        """ Test the scales and centers given per q """
+        res = QENSmodels.Resolution(self.x, self.y)
+        q = [0.5, 1.]
+        components = QENSmodels.componentsDeltaLorentz(q, 0.3, [0.05, 0.1])
+        expected = res.convolve(
+            [QENSmodels.sqwDeltaLorentz(self.w, q[i], scale, center, 0.3,
+                                        components[0][i, 0])
+             for i, (scale, center) in enumerate(((2., 0.1), (3., -0.1)))],
+            self.w)
+        numpy.testing.assert_array_almost_equal(
+            res.convolve_components(self.w, *components, scale=[2., 3.],
+                                    center=[0.1, -0.1]),
+            expected,
+            decimal=12)
+
+        with self.assertRaises(ValueError):
+            res.convolve_components(self.w, *components,
+                                    center=[0.1, 0., -0.1])
+
+    def test_convolve_components_cache_size(self):
+        """ Test that the cache keeps the convolved Lorentzians of a model
+        with many of them """
+        res = QENSmodels.Resolution(self.x, self.y)
+        q = numpy.linspace(0.3, 1.5, 20)
+        center = numpy.linspace(-0.1, 0.1, 20)
+        components = QENSmodels.componentsJumpSitesLogNormDist(
+            q, 3, 1.5, 1., 0.5)
+        res.convolve_components(self.w, *components, center=center)
+        bases = dict(res._bases._data)
+        self.assertGreater(len(bases), 512)
+        # no convolved Lorentzian is evicted and computed again
+        res.convolve_components(self.w, *components, scale=2.,
+                                center=center)
+        for key, basis in bases.items():
+            self.assertIs(res._bases.get(key), basis)
+
+    def test_convolve_components_several_spectra(self):
+        """ Test that each q is convolved with its own spectrum """
+        res = QENSmodels.Resolution(self.x,
+                                    numpy.vstack([self.y, self.y ** 2]))
+        q = [0.5, 1.]
+        components = QENSmodels.componentsBrownianTranslationalDiffusion(
+            q, 0.2)
+        expected = res.convolve(
+            QENSmodels.sqwBrownianTranslationalDiffusion(self.w, q, D=0.2),
+            self.w)
+        # the widths of this model are computed in single precision
+        numpy.testing.assert_array_almost_equal(
+            res.convolve_components(self.w, *components),
+            expected,
+            decimal=6)
+
+        with self.assertRaises(ValueError):
+            res.convolve_components(
+                self.w,
+                *QENSmodels.componentsBrownianTranslationalDiffusion(0.5))
+
+    def test_non_uniform_grid(self):
+        """ Test that convolution on a non-uniform grid raises an error """
+        res = QENSmodels.Resolution(self.x, self.y)
+        w = self.w ** 3
+        with self.assertRaises(ValueError):
+            res.convolve(numpy.ones(w.size), w)
+
+    def test_from_file(self):
+        """ Test loading of tabulated data """
+        res = QENSmodels.Resolution.from_file(pjn(data_dir, 'irf_iris.dat'))
+        w = numpy.linspace(-0.5, 0.5, 1001)
+        self.assertAlmostEqual(numpy.trapz(res.evaluate(w), w), 1., places=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import sys
+import unittest
+import numpy
+
+import QENSmodels
+from QENSmodels.selection import compare_models
+
+
+class TestSelection(unittest.TestCase):
+    """ Tests QENSmodels.selection """
+
+    def setUp(self):
+        self.w = numpy.linspace(-2, 2, 401)
+        self.q = numpy.linspace(0.4, 1.6, 4)
+        rng = numpy.random.default_rng(0)
+        self.data = QENSmodels.sqwJumpTranslationalDiffusion(
+            self.w, self.q, 1., 0., 0.3, 1.)
+        self.data += rng.normal(0., 0.002, self.data.shape)
+        self.error = numpy.full(self.data.shape, 0.002)
+        self.models = ['BrownianTranslationalDiffusion',
+                       'JumpTranslationalDiffusion',
+                       'IsotropicRotationalDiffusion']
+
+    @unittest.skipIf(sys.version_info < (3, 8),
+                     'several processes need Python 3.8 or later')
+    def test_ranking(self):
+        """ Test the ranking and the criteria of the candidates fitted in
+        several processes """
+        ranking = compare_models(self.models, self.w, self.q, self.data,
+                                 self.error, stop_ratio=None, workers=2)
+        self.assertEqual([item.model for item in ranking],
+                         ['JumpTranslationalDiffusion',
+                          'BrownianTranslationalDiffusion',
+                          'IsotropicRotationalDiffusion'])
+        best = ranking[0]
+        self.assertAlmostEqual(best.fit.params['D'], 0.3, delta=0.01)
+        self.assertLess(best.fit.redchi, 1.2)
+        # scale and center per q, and D and resTime
+        self.assertEqual(best.n_params, 10)
+        self.assertEqual(best.n_points, self.data.size)
+        self.assertAlmostEqual(best.aic, best.chisq + 20.)
+        self.assertAlmostEqual(best.bic,
+                               best.chisq + 10. * numpy.log(self.data.size))
+
+        serial = compare_models(self.models, self.w, self.q, self.data,
+                                self.error, stop_ratio=None, workers=1)
+        for result, expected in zip(ranking, serial):
+            self.assertEqual(result.model, expected.model)
+            self.assertAlmostEqual(result.chisq, expected.chisq)
+
+    def test_early_stopping(self):
+        """ Test that the candidates clearly worse than a fitted one are
+        abandoned """
+        models = ['JumpTranslationalDiffusion',
+                  'IsotropicRotationalDiffusion']
+        complete = compare_models(models, self.w, self.q, self.data,
+                                  self.error, stop_ratio=None, workers=1)
+        stopped = compare_models(models, self.w, self.q, self.data,
+                                 self.error, patience=5, workers=1)
+        self.assertFalse(stopped[0].stopped)
+        self.assertTrue(stopped[1].stopped)
+        self.assertIsNone(stopped[1].fit)
+        self.assertEqual(stopped[1].nfev, 5)
+        self.assertLess(stopped[1].nfev, complete[1].nfev)
+        self.assertGreater(stopped[1].chisq, 2. * stopped[0].bic)
+
+    def test_defaults_warning(self):
+        """ Test the warning for the candidates starting from the default
+        values of their parameters """
+        models = ['JumpTranslationalDiffusion', 'WaterTeixeira']
+        with self.assertWarnsRegex(UserWarning, 'radius, DR of '
+                                                'WaterTeixeira'):
+            compare_models(models, self.w, self.q, self.data, self.error,
+                           p0={'WaterTeixeira': {'D': 0.3, 'resTime': 1.}},
+                           workers=1)
+
+    def test_errors(self):
+        """ Test the candidates which cannot be fitted and the invalid
+        arguments """
+        ranking = compare_models(
+            self.models[:2], self.w, self.q, self.data, self.error,
+            p0={'JumpTranslationalDiffusion': {'resTime': -1.}}, workers=1)
+        self.assertEqual(ranking[0].model, 'BrownianTranslationalDiffusion')
+        self.assertIsNotNone(ranking[1].error)
+        self.assertIsNone(ranking[1].fit)
+
+        with self.assertRaises(ValueError):
+            compare_models(self.models, self.w, self.q, self.data,
+                           criterion='redchi')
+        with self.assertRaises(ValueError):
+            compare_models(self.models, self.w, self.q, self.data,
+                           p0={'DeltaLorentz': {'A0': 0.5}})
+        with self.assertRaises(ValueError):
+            compare_models(self.models, self.w, self.q, self.data,
+                           stop_ratio=0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
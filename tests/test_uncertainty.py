@@ -0,0 +1,88 @@
+import unittest
+import numpy
+
+import QENSmodels
+from QENSmodels.uncertainty import bootstrap, evaluate_batch, \
+    posterior_predictive
+
+
+class TestUncertainty(unittest.TestCase):
+    """ Tests QENSmodels.uncertainty """
+
+    def setUp(self):
+        self.w = numpy.linspace(-2, 2, 201)
+        self.q = numpy.array([0.5, 1., 1.5])
+        self.rng = numpy.random.default_rng(0)
+
+    def test_evaluate_batch(self):
+        """ Test the comparison with the model of each parameter set """
+        resolution = QENSmodels.Resolution(
+            self.w, [QENSmodels.gaussian(self.w, 1., 0., sigma)
+                     for sigma in (0.03, 0.04, 0.05)])
+        spec = QENSmodels.get_model('EquivalentSitesCircle')
+        params = {'scale': self.rng.uniform(1., 2., (4, 3)),
+                  'center': 0.05,
+                  'Nsites': [2, 3, 3, 5],
+                  'radius': [1., 1.5, 1.5, 2.],
+                  'resTime': 0.8}
+        result = evaluate_batch(spec, self.w, self.q, params, resolution)
+        self.assertEqual(result.shape, (4, 3, self.w.size))
+        for i in range(4):
+            expected = resolution.convolve(spec.evaluate(
+                self.w, self.q, scale=params['scale'][i], center=0.05,
+                Nsites=params['Nsites'][i], radius=params['radius'][i],
+                resTime=0.8), self.w)
+            numpy.testing.assert_array_almost_equal(result[i], expected,
+                                                    decimal=12)
+
+        with self.assertRaises(ValueError):
+            evaluate_batch(spec, self.w, self.q, {'radius': [1., 2.],
+                                                  'resTime': [1., 2., 3.]})
+        with self.assertRaises(ValueError):
+            evaluate_batch(spec, self.w, self.q,
+                           {'radius': numpy.ones((2, 3))})
+
+    def test_bootstrap(self):
+        """ Test the bootstrap uncertainties against those of the fit """
+        data = QENSmodels.sqwJumpTranslationalDiffusion(
+            self.w, self.q, 2., 0., 0.3, 1.2)
+        data = data + self.rng.normal(0., 0.005, data.shape)
+        error = numpy.full(data.shape, 0.005)
+        result = bootstrap('JumpTranslationalDiffusion', self.w, self.q,
+                           data, error, p0={'D': 0.1, 'resTime': 0.5},
+                           n_samples=40, rng=1)
+        self.assertEqual(result.samples['D'].shape, (40,))
+        self.assertEqual(result.samples['scale'].shape, (40, 3))
+        for name in ('D', 'resTime'):
+            self.assertGreater(result.stderr[name],
+                               0.5 * result.fit.stderr[name])
+            self.assertLess(result.stderr[name], 2. * result.fit.stderr[name])
+
+        serial = bootstrap('JumpTranslationalDiffusion', self.w, self.q,
+                           data, error, p0={'D': 0.1, 'resTime': 0.5},
+                           n_samples=4, rng=1, workers=1)
+        numpy.testing.assert_allclose(serial.samples['D'],
+                                      result.samples['D'][:4])
+
+    def test_posterior_predictive(self):
+        """ Test that the check rejects a wrong model """
+        data = QENSmodels.sqwDeltaLorentz(self.w, self.q, 2., 0., 0.3, 0.2)
+        data = data + self.rng.normal(0., 0.01, data.shape)
+        error = numpy.full(data.shape, 0.01)
+        check = posterior_predictive(
+            'DeltaLorentz', self.w, self.q,
+            {'scale': 2., 'A0': 0.3, 'hwhm': [0.2] * 20}, data, error,
+            rng=1)
+        self.assertEqual(check.bands.shape, (3,) + data.shape)
+        self.assertGreater(check.p_value, 0.05)
+        self.assertTrue(numpy.all(check.bands[0] < check.bands[2]))
+
+        check = posterior_predictive(
+            'DeltaLorentz', self.w, self.q,
+            {'scale': 2., 'A0': 0.3, 'hwhm': [0.3] * 20}, data, error,
+            rng=1)
+        self.assertEqual(check.p_value, 0.)
+
+
+if __name__ == '__main__':
+    unittest.main()
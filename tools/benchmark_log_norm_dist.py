@@ -0,0 +1,57 @@
+"""
+Accuracy and cost of the representations of the log-normal distribution of
+widths of `sqwJumpSitesLogNormDist`: the 21 equally spaced points used by
+default (`Nnodes=0`) and Gauss-Hermite quadratures of increasing order.
+
+The error is the maximum absolute difference with a quadrature of order 101,
+relative to the maximum of the quasielastic part of the model, for several
+widths `sigma` of the distribution.
+
+Usage::
+
+    python tools/benchmark_log_norm_dist.py
+"""
+import timeit
+
+import numpy as np
+
+import QENSmodels
+
+W = np.linspace(-5., 5., 2001)
+Q = np.linspace(0.3, 2., 10)
+NSITES, RADIUS, RES_TIME = 3, 1., 1.
+REFERENCE_NODES = 101
+
+
+def quasielastic(sigma: float, Nnodes: int) -> np.ndarray:
+    """ Model without its elastic line """
+    hwhm, eisf, qisf = QENSmodels.componentsJumpSitesLogNormDist(
+        Q, NSITES, RADIUS, RES_TIME, sigma, Nnodes)
+    return QENSmodels.assemble(W, hwhm, np.zeros_like(eisf), qisf)
+
+
+def main():
+    orders = (0, 3, 5, 7, 9)
+    print('relative error of the quasielastic part')
+    print('{:>8}'.format('sigma')
+          + ''.join('{:>10}'.format('Nnodes=' + str(n)) for n in orders))
+    for sigma in (0.3, 0.6, 1., 1.5):
+        reference = quasielastic(sigma, REFERENCE_NODES)
+        errors = [np.abs(quasielastic(sigma, n) - reference).max()
+                  / reference.max() for n in orders]
+        print('{:>8}'.format(sigma)
+              + ''.join('{:>10.1e}'.format(item) for item in errors))
+
+    print()
+    print('time per call of sqwJumpSitesLogNormDist ({} q, {} w)'.format(
+        Q.size, W.size))
+    for n in orders:
+        timer = timeit.Timer(lambda: QENSmodels.sqwJumpSitesLogNormDist(
+            W, Q, 1., 0., NSITES, RADIUS, RES_TIME, 1., n))
+        number, _ = timer.autorange()
+        best = min(timer.repeat(3, number)) / number
+        print('{:>18}: {:8.2f} ms'.format('Nnodes=' + str(n), 1e3 * best))
+
+
+if __name__ == '__main__':
+    main()
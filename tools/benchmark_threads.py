@@ -0,0 +1,61 @@
+"""
+Scaling of the evaluation of a model with the number of threads computing
+blocks of q at once, see `QENSmodels.set_num_threads`.
+
+The model is `sqwJumpSitesLogNormDist`, whose many Lorentzians make the
+assembly dominate the cost, on grids of increasing sizes. The speedup is
+relative to a single thread, and the efficiency is the speedup divided by
+the number of threads.
+
+Usage::
+
+    python tools/benchmark_threads.py [maximum number of threads]
+
+The maximum number of threads defaults to 32.
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+
+import QENSmodels
+
+GRIDS = ((64, 2001), (256, 4001), (1024, 4001))
+NSITES, RADIUS, RES_TIME, SIGMA = 3, 1., 1., 1.
+
+
+def best_time(w: np.ndarray, q: np.ndarray) -> float:
+    """ Best time of a call of the model, in seconds """
+    timer = timeit.Timer(lambda: QENSmodels.sqwJumpSitesLogNormDist(
+        w, q, 1., 0., NSITES, RADIUS, RES_TIME, SIGMA))
+    number, _ = timer.autorange()
+    return min(timer.repeat(3, number)) / number
+
+
+def main(max_threads: int = 32):
+    counts = [n for n in (1, 2, 4, 8, 16, 32) if n <= max_threads]
+    print('{} processors available'.format(os.cpu_count()))
+    previous = QENSmodels.get_num_threads()
+    try:
+        for n_q, n_w in GRIDS:
+            q = np.linspace(0.1, 2., n_q)
+            w = np.linspace(-10., 10., n_w)
+            print()
+            print('{} q, {} w'.format(n_q, n_w))
+            print('{:>8}{:>12}{:>10}{:>12}'.format(
+                'threads', 'time (ms)', 'speedup', 'efficiency'))
+            reference = None
+            for n in counts:
+                QENSmodels.set_num_threads(n)
+                elapsed = best_time(w, q)
+                reference = reference or elapsed
+                print('{:>8}{:>12.2f}{:>10.2f}{:>12.2f}'.format(
+                    n, 1e3 * elapsed, reference / elapsed,
+                    reference / elapsed / n))
+    finally:
+        QENSmodels.set_num_threads(previous)
+
+
+if __name__ == '__main__':
+    main(*[int(item) for item in sys.argv[1:2]])
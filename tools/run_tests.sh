@@ -7,19 +7,33 @@ cd $SCRIPT_DIR
 cd $TESTS_DIR
 
 ## TO RUN UNITTEST
+python -m unittest -v test_adapters
+python -m unittest -v test_assemble
 python -m unittest -v test_background_polynomials
 python -m unittest -v test_brownian_translational_diffusion
 python -m unittest -v test_chudley_elliott_diffusion
+python -m unittest -v test_composite
+python -m unittest -v test_corrections
 python -m unittest -v test_delta
 python -m unittest -v test_delta_lorentz
 python -m unittest -v test_delta_two_lorentz
 python -m unittest -v test_equivalent_sites_circle
+python -m unittest -v test_estimators
+python -m unittest -v test_fast
+python -m unittest -v test_fit_cache
+python -m unittest -v test_fitting
+python -m unittest -v test_fourier
 python -m unittest -v test_gaussian
 python -m unittest -v test_gaussian_model_3d
+python -m unittest -v test_interactive
 python -m unittest -v test_isotropic_rotational_diffusion
 python -m unittest -v test_jump_sites_log_norm_dist
 python -m unittest -v test_jump_translational_diffusion
 python -m unittest -v test_lorentzian
+python -m unittest -v test_models
+python -m unittest -v test_resolution
+python -m unittest -v test_selection
+python -m unittest -v test_uncertainty
 python -m unittest -v test_water_teixeira
 
 ## TO RUN DOCTEST